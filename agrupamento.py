@@ -0,0 +1,166 @@
+"""
+Agrupamento de requisições simultâneas (single-flight)
+Quando várias requisições pedem o mesmo produto ao mesmo tempo, só a
+primeira (a "líder") baixa e parseia a página; as outras esperam e
+recebem o mesmo resultado. A chave é o id do produto, então links
+diferentes do mesmo produto também são agrupados.
+
+O agrupamento vale só enquanto o trabalho está em andamento: quem chega
+depois que ele terminou segue o fluxo normal (cache, banco, download).
+Cada processo tem os seus agrupadores.
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+AGRUPAR_REQUISICOES = os.getenv("AGRUPAR_REQUISICOES", "true").lower() == "true"
+
+
+class _Contadores:
+    """Líderes (trabalhos executados) e requisições que pegaram carona num trabalho em andamento"""
+
+    def __init__(self):
+        self.lideres = 0
+        self.agrupadas = 0
+
+    def como_dict(self, em_andamento: int) -> Dict:
+        return {
+            "ativo": AGRUPAR_REQUISICOES,
+            "em_andamento": em_andamento,
+            "lideres": self.lideres,
+            "agrupadas": self.agrupadas
+        }
+
+
+class AgrupadorRequisicoes:
+    """
+    Single-flight para código síncrono (threads).
+
+    `executar(chave, fn, ...)` roda `fn` uma vez por chave em andamento; as
+    threads que chegam com a mesma chave esperam e recebem o mesmo resultado
+    (ou a mesma exceção).
+    """
+
+    def __init__(self):
+        self._voos = {}  # chave -> Future do trabalho em andamento
+        self._lock = threading.Lock()
+        self._contadores = _Contadores()
+
+    def executar(self, chave: Hashable, fn: Callable, *args, **kwargs) -> Tuple[Any, bool]:
+        """
+        Returns:
+            Tupla (resultado, agrupada). `agrupada` é True quando o resultado
+            veio do trabalho de outra requisição (o objeto é compartilhado:
+            copie antes de alterar).
+        """
+        if not AGRUPAR_REQUISICOES or chave is None:
+            return fn(*args, **kwargs), False
+
+        with self._lock:
+            futuro = self._voos.get(chave)
+            lider = futuro is None
+            if lider:
+                futuro = Future()
+                self._voos[chave] = futuro
+                self._contadores.lideres += 1
+            else:
+                self._contadores.agrupadas += 1
+
+        if not lider:
+            return futuro.result(), True
+
+        try:
+            resultado = fn(*args, **kwargs)
+        except BaseException as e:
+            futuro.set_exception(e)
+            raise
+        else:
+            futuro.set_result(resultado)
+            return resultado, False
+        finally:
+            with self._lock:
+                del self._voos[chave]
+
+    def estatisticas(self) -> Dict:
+        with self._lock:
+            return self._contadores.como_dict(len(self._voos))
+
+
+class AgrupadorRequisicoesAsync:
+    """
+    Single-flight para corrotinas.
+
+    O trabalho roda numa Task compartilhada: se a requisição líder for
+    cancelada (cliente desconectou), as outras continuam esperando o mesmo
+    trabalho, que não é interrompido.
+    """
+
+    def __init__(self):
+        self._voos = {}  # chave -> Task do trabalho em andamento
+        self._contadores = _Contadores()
+
+    async def executar(self, chave: Hashable, fabrica: Callable[[], Awaitable]) -> Tuple[Any, bool]:
+        """
+        Args:
+            fabrica: Função sem argumentos que cria a corrotina (só é chamada pela líder)
+
+        Returns:
+            Tupla (resultado, agrupada), como em `AgrupadorRequisicoes.executar`
+        """
+        if not AGRUPAR_REQUISICOES or chave is None:
+            return await fabrica(), False
+
+        tarefa = self._voos.get(chave)
+        agrupada = tarefa is not None
+        if agrupada:
+            self._contadores.agrupadas += 1
+        else:
+            tarefa = asyncio.ensure_future(fabrica())
+            self._voos[chave] = tarefa
+            self._contadores.lideres += 1
+            tarefa.add_done_callback(lambda _, chave=chave: self._voos.pop(chave, None))
+
+        # shield: cancelar quem espera não cancela o trabalho compartilhado
+        return await asyncio.shield(tarefa), agrupada
+
+    def estatisticas(self) -> Dict:
+        return self._contadores.como_dict(len(self._voos))
+
+
+_agrupadores = {}
+_agrupadores_pid = None
+_agrupadores_lock = threading.Lock()
+
+
+def obter_agrupador(nome: str, assincrono: bool = False):
+    """
+    Retorna o agrupador `nome` do processo, criando-o na primeira chamada.
+
+    Trabalhos diferentes sobre o mesmo produto (download e screenshots, por
+    exemplo) usam agrupadores com nomes diferentes.
+    """
+    global _agrupadores, _agrupadores_pid
+
+    pid = os.getpid()
+    with _agrupadores_lock:
+        if _agrupadores_pid != pid:
+            _agrupadores = {}
+            _agrupadores_pid = pid
+        chave = (nome, assincrono)
+        if chave not in _agrupadores:
+            _agrupadores[chave] = AgrupadorRequisicoesAsync() if assincrono else AgrupadorRequisicoes()
+        return _agrupadores[chave]
+
+
+def estatisticas_agrupamento() -> Dict:
+    """Contadores de todos os agrupadores do processo (usado em /status)"""
+    with _agrupadores_lock:
+        agrupadores = dict(_agrupadores) if _agrupadores_pid == os.getpid() else {}
+    return {
+        (f"{nome}_async" if assincrono else nome): agrupador.estatisticas()
+        for (nome, assincrono), agrupador in agrupadores.items()
+    }
@@ -1,13 +1,34 @@
-from fastapi import FastAPI, HTTPException, Header, BackgroundTasks
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import FastAPI, HTTPException, Header, Query
+from fastapi.responses import FileResponse, JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
+import asyncio
 import os
 import json
 import shutil
 from datetime import datetime
+from typing import List, Optional
 from pydantic import BaseModel
 from dotenv import load_dotenv
-from scraping_mercado_livre_v2 import scrape_mercado_livre
+from scraping_mercado_livre_v2 import normalizar_campos, scrape_mercado_livre_async, scrape_em_lote_async
+from sessao_http import fechar_cliente_async
+from pool_execucao import PoolExecucao, LimitadorAsync, PoolSaturado
+from cache_produtos import obter_cache
+from agrupamento import estatisticas_agrupamento
+from controle_taxa import EsperaTaxaEsgotada, obter_controle_taxa
+from resiliencia_http import estatisticas_resiliencia
+from metricas import TIPO_CONTEUDO, exportar_metricas
+from urls_mercado_livre import eh_url_mercado_livre
+from banco_produtos import BANCO_ATIVO, obter_banco
+from armazem_screenshots import SCREENSHOTS_DIR, nome_valido, obter_armazem, tipo_midia
+from navegadores import NAVEGADORES_AQUECER, obter_pool_navegadores
+from trabalhos_screenshots import (
+    SCREENSHOTS_ASSINCRONOS,
+    FilaTrabalhosCheia,
+    WebhookInvalido,
+    obter_fila_trabalhos,
+    resumo_trabalho,
+    validar_webhook_url
+)
 import logging
 
 # Carregar variáveis de ambiente
@@ -30,16 +51,71 @@ API_TOKEN = "6eOvzj_mCgrI83_7SqU-_JdGCMZk3Q9WjIw1A7e9ZPs"
 # API_TOKEN = os.getenv("API_TOKEN", "seu_token_secreto_aqui")
 logger.info(f"API_TOKEN configurado manualmente")
 
+# Limites do scraping em lote
+MAX_URLS_LOTE = int(os.getenv("MAX_URLS_LOTE", 500))
+MAX_CONCORRENCIA_LOTE = int(os.getenv("MAX_CONCORRENCIA_LOTE", 10))
+
+# Controle de carga: scrapes simultâneos, fila de espera e pool para parsing/Selenium
+MAX_SCRAPES_SIMULTANEOS = int(os.getenv("MAX_SCRAPES_SIMULTANEOS", 8))
+MAX_FILA_SCRAPES = int(os.getenv("MAX_FILA_SCRAPES", 32))
+SCRAPER_WORKERS = int(os.getenv("SCRAPER_WORKERS", 4))
+SCRAPER_POOL_TIPO = os.getenv("SCRAPER_POOL_TIPO", "thread")  # thread | process
+
+limitador_scrapes = LimitadorAsync(
+    max_concorrencia=MAX_SCRAPES_SIMULTANEOS,
+    max_fila=MAX_FILA_SCRAPES
+)
+# Cada scrape ativo (ou item de lote) ocupa no máximo uma vaga do pool por vez,
+# então a fila comporta todos os scrapes admitidos pelo limitador
+pool_scraper = PoolExecucao(
+    max_workers=SCRAPER_WORKERS,
+    max_fila=MAX_SCRAPES_SIMULTANEOS * MAX_CONCORRENCIA_LOTE,
+    tipo=SCRAPER_POOL_TIPO
+)
+
 # Modelo de requisição
 class ScrapeRequest(BaseModel):
     url: str
     capturar_screenshots: bool = True
+    force_refresh: bool = False
+    # Screenshots em segundo plano: a resposta traz o id do trabalho (GET /jobs/{id})
+    aguardar_screenshots: bool = not SCREENSHOTS_ASSINCRONOS
+    webhook_url: Optional[str] = None
+    # Só esses campos são extraídos e devolvidos (None = todos)
+    fields: Optional[List[str]] = None
+    # None = debug_logs só na extração completa
+    debug_logs: Optional[bool] = None
 
 
 class ScrapeResponse(BaseModel):
     sucesso: bool
     mensagem: str
     dados: dict = None
+    trabalho: Optional[dict] = None
+    timestamp: str = None
+
+
+class BatchScrapeRequest(BaseModel):
+    urls: List[str]
+    capturar_screenshots: bool = False
+    max_concorrencia: int = 5
+    force_refresh: bool = False
+
+
+class BatchScrapeResultado(BaseModel):
+    url: str
+    sucesso: bool
+    dados: Optional[dict] = None
+    erro: Optional[str] = None
+
+
+class BatchScrapeResponse(BaseModel):
+    sucesso: bool
+    mensagem: str
+    total: int
+    sucessos: int
+    falhas: int
+    resultados: List[BatchScrapeResultado] = []
     timestamp: str = None
 
 
@@ -60,25 +136,14 @@ def verificar_token(authorization: str = Header(None)):
     return token
 
 
-def limpar_screenshots_antigos(dias=7):
-    """Remove screenshots com mais de X dias"""
-    try:
-        screenshots_dir = "screenshots"
-        if os.path.exists(screenshots_dir):
-            agora = datetime.now().timestamp()
-            for arquivo in os.listdir(screenshots_dir):
-                caminho_arquivo = os.path.join(screenshots_dir, arquivo)
-                tempo_arquivo = os.path.getmtime(caminho_arquivo)
-                idade_dias = (agora - tempo_arquivo) / (24 * 3600)
-                
-                if idade_dias > dias:
-                    try:
-                        os.remove(caminho_arquivo)
-                        logger.info(f"Screenshot antigo removido: {arquivo}")
-                    except Exception as e:
-                        logger.error(f"Erro ao remover screenshot: {e}")
-    except Exception as e:
-        logger.error(f"Erro ao limpar screenshots antigos: {e}")
+def erro_servidor_ocupado(e: PoolSaturado) -> HTTPException:
+    """Converte PoolSaturado em 429 com Retry-After"""
+    logger.warning(f"Requisição recusada por excesso de carga (retry after {e.retry_after}s)")
+    return HTTPException(
+        status_code=429,
+        detail="Servidor ocupado: fila de scraping cheia, tente novamente mais tarde",
+        headers={"Retry-After": str(e.retry_after)}
+    )
 
 
 @app.on_event("startup")
@@ -86,6 +151,21 @@ async def startup_event():
     """Executado ao iniciar a API"""
     logger.info("API iniciada com sucesso")
     logger.info(f"Token de autenticação configurado: {bool(API_TOKEN)}")
+    # Faxina periódica dos screenshots (idade e espaço total), no lugar de uma varredura por requisição
+    obter_armazem().iniciar_limpeza()
+    if NAVEGADORES_AQUECER:
+        # Navegadores abertos em segundo plano: a primeira captura já encontra um pronto
+        obter_pool_navegadores().aquecer()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Executado ao encerrar a API"""
+    await fechar_cliente_async()
+    pool_scraper.shutdown(wait=False)
+    obter_fila_trabalhos().encerrar()
+    obter_pool_navegadores().encerrar()
+    obter_armazem().parar_limpeza()
 
 
 @app.get("/", tags=["Info"])
@@ -97,7 +177,10 @@ async def root():
         "descricao": "API para scraping de produtos do Mercado Livre",
         "endpoints": {
             "POST /scrape": "Realizar scraping de um produto",
+            "POST /scrape/batch": "Realizar scraping de vários produtos em paralelo",
             "GET /status": "Verificar status da API",
+            "GET /metrics": "Métricas no formato do Prometheus",
+            "GET /jobs/{id}": "Consultar um trabalho de screenshots",
             "GET /screenshot/{filename}": "Baixar um screenshot capturado"
         },
         "autenticacao": "Use header: Authorization: Bearer <seu_token>"
@@ -107,23 +190,35 @@ async def root():
 @app.get("/status", tags=["Info"])
 async def status():
     """Verifica status da API"""
-    screenshots_count = 0
-    screenshots_dir = "screenshots"
-    if os.path.exists(screenshots_dir):
-        screenshots_count = len(os.listdir(screenshots_dir))
+    screenshots = obter_armazem().estatisticas()
     
     return {
         "online": True,
         "status": "online",
         "timestamp": datetime.now().isoformat(),
-        "screenshots_armazenados": screenshots_count
+        "screenshots_armazenados": screenshots["arquivos"],
+        "screenshots": screenshots,
+        "fila_scraping": limitador_scrapes.estatisticas(),
+        "pool_execucao": pool_scraper.estatisticas(),
+        "navegadores": obter_pool_navegadores().estatisticas(),
+        "trabalhos_screenshots": obter_fila_trabalhos().estatisticas(),
+        "agrupamento": estatisticas_agrupamento(),
+        "controle_taxa": obter_controle_taxa().estatisticas(),
+        "resiliencia": estatisticas_resiliencia(),
+        "cache": obter_cache().estatisticas(),
+        "banco": obter_banco().estatisticas() if BANCO_ATIVO else {"ativo": False}
     }
 
 
+@app.get("/metrics", tags=["Info"])
+async def metricas():
+    """Histogramas por etapa do scraping e contadores, no formato de texto do Prometheus"""
+    return Response(content=exportar_metricas(), headers={"Content-Type": TIPO_CONTEUDO})
+
+
 @app.post("/scrape", tags=["Scraping"], response_model=ScrapeResponse)
 async def scrape_produto(
     request: ScrapeRequest,
-    background_tasks: BackgroundTasks,
     authorization: str = Header(None)
 ):
     """
@@ -138,9 +233,20 @@ async def scrape_produto(
     
     {
         "url": "https://www.mercadolivre.com.br/produto/...",
-        "capturar_screenshots": true
+        "capturar_screenshots": true,
+        "force_refresh": false,
+        "webhook_url": "https://meu-n8n/webhook/screenshots",
+        "fields": ["titulo", "caracteristicas"]
     }
     ```
+    
+    Com `fields`, só os extratores desses campos rodam e `dados` traz apenas
+    eles (debug_logs só com `debug_logs: true`).
+    
+    Com screenshots, a resposta volta assim que os campos de texto ficam
+    prontos e traz `trabalho` (id e URL de GET /jobs/{id}); a captura segue
+    em segundo plano e o resultado também é enviado por POST ao `webhook_url`,
+    se informado. Com `aguardar_screenshots: true` a resposta espera as capturas.
     """
     try:
         # Verificar token
@@ -150,38 +256,61 @@ async def scrape_produto(
         if not request.url:
             raise HTTPException(status_code=400, detail="URL não fornecida")
         
-        if "mercadolivre.com.br" not in request.url:
+        if not eh_url_mercado_livre(request.url):
             raise HTTPException(
                 status_code=400,
-                detail="URL deve ser de um produto do Mercado Livre"
+                detail="URL deve ser do Mercado Livre"
             )
         
+        if request.webhook_url:
+            try:
+                # A resolução do host é bloqueante: fora do event loop
+                await asyncio.to_thread(validar_webhook_url, request.webhook_url)
+            except WebhookInvalido as e:
+                raise HTTPException(status_code=400, detail=str(e))
+        
+        try:
+            campos = normalizar_campos(request.fields)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
         logger.info(f"Iniciando scraping de: {request.url}")
         
-        # Executar scraping
+        # Screenshots em segundo plano: os campos de texto não esperam o navegador
+        screenshots_em_trabalho = request.capturar_screenshots and not request.aguardar_screenshots
+        
+        # Executar scraping (assíncrono: não bloqueia outras requisições)
         try:
-            dados = scrape_mercado_livre(
-                url=request.url,
-                capturar_screenshots=request.capturar_screenshots
-            )
+            async with limitador_scrapes.vaga():
+                dados = await scrape_mercado_livre_async(
+                    url=request.url,
+                    capturar_screenshots=request.capturar_screenshots and not screenshots_em_trabalho,
+                    executor=pool_scraper,
+                    force_refresh=request.force_refresh,
+                    campos=campos,
+                    debug_logs=request.debug_logs
+                )
+        except PoolSaturado as e:
+            raise erro_servidor_ocupado(e)
+        except EsperaTaxaEsgotada as e:
+            logger.warning(f"Controle de taxa sem vaga para o host: {e}")
+            raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
         except TypeError as te:
-            logger.error(f"Erro de tipo ao chamar scrape_mercado_livre: {str(te)}")
+            logger.error(f"Erro de tipo ao chamar scrape_mercado_livre_async: {str(te)}")
             return ScrapeResponse(
                 sucesso=False,
                 mensagem=f"Erro ao chamar função de scraping: {str(te)}",
                 timestamp=datetime.now().isoformat()
             )
         
-        # Converter caminhos de screenshots para URLs acessíveis
-        if dados["screenshots"]:
-            for tipo, caminho in dados["screenshots"].items():
-                if caminho and os.path.exists(caminho):
-                    # Convertendo caminho para URL
-                    nome_arquivo = os.path.basename(caminho)
-                    dados["screenshots"][tipo] = f"/screenshot/{nome_arquivo}"
-        
-        # Agendar limpeza de screenshots antigos em background
-        background_tasks.add_task(limpar_screenshots_antigos)
+        trabalho = None
+        if screenshots_em_trabalho:
+            try:
+                trabalho = obter_fila_trabalhos().enviar(request.url, webhook_url=request.webhook_url)
+            except FilaTrabalhosCheia as e:
+                raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
+            trabalho = {"id": trabalho["id"], "status": trabalho["status"], "url": f"/jobs/{trabalho['id']}"}
+            logger.info(f"Screenshots agendados no trabalho {trabalho['id']}")
         
         logger.info("Scraping concluído com sucesso")
         
@@ -189,6 +318,7 @@ async def scrape_produto(
             sucesso=True,
             mensagem="Scraping realizado com sucesso",
             dados=dados,
+            trabalho=trabalho,
             timestamp=datetime.now().isoformat()
         )
     
@@ -203,6 +333,117 @@ async def scrape_produto(
         )
 
 
+@app.post("/scrape/batch", tags=["Scraping"], response_model=BatchScrapeResponse)
+async def scrape_lote(
+    request: BatchScrapeRequest,
+    authorization: str = Header(None)
+):
+    """
+    Realiza scraping de vários produtos do Mercado Livre em uma única chamada
+    
+    As URLs são processadas em paralelo (até `max_concorrencia` ao mesmo tempo)
+    e cada uma tem seu próprio resultado ou erro na resposta.
+    
+    Exemplo:
+    ```
+    POST /scrape/batch
+    Authorization: Bearer seu_token_aqui
+    
+    {
+        "urls": ["https://www.mercadolivre.com.br/...", "https://www.mercadolivre.com.br/..."],
+        "capturar_screenshots": false,
+        "max_concorrencia": 5
+    }
+    ```
+    """
+    # Verificar token
+    verificar_token(authorization)
+    
+    if not request.urls:
+        raise HTTPException(status_code=400, detail="Lista de URLs não fornecida")
+    
+    if len(request.urls) > MAX_URLS_LOTE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Máximo de {MAX_URLS_LOTE} URLs por lote"
+        )
+    
+    max_concorrencia = max(1, min(request.max_concorrencia, MAX_CONCORRENCIA_LOTE))
+    
+    # Separar URLs inválidas sem gastar requisições com elas
+    resultados = [None] * len(request.urls)
+    indices_validos = []
+    for i, url in enumerate(request.urls):
+        if not url or not eh_url_mercado_livre(url):
+            resultados[i] = BatchScrapeResultado(
+                url=url or "",
+                sucesso=False,
+                erro="URL deve ser do Mercado Livre"
+            )
+        else:
+            indices_validos.append(i)
+    
+    logger.info(f"Iniciando scraping em lote: {len(indices_validos)} URLs, concorrência {max_concorrencia}")
+    
+    try:
+        # O lote inteiro ocupa uma vaga; os itens dividem o pool de execução
+        async with limitador_scrapes.vaga():
+            resultados_lote = await scrape_em_lote_async(
+                [request.urls[i] for i in indices_validos],
+                capturar_screenshots=request.capturar_screenshots,
+                max_concorrencia=max_concorrencia,
+                executor=pool_scraper,
+                force_refresh=request.force_refresh
+            )
+    except PoolSaturado as e:
+        raise erro_servidor_ocupado(e)
+    except Exception as e:
+        logger.error(f"Erro durante scraping em lote: {str(e)}")
+        return BatchScrapeResponse(
+            sucesso=False,
+            mensagem=f"Erro durante scraping em lote: {str(e)}",
+            total=len(request.urls),
+            sucessos=0,
+            falhas=len(request.urls),
+            timestamp=datetime.now().isoformat()
+        )
+    
+    for i, resultado in zip(indices_validos, resultados_lote):
+        resultados[i] = BatchScrapeResultado(**resultado)
+    
+    sucessos = sum(1 for r in resultados if r.sucesso)
+    logger.info(f"Scraping em lote concluído: {sucessos}/{len(resultados)} com sucesso")
+    
+    return BatchScrapeResponse(
+        sucesso=sucessos > 0,
+        mensagem=f"Scraping em lote concluído: {sucessos} de {len(resultados)} com sucesso",
+        total=len(resultados),
+        sucessos=sucessos,
+        falhas=len(resultados) - sucessos,
+        resultados=resultados,
+        timestamp=datetime.now().isoformat()
+    )
+
+
+@app.get("/jobs/{trabalho_id}", tags=["Scraping"])
+async def consultar_trabalho(
+    trabalho_id: str,
+    authorization: str = Header(None)
+):
+    """
+    Consulta um trabalho de screenshots criado pelo /scrape
+    
+    Status: pendente, executando, concluido ou erro. Trabalhos concluídos
+    ficam disponíveis por TRABALHOS_TTL_SEGUNDOS.
+    """
+    verificar_token(authorization)
+    
+    trabalho = obter_fila_trabalhos().consultar(trabalho_id)
+    if trabalho is None:
+        raise HTTPException(status_code=404, detail="Trabalho não encontrado ou expirado")
+    return resumo_trabalho(trabalho)
+
+
 @app.get("/screenshot/{filename}", tags=["Recursos"])
 async def download_screenshot(
     filename: str,
@@ -218,20 +459,23 @@ async def download_screenshot(
         verificar_token(authorization)
         
         # Validar nome do arquivo (segurança)
-        if "/" in filename or "\\" in filename or ".." in filename:
+        if not nome_valido(filename):
             raise HTTPException(status_code=400, detail="Nome de arquivo inválido")
         
-        caminho_arquivo = os.path.join("screenshots", filename)
+        caminho_arquivo = os.path.join(SCREENSHOTS_DIR, filename)
         
-        if not os.path.exists(caminho_arquivo):
+        # Consulta o índice e conta o acesso (a faxina remove primeiro os menos acessados)
+        if not obter_armazem().registrar_acesso(filename):
             raise HTTPException(status_code=404, detail="Screenshot não encontrado")
         
         logger.info(f"Screenshot baixado: {filename}")
         
+        # Nome = hash do conteúdo: o arquivo nunca muda e pode ficar em cache no cliente
         return FileResponse(
             path=caminho_arquivo,
-            media_type="image/png",
-            filename=filename
+            media_type=tipo_midia(filename),
+            filename=filename,
+            headers={"Cache-Control": "private, max-age=31536000, immutable"}
         )
     
     except HTTPException:
@@ -242,34 +486,27 @@ async def download_screenshot(
 
 
 @app.get("/screenshots/list", tags=["Recursos"])
-async def listar_screenshots(authorization: str = Header(None)):
+async def listar_screenshots(
+    pagina: int = Query(1, ge=1),
+    por_pagina: int = Query(100, ge=1, le=1000),
+    authorization: str = Header(None)
+):
     """
-    Lista todos os screenshots disponíveis
+    Lista os screenshots disponíveis, do acesso mais recente ao mais antigo
     
-    Requer autenticação via token
+    Paginado (`pagina`, `por_pagina`); a listagem vem do índice em memória,
+    sem varrer o diretório. Requer autenticação via token
     """
     try:
         # Verificar token
         verificar_token(authorization)
         
-        screenshots_dir = "screenshots"
-        screenshots = []
-        
-        if os.path.exists(screenshots_dir):
-            for arquivo in os.listdir(screenshots_dir):
-                caminho_completo = os.path.join(screenshots_dir, arquivo)
-                tamanho = os.path.getsize(caminho_completo)
-                tempo_modificacao = os.path.getmtime(caminho_completo)
-                
-                screenshots.append({
-                    "nome": arquivo,
-                    "tamanho_bytes": tamanho,
-                    "url": f"/screenshot/{arquivo}",
-                    "data_criacao": datetime.fromtimestamp(tempo_modificacao).isoformat()
-                })
+        total, screenshots = obter_armazem().listar(pagina, por_pagina)
         
         return {
-            "total": len(screenshots),
+            "total": total,
+            "pagina": pagina,
+            "por_pagina": por_pagina,
             "screenshots": screenshots
         }
     
@@ -282,8 +519,8 @@ async def listar_screenshots(authorization: str = Header(None)):
 
 # Servir arquivos estáticos (screenshots)
 try:
-    if os.path.exists("screenshots"):
-        app.mount("/static", StaticFiles(directory="screenshots"), name="static")
+    if os.path.exists(SCREENSHOTS_DIR):
+        app.mount("/static", StaticFiles(directory=SCREENSHOTS_DIR), name="static")
 except Exception as e:
     logger.warning(f"Não foi possível montar diretório de screenshots: {e}")
 
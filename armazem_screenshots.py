@@ -0,0 +1,343 @@
+"""
+Armazenamento dos screenshots em disco
+Cada captura é gravada comprimida (WebP ou JPEG) no diretório de
+screenshots, com o nome derivado do sha256 do PNG original: capturas
+idênticas ocupam espaço uma vez só. Opcionalmente grava também uma
+miniatura (<hash>_mini.<ext>).
+
+As respostas da API carregam só as URLs (/screenshot/<arquivo>), em vez
+de PNGs inteiros em base64 no JSON.
+
+Um índice em memória (lido do disco uma vez, mantido a cada gravação,
+acesso e remoção) atende /status e a listagem, e uma faxina periódica
+aplica os limites de idade e de espaço total removendo primeiro os
+arquivos acessados há mais tempo (LRU), sem varrer o diretório a cada
+requisição. Só entram no índice os nomes gerados pelo armazém; outros
+arquivos do diretório nunca são servidos nem apagados. Imagem e
+miniatura são uma unidade: o acesso a uma conta para as duas e a
+faxina remove as duas juntas.
+"""
+
+import hashlib
+import io
+import itertools
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from PIL import Image
+    PIL_DISPONIVEL = True
+except ImportError:
+    PIL_DISPONIVEL = False
+
+
+SCREENSHOTS_DIR = os.getenv(
+    "SCREENSHOTS_DIR",
+    "/tmp/screenshots" if os.getenv("VERCEL") else "screenshots"
+)
+SCREENSHOTS_FORMATO = os.getenv("SCREENSHOTS_FORMATO", "webp").lower()  # webp | jpeg | png
+SCREENSHOTS_QUALIDADE = int(os.getenv("SCREENSHOTS_QUALIDADE", 80))
+SCREENSHOTS_MINIATURAS = os.getenv("SCREENSHOTS_MINIATURAS", "true").lower() == "true"
+SCREENSHOTS_MINIATURA_LARGURA = int(os.getenv("SCREENSHOTS_MINIATURA_LARGURA", 320))
+
+# Limites da faxina: arquivos sem acesso há mais de N dias e espaço total (0 = sem limite)
+SCREENSHOTS_MAX_DIAS = float(os.getenv("SCREENSHOTS_MAX_DIAS", 7))
+SCREENSHOTS_MAX_BYTES = int(os.getenv("SCREENSHOTS_MAX_BYTES", 1024 * 1024 * 1024))
+SCREENSHOTS_LIMPEZA_INTERVALO = int(os.getenv("SCREENSHOTS_LIMPEZA_INTERVALO", 300))
+
+URL_SCREENSHOT = "/screenshot/{}"
+SUFIXO_MINIATURA = "_mini"
+
+_EXTENSOES = {"webp": "webp", "jpeg": "jpg", "jpg": "jpg", "png": "png"}
+# Nomes gerados pelo armazém: <sha256[:32]>[_mini].<ext>
+_NOME_ARMAZEM = re.compile(r'^([0-9a-f]{32})(' + SUFIXO_MINIATURA + r')?\.(webp|jpg|png)$')
+_FORMATOS_PIL = {"webp": "WEBP", "jpg": "JPEG", "png": "PNG"}
+TIPOS_MIDIA = {"webp": "image/webp", "jpg": "image/jpeg", "png": "image/png"}
+
+
+class ArmazemScreenshots:
+    """Screenshots endereçados por conteúdo: <diretorio>/<sha256[:32]>.<ext>, com índice em memória"""
+
+    def __init__(
+        self,
+        diretorio: str = SCREENSHOTS_DIR,
+        formato: str = SCREENSHOTS_FORMATO,
+        qualidade: int = SCREENSHOTS_QUALIDADE,
+        miniaturas: bool = SCREENSHOTS_MINIATURAS,
+        largura_miniatura: int = SCREENSHOTS_MINIATURA_LARGURA,
+        max_dias: float = SCREENSHOTS_MAX_DIAS,
+        max_bytes: int = SCREENSHOTS_MAX_BYTES
+    ):
+        if formato not in _EXTENSOES:
+            raise ValueError(f"Formato de screenshot '{formato}' inválido (use webp, jpeg ou png)")
+        # Sem Pillow não há como recomprimir: grava o PNG original e sem miniatura
+        self.extensao = _EXTENSOES[formato] if PIL_DISPONIVEL else "png"
+        self.diretorio = diretorio
+        self.qualidade = qualidade
+        self.gerar_miniaturas = miniaturas and PIL_DISPONIVEL
+        self.largura_miniatura = largura_miniatura
+        self.max_dias = max_dias
+        self.max_bytes = max_bytes
+        # arquivo -> {"tamanho", "criado_em", "acessado_em"}; ordem = do acesso mais antigo ao mais recente
+        self._indice = OrderedDict()
+        self._bytes = 0
+        self._removidos = 0
+        self._lock = threading.Lock()
+        self._parar_limpeza = threading.Event()
+        self._thread_limpeza = None
+        os.makedirs(diretorio, exist_ok=True)
+        self._carregar_indice()
+
+    def guardar(self, png: bytes) -> Dict[str, Optional[str]]:
+        """
+        Grava um screenshot (PNG) no formato configurado.
+
+        Returns:
+            Dict com "arquivo" e "miniatura" (nomes dos arquivos; miniatura None se desativada)
+        """
+        base = hashlib.sha256(png).hexdigest()[:32]
+        arquivo = f"{base}.{self.extensao}"
+        miniatura = f"{base}{SUFIXO_MINIATURA}.{self.extensao}" if self.gerar_miniaturas else None
+
+        # Já gravado (captura idêntica): só conta como acesso
+        if self.registrar_acesso(arquivo) and (miniatura is None or self.registrar_acesso(miniatura)):
+            return {"arquivo": arquivo, "miniatura": miniatura}
+
+        if PIL_DISPONIVEL:
+            imagem = Image.open(io.BytesIO(png))
+            self._gravar(arquivo, self._codificar(imagem))
+            if miniatura:
+                imagem.thumbnail((self.largura_miniatura, self.largura_miniatura * 4))
+                self._gravar(miniatura, self._codificar(imagem))
+        else:
+            self._gravar(arquivo, png)
+        return {"arquivo": arquivo, "miniatura": miniatura}
+
+    def registrar_acesso(self, arquivo: str) -> bool:
+        """
+        Marca o arquivo (e o par imagem/miniatura dele) como usado agora,
+        adiando a remoção pela faxina.
+
+        Returns:
+            False se o arquivo não existe ou não é um nome do armazém
+        """
+        par = _par(arquivo)
+        if par is None:
+            return False
+        agora = time.time()
+        with self._lock:
+            entrada = self._indice.get(arquivo)
+            if entrada is not None:
+                for nome in (par, arquivo):
+                    if nome in self._indice:
+                        self._indice[nome]["acessado_em"] = agora
+                        self._indice.move_to_end(nome)
+                return True
+        # Gravado por outro processo: entra no índice na primeira consulta
+        try:
+            estado = os.stat(self.caminho(arquivo))
+        except OSError:
+            return False
+        self._indexar(arquivo, estado.st_size, estado.st_mtime, agora)
+        return True
+
+    def listar(self, pagina: int = 1, por_pagina: int = 100) -> Tuple[int, List[Dict]]:
+        """
+        Página da listagem, do acesso mais recente ao mais antigo (direto do índice).
+
+        Returns:
+            (total de arquivos, itens da página com nome, tamanho_bytes, url, data_criacao, ultimo_acesso)
+        """
+        inicio = (max(1, pagina) - 1) * por_pagina
+        with self._lock:
+            total = len(self._indice)
+            recentes = reversed(self._indice.items())
+            itens = [(arquivo, dict(entrada)) for arquivo, entrada in itertools.islice(recentes, inicio, inicio + por_pagina)]
+        return total, [
+            {
+                "nome": arquivo,
+                "tamanho_bytes": entrada["tamanho"],
+                "url": URL_SCREENSHOT.format(arquivo),
+                "data_criacao": _iso(entrada["criado_em"]),
+                "ultimo_acesso": _iso(entrada["acessado_em"])
+            }
+            for arquivo, entrada in itens
+        ]
+
+    def remover(self, arquivo: str):
+        """Apaga o arquivo e o par imagem/miniatura dele, do disco e do índice"""
+        par = _par(arquivo)
+        if par is None:
+            return
+        for nome in (arquivo, par):
+            with self._lock:
+                entrada = self._indice.pop(nome, None)
+                if entrada is not None:
+                    self._bytes -= entrada["tamanho"]
+                    self._removidos += 1
+            try:
+                os.remove(self.caminho(nome))
+            except FileNotFoundError:
+                pass
+
+    def limpar(self) -> int:
+        """
+        Aplica os limites: remove os arquivos sem acesso há mais de `max_dias`
+        e, enquanto o total passar de `max_bytes`, os acessados há mais tempo.
+        Imagem e miniatura saem juntas.
+
+        Returns:
+            Quantidade de arquivos removidos
+        """
+        limite_acesso = time.time() - self.max_dias * 86400 if self.max_dias > 0 else None
+        remover = {}  # arquivo -> tamanho, na ordem de remoção
+        with self._lock:
+            total = self._bytes
+            # O índice está em ordem de acesso: basta andar do início até o primeiro que fica
+            for arquivo, entrada in self._indice.items():
+                if arquivo in remover:
+                    continue  # par de um arquivo já marcado
+                expirado = limite_acesso is not None and entrada["acessado_em"] < limite_acesso
+                excedente = self.max_bytes > 0 and total > self.max_bytes
+                if not (expirado or excedente):
+                    break
+                for nome in (arquivo, _par(arquivo)):
+                    if nome in self._indice:
+                        remover[nome] = self._indice[nome]["tamanho"]
+                        total -= remover[nome]
+        for arquivo in remover:
+            self.remover(arquivo)
+        return len(remover)
+
+    def iniciar_limpeza(self, intervalo: int = SCREENSHOTS_LIMPEZA_INTERVALO):
+        """Roda `limpar` a cada `intervalo` segundos numa thread em segundo plano"""
+        if self._thread_limpeza is not None and self._thread_limpeza.is_alive():
+            return
+        self._parar_limpeza.clear()
+
+        def executar():
+            while not self._parar_limpeza.wait(intervalo):
+                try:
+                    removidos = self.limpar()
+                    if removidos:
+                        print(f"[INFO] Faxina de screenshots: {removidos} arquivos removidos")
+                except Exception as e:
+                    print(f"[AVISO] Erro na faxina de screenshots: {e}")
+
+        self._thread_limpeza = threading.Thread(target=executar, name="faxina-screenshots", daemon=True)
+        self._thread_limpeza.start()
+
+    def parar_limpeza(self):
+        self._parar_limpeza.set()
+
+    def estatisticas(self) -> Dict:
+        """Arquivos e bytes em disco segundo o índice (usado em /status)"""
+        with self._lock:
+            return {
+                "diretorio": self.diretorio,
+                "arquivos": len(self._indice),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "max_dias": self.max_dias,
+                "removidos": self._removidos
+            }
+
+    def caminho(self, arquivo: str) -> str:
+        return os.path.join(self.diretorio, arquivo)
+
+    def miniaturas(self, screenshots: Dict[str, str]) -> Dict[str, str]:
+        """URLs das miniaturas dos screenshots (mesmo nome, com o sufixo _mini)"""
+        urls = {}
+        for nome, url in screenshots.items():
+            base, _, extensao = url.rsplit("/", 1)[-1].rpartition(".")
+            miniatura = f"{base}{SUFIXO_MINIATURA}.{extensao}"
+            with self._lock:
+                existe = miniatura in self._indice
+            if existe:
+                urls[nome] = URL_SCREENSHOT.format(miniatura)
+        return urls
+
+    def _codificar(self, imagem) -> bytes:
+        formato = _FORMATOS_PIL[self.extensao]
+        if formato == "JPEG" and imagem.mode != "RGB":
+            imagem = imagem.convert("RGB")
+        saida = io.BytesIO()
+        opcoes = {"quality": self.qualidade} if formato != "PNG" else {"optimize": True}
+        if formato == "WEBP":
+            opcoes["method"] = 4  # equilíbrio entre tamanho e tempo de compressão
+        imagem.save(saida, formato, **opcoes)
+        return saida.getvalue()
+
+    def _gravar(self, arquivo: str, conteudo: bytes):
+        # Arquivo temporário + rename: quem baixa nunca vê imagem pela metade
+        caminho = self.caminho(arquivo)
+        temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporario, "wb") as f:
+            f.write(conteudo)
+        os.replace(temporario, caminho)
+        agora = time.time()
+        self._indexar(arquivo, len(conteudo), agora, agora)
+
+    def _indexar(self, arquivo: str, tamanho: int, criado_em: float, acessado_em: float):
+        with self._lock:
+            anterior = self._indice.pop(arquivo, None)
+            if anterior is not None:
+                self._bytes -= anterior["tamanho"]
+            self._indice[arquivo] = {"tamanho": tamanho, "criado_em": criado_em, "acessado_em": acessado_em}
+            self._bytes += tamanho
+
+    def _carregar_indice(self):
+        """Única varredura do diretório, na criação do armazém (último acesso = data de modificação)"""
+        entradas = []
+        with os.scandir(self.diretorio) as arquivos:
+            for item in arquivos:
+                # Temporários e arquivos que não são do armazém ficam fora do índice (e da faxina)
+                if item.is_file() and _NOME_ARMAZEM.match(item.name):
+                    estado = item.stat()
+                    entradas.append((estado.st_mtime, item.name, estado.st_size))
+        entradas.sort()
+        for mtime, arquivo, tamanho in entradas:
+            self._indexar(arquivo, tamanho, mtime, mtime)
+
+
+def _par(arquivo: str) -> Optional[str]:
+    """O outro arquivo da unidade (miniatura da imagem ou imagem da miniatura); None se o nome não é do armazém"""
+    match = _NOME_ARMAZEM.match(arquivo)
+    if match is None:
+        return None
+    base, mini, extensao = match.groups()
+    return f"{base}.{extensao}" if mini else f"{base}{SUFIXO_MINIATURA}.{extensao}"
+
+
+def _iso(instante: float) -> str:
+    return datetime.fromtimestamp(instante).isoformat()
+
+
+def tipo_midia(arquivo: str) -> str:
+    """Content-Type de um screenshot pelo nome do arquivo"""
+    return TIPOS_MIDIA.get(arquivo.rsplit(".", 1)[-1].lower(), "application/octet-stream")
+
+
+def nome_valido(arquivo: str) -> bool:
+    """Nome simples de arquivo, sem caminho (evita path traversal no download)"""
+    return bool(arquivo) and "/" not in arquivo and "\\" not in arquivo and ".." not in arquivo
+
+
+_armazem = None
+_armazem_lock = threading.Lock()
+
+
+def obter_armazem() -> ArmazemScreenshots:
+    """Retorna o armazém compartilhado do processo, criando-o na primeira chamada"""
+    global _armazem
+
+    if _armazem is None:
+        with _armazem_lock:
+            if _armazem is None:
+                _armazem = ArmazemScreenshots()
+    return _armazem
@@ -0,0 +1,321 @@
+"""
+Arquivo de HTML bruto com modo replay (reprocessamento offline)
+Guarda cada página baixada comprimida (gzip) e endereçada pelo conteúdo
+(sha256), mais um índice JSONL com os metadados de cada download.
+O modo replay roda os extratores sobre as páginas arquivadas sem acessar
+a rede, limitado apenas pela CPU.
+
+Como usar:
+    python arquivo_html.py stats [--dir DIRETORIO]
+    python arquivo_html.py replay --saida resultados.jsonl [--workers 8] [--atualizar-banco] [--dir DIRETORIO]
+
+A chave de cada download é recalculada pela URL (`resolver_url`) na
+leitura do índice: downloads gravados antes das chaves "p:" de catálogo
+caem na chave atual do produto.
+"""
+
+import argparse
+import contextlib
+import gzip
+import hashlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional
+
+from controle_taxa import OK, sinal_da_pagina
+from urls_mercado_livre import resolver_url
+
+
+ARQUIVO_HTML_ATIVO = os.getenv("ARQUIVO_HTML_ATIVO", "false").lower() == "true"
+ARQUIVO_HTML_DIR = os.getenv(
+    "ARQUIVO_HTML_DIR",
+    "/tmp/arquivo_html" if os.getenv("VERCEL") else "arquivo_html"
+)
+ARQUIVO_HTML_NIVEL_COMPRESSAO = int(os.getenv("ARQUIVO_HTML_NIVEL_COMPRESSAO", 6))
+
+
+class ArquivoHTML:
+    """Armazenamento endereçado por conteúdo: objetos/<aa>/<sha256>.html.gz + indice.jsonl"""
+
+    def __init__(self, diretorio: str = ARQUIVO_HTML_DIR, nivel_compressao: int = ARQUIVO_HTML_NIVEL_COMPRESSAO):
+        self.diretorio = diretorio
+        self.nivel_compressao = nivel_compressao
+        self.caminho_indice = os.path.join(diretorio, "indice.jsonl")
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(diretorio, "objetos"), exist_ok=True)
+
+    def _caminho_objeto(self, sha: str) -> str:
+        return os.path.join(self.diretorio, "objetos", sha[:2], f"{sha}.html.gz")
+
+    def guardar(
+        self,
+        conteudo: bytes,
+        url: str,
+        chave: Optional[str] = None,
+        status: int = 200,
+        headers: Optional[Dict] = None
+    ) -> str:
+        """
+        Arquiva o HTML de uma resposta e registra os metadados no índice.
+
+        Páginas idênticas são gravadas uma única vez (mesmo sha256).
+
+        Returns:
+            sha256 do conteúdo
+        """
+        sha = hashlib.sha256(conteudo).hexdigest()
+        caminho = self._caminho_objeto(sha)
+
+        tamanho_comprimido = None
+        if not os.path.exists(caminho):
+            comprimido = gzip.compress(conteudo, compresslevel=self.nivel_compressao)
+            tamanho_comprimido = len(comprimido)
+            os.makedirs(os.path.dirname(caminho), exist_ok=True)
+            # Gravar em arquivo temporário e renomear: leitores nunca veem objeto parcial
+            temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temporario, "wb") as f:
+                f.write(comprimido)
+            os.replace(temporario, caminho)
+
+        headers = headers or {}
+        metadados = {
+            "sha256": sha,
+            "url": url,
+            "chave": chave,
+            "status": status,
+            "content_type": headers.get("content-type"),
+            "etag": headers.get("etag"),
+            "last_modified": headers.get("last-modified"),
+            "buscado_em": time.time(),
+            "bytes": len(conteudo),
+            "bytes_comprimidos": tamanho_comprimido
+        }
+        linha = json.dumps(metadados, ensure_ascii=False) + "\n"
+        with self._lock:
+            with open(self.caminho_indice, "a", encoding="utf-8") as f:
+                f.write(linha)
+        return sha
+
+    def ler(self, sha: str) -> bytes:
+        """Retorna o HTML original (descomprimido) de um objeto arquivado"""
+        with open(self._caminho_objeto(sha), "rb") as f:
+            return gzip.decompress(f.read())
+
+    def listar(self, apenas_mais_recente: bool = True) -> List[Dict]:
+        """
+        Lista os metadados do índice.
+
+        Args:
+            apenas_mais_recente: Se True, retorna só o download mais recente de cada produto (chave ou URL)
+        """
+        if not os.path.exists(self.caminho_indice):
+            return []
+
+        registros = []
+        with open(self.caminho_indice, encoding="utf-8") as f:
+            for linha in f:
+                linha = linha.strip()
+                if linha:
+                    registros.append(json.loads(linha))
+
+        if not apenas_mais_recente:
+            return registros
+
+        por_produto = {}
+        for registro in registros:
+            por_produto[chave_do_registro(registro) or registro["url"]] = registro
+        return list(por_produto.values())
+
+    def estatisticas(self) -> Dict:
+        """Downloads registrados, objetos únicos e espaço ocupado"""
+        registros = self.listar(apenas_mais_recente=False)
+        objetos = 0
+        bytes_disco = 0
+        raiz_objetos = os.path.join(self.diretorio, "objetos")
+        for pasta, _, arquivos in os.walk(raiz_objetos):
+            for nome in arquivos:
+                if nome.endswith(".html.gz"):
+                    objetos += 1
+                    bytes_disco += os.path.getsize(os.path.join(pasta, nome))
+        return {
+            "diretorio": self.diretorio,
+            "downloads": len(registros),
+            "produtos": len({chave_do_registro(r) or r["url"] for r in registros}),
+            "objetos": objetos,
+            "bytes_originais": sum(r["bytes"] for r in registros),
+            "bytes_em_disco": bytes_disco
+        }
+
+
+def chave_do_registro(metadados: Dict) -> Optional[str]:
+    """
+    Chave atual do produto de um download arquivado: recalculada pela URL,
+    ou a gravada no índice quando a URL não é do Mercado Livre (ML_BASE_URL)
+    """
+    produto = resolver_url(metadados["url"])
+    return produto.chave if produto else metadados.get("chave")
+
+
+_arquivo = None
+_arquivo_lock = threading.Lock()
+
+
+def obter_arquivo() -> ArquivoHTML:
+    """Retorna o arquivo compartilhado do processo, criando-o na primeira chamada"""
+    global _arquivo
+
+    if _arquivo is None:
+        with _arquivo_lock:
+            if _arquivo is None:
+                _arquivo = ArquivoHTML()
+    return _arquivo
+
+
+def _reprocessar_objeto(diretorio: str, metadados: Dict) -> Dict:
+    """Worker do replay: lê um objeto arquivado e roda os extratores (sem rede)"""
+    from scraping_mercado_livre_v2 import extrair_dados_html
+
+    inicio = time.perf_counter()
+    try:
+        conteudo = ArquivoHTML(diretorio).ler(metadados["sha256"])
+        logs = []
+        # Os extratores imprimem debug; não misturar com a saída JSONL
+        with contextlib.redirect_stdout(io.StringIO()):
+            dados = extrair_dados_html(conteudo, logs)
+        erro = None
+    except Exception as e:
+        dados = None
+        erro = str(e)
+    return {
+        "url": metadados["url"],
+        "chave": chave_do_registro(metadados),
+        "sha256": metadados["sha256"],
+        "status": metadados.get("status"),
+        "bytes": metadados.get("bytes"),
+        "etag": metadados.get("etag"),
+        "last_modified": metadados.get("last_modified"),
+        "sucesso": erro is None,
+        "dados": dados,
+        "erro": erro,
+        "tempo_ms": round((time.perf_counter() - inicio) * 1000, 2)
+    }
+
+
+def reprocessar(
+    arquivo: Optional[ArquivoHTML] = None,
+    max_workers: Optional[int] = None,
+    apenas_mais_recente: bool = True
+) -> Iterator[Dict]:
+    """
+    Roda os extratores atuais sobre todas as páginas arquivadas, em paralelo.
+
+    Args:
+        arquivo: Arquivo a reprocessar (padrão: o compartilhado)
+        max_workers: Processos usados (padrão: número de CPUs)
+        apenas_mais_recente: Reprocessar só o download mais recente de cada produto
+
+    Yields:
+        Um dict por página: url, chave (recalculada pela URL), sha256, status,
+        bytes, etag, last_modified, sucesso, dados, erro, tempo_ms
+    """
+    arquivo = arquivo or obter_arquivo()
+    registros = arquivo.listar(apenas_mais_recente=apenas_mais_recente)
+    if not registros:
+        return
+
+    diretorios = [arquivo.diretorio] * len(registros)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        # chunksize reduz o custo de IPC quando há milhares de páginas pequenas
+        yield from executor.map(_reprocessar_objeto, diretorios, registros, chunksize=16)
+
+
+def atualizar_banco(banco, resultado: Dict) -> bool:
+    """
+    Grava no banco de produtos os dados reextraídos de uma página arquivada.
+
+    Só páginas saudáveis para o controle de taxa são gravadas: sem título
+    (como em `_guardar_resultado` do scraper), curtas (bloqueio, captcha)
+    ou com status de erro não sobrescrevem um registro bom nem levam o ETag dele.
+
+    Returns:
+        True se o registro foi gravado
+    """
+    if not resultado["sucesso"] or not resultado["chave"]:
+        return False
+    sinal = sinal_da_pagina(resultado["status"] or 200, resultado["url"], resultado["bytes"] or 0, resultado["dados"])
+    if sinal != OK:
+        return False
+    banco.guardar(
+        resultado["chave"],
+        resultado["url"],
+        resultado["dados"],
+        etag=resultado["etag"],
+        last_modified=resultado["last_modified"]
+    )
+    return True
+
+
+def main():
+    """CLI do arquivo: estatísticas e replay"""
+    parser = argparse.ArgumentParser(description="Arquivo de HTML bruto do scraper")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    # Opções comuns aos subcomandos (vêm depois deles: replay --dir X)
+    comuns = argparse.ArgumentParser(add_help=False)
+    comuns.add_argument("--dir", default=ARQUIVO_HTML_DIR, help="Diretório do arquivo")
+
+    subparsers.add_parser("stats", parents=[comuns], help="Mostrar estatísticas do arquivo")
+
+    parser_replay = subparsers.add_parser("replay", parents=[comuns], help="Reprocessar páginas arquivadas sem acessar a rede")
+    parser_replay.add_argument("--saida", metavar="ARQUIVO", help="Gravar resultados em JSONL (padrão: stdout)")
+    parser_replay.add_argument("--workers", type=int, default=None, help="Processos em paralelo (padrão: CPUs)")
+    parser_replay.add_argument("--todos", action="store_true", help="Reprocessar todos os downloads, não só o mais recente de cada produto")
+    parser_replay.add_argument("--atualizar-banco", action="store_true", help="Gravar os dados reextraídos no banco SQLite de produtos")
+    args = parser.parse_args()
+
+    arquivo = ArquivoHTML(args.dir)
+
+    if args.comando == "stats":
+        print(json.dumps(arquivo.estatisticas(), ensure_ascii=False, indent=2))
+        return
+
+    banco = None
+    if args.atualizar_banco:
+        from banco_produtos import obter_banco
+        banco = obter_banco()
+
+    saida = open(args.saida, "w", encoding="utf-8") if args.saida else sys.stdout
+    inicio = time.perf_counter()
+    total = 0
+    falhas = 0
+    ignoradas = 0
+    try:
+        for resultado in reprocessar(arquivo, max_workers=args.workers, apenas_mais_recente=not args.todos):
+            total += 1
+            if not resultado["sucesso"]:
+                falhas += 1
+            elif banco is not None and not atualizar_banco(banco, resultado):
+                ignoradas += 1
+            saida.write(json.dumps(resultado, ensure_ascii=False) + "\n")
+    finally:
+        if saida is not sys.stdout:
+            saida.close()
+
+    duracao = time.perf_counter() - inicio
+    paginas_por_segundo = total / duracao if duracao > 0 else 0.0
+    print(
+        f"[INFO] Replay concluído: {total} páginas ({falhas} falhas) em {duracao:.1f}s "
+        f"({paginas_por_segundo:.1f} páginas/s)",
+        file=sys.stderr
+    )
+    if ignoradas:
+        print(f"[AVISO] {ignoradas} páginas bloqueadas, sem título ou sem chave não foram gravadas no banco", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Armazenamento persistente dos produtos extraídos (SQLite)
+Guarda os dados de cada produto junto com o horário da busca e os
+validadores HTTP da resposta (ETag / Last-Modified), para que novos scrapes
+façam requisições condicionais e pulem o parsing quando a página não mudou (304).
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+from cache_produtos import mesclar_extracao
+
+
+BANCO_ATIVO = os.getenv("BANCO_PRODUTOS_ATIVO", "true").lower() == "true"
+# Na Vercel apenas /tmp é gravável
+BANCO_CAMINHO = os.getenv(
+    "BANCO_PRODUTOS_CAMINHO",
+    "/tmp/produtos.db" if os.getenv("VERCEL") else "produtos.db"
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS produtos (
+    chave TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    dados TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    buscado_em REAL NOT NULL,
+    validado_em REAL NOT NULL
+)
+"""
+
+# Campos persistidos (screenshots e logs são específicos de cada requisição)
+# campos_extraidos só existe em extrações parciais (fields): lista dos campos extraídos
+CAMPOS_BANCO = ("titulo", "bullet_points", "caracteristicas", "cor", "descricao", "fontes", "campos_extraidos")
+
+
+class BancoProdutos:
+    """Tabela SQLite de produtos; uma conexão por thread"""
+
+    def __init__(self, caminho: str = BANCO_CAMINHO):
+        self.caminho = caminho
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.validacoes_304 = 0
+        self.gravacoes = 0
+
+        with self._conexao() as conexao:
+            conexao.execute(_SCHEMA)
+
+    def _conexao(self) -> sqlite3.Connection:
+        conexao = getattr(self._local, "conexao", None)
+        if conexao is None:
+            conexao = sqlite3.connect(self.caminho, timeout=10)
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.execute("PRAGMA synchronous=NORMAL")
+            conexao.row_factory = sqlite3.Row
+            self._local.conexao = conexao
+        return conexao
+
+    def obter(self, chave: str) -> Optional[Dict]:
+        """
+        Retorna o registro salvo de um produto.
+
+        Returns:
+            Dict com dados, url, etag, last_modified, buscado_em e validado_em (ou None)
+        """
+        linha = self._conexao().execute(
+            "SELECT * FROM produtos WHERE chave = ?", (chave,)
+        ).fetchone()
+        if linha is None:
+            return None
+
+        registro = dict(linha)
+        registro["dados"] = json.loads(registro["dados"])
+        return registro
+
+    def guardar(self, chave: str, url: str, dados: Dict, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        """
+        Grava (ou substitui) os dados de um produto com os validadores da resposta.
+
+        Uma extração parcial não substitui um registro completo (que continua
+        valendo para a requisição condicional) e, sobre uma parcial da mesma
+        versão da página (mesmos validadores), soma os campos.
+        """
+        valor = {campo: dados[campo] for campo in CAMPOS_BANCO if campo in dados}
+        agora = time.time()
+        with self._conexao() as conexao:
+            if "campos_extraidos" in valor:
+                # Leitura e gravação na mesma transação: outra thread não grava no meio
+                conexao.execute("BEGIN IMMEDIATE")
+                linha = conexao.execute(
+                    "SELECT dados, etag, last_modified FROM produtos WHERE chave = ?", (chave,)
+                ).fetchone()
+                if linha is not None:
+                    salvo = json.loads(linha["dados"])
+                    if "campos_extraidos" not in salvo:
+                        return
+                    if (linha["etag"], linha["last_modified"]) == (etag, last_modified):
+                        valor = mesclar_extracao(salvo, valor)
+            conexao.execute(
+                """
+                INSERT OR REPLACE INTO produtos (chave, url, dados, etag, last_modified, buscado_em, validado_em)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (chave, url, json.dumps(valor, ensure_ascii=False), etag, last_modified, agora, agora)
+            )
+        with self._lock:
+            self.gravacoes += 1
+
+    def marcar_validado(self, chave: str):
+        """Registra que o servidor confirmou (304) que o produto não mudou"""
+        with self._conexao() as conexao:
+            conexao.execute(
+                "UPDATE produtos SET validado_em = ? WHERE chave = ?",
+                (time.time(), chave)
+            )
+        with self._lock:
+            self.validacoes_304 += 1
+
+    def remover(self, chave: str):
+        """Remove um produto do banco"""
+        with self._conexao() as conexao:
+            conexao.execute("DELETE FROM produtos WHERE chave = ?", (chave,))
+
+    def estatisticas(self) -> Dict:
+        """Quantidade de produtos salvos e contadores (usado em /status)"""
+        total = self._conexao().execute("SELECT COUNT(*) FROM produtos").fetchone()[0]
+        with self._lock:
+            return {
+                "ativo": BANCO_ATIVO,
+                "caminho": self.caminho,
+                "produtos": total,
+                "gravacoes": self.gravacoes,
+                "validacoes_304": self.validacoes_304
+            }
+
+
+def headers_condicionais(registro: Optional[Dict]) -> Dict:
+    """Monta If-None-Match / If-Modified-Since a partir de um registro salvo"""
+    headers = {}
+    if not registro:
+        return headers
+    if registro.get("etag"):
+        headers["If-None-Match"] = registro["etag"]
+    if registro.get("last_modified"):
+        headers["If-Modified-Since"] = registro["last_modified"]
+    return headers
+
+
+_banco = None
+_banco_lock = threading.Lock()
+
+
+def obter_banco() -> BancoProdutos:
+    """Retorna o banco compartilhado do processo, criando-o na primeira chamada"""
+    global _banco
+
+    if _banco is None:
+        with _banco_lock:
+            if _banco is None:
+                _banco = BancoProdutos()
+    return _banco
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Benchmark offline da extração de produtos
+Roda a extração usada pelo scraper (extrair_dados_html, motor de
+EXTRATOR_HTML) sobre as páginas salvas em benchmarks/corpus, sem rede, e
+mede por página:
+
+- tempo total (melhor de N repetições) e páginas/s do corpus
+- tempo de cada campo sozinho (ExtratorPassagemUnica(campos=[campo]))
+- pico de memória Python da extração (tracemalloc)
+
+Os números são comparados com benchmarks/baseline_extracao.json: o
+script termina com código 1 se algum tempo ou pico passar do baseline
+além da tolerância (confirmado numa segunda rodada), ou se os dados
+extraídos de alguma página mudarem.
+Os tempos são comparados relativos a uma carga fixa de calibração medida
+junto de cada repetição, então o baseline vale em máquinas diferentes.
+
+Como usar:
+    python benchmarks/bench_extracao.py
+    python benchmarks/bench_extracao.py --repeticoes 50 --tolerancia 0.3
+    python benchmarks/bench_extracao.py --salvar-baseline
+    python benchmarks/bench_extracao.py --json resultados.json
+"""
+
+import argparse
+import contextlib
+import gc
+import glob
+import hashlib
+import io
+import json
+import os
+import platform
+import re
+import sys
+import time
+import tracemalloc
+from typing import Tuple
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from extrator_html import (  # noqa: E402
+    CAMPOS_PRODUTO,
+    EXTRATOR_HTML,
+    LXML_DISPONIVEL,
+    SELECTOLAX_DISPONIVEL,
+    ExtratorPassagemUnica
+)
+from scraping_mercado_livre_v2 import extrair_dados_html  # noqa: E402
+
+CORPUS_PADRAO = os.path.join(RAIZ, "benchmarks", "corpus")
+BASELINE_PADRAO = os.path.join(RAIZ, "benchmarks", "baseline_extracao.json")
+
+# Folga absoluta no pico de memória: abaixo disso a diferença é ruído
+FOLGA_PICO_KB = 64
+
+
+def _carga_calibracao():
+    """Carga fixa de CPU (regex + JSON), medida junto de cada extração"""
+    json.loads(json.dumps([_PADRAO_CALIBRACAO.findall(_TEXTO_CALIBRACAO), _TEXTO_CALIBRACAO.split(":")]))
+
+
+_TEXTO_CALIBRACAO = " ".join(f"Característica {i}: valor {i * 7}" for i in range(2000))
+_PADRAO_CALIBRACAO = re.compile(r'(\w+) (\d+): valor (\d+)')
+
+
+def medir(funcao, repeticoes: int) -> Tuple[float, float]:
+    """
+    Menor tempo de `funcao` entre `repeticoes` (com debug silenciado e GC desligado).
+
+    Cada repetição é intercalada com a carga de calibração: a razão entre os
+    dois tempos quase não muda com a velocidade ou a carga da máquina, e é
+    ela que vai para a comparação com o baseline.
+
+    Returns:
+        Tupla (milissegundos, tempo relativo à calibração)
+    """
+    tempos, referencias = [], []
+    gc.collect()
+    gc_ativo = gc.isenabled()
+    gc.disable()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(repeticoes):
+                inicio = time.perf_counter()
+                _carga_calibracao()
+                referencias.append(time.perf_counter() - inicio)
+                inicio = time.perf_counter()
+                funcao()
+                tempos.append(time.perf_counter() - inicio)
+    finally:
+        if gc_ativo:
+            gc.enable()
+    return round(min(tempos) * 1000, 3), round(min(tempos) / min(referencias), 4)
+
+
+def medir_pico_kb(funcao) -> float:
+    """Pico de memória alocada pelo Python durante `funcao` (inclui o que o selectolax aloca pelo Python)"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        tracemalloc.start()
+        try:
+            funcao()
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return round(pico / 1024, 1)
+
+
+def assinatura(valor) -> str:
+    """Hash curto de um campo extraído (detecta mudança de resultado sem guardar o conteúdo)"""
+    return hashlib.sha1(json.dumps(valor, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+def executar(corpus: str, repeticoes: int) -> dict:
+    """Roda o benchmark em todas as páginas do corpus"""
+    paginas = sorted(glob.glob(os.path.join(corpus, "*.html")))
+    if not paginas:
+        raise SystemExit(f"Nenhuma página .html encontrada em {corpus}")
+
+    resultados = {}
+    for caminho in paginas:
+        conteudo = open(caminho, "rb").read()
+        with contextlib.redirect_stdout(io.StringIO()):
+            dados = extrair_dados_html(conteudo, [])
+
+        total_ms, total_rel = medir(lambda: extrair_dados_html(conteudo, []), repeticoes)
+        campos = {
+            campo: medir(lambda: ExtratorPassagemUnica(campos=[campo]).processar(conteudo), repeticoes)
+            for campo in CAMPOS_PRODUTO
+        }
+        resultados[os.path.basename(caminho)] = {
+            "kb": round(len(conteudo) / 1024, 1),
+            "total_ms": total_ms,
+            "total_rel": total_rel,
+            "campos_ms": {campo: ms for campo, (ms, _) in campos.items()},
+            "campos_rel": {campo: rel for campo, (_, rel) in campos.items()},
+            "pico_kb": medir_pico_kb(lambda: extrair_dados_html(conteudo, [])),
+            "dados": {campo: assinatura(dados[campo]) for campo in CAMPOS_PRODUTO}
+        }
+
+    total_s = sum(r["total_ms"] for r in resultados.values()) / 1000
+    return {
+        "ambiente": {
+            "python": platform.python_version(),
+            "motor": EXTRATOR_HTML,
+            "selectolax": SELECTOLAX_DISPONIVEL,
+            "lxml": LXML_DISPONIVEL
+        },
+        "paginas_por_segundo": round(len(resultados) / total_s, 1) if total_s else 0.0,
+        "paginas": resultados
+    }
+
+
+def comparar(atual: dict, baseline: dict, tolerancia: float) -> list:
+    """
+    Regressões do resultado atual em relação ao baseline.
+
+    Os tempos são comparados pelo valor relativo à calibração (independe da
+    máquina): por página, por campo e para o corpus inteiro (somando as páginas).
+
+    Returns:
+        Lista de mensagens (vazia = nenhuma regressão)
+    """
+    regressoes = []
+    mesmo_motor = all(atual["ambiente"][chave] == baseline["ambiente"].get(chave) for chave in ("motor", "selectolax", "lxml"))
+    if not mesmo_motor:
+        print("[AVISO] Motor ou parsers diferentes do baseline: comparando só os dados extraídos")
+    limite = 1 + tolerancia
+
+    def verificar_tempo(descricao: str, medido_rel: float, base_rel: float, medido_ms: float, limite: float = limite):
+        if base_rel and medido_rel > base_rel * limite:
+            regressoes.append(f"{descricao}: {medido_rel / base_rel - 1:+.0%} em relação ao baseline ({medido_ms:.2f} ms)")
+
+    paginas = [pagina for pagina in baseline["paginas"] if pagina in atual["paginas"]]
+    for pagina in baseline["paginas"]:
+        if pagina not in atual["paginas"]:
+            regressoes.append(f"{pagina}: página do baseline ausente no corpus")
+
+    for pagina in paginas:
+        base, medido = baseline["paginas"][pagina], atual["paginas"][pagina]
+        mudaram = [campo for campo, valor in base["dados"].items() if medido["dados"].get(campo) != valor]
+        if mudaram:
+            regressoes.append(f"{pagina}: dados extraídos mudaram ({', '.join(mudaram)})")
+        if mesmo_motor:
+            # Por página o ruído é maior (páginas pequenas levam décimos de ms): tolerância dobrada
+            verificar_tempo(f"{pagina}: total", medido["total_rel"], base["total_rel"], medido["total_ms"], 1 + 2 * tolerancia)
+            if medido["pico_kb"] > base["pico_kb"] * limite + FOLGA_PICO_KB:
+                regressoes.append(f"{pagina}: pico de memória {medido['pico_kb']:.0f} KB (baseline {base['pico_kb']:.0f} KB)")
+
+    if not mesmo_motor:
+        return regressoes
+
+    # Campos: soma no corpus (por página, tempos de décimos de ms oscilam demais)
+    for campo in CAMPOS_PRODUTO:
+        verificar_tempo(
+            f"campo {campo}",
+            sum(atual["paginas"][p]["campos_rel"][campo] for p in paginas),
+            sum(baseline["paginas"][p]["campos_rel"].get(campo, 0.0) for p in paginas),
+            sum(atual["paginas"][p]["campos_ms"][campo] for p in paginas)
+        )
+    verificar_tempo(
+        "corpus",
+        sum(atual["paginas"][p]["total_rel"] for p in paginas),
+        sum(baseline["paginas"][p]["total_rel"] for p in paginas),
+        sum(atual["paginas"][p]["total_ms"] for p in paginas)
+    )
+    return regressoes
+
+
+def combinar_minimos(primeiro: dict, segundo: dict) -> dict:
+    """Junta duas execuções ficando com o menor tempo e o menor pico de cada medida"""
+    resultado = json.loads(json.dumps(primeiro))
+    for pagina, r in resultado["paginas"].items():
+        outra = segundo["paginas"][pagina]
+        for chave in ("total_ms", "total_rel", "pico_kb"):
+            r[chave] = min(r[chave], outra[chave])
+        for chave in ("campos_ms", "campos_rel"):
+            r[chave] = {campo: min(valor, outra[chave][campo]) for campo, valor in r[chave].items()}
+    total_s = sum(r["total_ms"] for r in resultado["paginas"].values()) / 1000
+    resultado["paginas_por_segundo"] = round(len(resultado["paginas"]) / total_s, 1) if total_s else 0.0
+    return resultado
+
+
+def imprimir_tabela(resultado: dict):
+    campos = " ".join(f"{campo[:10]:>10}" for campo in CAMPOS_PRODUTO)
+    print(f"{'Página':<40} {'KB':>7} {'Total ms':>9} {'Pico KB':>8}  {campos}")
+    print("-" * (68 + 11 * len(CAMPOS_PRODUTO)))
+    for pagina, r in resultado["paginas"].items():
+        tempos = " ".join(f"{r['campos_ms'][campo]:>10.2f}" for campo in CAMPOS_PRODUTO)
+        print(f"{pagina:<40} {r['kb']:>7} {r['total_ms']:>9.2f} {r['pico_kb']:>8.0f}  {tempos}")
+
+    ambiente = resultado["ambiente"]
+    print(f"\nMotor: {ambiente['motor']} (selectolax: {ambiente['selectolax']}, lxml: {ambiente['lxml']}), Python {ambiente['python']}")
+    print(f"Corpus: {resultado['paginas_por_segundo']:.1f} páginas/s")
+    print("Colunas por campo: tempo extraindo só aquele campo (ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark offline da extração de produtos")
+    parser.add_argument("--corpus", default=CORPUS_PADRAO, help="Diretório com páginas .html salvas")
+    parser.add_argument("--baseline", default=BASELINE_PADRAO, help="Arquivo JSON do baseline")
+    parser.add_argument("--repeticoes", type=int, default=30, help="Repetições por medida (usa o menor tempo)")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="Piora aceita em relação ao baseline (0.25 = 25%%)")
+    parser.add_argument("--salvar-baseline", action="store_true", help="Grava o resultado como novo baseline")
+    parser.add_argument("--json", metavar="ARQUIVO", help="Salvar resultados em JSON")
+    args = parser.parse_args()
+
+    resultado = executar(args.corpus, args.repeticoes)
+    imprimir_tabela(resultado)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, ensure_ascii=False, indent=2)
+        print(f"\n[INFO] Resultados salvos em: {args.json}")
+
+    if args.salvar_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"\n[OK] Baseline salvo em: {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"\n[AVISO] Baseline não encontrado ({args.baseline}); rode com --salvar-baseline")
+        return
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressoes = comparar(resultado, baseline, args.tolerancia)
+    if regressoes:
+        # Confirma antes de acusar: uma rodada lenta por ruído da máquina não se repete
+        print(f"\n[INFO] {len(regressoes)} possíveis regressões, medindo de novo para confirmar...")
+        resultado = combinar_minimos(resultado, executar(args.corpus, args.repeticoes))
+        regressoes = comparar(resultado, baseline, args.tolerancia)
+    if regressoes:
+        print(f"\n[ERRO] {len(regressoes)} regressões em relação ao baseline (tolerância {args.tolerancia:.0%}):")
+        for regressao in regressoes:
+            print(f"  - {regressao}")
+        sys.exit(1)
+    print(f"\n[OK] Sem regressões em relação ao baseline (tolerância {args.tolerancia:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos backends de parsing HTML
+Mede, para cada backend instalado e cada página salva em benchmarks/corpus,
+o tempo de parse e o tempo de extração (mediana de N repetições) e lista
+os campos em que cada backend diverge dos extratores DOM com html.parser.
+
+O motor de passagem única ("passagem_unica") faz parse e extração juntos,
+por isso só tem o tempo total.
+
+Como usar:
+    python benchmarks/bench_parsers.py
+    python benchmarks/bench_parsers.py --repeticoes 20 --backends selectolax passagem_unica
+    python benchmarks/bench_parsers.py --json resultados.json
+"""
+
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import statistics
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from extrator_html import MOTOR_PASSAGEM_UNICA  # noqa: E402
+from parsers_html import backends_disponiveis, carregar_documento  # noqa: E402
+from scraping_mercado_livre_v2 import extrair_dados_html  # noqa: E402
+
+CORPUS_PADRAO = os.path.join(RAIZ, "benchmarks", "corpus")
+
+
+def medir(funcao, repeticoes: int) -> float:
+    """Mediana do tempo de execução em milissegundos (com debug silenciado)"""
+    tempos = []
+    for _ in range(repeticoes):
+        with contextlib.redirect_stdout(io.StringIO()):
+            inicio = time.perf_counter()
+            funcao()
+            tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos)
+
+
+def executar(corpus: str, backends, repeticoes: int):
+    """Roda o benchmark e retorna uma lista de resultados (um por página × backend)"""
+    paginas = sorted(glob.glob(os.path.join(corpus, "*.html")))
+    if not paginas:
+        raise SystemExit(f"Nenhuma página .html encontrada em {corpus}")
+
+    resultados = []
+    for caminho in paginas:
+        conteudo = open(caminho, "rb").read()
+        with contextlib.redirect_stdout(io.StringIO()):
+            referencia = extrair_dados_html(conteudo, [], "html.parser")
+
+        for backend in backends:
+            total_ms = medir(lambda: extrair_dados_html(conteudo, [], backend), repeticoes)
+            if backend == MOTOR_PASSAGEM_UNICA:
+                parse_ms = extracao_ms = None
+            else:
+                parse_ms = medir(lambda: carregar_documento(conteudo, backend), repeticoes)
+                extracao_ms = round(max(0.0, total_ms - parse_ms), 2)
+                parse_ms = round(parse_ms, 2)
+            with contextlib.redirect_stdout(io.StringIO()):
+                dados = extrair_dados_html(conteudo, [], backend)
+
+            resultados.append({
+                "pagina": os.path.basename(caminho),
+                "kb": round(len(conteudo) / 1024, 1),
+                "backend": backend,
+                "parse_ms": parse_ms,
+                "extracao_ms": extracao_ms,
+                "total_ms": round(total_ms, 2),
+                "divergencias": [campo for campo in referencia if dados.get(campo) != referencia[campo]]
+            })
+    return resultados
+
+
+def imprimir_tabela(resultados):
+    print(f"{'Página':<38} {'KB':>7} {'Backend':<15} {'Parse ms':>9} {'Extr. ms':>9} {'Total ms':>9}  Divergências")
+    print("-" * 110)
+    for r in resultados:
+        parse_ms = "-" if r["parse_ms"] is None else r["parse_ms"]
+        extracao_ms = "-" if r["extracao_ms"] is None else r["extracao_ms"]
+        print(
+            f"{r['pagina']:<38} {r['kb']:>7} {r['backend']:<15} {parse_ms:>9} "
+            f"{extracao_ms:>9} {r['total_ms']:>9}  {', '.join(r['divergencias']) or '-'}"
+        )
+
+    print("\nTotal por backend (soma das páginas):")
+    for backend in dict.fromkeys(r["backend"] for r in resultados):
+        linhas = [r for r in resultados if r["backend"] == backend]
+        total = sum(r["total_ms"] for r in linhas)
+        print(f"  {backend:<15} {total:>9.2f} ms  ({len(linhas) / (total / 1000):.1f} páginas/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos backends de parsing HTML")
+    parser.add_argument("--corpus", default=CORPUS_PADRAO, help="Diretório com páginas .html salvas")
+    parser.add_argument("--backends", nargs="+", default=None, help=f"Backends a medir (disponíveis: {', '.join(backends_disponiveis())}, {MOTOR_PASSAGEM_UNICA})")
+    parser.add_argument("--repeticoes", type=int, default=10, help="Repetições por página (usa a mediana)")
+    parser.add_argument("--json", metavar="ARQUIVO", help="Salvar resultados em JSON")
+    args = parser.parse_args()
+
+    backends = args.backends or backends_disponiveis() + [MOTOR_PASSAGEM_UNICA]
+    resultados = executar(args.corpus, backends, args.repeticoes)
+    imprimir_tabela(resultados)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+        print(f"\n[INFO] Resultados salvos em: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
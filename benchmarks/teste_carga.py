@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""
+Teste de carga ponta a ponta com um Mercado Livre falso
+Sobe um servidor HTTP local que faz o papel do Mercado Livre (servindo as
+páginas de benchmarks/corpus, com latência, erros e limite de taxa
+configuráveis), inicia api.py ou server_local.py apontando para ele
+(ML_BASE_URL) e dispara /scrape e /scrape/batch numa taxa fixa. No fim
+mostra vazão e latências p50/p95/p99 por rota, as falhas e o que o site
+falso respondeu.
+
+A carga é de malha aberta: as requisições saem nos horários programados
+mesmo que o servidor esteja lento, e a latência conta a partir do horário
+programado (a espera por uma conexão livre entra na conta).
+
+Banco de produtos e screenshots do servidor testado ficam num diretório
+temporário, sem tocar nos arquivos do projeto.
+
+Como usar:
+    python benchmarks/teste_carga.py --servidor api --token SEU_TOKEN --rps 20 --duracao 60
+    python benchmarks/teste_carga.py --servidor local --latencia-ms 300 --cauda-ms 200 --taxa-erro 0.05
+    python benchmarks/teste_carga.py --servidor api --token SEU_TOKEN --fracao-lote 0.2 --tamanho-lote 10
+    python benchmarks/teste_carga.py --limite-rps 5 --force-refresh --json resultados.json
+
+    # Só o site falso, para uma API já rodando com ML_BASE_URL=http://127.0.0.1:8900
+    python benchmarks/teste_carga.py --apenas-site-falso --porta-site 8900
+    python benchmarks/teste_carga.py --alvo http://127.0.0.1:8000 --token SEU_TOKEN
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, NamedTuple, Optional
+
+import requests
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CORPUS_PADRAO = os.path.join(RAIZ, "benchmarks", "corpus")
+
+# Script e rota de saúde de cada servidor testado
+SERVIDORES = {
+    "api": ("api.py", "/status"),
+    "local": ("server_local.py", "/health")
+}
+
+# Caminhos de download gerados por urls_mercado_livre com ML_BASE_URL
+_ROTA_PRODUTO = re.compile(r'^/(?:p/(MLB\d+)|up/(MLBU\d+)|MLB-(\d+)-_JM)$')
+
+
+# ============================================
+# Mercado Livre falso
+# ============================================
+
+class SiteFalso:
+    """
+    Servidor no lugar do Mercado Livre.
+
+    Cada id de produto recebe sempre a mesma página do corpus (com ETag, e
+    304 para If-None-Match). Antes de responder, aplica na ordem: limite de
+    taxa (429 com Retry-After), erro de servidor (503) e bloqueio disfarçado
+    (200 com a página de captcha).
+    """
+
+    def __init__(self, corpus: str, latencia_ms: float = 50, cauda_ms: float = 0, taxa_erro: float = 0,
+                 taxa_bloqueio: float = 0, limite_rps: float = 0, retry_after: float = 1):
+        caminhos = sorted(glob.glob(os.path.join(corpus, "*.html")))
+        bloqueios = [c for c in caminhos if "bloqueio" in os.path.basename(c)]
+        self.paginas = [open(c, "rb").read() for c in caminhos if c not in bloqueios]
+        if not self.paginas:
+            raise SystemExit(f"Nenhuma página de produto .html encontrada em {corpus}")
+        self.pagina_bloqueio = open(bloqueios[0], "rb").read() if bloqueios else b"<html><title>captcha</title></html>"
+        self.etags = [f'"{hashlib.sha1(pagina).hexdigest()[:16]}"' for pagina in self.paginas]
+
+        self.latencia = latencia_ms / 1000
+        self.cauda = cauda_ms / 1000
+        self.taxa_erro = taxa_erro
+        self.taxa_bloqueio = taxa_bloqueio
+        self.limite_rps = limite_rps
+        self.retry_after = retry_after
+        self.respostas = Counter()
+        self._tokens = max(1.0, limite_rps)
+        self._reposto_em = time.monotonic()
+        self._lock = threading.Lock()
+        self._servidor = None
+
+    def _dentro_do_limite(self) -> bool:
+        if not self.limite_rps:
+            return True
+        with self._lock:
+            agora = time.monotonic()
+            self._tokens = min(max(1.0, self.limite_rps), self._tokens + (agora - self._reposto_em) * self.limite_rps)
+            self._reposto_em = agora
+            if self._tokens < 1.0:
+                return False
+            self._tokens -= 1.0
+            return True
+
+    def _contar(self, tipo: str):
+        with self._lock:
+            self.respostas[tipo] += 1
+
+    def responder(self, caminho: str, if_none_match: Optional[str]):
+        """Tupla (status, headers, corpo) para um GET em `caminho`"""
+        match = _ROTA_PRODUTO.match(caminho.split("?", 1)[0])
+        if not match:
+            self._contar("404")
+            return 404, {}, b"not found"
+
+        atraso = self.latencia + (random.expovariate(1 / self.cauda) if self.cauda else 0.0)
+        time.sleep(atraso)
+
+        if not self._dentro_do_limite():
+            self._contar("429")
+            return 429, {"Retry-After": f"{self.retry_after:g}"}, b"too many requests"
+        if random.random() < self.taxa_erro:
+            self._contar("503")
+            return 503, {}, b"service unavailable"
+        if random.random() < self.taxa_bloqueio:
+            self._contar("bloqueio")
+            return 200, {"Content-Type": "text/html; charset=utf-8"}, self.pagina_bloqueio
+
+        produto = next(grupo for grupo in match.groups() if grupo)
+        indice = zlib.crc32(produto.encode()) % len(self.paginas)
+        if if_none_match == self.etags[indice]:
+            self._contar("304")
+            return 304, {"ETag": self.etags[indice]}, b""
+        self._contar("200")
+        return 200, {"Content-Type": "text/html; charset=utf-8", "ETag": self.etags[indice]}, self.paginas[indice]
+
+    def iniciar(self, porta: int) -> str:
+        """Sobe o servidor numa thread e retorna a URL base"""
+        site = self
+
+        class Manipulador(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, como o site real
+
+            def do_GET(self):
+                status, headers, corpo = site.responder(self.path, self.headers.get("If-None-Match"))
+                self.send_response(status)
+                for nome, valor in headers.items():
+                    self.send_header(nome, valor)
+                self.send_header("Content-Length", str(len(corpo)))
+                self.end_headers()
+                try:
+                    self.wfile.write(corpo)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # o scraper em streaming fecha a conexão quando já tem todos os campos
+
+            def log_message(self, formato, *args):
+                pass
+
+        ThreadingHTTPServer.daemon_threads = True
+        self._servidor = ThreadingHTTPServer(("127.0.0.1", porta), Manipulador)
+        threading.Thread(target=self._servidor.serve_forever, name="site-falso", daemon=True).start()
+        return f"http://127.0.0.1:{self._servidor.server_address[1]}"
+
+    def parar(self):
+        if self._servidor is not None:
+            self._servidor.shutdown()
+            self._servidor.server_close()
+
+
+# ============================================
+# Servidor testado
+# ============================================
+
+def iniciar_servidor(tipo: str, porta: int, base_site: str, diretorio: str) -> subprocess.Popen:
+    """Inicia api.py ou server_local.py com downloads apontados para o site falso"""
+    script, _ = SERVIDORES[tipo]
+    env = dict(
+        os.environ,
+        ML_BASE_URL=base_site,
+        PORT=str(porta),
+        BANCO_PRODUTOS_CAMINHO=os.path.join(diretorio, "produtos.db"),
+        SCREENSHOTS_DIR=os.path.join(diretorio, "screenshots"),
+        ARQUIVO_HTML_DIR=os.path.join(diretorio, "arquivo_html"),
+        PYTHONUNBUFFERED="1"
+    )
+    log = open(os.path.join(diretorio, "servidor.log"), "wb")
+    return subprocess.Popen([sys.executable, script], cwd=RAIZ, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+def aguardar_servidor(alvo: str, rota_saude: str, processo: Optional[subprocess.Popen], log: Optional[str], prazo: float = 60):
+    """Espera a rota de saúde responder 200 (ou o processo morrer)"""
+    limite = time.monotonic() + prazo
+    while time.monotonic() < limite:
+        if processo is not None and processo.poll() is not None:
+            ultimas = open(log, encoding="utf-8", errors="replace").read()[-2000:] if log else ""
+            raise SystemExit(f"[ERRO] Servidor encerrou ao iniciar (código {processo.returncode}):\n{ultimas}")
+        try:
+            if requests.get(alvo + rota_saude, timeout=2).status_code == 200:
+                return
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(0.3)
+    raise SystemExit(f"[ERRO] Servidor não respondeu {rota_saude} em {prazo:.0f}s")
+
+
+def estatisticas_servidor(alvo: str, rota_saude: str) -> Dict:
+    """Agrupamento, controle de taxa e resiliência informados pelo servidor no fim do teste"""
+    try:
+        dados = requests.get(alvo + rota_saude, timeout=5).json()
+    except (requests.exceptions.RequestException, ValueError):
+        return {}
+    return {chave: dados.get(chave) for chave in ("agrupamento", "controle_taxa", "resiliencia", "cache")}
+
+
+# ============================================
+# Geração de carga
+# ============================================
+
+class Medida(NamedTuple):
+    rota: str
+    latencia: float  # segundos, a partir do horário programado
+    produtos: int
+    falha: Optional[str]  # None = sucesso
+
+
+def url_produto(n: int, rng: random.Random) -> str:
+    """URL do produto `n` como chegaria de um cliente (com rastreamento); pares são catálogo, ímpares anúncio"""
+    if n % 2 == 0:
+        return f"https://www.mercadolivre.com.br/produto-teste-{n}/p/MLB{40000000 + n}?tracking_id={rng.getrandbits(32):x}"
+    return f"https://produto.mercadolivre.com.br/MLB-{1000000000 + n}-produto-teste-{n}-_JM#reco={rng.randrange(10)}"
+
+
+class GeradorCarga:
+    """Dispara requisições em malha aberta numa taxa fixa"""
+
+    def __init__(self, alvo: str, token: Optional[str], conexoes: int, produtos: int,
+                 fracao_lote: float, tamanho_lote: int, force_refresh: bool, timeout: float):
+        self.alvo = alvo.rstrip("/")
+        self.headers = {"Authorization": f"Bearer {token}"} if token else {}
+        self.conexoes = conexoes
+        self.produtos = produtos
+        self.fracao_lote = fracao_lote
+        self.tamanho_lote = tamanho_lote
+        self.force_refresh = force_refresh
+        self.timeout = timeout
+        self.medidas: List[Medida] = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _sessao(self) -> requests.Session:
+        sessao = getattr(self._local, "sessao", None)
+        if sessao is None:
+            sessao = self._local.sessao = requests.Session()
+        return sessao
+
+    def _enviar(self, programado: float, rota: str, corpo: Dict, produtos: int):
+        falha = None
+        try:
+            resposta = self._sessao().post(self.alvo + rota, json=corpo, headers=self.headers, timeout=self.timeout)
+            if resposta.status_code != 200:
+                falha = f"HTTP {resposta.status_code}"
+            elif not resposta.json().get("sucesso"):
+                falha = "sucesso=false"
+        except requests.exceptions.RequestException as e:
+            falha = type(e).__name__
+        except ValueError:
+            falha = "resposta não é JSON"
+        medida = Medida(rota, time.monotonic() - programado, produtos, falha)
+        with self._lock:
+            self.medidas.append(medida)
+
+    def _proxima(self, rng: random.Random):
+        """(rota, corpo, produtos) da próxima requisição"""
+        if self.fracao_lote and rng.random() < self.fracao_lote:
+            urls = [url_produto(rng.randrange(self.produtos), rng) for _ in range(self.tamanho_lote)]
+            return "/scrape/batch", {"urls": urls, "force_refresh": self.force_refresh}, len(urls)
+        url = url_produto(rng.randrange(self.produtos), rng)
+        return "/scrape", {"url": url, "force_refresh": self.force_refresh}, 1
+
+    def executar(self, rps: float, duracao: float, semente: int = 42) -> float:
+        """Roda a carga e retorna a duração real em segundos (até a última resposta)"""
+        rng = random.Random(semente)
+        total = max(1, int(rps * duracao))
+        inicio = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.conexoes, thread_name_prefix="carga") as executor:
+            for i in range(total):
+                programado = inicio + i / rps
+                espera = programado - time.monotonic()
+                if espera > 0:
+                    time.sleep(espera)
+                executor.submit(self._enviar, programado, *self._proxima(rng))
+        return time.monotonic() - inicio
+
+
+# ============================================
+# Relatório
+# ============================================
+
+def percentil(valores: List[float], fracao: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[max(0, math.ceil(fracao * len(ordenados)) - 1)] if ordenados else 0.0
+
+
+def resumir(medidas: List[Medida], duracao: float, rps: float) -> Dict:
+    rotas = {}
+    for rota in sorted({m.rota for m in medidas}):
+        da_rota = [m for m in medidas if m.rota == rota]
+        latencias = [m.latencia * 1000 for m in da_rota]
+        rotas[rota] = {
+            "requisicoes": len(da_rota),
+            "sucessos": sum(1 for m in da_rota if m.falha is None),
+            "p50_ms": round(percentil(latencias, 0.50), 1),
+            "p95_ms": round(percentil(latencias, 0.95), 1),
+            "p99_ms": round(percentil(latencias, 0.99), 1),
+            "max_ms": round(max(latencias), 1)
+        }
+    sucessos = [m for m in medidas if m.falha is None]
+    return {
+        "duracao_s": round(duracao, 1),
+        "rps_alvo": rps,
+        "rps_concluidas": round(len(medidas) / duracao, 2) if duracao else 0.0,
+        "rps_sucesso": round(len(sucessos) / duracao, 2) if duracao else 0.0,
+        "produtos_por_segundo": round(sum(m.produtos for m in sucessos) / duracao, 2) if duracao else 0.0,
+        "rotas": rotas,
+        "falhas": dict(Counter(m.falha for m in medidas if m.falha is not None).most_common())
+    }
+
+
+def imprimir_relatorio(resumo: Dict, site: Optional[SiteFalso], servidor: Dict):
+    print(f"\n{'Rota':<16} {'Req':>6} {'OK':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'máx ms':>9}")
+    print("-" * 70)
+    for rota, r in resumo["rotas"].items():
+        print(f"{rota:<16} {r['requisicoes']:>6} {r['sucessos']:>6} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} {r['p99_ms']:>9.1f} {r['max_ms']:>9.1f}")
+
+    print(f"\nDuração: {resumo['duracao_s']:.1f}s")
+    print(f"Vazão: {resumo['rps_concluidas']:.2f} req/s concluídas, {resumo['rps_sucesso']:.2f} req/s com sucesso (alvo {resumo['rps_alvo']:g} req/s)")
+    print(f"Produtos: {resumo['produtos_por_segundo']:.2f}/s")
+    if resumo["falhas"]:
+        print("Falhas: " + ", ".join(f"{tipo}: {n}" for tipo, n in resumo["falhas"].items()))
+    if site is not None:
+        print("Site falso: " + ", ".join(f"{tipo}: {n}" for tipo, n in sorted(site.respostas.items())))
+    for host, estado in ((servidor.get("controle_taxa") or {}).get("hosts") or {}).items():
+        print(f"Controle de taxa ({host}): {estado['taxa_rps']} req/s, {estado['limite_concorrencia']} simultâneas, {estado['recuos']} recuos")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga ponta a ponta com um Mercado Livre falso")
+    parser.add_argument("--servidor", choices=sorted(SERVIDORES), default="api", help="Servidor testado")
+    parser.add_argument("--alvo", help="URL de um servidor já rodando (não inicia nenhum; ele precisa de ML_BASE_URL)")
+    parser.add_argument("--porta", type=int, default=8811, help="Porta do servidor iniciado pelo teste")
+    parser.add_argument("--token", default=os.getenv("API_TOKEN"), help="Token Bearer da api.py (padrão: $API_TOKEN)")
+    parser.add_argument("--rps", type=float, default=10, help="Requisições por segundo disparadas")
+    parser.add_argument("--duracao", type=float, default=30, help="Segundos de carga")
+    parser.add_argument("--conexoes", type=int, default=64, help="Requisições simultâneas máximas do gerador")
+    parser.add_argument("--produtos", type=int, default=200, help="Produtos distintos sorteados (menos = mais cache e agrupamento)")
+    parser.add_argument("--fracao-lote", type=float, default=0.0, help="Fração das requisições que vão para /scrape/batch (só api)")
+    parser.add_argument("--tamanho-lote", type=int, default=10, help="URLs por requisição de lote")
+    parser.add_argument("--force-refresh", action="store_true", help="Ignorar cache e banco (todo scrape baixa a página)")
+    parser.add_argument("--timeout", type=float, default=120, help="Timeout de cada requisição ao servidor")
+    parser.add_argument("--corpus", default=CORPUS_PADRAO, help="Páginas servidas pelo site falso")
+    parser.add_argument("--porta-site", type=int, default=0, help="Porta do site falso (0 = livre)")
+    parser.add_argument("--latencia-ms", type=float, default=50, help="Latência fixa do site falso")
+    parser.add_argument("--cauda-ms", type=float, default=0, help="Média da latência extra exponencial (cauda p99)")
+    parser.add_argument("--taxa-erro", type=float, default=0.0, help="Fração de respostas 503")
+    parser.add_argument("--taxa-bloqueio", type=float, default=0.0, help="Fração de respostas com a página de captcha")
+    parser.add_argument("--limite-rps", type=float, default=0.0, help="Acima disso o site falso responde 429 (0 = sem limite)")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After dos 429, em segundos")
+    parser.add_argument("--apenas-site-falso", action="store_true", help="Só sobe o site falso e espera Ctrl+C")
+    parser.add_argument("--json", metavar="ARQUIVO", help="Salvar resultados em JSON")
+    args = parser.parse_args()
+
+    site = SiteFalso(args.corpus, args.latencia_ms, args.cauda_ms, args.taxa_erro, args.taxa_bloqueio, args.limite_rps, args.retry_after)
+    base_site = site.iniciar(args.porta_site)
+    print(f"[OK] Site falso em {base_site} ({len(site.paginas)} páginas)")
+
+    if args.apenas_site_falso:
+        print(f"[INFO] Inicie o servidor com ML_BASE_URL={base_site} (Ctrl+C para sair)")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            return
+
+    fracao_lote = args.fracao_lote
+    if fracao_lote and args.servidor == "local":
+        print("[AVISO] server_local.py não tem /scrape/batch: usando só /scrape")
+        fracao_lote = 0.0
+    _, rota_saude = SERVIDORES[args.servidor]
+
+    processo = None
+    with tempfile.TemporaryDirectory(prefix="teste_carga_") as diretorio:
+        log = os.path.join(diretorio, "servidor.log")
+        alvo = args.alvo
+        if alvo is None:
+            alvo = f"http://127.0.0.1:{args.porta}"
+            processo = iniciar_servidor(args.servidor, args.porta, base_site, diretorio)
+        try:
+            aguardar_servidor(alvo, rota_saude, processo, log if processo else None)
+            print(f"[OK] Servidor em {alvo}; disparando {args.rps:g} req/s por {args.duracao:g}s")
+
+            gerador = GeradorCarga(alvo, args.token, args.conexoes, args.produtos, fracao_lote,
+                                   args.tamanho_lote, args.force_refresh, args.timeout)
+            duracao = gerador.executar(args.rps, args.duracao)
+            resumo = resumir(gerador.medidas, duracao, args.rps)
+            servidor = estatisticas_servidor(alvo, rota_saude)
+        finally:
+            if processo is not None:
+                processo.terminate()
+                try:
+                    processo.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    processo.kill()
+            site.parar()
+
+    imprimir_relatorio(resumo, site, servidor)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({**resumo, "site_falso": dict(site.respostas), "servidor": servidor}, f, ensure_ascii=False, indent=2)
+        print(f"\n[INFO] Resultados salvos em: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Cache em memória dos produtos extraídos
+Chaveado pela chave do produto (ex.: p:MLB44589848, ver
+urls_mercado_livre.resolver_url), com TTL e despejo LRU
+por número de itens e/ou tamanho total. Compartilhado por api.py,
+server_local.py e pelo scraping em lote.
+"""
+
+import copy
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+
+CACHE_ATIVO = os.getenv("CACHE_ATIVO", "true").lower() == "true"
+CACHE_TTL_SEGUNDOS = int(os.getenv("CACHE_TTL_SEGUNDOS", 3600))
+CACHE_MAX_ITENS = int(os.getenv("CACHE_MAX_ITENS", 1000))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", 0))  # 0 = sem limite de tamanho
+
+# Campos guardados no cache (screenshots e logs são específicos de cada requisição)
+# campos_extraidos só existe em extrações parciais (fields): lista dos campos extraídos
+CAMPOS_CACHE = ("titulo", "bullet_points", "caracteristicas", "cor", "descricao", "fontes", "campos_extraidos")
+
+
+def cobre_campos(dados: Dict, campos: Optional[Iterable[str]]) -> bool:
+    """Se dados guardados têm todos os `campos` pedidos (None = todos; sem campos_extraidos = extração completa)"""
+    extraidos = dados.get("campos_extraidos")
+    if extraidos is None:
+        return True
+    return campos is not None and set(campos).issubset(extraidos)
+
+
+def mesclar_extracao(atual: Optional[Dict], novo: Dict) -> Optional[Dict]:
+    """
+    O que guardar quando `novo` chega e o produto já tem `atual`: uma
+    extração parcial nunca substitui uma completa (None = manter `atual`);
+    sobre outra parcial, os campos se somam (os de `novo` valem).
+    """
+    extraidos_novo = novo.get("campos_extraidos")
+    if extraidos_novo is None or atual is None:
+        return novo
+    extraidos_atual = atual.get("campos_extraidos")
+    if extraidos_atual is None:
+        return None
+
+    mesclado = dict(atual)
+    for campo in extraidos_novo:
+        if campo in novo:
+            mesclado[campo] = novo[campo]
+    mesclado["fontes"] = {**atual.get("fontes", {}), **novo.get("fontes", {})}
+    extraidos = set(extraidos_atual) | set(extraidos_novo)
+    mesclado["campos_extraidos"] = [campo for campo in CAMPOS_CACHE if campo in extraidos]
+    return mesclado
+
+
+class CacheProdutos:
+    """Cache LRU thread-safe com expiração por TTL"""
+
+    def __init__(self, ttl_segundos: int = CACHE_TTL_SEGUNDOS, max_itens: int = CACHE_MAX_ITENS, max_bytes: int = CACHE_MAX_BYTES):
+        self.ttl_segundos = ttl_segundos
+        self.max_itens = max_itens
+        self.max_bytes = max_bytes
+        self._itens = OrderedDict()  # chave -> (expira_em, tamanho, dados)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.despejos = 0
+        self.expirados = 0
+
+    def obter(self, chave: str, campos: Optional[Iterable[str]] = None) -> Optional[Dict]:
+        """
+        Retorna uma cópia dos dados em cache (ou None se ausente/expirado).
+        Uma extração parcial que não tem todos os `campos` pedidos conta como miss.
+        """
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                self.misses += 1
+                return None
+
+            expira_em, tamanho, dados = item
+            if expira_em < time.monotonic():
+                self._remover(chave)
+                self.expirados += 1
+                self.misses += 1
+                return None
+            if not cobre_campos(dados, campos):
+                self.misses += 1
+                return None
+
+            self._itens.move_to_end(chave)
+            self.hits += 1
+        return copy.deepcopy(dados)
+
+    def guardar(self, chave: str, dados: Dict):
+        """
+        Guarda os campos de produto de `dados` sob `chave`. Uma extração
+        parcial não substitui uma completa ainda válida e se soma a outra parcial.
+        """
+        valor = {campo: copy.deepcopy(dados[campo]) for campo in CAMPOS_CACHE if campo in dados}
+
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is not None and item[0] >= time.monotonic():
+                valor = mesclar_extracao(item[2], valor)
+                if valor is None:
+                    return
+            tamanho = len(json.dumps(valor, ensure_ascii=False).encode("utf-8"))
+            if self.max_bytes and tamanho > self.max_bytes:
+                return
+
+            if chave in self._itens:
+                self._remover(chave)
+            self._itens[chave] = (time.monotonic() + self.ttl_segundos, tamanho, valor)
+            self._bytes += tamanho
+
+            while self._itens and (
+                (self.max_itens and len(self._itens) > self.max_itens)
+                or (self.max_bytes and self._bytes > self.max_bytes)
+            ):
+                chave_antiga = next(iter(self._itens))
+                self._remover(chave_antiga)
+                self.despejos += 1
+
+    def invalidar(self, chave: str):
+        """Remove uma chave do cache"""
+        with self._lock:
+            if chave in self._itens:
+                self._remover(chave)
+
+    def limpar(self):
+        """Remove todos os itens do cache"""
+        with self._lock:
+            self._itens.clear()
+            self._bytes = 0
+
+    def _remover(self, chave: str):
+        _, tamanho, _ = self._itens.pop(chave)
+        self._bytes -= tamanho
+
+    def estatisticas(self) -> Dict:
+        """Contadores de hit/miss e ocupação (usado em /status)"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "ativo": CACHE_ATIVO,
+                "itens": len(self._itens),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "taxa_acerto": round(self.hits / total, 3) if total else 0.0,
+                "despejos": self.despejos,
+                "expirados": self.expirados,
+                "ttl_segundos": self.ttl_segundos,
+                "max_itens": self.max_itens,
+                "max_bytes": self.max_bytes
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def obter_cache() -> CacheProdutos:
+    """Retorna o cache compartilhado do processo, criando-o na primeira chamada"""
+    global _cache
+
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = CacheProdutos()
+    return _cache
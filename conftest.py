@@ -0,0 +1,77 @@
+"""
+Configuração dos testes offline
+O scraper baixa do Mercado Livre falso do teste de carga
+(benchmarks/teste_carga.py), que serve as páginas de benchmarks/corpus,
+e grava banco, arquivo de HTML e screenshots num diretório temporário.
+As variáveis de ambiente são lidas na importação dos módulos, por isso
+ficam definidas aqui, antes de qualquer teste importar o scraper.
+"""
+
+import glob
+import os
+import socket
+import sys
+import tempfile
+import zlib
+
+import pytest
+
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+CORPUS = os.path.join(RAIZ, "benchmarks", "corpus")
+sys.path.insert(0, os.path.join(RAIZ, "benchmarks"))
+
+
+def _porta_livre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+_PORTA_SITE_FALSO = _porta_livre()
+_DIRETORIO = tempfile.mkdtemp(prefix="testes_scraper_")
+
+os.environ["ML_BASE_URL"] = f"http://127.0.0.1:{_PORTA_SITE_FALSO}"
+os.environ["BANCO_PRODUTOS_CAMINHO"] = os.path.join(_DIRETORIO, "produtos.db")
+os.environ["ARQUIVO_HTML_DIR"] = os.path.join(_DIRETORIO, "arquivo_html")
+os.environ["SCREENSHOTS_DIR"] = os.path.join(_DIRETORIO, "screenshots")
+os.environ["TAXA_INICIAL_RPS"] = "50"
+
+
+def paginas_corpus():
+    """Caminhos das páginas do corpus (inclusive a de bloqueio)"""
+    return sorted(glob.glob(os.path.join(CORPUS, "*.html")))
+
+
+def ler_pagina(nome: str) -> bytes:
+    with open(os.path.join(CORPUS, nome), "rb") as arquivo:
+        return arquivo.read()
+
+
+@pytest.fixture(scope="session")
+def site_falso():
+    from teste_carga import SiteFalso
+
+    site = SiteFalso(CORPUS, latencia_ms=0)
+    site.iniciar(_PORTA_SITE_FALSO)
+    yield site
+    site.parar()
+
+
+_ids_usados = set()
+
+
+def url_de_catalogo(nome_pagina: str) -> str:
+    """
+    URL de catálogo de um produto ainda não usado nos testes que o site
+    falso responde com a página `nome_pagina` do corpus (cache e banco vazios para ele)
+    """
+    produtos = [c for c in paginas_corpus() if "bloqueio" not in os.path.basename(c)]
+    indice = [os.path.basename(c) for c in produtos].index(nome_pagina)
+    numero = 1000
+    while True:
+        numero += 1
+        produto = f"MLB{numero}"
+        if produto not in _ids_usados and zlib.crc32(produto.encode()) % len(produtos) == indice:
+            _ids_usados.add(produto)
+            return f"https://www.mercadolivre.com.br/produto-teste/p/{produto}"
@@ -0,0 +1,335 @@
+"""
+Controle adaptativo de taxa por host
+Cada host do Mercado Livre tem um token bucket (requisições por segundo)
+e um limite de requisições simultâneas, ajustados no estilo AIMD:
+respostas saudáveis aumentam taxa e limite aos poucos (aditivo); sinais
+de bloqueio (429/403, página de verificação), páginas curtas e erros de
+rede ou 5xx cortam os dois pela metade (multiplicativo). Um 429 ou 403
+também pausa o host por Retry-After (ou TAXA_PAUSA_BLOQUEIO segundos).
+
+Assim o scraping em lote encontra sozinho a maior vazão que o site
+aceita, sem ajuste manual. Cada processo tem o seu controle.
+"""
+
+import asyncio
+import math
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+
+from metricas import SINAIS
+
+
+CONTROLE_TAXA_ATIVO = os.getenv("CONTROLE_TAXA_ATIVO", "true").lower() == "true"
+TAXA_INICIAL_RPS = float(os.getenv("TAXA_INICIAL_RPS", 2))
+TAXA_MIN_RPS = float(os.getenv("TAXA_MIN_RPS", 0.2))
+TAXA_MAX_RPS = float(os.getenv("TAXA_MAX_RPS", 20))
+TAXA_INCREMENTO_RPS = float(os.getenv("TAXA_INCREMENTO_RPS", 0.2))  # por resposta saudável
+CONCORRENCIA_INICIAL = int(os.getenv("CONCORRENCIA_INICIAL", 4))
+CONCORRENCIA_MIN = int(os.getenv("CONCORRENCIA_MIN", 1))
+CONCORRENCIA_MAX = int(os.getenv("CONCORRENCIA_MAX", 16))
+AIMD_FATOR_RECUO = float(os.getenv("AIMD_FATOR_RECUO", 0.5))
+TAXA_PAUSA_BLOQUEIO = float(os.getenv("TAXA_PAUSA_BLOQUEIO", 5))
+# Bem abaixo do maxDuration da Vercel (60s): sobra tempo para o download (TIMEOUT_DOWNLOAD) e o 429
+TAXA_ESPERA_MAX = float(os.getenv("TAXA_ESPERA_MAX", 10))
+PAGINA_CURTA_BYTES = int(os.getenv("PAGINA_CURTA_BYTES", 2000))
+
+# Sinais de uma resposta
+OK = "ok"
+BLOQUEIO = "bloqueio"          # 429, 403 ou página de verificação / captcha
+PAGINA_CURTA = "pagina_curta"  # página pequena demais ou sem produto (provável bloqueio)
+ERRO = "erro"                  # erro de rede, timeout ou 5xx
+NEUTRO = "neutro"              # ex.: 404 ou falha do próprio scraper: não ajusta nada
+
+# Redirecionamentos do Mercado Livre para verificação de conta / captcha
+_MARCADORES_VERIFICACAO = ("account-verification", "captcha", "/lgz/login", "/jms/mlb/lgz")
+
+# Intervalo entre novas tentativas quando o host está sem vaga
+_ESPERA_VAGA = 0.05
+
+
+class EsperaTaxaEsgotada(Exception):
+    """Levantada quando a requisição esperou mais que TAXA_ESPERA_MAX pela vez do host"""
+
+    def __init__(self, mensagem: str, retry_after: int = 1):
+        super().__init__(mensagem)
+        self.retry_after = retry_after
+
+
+def sinal_do_status(status: int) -> str:
+    if status in (403, 429):
+        return BLOQUEIO
+    if status >= 500:
+        return ERRO
+    if status < 400:
+        return OK
+    return NEUTRO
+
+
+def sinal_da_pagina(status: int, url_final: str, tamanho: int, dados: Dict) -> str:
+    """Sinal de uma página baixada: bloqueio disfarçado de 200 vira BLOQUEIO ou PAGINA_CURTA"""
+    sinal = sinal_do_status(status)
+    if sinal != OK:
+        return sinal
+    if any(marcador in (url_final or "").lower() for marcador in _MARCADORES_VERIFICACAO):
+        return BLOQUEIO
+    if tamanho < PAGINA_CURTA_BYTES or dados.get("titulo", "N/A") == "N/A":
+        return PAGINA_CURTA
+    return OK
+
+
+def _sinal_da_excecao(e: BaseException):
+    """(sinal, retry_after) de uma exceção levantada durante a requisição"""
+    resposta = getattr(e, "response", None)
+    status = getattr(resposta, "status_code", None)
+    if status is not None:
+        return sinal_do_status(status), _retry_after(resposta.headers.get("retry-after"))
+    if isinstance(e, (requests.exceptions.RequestException, httpx.HTTPError)):
+        return ERRO, None
+    return NEUTRO, None
+
+
+def _retry_after(valor) -> Optional[float]:
+    try:
+        return max(0.0, float(valor))
+    except (TypeError, ValueError):
+        return None
+
+
+class Permissao:
+    """Vez de uma requisição num host; o chamador informa o `sinal` da resposta"""
+
+    def __init__(self, host: str, inicio: float):
+        self.host = host
+        self.inicio = inicio
+        self.espera = 0.0
+        self.sinal = None
+        self.retry_after = None
+
+    def registrar(self, sinal: str, retry_after: Optional[float] = None):
+        self.sinal = sinal
+        self.retry_after = retry_after
+
+
+class ControladorHost:
+    """Token bucket + limite de concorrência AIMD de um host (estado protegido pelo lock do ControleTaxa)"""
+
+    def __init__(self, host: str):
+        self.host = host
+        self.taxa = TAXA_INICIAL_RPS
+        self.limite = float(CONCORRENCIA_INICIAL)
+        self.tokens = 1.0
+        self.em_uso = 0
+        self.pausado_ate = 0.0
+        self.recuos = 0
+        self.sinais = {OK: 0, BLOQUEIO: 0, PAGINA_CURTA: 0, ERRO: 0, NEUTRO: 0}
+        self._reposto_em = time.monotonic()
+        self._ultimo_recuo = 0.0
+
+    def tentar(self, agora: float) -> float:
+        """Ocupa uma vaga e um token; devolve 0 se conseguiu ou quanto esperar antes de tentar de novo"""
+        if agora < self.pausado_ate:
+            return self.pausado_ate - agora
+        if self.em_uso >= int(self.limite):
+            return _ESPERA_VAGA
+
+        # Rajada máxima: um segundo de taxa (ao menos uma requisição)
+        # `agora` pode ser anterior à última reposição (lido antes do lock)
+        self.tokens = min(max(1.0, self.taxa), self.tokens + max(0.0, agora - self._reposto_em) * self.taxa)
+        self._reposto_em = max(self._reposto_em, agora)
+        if self.tokens < 1.0:
+            return (1.0 - self.tokens) / self.taxa
+
+        self.tokens -= 1.0
+        self.em_uso += 1
+        return 0.0
+
+    def liberar(self, permissao: Permissao, agora: float):
+        self.em_uso -= 1
+        sinal = permissao.sinal or NEUTRO
+        self.sinais[sinal] += 1
+        SINAIS.incrementar(host=self.host, sinal=sinal)
+
+        if sinal == OK:
+            # Aumento aditivo: ~+1 de concorrência a cada `limite` respostas saudáveis
+            self.limite = min(float(CONCORRENCIA_MAX), self.limite + 1.0 / self.limite)
+            self.taxa = min(TAXA_MAX_RPS, self.taxa + TAXA_INCREMENTO_RPS)
+        elif sinal != NEUTRO:
+            # Um recuo por janela: respostas de requisições que já estavam no ar
+            # quando houve o último corte não cortam de novo
+            if permissao.inicio >= self._ultimo_recuo:
+                self.limite = max(float(CONCORRENCIA_MIN), self.limite * AIMD_FATOR_RECUO)
+                self.taxa = max(TAXA_MIN_RPS, self.taxa * AIMD_FATOR_RECUO)
+                self.tokens = min(self.tokens, 0.0)
+                self._ultimo_recuo = agora
+                self.recuos += 1
+                print(f"[AVISO] {self.host}: {sinal}, reduzindo para {self.taxa:.2f} req/s e {int(self.limite)} simultâneas")
+            if sinal == BLOQUEIO:
+                pausa = permissao.retry_after if permissao.retry_after is not None else TAXA_PAUSA_BLOQUEIO
+                self.pausado_ate = max(self.pausado_ate, agora + pausa)
+
+    def estatisticas(self, agora: float) -> Dict:
+        return {
+            "taxa_rps": round(self.taxa, 2),
+            "limite_concorrencia": int(self.limite),
+            "em_uso": self.em_uso,
+            "pausado_por_s": round(max(0.0, self.pausado_ate - agora), 1),
+            "recuos": self.recuos,
+            "sinais": dict(self.sinais)
+        }
+
+
+class ControleTaxa:
+    """
+    Controladores por host, usados em volta de cada download:
+
+        with obter_controle_taxa().permissao(url) as permissao:
+            resposta = sessao.get(url)
+            permissao.registrar(sinal_da_pagina(...))
+
+    Exceções levantadas dentro do bloco viram o sinal automaticamente
+    (429/403 -> bloqueio, 5xx e erros de rede -> erro).
+    """
+
+    def __init__(self, espera_max: float = TAXA_ESPERA_MAX):
+        self.espera_max = espera_max
+        self._hosts = {}
+        self._condicao = threading.Condition()
+
+    @contextmanager
+    def permissao(self, url: str):
+        permissao = self._adquirir(url)
+        try:
+            yield permissao
+        except BaseException as e:
+            if permissao is not None and permissao.sinal is None:
+                permissao.registrar(*_sinal_da_excecao(e))
+            raise
+        finally:
+            self._liberar(permissao)
+
+    @asynccontextmanager
+    async def permissao_async(self, url: str):
+        """Mesmo que `permissao`, esperando a vez sem bloquear o event loop"""
+        permissao = await self._adquirir_async(url)
+        try:
+            yield permissao
+        except BaseException as e:
+            if permissao is not None and permissao.sinal is None:
+                permissao.registrar(*_sinal_da_excecao(e))
+            raise
+        finally:
+            self._liberar(permissao)
+
+    def permissao_reserva(self, host: str) -> Optional[Permissao]:
+        """
+        Vez extra para a requisição de reserva do hedging, sem esperar: só se
+        o host tem vaga e token agora. None quando ele está pausado, recuando
+        (sem token) ou cheio, e aí a reserva não é disparada. Devolver com
+        `devolver_reserva`.
+        """
+        host = (host or "").lower()
+        agora = time.monotonic()
+        if not CONTROLE_TAXA_ATIVO or not host:
+            return Permissao(host, agora)
+        if self._tentar(host, agora) != 0.0:
+            return None
+        return self._permissao(host, agora, agora)
+
+    def devolver_reserva(self, permissao: Permissao, status: Optional[int] = None, erro: Optional[BaseException] = None):
+        """
+        Libera a vez da reserva. Só erros e status de bloqueio / 5xx viram
+        sinal: a página em si conta na permissão da requisição original.
+        """
+        if not CONTROLE_TAXA_ATIVO or not permissao.host:
+            return
+        if erro is not None:
+            permissao.registrar(*_sinal_da_excecao(erro))
+        elif status is not None and sinal_do_status(status) != OK:
+            permissao.registrar(sinal_do_status(status))
+        self._liberar(permissao)
+
+    def estatisticas(self) -> Dict:
+        """Taxa e concorrência atuais de cada host (usado em /status)"""
+        agora = time.monotonic()
+        with self._condicao:
+            hosts = {host: controlador.estatisticas(agora) for host, controlador in self._hosts.items()}
+        return {"ativo": CONTROLE_TAXA_ATIVO, "hosts": hosts}
+
+    def _tentar(self, host: str, agora: float) -> float:
+        with self._condicao:
+            controlador = self._hosts.get(host)
+            if controlador is None:
+                controlador = self._hosts[host] = ControladorHost(host)
+            return controlador.tentar(agora)
+
+    def _adquirir(self, url: str) -> Optional[Permissao]:
+        host = (urlsplit(url).hostname or "").lower()
+        if not CONTROLE_TAXA_ATIVO or not host:
+            return None
+        chegada = time.monotonic()
+        while True:
+            agora = time.monotonic()
+            espera = self._tentar(host, agora)
+            if espera == 0.0:
+                return self._permissao(host, chegada, agora)
+            self._verificar_prazo(host, chegada, agora, espera)
+            with self._condicao:
+                # Acordado antes do prazo quando outra requisição do host termina
+                self._condicao.wait(espera)
+
+    async def _adquirir_async(self, url: str) -> Optional[Permissao]:
+        host = (urlsplit(url).hostname or "").lower()
+        if not CONTROLE_TAXA_ATIVO or not host:
+            return None
+        chegada = time.monotonic()
+        while True:
+            agora = time.monotonic()
+            espera = self._tentar(host, agora)
+            if espera == 0.0:
+                return self._permissao(host, chegada, agora)
+            self._verificar_prazo(host, chegada, agora, espera)
+            await asyncio.sleep(espera)
+
+    def _permissao(self, host: str, chegada: float, agora: float) -> Permissao:
+        permissao = Permissao(host, agora)
+        permissao.espera = agora - chegada
+        return permissao
+
+    def _verificar_prazo(self, host: str, chegada: float, agora: float, espera: float):
+        if agora + espera - chegada > self.espera_max:
+            raise EsperaTaxaEsgotada(
+                f"{host}: vez não liberada em {self.espera_max:.0f}s (host lento ou bloqueando)",
+                retry_after=max(1, math.ceil(espera))
+            )
+
+    def _liberar(self, permissao: Optional[Permissao]):
+        if permissao is None:
+            return
+        with self._condicao:
+            self._hosts[permissao.host].liberar(permissao, time.monotonic())
+            self._condicao.notify_all()
+
+
+_controle = None
+_controle_pid = None
+_controle_lock = threading.Lock()
+
+
+def obter_controle_taxa() -> ControleTaxa:
+    """Retorna o controle de taxa do processo, criando-o na primeira chamada"""
+    global _controle, _controle_pid
+
+    pid = os.getpid()
+    if _controle is None or _controle_pid != pid:
+        with _controle_lock:
+            if _controle is None or _controle_pid != pid:
+                _controle = ControleTaxa()
+                _controle_pid = pid
+    return _controle
@@ -0,0 +1,202 @@
+"""
+Dados estruturados embutidos na página do produto
+As páginas do Mercado Livre trazem os dados do produto em JSON: blocos
+JSON-LD (schema.org Product) e o estado inicial da aplicação
+(__PRELOADED_STATE__). Decodificar só esses blocos é mais barato e menos
+frágil que as heurísticas sobre o HTML; os extratores de HTML ficam só
+para os campos que o JSON não traz.
+
+Prioridade por campo: estado inicial > JSON-LD > HTML.
+"""
+
+import json
+import os
+import re
+from typing import Dict, List, Optional
+
+
+DADOS_ESTRUTURADOS_ATIVO = os.getenv("DADOS_ESTRUTURADOS_ATIVO", "true").lower() == "true"
+
+# Nomes das fontes, na ordem de prioridade (maior primeiro)
+FONTE_ESTADO_INICIAL = "estado_inicial"
+FONTE_JSON_LD = "json_ld"
+FONTE_HTML = "html"
+PRIORIDADE_FONTES = {FONTE_ESTADO_INICIAL: 2, FONTE_JSON_LD: 1, FONTE_HTML: 0}
+
+ID_ESTADO_INICIAL = "__PRELOADED_STATE__"
+TIPO_JSON_LD = "application/ld+json"
+
+# Estado inicial em script comum: window.__PRELOADED_STATE__ = {...};
+_ATRIBUICAO_ESTADO = re.compile(r'^\s*(?:window\.)?__PRELOADED_STATE__\s*=\s*')
+
+
+def eh_script_json_ld(atributos) -> bool:
+    return (atributos.get("type") or "").strip().lower() == TIPO_JSON_LD
+
+
+def eh_script_estado_inicial(atributos, inicio_texto: str = "") -> bool:
+    """Script com id __PRELOADED_STATE__ ou que atribui window.__PRELOADED_STATE__"""
+    if atributos.get("id") == ID_ESTADO_INICIAL:
+        return True
+    return _ATRIBUICAO_ESTADO.match(inicio_texto) is not None
+
+
+# ============================================
+# JSON-LD (schema.org)
+# ============================================
+
+def de_json_ld(texto: str) -> Dict:
+    """
+    Campos do produto de um bloco JSON-LD.
+
+    Returns:
+        Dict só com os campos presentes (titulo, cor, descricao, caracteristicas)
+    """
+    produto = _produto_json_ld(_decodificar(texto))
+    if produto is None:
+        return {}
+
+    campos = {}
+    nome = _texto(produto.get("name"))
+    if nome:
+        campos["titulo"] = nome[:200]
+    cor = _texto(produto.get("color"))
+    if cor:
+        campos["cor"] = cor
+    descricao = _texto(produto.get("description"))
+    if descricao and len(descricao) > 30:
+        campos["descricao"] = descricao[:500]
+
+    caracteristicas = {}
+    propriedades = produto.get("additionalProperty")
+    for propriedade in propriedades if isinstance(propriedades, list) else []:
+        if isinstance(propriedade, dict):
+            _adicionar_caracteristica(caracteristicas, propriedade.get("name"), propriedade.get("value"))
+    if caracteristicas:
+        campos["caracteristicas"] = caracteristicas
+    return campos
+
+
+def _produto_json_ld(dados) -> Optional[Dict]:
+    """Primeiro objeto @type Product (aceita listas e @graph)"""
+    if isinstance(dados, list):
+        for item in dados:
+            produto = _produto_json_ld(item)
+            if produto is not None:
+                return produto
+        return None
+    if not isinstance(dados, dict):
+        return None
+
+    tipo = dados.get("@type")
+    if tipo == "Product" or (isinstance(tipo, list) and "Product" in tipo):
+        return dados
+    if "@graph" in dados:
+        return _produto_json_ld(dados["@graph"])
+    return None
+
+
+# ============================================
+# Estado inicial (__PRELOADED_STATE__)
+# ============================================
+
+def do_estado_inicial(texto: str) -> Dict:
+    """
+    Campos do produto no estado inicial da aplicação.
+
+    Returns:
+        Dict só com os campos presentes (titulo, bullet_points, caracteristicas, cor, descricao)
+    """
+    texto = _ATRIBUICAO_ESTADO.sub("", texto, count=1).strip().rstrip(";")
+    estado = _decodificar(texto)
+    if not isinstance(estado, dict):
+        return {}
+
+    inicial = _dict(_dict(estado.get("pageState")).get("initialState") or estado.get("initialState") or estado)
+    componentes = _componentes(inicial.get("components"))
+    campos = {}
+
+    titulo = _texto(_dict(componentes.get("header")).get("title"))
+    if titulo:
+        campos["titulo"] = titulo[:200]
+
+    cor = _cor_das_variacoes(_dict(componentes.get("variations")))
+    if cor:
+        campos["cor"] = cor
+
+    destaques = _componentes(_dict(componentes.get("highlighted_specs_attrs")).get("components"))
+
+    bullet_points = []
+    for item in _lista(_dict(destaques.get("highlighted_specs_features")).get("features")):
+        texto_item = _texto(_dict(item).get("text"))
+        if 10 < len(texto_item) < 500 and texto_item not in bullet_points:
+            bullet_points.append(texto_item)
+    if bullet_points:
+        campos["bullet_points"] = bullet_points
+
+    caracteristicas = {}
+    for grupo in _lista(_dict(destaques.get("technical_specifications")).get("specs")):
+        for atributo in _lista(_dict(grupo).get("attributes")):
+            atributo = _dict(atributo)
+            _adicionar_caracteristica(caracteristicas, atributo.get("id"), atributo.get("text"))
+    if caracteristicas:
+        campos["caracteristicas"] = caracteristicas
+
+    descricao = _texto(_dict(componentes.get("description")).get("content"))
+    if descricao and len(descricao) > 30:
+        campos["descricao"] = descricao[:500]
+
+    return campos
+
+
+def _cor_das_variacoes(variacoes: Dict) -> str:
+    for seletor in _lista(variacoes.get("pickers")):
+        seletor = _dict(seletor)
+        if str(seletor.get("id", "")).upper() != "COLOR":
+            continue
+        cor = _texto(_dict(seletor.get("selected_option")).get("text"))
+        if not cor:
+            # Rótulo no formato "Cor: Preto"
+            cor = _texto(_dict(seletor.get("label")).get("text")).split(":", 1)[-1].strip()
+        if cor and len(cor) < 50:
+            return cor
+    return ""
+
+
+def _componentes(componentes) -> Dict:
+    """Componentes podem vir como dict (id -> componente) ou lista de componentes com "id" """
+    if isinstance(componentes, dict):
+        return componentes
+    return {c["id"]: c for c in _lista(componentes) if isinstance(c, dict) and "id" in c}
+
+
+# ============================================
+# Utilitários
+# ============================================
+
+def _decodificar(texto: str):
+    try:
+        return json.loads(texto)
+    except (TypeError, ValueError):
+        return None
+
+
+def _adicionar_caracteristica(caracteristicas: Dict, chave, valor):
+    chave = _texto(chave).rstrip(":")
+    valor = _texto(valor)
+    if chave and valor and len(chave) < 100 and len(valor) < 200:
+        caracteristicas[chave] = valor
+
+
+def _texto(valor) -> str:
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        return str(valor)
+    return valor.strip() if isinstance(valor, str) else ""
+
+
+def _dict(valor) -> Dict:
+    return valor if isinstance(valor, dict) else {}
+
+
+def _lista(valor) -> List:
+    return valor if isinstance(valor, list) else []
@@ -0,0 +1,786 @@
+"""
+Motor de extração em passagem única
+Percorre o HTML uma única vez, como fluxo de eventos (abre tag / texto /
+fecha tag), e preenche título, bullet points, características, cor e
+descrição durante a mesma passagem, com padrões pré-compilados.
+
+Não monta o texto completo da página nem repete buscas na árvore: cada
+campo guarda só o texto dos elementos que interessam. Os eventos vêm da
+árvore do lexbor (selectolax) para documentos completos, ou de um
+tokenizador incremental (lxml, senão html.parser da biblioteca padrão)
+quando o HTML chega em pedaços (`alimentar`).
+
+Antes do HTML, os blocos JSON da página (JSON-LD e estado inicial, ver
+`dados_estruturados`) são decodificados; as regras de HTML só rodam para
+os campos que o JSON não trouxe, e `fontes` diz de onde veio cada campo.
+
+Selecionado por EXTRATOR_HTML (padrão: passagem_unica; "dom" volta aos
+extratores DOM de `scraping_mercado_livre_v2` com o backend PARSER_HTML).
+`PaginaProduto` usa o mesmo motor para extrair cada campo só quando é lido.
+"""
+
+import codecs
+import copy
+import os
+import re
+import time
+from html.parser import HTMLParser
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    from lxml import etree
+    LXML_DISPONIVEL = True
+except ImportError:
+    LXML_DISPONIVEL = False
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    SELECTOLAX_DISPONIVEL = True
+except ImportError:
+    SELECTOLAX_DISPONIVEL = False
+
+import dados_estruturados
+from metricas import EXTRATOR_SEGUNDOS, Cronometro
+from dados_estruturados import (
+    DADOS_ESTRUTURADOS_ATIVO,
+    FONTE_ESTADO_INICIAL,
+    FONTE_HTML,
+    FONTE_JSON_LD,
+    PRIORIDADE_FONTES
+)
+
+
+MOTOR_PASSAGEM_UNICA = "passagem_unica"
+EXTRATOR_HTML = os.getenv("EXTRATOR_HTML", MOTOR_PASSAGEM_UNICA)
+
+CAMPOS_PRODUTO = ("titulo", "bullet_points", "caracteristicas", "cor", "descricao")
+
+# Tags sem fechamento: não entram na pilha
+_TAGS_VAZIAS = frozenset({
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link",
+    "meta", "param", "source", "track", "wbr"
+})
+# Subárvores que nunca têm dados do produto: não são percorridas (nem contam
+# como texto da página). Vale também para <section> de recomendações,
+# opiniões e perguntas, que repetem títulos e "Cor:" de outros produtos.
+_TAGS_IGNORADAS = frozenset({"script", "style", "template", "noscript", "svg", "nav", "footer"})
+_CLASSE_SECAO_IGNORADA = re.compile(r'recommendations|review|questions')
+# Tags tratadas fora das seções
+_TAGS_CABECALHO = frozenset({"h1", "h2", "title"})
+
+# Um único padrão identifica as três seções pelo texto do h2 (grupo = campo)
+_SECOES_H2 = re.compile(
+    r'(?P<bullet_points>você precisa saber)|(?P<caracteristicas>características)|(?P<descricao>descrição)',
+    re.IGNORECASE
+)
+_CLASSE_LISTA_BULLETS = re.compile(r'features(?:-|__)list')
+_CLASSE_CHAVE_VALOR = re.compile(r'key-value')
+_TAGS_DESCRICAO = frozenset({"div", "p", "section"})
+
+# Cor: rótulo "Cor" / "Cor:" num nó de texto curto; o valor vem no mesmo nó ou no próximo
+_COR_ROTULO = re.compile(r'^Cor\b\s*:?\s*(.*)$', re.IGNORECASE | re.DOTALL)
+_COR_VALOR = re.compile(r'^([A-Za-záàâãéèêíïóôõöúçñ]+(?:\s+[A-Za-záàâãéèêíïóôõöúçñ]+)?)\b')
+_COR_EXCLUIR = ("escolha", "selecione", "voltagem")
+_COR_ROTULO_MAX = 60
+
+# Título quando a página não tem h1: <title> sem o sufixo do site
+_SUFIXO_TITULO = re.compile(r'\s*[|\-]\s*Mercado Livre.*$', re.IGNORECASE)
+
+_AMOSTRA_TEXTO = 200
+_INICIO_HTML = 500
+
+
+class _Captura:
+    """Texto acumulado de um elemento aberto (h1, li, span de chave-valor, ...)"""
+
+    __slots__ = ("tipo", "partes", "celulas", "dono")
+
+    def __init__(self, tipo: str, dono: Optional["_Captura"] = None):
+        self.tipo = tipo
+        self.partes: List[str] = []
+        self.celulas: List[str] = []
+        self.dono = dono
+
+    def texto(self) -> str:
+        # Mesmo resultado de get_text(strip=True) dos extratores DOM
+        return "".join(self.partes)
+
+
+# Marca na pilha o elemento que abriu uma subárvore ignorada
+_IGNORADA = _Captura("ignorada")
+
+
+def _ignorar(tag: str, atributos) -> bool:
+    if tag in _TAGS_IGNORADAS:
+        return True
+    return tag == "section" and _CLASSE_SECAO_IGNORADA.search(atributos.get("class") or "") is not None
+
+
+class ExtratorPassagemUnica:
+    """
+    Extrator orientado a eventos. Uso:
+
+        dados = ExtratorPassagemUnica().processar(html)
+
+    ou, com o HTML chegando em pedaços:
+
+        extrator = ExtratorPassagemUnica()
+        extrator.alimentar(pedaco)   # quantas vezes forem necessárias
+        dados = extrator.finalizar()
+
+    Depois de finalizar, `fontes` indica a fonte de cada campo
+    (estado_inicial, json_ld, html ou None quando não encontrado).
+
+    Com o HTML em pedaços, `completo` fica True assim que todos os `campos`
+    pedidos estão prontos: o restante da página pode nem ser baixado. Com
+    os dados estruturados ativos, só depois do estado inicial, que tem
+    prioridade sobre as outras fontes: o resultado é o mesmo de `processar`.
+    `segundos_processando` soma o tempo gasto dentro de `alimentar`.
+    """
+
+    def __init__(self, campos: Optional[Iterable[str]] = None, usar_dados_estruturados: bool = DADOS_ESTRUTURADOS_ATIVO):
+        self.campos = tuple(c for c in CAMPOS_PRODUTO if campos is None or c in campos)
+        self.dados = {
+            "titulo": "N/A",
+            "bullet_points": [],
+            "caracteristicas": {},
+            "cor": "N/A",
+            "descricao": "N/A"
+        }
+        self.fontes: Dict[str, Optional[str]] = {}
+        self.texto_medido = True
+        self.bytes_recebidos = 0
+        self.segundos_processando = 0.0
+        self.inicio_html = b""
+        self.tamanho_texto = 0
+        self.total_h1 = 0
+        self.amostra_texto = ""
+
+        self._pilha: List[tuple] = []  # (tag, _Captura ou None)
+        self._capturas: List[_Captura] = []  # capturas abertas (recebem o texto)
+        self._pendente: List[str] = []  # texto ainda não associado a um nó
+        self._ignorando = 0  # profundidade dentro de subárvores ignoradas
+        self._secao: Optional[str] = None
+        self._secoes_vistas = set()
+        self._titulo_pagina: Optional[str] = None
+        self._aguardando_cor = False
+        self._cor_encontrada = "cor" not in self.campos  # sem a cor, o texto nem é examinado
+        self._finalizado = False
+        self._parser = None
+        self._decodificador = None
+
+        self._usar_dados_estruturados = usar_dados_estruturados
+        self._campos_html = set(self.campos)  # campos ainda a cargo das regras de HTML
+        self._concluidos = set()  # campos que nada mais na página vai mudar
+        # Enquanto o estado inicial (fonte de maior prioridade, no fim da página) pode
+        # chegar, qualquer campo ainda pode ser sobrescrito por ele
+        self._aguardando_estado_inicial = usar_dados_estruturados
+        self._script: Optional[_Captura] = None  # script JSON sendo lido pelo tokenizador
+
+    # ============================================
+    # Entrada
+    # ============================================
+
+    def processar(self, conteudo: bytes) -> Dict:
+        """
+        Extrai de um documento completo.
+
+        Com selectolax instalado, o parse fica todo no lexbor (C) e a passagem
+        percorre a árvore pronta; senão o HTML vai para o tokenizador.
+        """
+        if SELECTOLAX_DISPONIVEL:
+            self.bytes_recebidos = len(conteudo)
+            self.inicio_html = conteudo[:_INICIO_HTML]
+            cronometro = Cronometro(EXTRATOR_SEGUNDOS)
+            arvore = LexborHTMLParser(conteudo)
+            cronometro.marcar(extrator="parse_lexbor")
+            blocos = ()
+            if self._usar_dados_estruturados:
+                blocos = blocos_json(arvore)
+                cronometro.marcar(extrator="dados_estruturados")
+            self.processar_arvore(arvore, blocos)
+            if self.texto_medido:
+                cronometro.marcar(extrator="html")
+        else:
+            self.alimentar(conteudo)
+        return self.finalizar()
+
+    def processar_arvore(self, arvore, blocos: Iterable[Tuple[Dict, str]] = (), ate_completar: bool = False) -> Dict:
+        """
+        Extrai de uma árvore do lexbor já montada, com os blocos JSON da
+        página já decodificados por `blocos_json`. Árvore e blocos não são
+        alterados: quem os guarda extrai outros campos sem novo parse.
+
+        Com `ate_completar`, a passagem para assim que os `campos` pedidos
+        estão prontos (os contadores de diagnóstico ficam parciais).
+        """
+        for campos, fonte in blocos:
+            self._aplicar(campos, fonte)
+        # Todo o JSON da página já foi lido: nada mais sobrescreve o HTML
+        self._aguardando_estado_inicial = False
+        if self._campos_html:
+            self._percorrer_arvore(arvore.root, ate_completar)
+        else:
+            # O JSON cobriu todos os campos: o HTML nem é percorrido
+            self.texto_medido = False
+        return self.finalizar()
+
+    def alimentar(self, pedaco: bytes):
+        """Processa mais um pedaço do HTML (parse incremental)"""
+        if not pedaco:
+            return
+        inicio = time.perf_counter()
+        self.bytes_recebidos += len(pedaco)
+        if len(self.inicio_html) < _INICIO_HTML:
+            self.inicio_html += pedaco[:_INICIO_HTML - len(self.inicio_html)]
+        if self._parser is None:
+            if LXML_DISPONIVEL:
+                self._parser = etree.HTMLParser(target=self, recover=True)
+            else:
+                self._parser = _TokenizadorPadrao(self)
+                self._decodificador = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        if self._decodificador is None:
+            self._parser.feed(pedaco)
+        else:
+            self._parser.feed(self._decodificador.decode(pedaco))
+        self.segundos_processando += time.perf_counter() - inicio
+
+    @property
+    def completo(self) -> bool:
+        """Todos os campos pedidos já foram extraídos (o resto da página é dispensável)"""
+        return not self._aguardando_estado_inicial and self._concluidos.issuperset(self.campos)
+
+    def finalizar(self) -> Dict:
+        """Encerra o parse e retorna os dados extraídos"""
+        if self._finalizado:
+            return self.dados
+        self._finalizado = True
+
+        if self._decodificador is not None:
+            self._parser.feed(self._decodificador.decode(b"", final=True))
+            self._parser.close()
+        elif self._parser is not None:
+            try:
+                self._parser.close()
+            except etree.XMLSyntaxError:
+                # Documento vazio ou truncado: vale o que já foi extraído
+                pass
+        self.close()
+        self.fontes = {
+            campo: self.fontes.get(campo) or (FONTE_HTML if self.dados[campo] not in ("N/A", [], {}) else None)
+            for campo in self.campos
+        }
+        return self.dados
+
+    def _aplicar(self, campos: Dict, fonte: str):
+        """Usa os campos vindos do JSON, respeitando a prioridade entre as fontes"""
+        for campo, valor in campos.items():
+            atual = self.fontes.get(campo)
+            if atual is not None and PRIORIDADE_FONTES[atual] > PRIORIDADE_FONTES[fonte]:
+                continue
+            self.dados[campo] = valor
+            self.fontes[campo] = fonte
+            self._campos_html.discard(campo)
+            self._concluidos.add(campo)
+            if campo == self._secao:
+                self._secao = None
+        if "cor" not in self._campos_html:
+            self._cor_encontrada = True
+        if fonte == FONTE_ESTADO_INICIAL:
+            # O JSON-LD vem antes dele nas páginas do ML: daqui em diante nada sobrescreve o que já foi extraído
+            self._aguardando_estado_inicial = False
+
+    def _percorrer_arvore(self, raiz, ate_completar: bool = False):
+        """
+        Passagem sobre a árvore do lexbor, sem recursão.
+
+        Equivale a emitir start/data/end para cada nó, mas só chama as regras
+        de extração para os elementos que podem interessar (h1, h2, title e
+        os de dentro de uma seção aberta). Com `ate_completar`, termina no
+        primeiro fechamento que deixa o extrator `completo`.
+        """
+        if raiz is None:
+            return
+        pilha = self._pilha
+        capturas = self._capturas
+        no = raiz
+        while True:
+            tag = no.tag
+            if tag == "-text":
+                # Nó de texto inteiro: dispensa o buffer do tokenizador
+                texto = no.text_content
+                if capturas or not self._cor_encontrada or len(self.amostra_texto) < _AMOSTRA_TEXTO:
+                    self._receber_texto(texto)
+                else:
+                    self.tamanho_texto += len(texto)
+            elif tag[0] != "-" and tag not in _TAGS_VAZIAS:
+                if tag in _TAGS_CABECALHO or self._secao is not None:
+                    captura = self._abrir(tag, no.attrs)
+                else:
+                    captura = None
+                filho = no.child
+                # Subárvores ignoradas nem são visitadas (atributos só são lidos para <section>)
+                ignorar = tag in _TAGS_IGNORADAS or (tag == "section" and _ignorar(tag, no.attrs))
+                if filho is not None and not ignorar:
+                    pilha.append((tag, captura))
+                    no = filho
+                    continue
+                if captura is not None:
+                    self._fechar(tag, captura)
+                    if ate_completar and self.completo:
+                        return
+
+            # Sem filhos: próximo irmão, subindo (e fechando) os ancestrais sem irmãos
+            proximo = no.next
+            while proximo is None:
+                no = no.parent
+                if no is None or no.tag[0] == "-":
+                    return
+                tag, captura = pilha.pop()
+                if captura is not None:
+                    self._fechar(tag, captura)
+                    if ate_completar and self.completo:
+                        return
+                proximo = no.next
+            no = proximo
+
+    # ============================================
+    # Eventos (interface "target" do lxml)
+    # ============================================
+
+    def start(self, tag: str, atributos):
+        if self._pendente:
+            self._descarregar()
+        if tag in _TAGS_VAZIAS:
+            return
+        if self._ignorando:
+            captura = None
+        elif tag == "script" and self._usar_dados_estruturados:
+            captura = self._abrir_script(atributos)
+            self._ignorando += 1
+        elif _ignorar(tag, atributos):
+            self._ignorando += 1
+            captura = _IGNORADA
+        else:
+            captura = self._abrir(tag, atributos)
+        self._pilha.append((tag, captura))
+
+    def end(self, tag: str):
+        if self._pendente:
+            self._descarregar()
+        pilha = self._pilha
+        if pilha and pilha[-1][0] == tag:
+            self._fechar(*pilha.pop())
+            return
+        if tag in _TAGS_VAZIAS:
+            return
+
+        # HTML malformado pode deixar tags abertas: fecha até a correspondente
+        for indice in range(len(pilha) - 2, -1, -1):
+            if pilha[indice][0] == tag:
+                break
+        else:
+            return
+        while len(pilha) > indice:
+            self._fechar(*pilha.pop())
+
+    def _fechar(self, tag: str, captura: Optional[_Captura]):
+        if captura is _IGNORADA:
+            self._ignorando -= 1
+        elif captura is not None and captura is self._script:
+            self._ignorando -= 1
+            self._script = None
+            self._concluir_script(captura)
+        elif captura is not None:
+            self._capturas.remove(captura)
+            self._concluir(captura)
+
+    def data(self, texto: str):
+        self._pendente.append(texto)
+
+    def close(self):
+        if self._pendente:
+            self._descarregar()
+        while self._pilha:
+            self.end(self._pilha[-1][0])
+        if self.dados["titulo"] == "N/A" and self._titulo_pagina and "titulo" in self._campos_html:
+            self.dados["titulo"] = self._titulo_pagina[:200]
+
+    # ============================================
+    # Regras de extração
+    # ============================================
+
+    def _abrir_script(self, atributos) -> _Captura:
+        """No tokenizador, scripts são marcados para leitura do JSON (ou só ignorados)"""
+        if atributos.get("src"):
+            tipo = "script"
+        elif dados_estruturados.eh_script_json_ld(atributos):
+            tipo = "json_ld"
+        elif dados_estruturados.eh_script_estado_inicial(atributos):
+            tipo = "estado_inicial"
+        elif atributos.get("type") in (None, "", "text/javascript"):
+            tipo = "script_talvez_estado"  # decide pelo começo do texto
+        else:
+            tipo = "script"
+        self._script = _Captura(tipo)
+        return self._script
+
+    def _concluir_script(self, captura: _Captura):
+        if captura.tipo == "json_ld":
+            self._aplicar(dados_estruturados.de_json_ld(captura.texto()), FONTE_JSON_LD)
+        elif captura.tipo == "estado_inicial":
+            self._aplicar(dados_estruturados.do_estado_inicial(captura.texto()), FONTE_ESTADO_INICIAL)
+
+    def _abrir(self, tag: str, atributos) -> Optional[_Captura]:
+        """Decide se o elemento que abre guarda texto (e passa a receber o texto)"""
+        captura = None
+        campos_html = self._campos_html
+        if tag == "h1":
+            self.total_h1 += 1
+            if self.total_h1 == 1 and "titulo" in campos_html:
+                captura = _Captura("titulo")
+        elif tag == "h2":
+            captura = _Captura("h2")
+        elif tag == "title":
+            if self._titulo_pagina is None and "titulo" in campos_html:
+                captura = _Captura("title")
+        elif self._secao is not None:
+            captura = self._captura_da_secao(tag, atributos)
+
+        if captura is not None:
+            self._capturas.append(captura)
+        return captura
+
+    def _captura_da_secao(self, tag: str, atributos) -> Optional[_Captura]:
+        """Elementos que guardam texto dentro da seção aberta pelo último h2"""
+        secao = self._secao
+        if secao == "bullet_points":
+            if tag == "li" and self._abertas("lista_bullets"):
+                return _Captura("bullet")
+            if tag == "ul" and _CLASSE_LISTA_BULLETS.search(atributos.get("class") or ""):
+                return _Captura("lista_bullets")
+        elif secao == "caracteristicas":
+            linha = self._abertas("chave_valor") or self._abertas("linha_tabela")
+            if linha is not None:
+                tags_celula = ("span",) if linha.tipo == "chave_valor" else ("th", "td")
+                if tag in tags_celula:
+                    return _Captura("celula", dono=linha)
+            elif tag == "tr":
+                return _Captura("linha_tabela")
+            elif tag == "div" and _CLASSE_CHAVE_VALOR.search(atributos.get("class") or ""):
+                return _Captura("chave_valor")
+        elif secao == "descricao":
+            if tag in _TAGS_DESCRICAO and self.dados["descricao"] == "N/A" and not self._abertas("descricao"):
+                return _Captura("descricao")
+        return None
+
+    def _abertas(self, tipo: str) -> Optional[_Captura]:
+        for captura in reversed(self._capturas):
+            if captura.tipo == tipo:
+                return captura
+        return None
+
+    def _concluir(self, captura: _Captura):
+        tipo = captura.tipo
+        dados = self.dados
+
+        if tipo == "celula":
+            texto = captura.texto()
+            captura.dono.celulas.append(texto)
+
+        elif tipo in ("chave_valor", "linha_tabela"):
+            celulas = captura.celulas
+            if len(celulas) >= 2 and "caracteristicas" in self._campos_html:
+                chave, valor = celulas[0], celulas[1]
+                if chave and valor and len(chave) < 100 and len(valor) < 200:
+                    dados["caracteristicas"][chave.rstrip(":")] = valor
+
+        elif tipo == "bullet":
+            texto = captura.texto()
+            if 10 < len(texto) < 500 and texto not in dados["bullet_points"] and "bullet_points" in self._campos_html:
+                dados["bullet_points"].append(texto)
+
+        elif tipo == "lista_bullets":
+            # Só a primeira lista da seção
+            self._secao = None
+            self._concluidos.add("bullet_points")
+
+        elif tipo == "descricao":
+            texto = captura.texto()
+            if len(texto) > 30 and "descricao" in self._campos_html:
+                dados["descricao"] = texto[:500]
+                self._secao = None
+                self._concluidos.add("descricao")
+
+        elif tipo == "secao_descricao":
+            # Fallback: todo o conteúdo do bloco da descrição
+            texto = captura.texto()
+            if dados["descricao"] == "N/A" and len(texto) > 100 and "descricao" in self._campos_html:
+                dados["descricao"] = texto[:500]
+                self._concluidos.add("descricao")
+
+        elif tipo == "h2":
+            self._iniciar_secao(captura.texto())
+
+        elif tipo == "titulo":
+            titulo = captura.texto()[:200]
+            if titulo and "titulo" in self._campos_html:
+                dados["titulo"] = titulo
+                self._concluidos.add("titulo")
+
+        elif tipo == "title":
+            self._titulo_pagina = _SUFIXO_TITULO.sub("", captura.texto())
+
+    def _iniciar_secao(self, texto_h2: str):
+        """Um h2 abre a seção que o texto dele indica (e encerra a anterior)"""
+        if self._secao == "caracteristicas":
+            # As características terminam onde começa a próxima seção
+            self._concluidos.add("caracteristicas")
+
+        match = _SECOES_H2.search(texto_h2)
+        secao = match.lastgroup if match else None
+        if secao in self._secoes_vistas or secao not in self._campos_html:
+            secao = None
+        self._secao = secao
+        if secao is None:
+            return
+
+        self._secoes_vistas.add(secao)
+        if secao == "descricao" and self._pilha:
+            # O bloco que contém o h2 também é capturado, para o fallback
+            tag, captura = self._pilha[-1]
+            if captura is None:
+                captura = _Captura("secao_descricao")
+                self._pilha[-1] = (tag, captura)
+                self._capturas.append(captura)
+
+    def _descarregar(self):
+        """Associa o texto pendente do tokenizador a um nó de texto"""
+        texto = "".join(self._pendente)
+        self._pendente.clear()
+        if self._script is not None:
+            self._receber_script(texto)
+        elif not self._ignorando:
+            self._receber_texto(texto)
+
+    def _receber_script(self, texto: str):
+        script = self._script
+        if script.tipo == "script_talvez_estado":
+            # Só o começo do script diz se é o estado inicial; os demais não são guardados
+            script.tipo = "estado_inicial" if dados_estruturados.eh_script_estado_inicial({}, texto[:100]) else "script"
+        if script.tipo in ("json_ld", "estado_inicial"):
+            script.partes.append(texto)
+
+    def _receber_texto(self, texto: str):
+        self.tamanho_texto += len(texto)
+        if len(self.amostra_texto) < _AMOSTRA_TEXTO:
+            self.amostra_texto += texto[:_AMOSTRA_TEXTO - len(self.amostra_texto)]
+
+        limpo = texto.strip()
+        if not limpo:
+            return
+        for captura in self._capturas:
+            captura.partes.append(limpo)
+        if not self._cor_encontrada:
+            self._procurar_cor(limpo)
+
+    def _procurar_cor(self, texto: str):
+        if self._aguardando_cor:
+            self._aguardando_cor = False
+            self._aceitar_cor(texto)
+            return
+
+        if len(texto) > _COR_ROTULO_MAX:
+            return
+        rotulo = _COR_ROTULO.match(texto)
+        if rotulo is None:
+            return
+        valor = rotulo.group(1).strip()
+        if valor:
+            self._aceitar_cor(valor)
+        else:
+            self._aguardando_cor = True
+
+    def _aceitar_cor(self, texto: str):
+        match = _COR_VALOR.match(texto)
+        if not match:
+            return
+        cor = match.group(1).strip()
+        if len(cor) < 50 and not any(palavra in cor.lower() for palavra in _COR_EXCLUIR):
+            self.dados["cor"] = cor
+            self._cor_encontrada = True
+            self._concluidos.add("cor")
+
+
+class _TokenizadorPadrao(HTMLParser):
+    """Adapta o html.parser da biblioteca padrão à interface target (sem lxml)"""
+
+    def __init__(self, alvo: ExtratorPassagemUnica):
+        super().__init__(convert_charrefs=True)
+        self.alvo = alvo
+
+    def handle_starttag(self, tag, attrs):
+        self.alvo.start(tag, dict(attrs))
+
+    def handle_startendtag(self, tag, attrs):
+        self.alvo.start(tag, dict(attrs))
+        self.alvo.end(tag)
+
+    def handle_endtag(self, tag):
+        self.alvo.end(tag)
+
+    def handle_data(self, data):
+        self.alvo.data(data)
+
+
+def blocos_json(arvore) -> List[Tuple[Dict, str]]:
+    """Decodifica os blocos JSON-LD e o estado inicial da árvore: (campos, fonte), na ordem da página"""
+    blocos = []
+    for script in arvore.css("script:not([src])"):
+        atributos = script.attrs
+        if dados_estruturados.eh_script_json_ld(atributos):
+            blocos.append((dados_estruturados.de_json_ld(script.text()), FONTE_JSON_LD))
+        elif atributos.get("type") in (None, "", "text/javascript", "application/json"):
+            texto = script.text()
+            if dados_estruturados.eh_script_estado_inicial(atributos, texto[:100]):
+                blocos.append((dados_estruturados.do_estado_inicial(texto), FONTE_ESTADO_INICIAL))
+    return blocos
+
+
+def extrair_passagem_unica(conteudo: bytes, logs: List[str], campos: Optional[Iterable[str]] = None) -> Dict:
+    """
+    Extrai os dados do produto com o motor de passagem única.
+
+    Args:
+        conteudo: HTML da página do produto (bytes)
+        logs: Lista onde as mensagens de debug são acumuladas
+        campos: Campos a extrair (None = todos); os outros ficam vazios
+
+    Returns:
+        Dict com titulo, bullet_points, caracteristicas, cor, descricao e
+        fontes (de onde veio cada campo)
+    """
+    extrator = ExtratorPassagemUnica(campos)
+    extrator.processar(conteudo)
+    return resultado_extracao(extrator, logs)
+
+
+def resultado_extracao(extrator: ExtratorPassagemUnica, logs: List[str]) -> Dict:
+    """Finaliza o extrator, registra o diagnóstico e monta o dict de resposta (com fontes)"""
+    dados = extrator.finalizar()
+    registrar_diagnostico(extrator, logs)
+    return {**dados, "fontes": dict(extrator.fontes)}
+
+
+def registrar_diagnostico(extrator: ExtratorPassagemUnica, logs: List[str]):
+    """Mesmas mensagens de debug dos extratores DOM, a partir dos contadores da passagem"""
+    dados = extrator.dados
+    if extrator.texto_medido:
+        print(f"[DEBUG] Page text length: {extrator.tamanho_texto} caracteres")
+        print(f"[DEBUG] Total de h1s encontrados: {extrator.total_h1}")
+        logs.append(f"Page text length: {extrator.tamanho_texto} caracteres")
+        logs.append(f"H1 elements found: {extrator.total_h1}")
+    logs.append(f"HTML snippet: {extrator.inicio_html.decode('utf-8', errors='ignore')}")
+
+    fontes = ", ".join(f"{campo}={fonte or 'não encontrado'}" for campo, fonte in extrator.fontes.items())
+    print(f"[DEBUG] Fontes dos campos: {fontes}")
+    logs.append(f"Fontes dos campos: {fontes}")
+
+    if extrator.texto_medido and extrator.tamanho_texto < 1000:
+        logs.append("⚠️ AVISO: Página retornou com conteúdo muito pequeno - pode estar bloqueada!")
+        logs.append(f"Content: {extrator.amostra_texto}")
+
+    if dados["titulo"] != "N/A":
+        print(f"[OK] Título encontrado: {dados['titulo'][:50]}...")
+        logs.append(f"Título: {dados['titulo'][:50]}...")
+    if dados["bullet_points"]:
+        print(f"[OK] {len(dados['bullet_points'])} bullet points encontrados")
+    if dados["caracteristicas"]:
+        print(f"[OK] {len(dados['caracteristicas'])} características encontradas")
+    if dados["cor"] != "N/A":
+        print(f"[OK] Cor: {dados['cor']}")
+        logs.append(f"Cor: {dados['cor']}")
+    if dados["descricao"] != "N/A":
+        print(f"[OK] Descrição: {len(dados['descricao'])} caracteres")
+
+
+class PaginaProduto:
+    """
+    Página de produto já baixada, com os campos extraídos sob demanda:
+
+        pagina = PaginaProduto(html)
+        pagina.cor          # só as regras da cor rodam
+        pagina.para_dict()  # mesmo formato de `extrair_passagem_unica`
+
+    O documento é parseado uma vez só, no primeiro acesso: a árvore do
+    lexbor e os blocos JSON decodificados ficam guardados, e cada campo
+    roda só as próprias regras sobre eles (campos que vieram do JSON nem
+    percorrem a árvore). O resultado é o mesmo de `extrair_passagem_unica`.
+    Sem selectolax não há árvore para guardar: o primeiro acesso extrai
+    todos os campos. Os campos são devolvidos como cópias: alterá-los não
+    muda a página.
+    """
+
+    def __init__(self, conteudo: bytes, url: Optional[str] = None):
+        self.conteudo = conteudo
+        self.url = url
+        self._arvore = None
+        self._blocos: List[Tuple[Dict, str]] = []
+        self._dados: Dict = {}
+        self._fontes: Dict[str, Optional[str]] = {}
+
+    @property
+    def titulo(self) -> str:
+        return self._campo("titulo")
+
+    @property
+    def bullet_points(self) -> List[str]:
+        return self._campo("bullet_points")
+
+    @property
+    def caracteristicas(self) -> Dict[str, str]:
+        return self._campo("caracteristicas")
+
+    @property
+    def cor(self) -> str:
+        return self._campo("cor")
+
+    @property
+    def descricao(self) -> str:
+        return self._campo("descricao")
+
+    @property
+    def fontes(self) -> Dict[str, Optional[str]]:
+        """Fonte de cada campo já extraído (estado_inicial, json_ld, html ou None)"""
+        return dict(self._fontes)
+
+    def para_dict(self) -> Dict:
+        """Todos os campos, com fontes (os que faltam são extraídos numa passagem só)"""
+        faltantes = tuple(campo for campo in CAMPOS_PRODUTO if campo not in self._dados)
+        if faltantes:
+            self._extrair(faltantes)
+        dados = {campo: copy.deepcopy(self._dados[campo]) for campo in CAMPOS_PRODUTO}
+        return {**dados, "fontes": {campo: self._fontes[campo] for campo in CAMPOS_PRODUTO}}
+
+    def _campo(self, campo: str):
+        if campo not in self._dados:
+            self._extrair((campo,))
+        return copy.deepcopy(self._dados[campo])
+
+    def _extrair(self, campos: Tuple[str, ...]):
+        cronometro = Cronometro(EXTRATOR_SEGUNDOS)
+        if not SELECTOLAX_DISPONIVEL:
+            extrator = ExtratorPassagemUnica()
+            extrator.processar(self.conteudo)
+            campos = CAMPOS_PRODUTO
+        else:
+            extrator = ExtratorPassagemUnica(campos)
+            if self._arvore is None:
+                self._arvore = LexborHTMLParser(self.conteudo)
+                if extrator._usar_dados_estruturados:
+                    self._blocos = blocos_json(self._arvore)
+            extrator.processar_arvore(self._arvore, self._blocos, ate_completar=True)
+        cronometro.marcar(extrator="pagina_produto")
+        for campo in campos:
+            self._dados[campo] = extrator.dados[campo]
+            self._fontes[campo] = extrator.fontes[campo]
@@ -0,0 +1,236 @@
+"""
+Métricas do scraper no formato de texto do Prometheus
+Histogramas de cada etapa do scraping (download, bytes baixados, parsing,
+extratores, screenshots) e contadores de cache, sinais de bloqueio e
+erros, expostos em GET /metrics pela api.py e pelo server_local.py.
+
+Sem dependências: cada métrica guarda, por combinação de rótulos, as
+contagens acumuladas por faixa, a soma e o total de observações. Os
+valores são do processo: com várias instâncias, o Prometheus coleta
+cada uma; com SCRAPER_POOL_TIPO=process, o que roda nos processos do
+pool não aparece aqui.
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Tuple
+
+
+METRICAS_ATIVAS = os.getenv("METRICAS_ATIVAS", "true").lower() == "true"
+
+TIPO_CONTEUDO = "text/plain; version=0.0.4; charset=utf-8"
+
+# Faixas (limite superior) dos histogramas
+FAIXAS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+FAIXAS_EXTRATOR_SEGUNDOS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+FAIXAS_BYTES = tuple(1024 * 2 ** n for n in range(4, 13))  # 16 KB a 4 MB
+_FAIXA_INFINITA = 'le="+Inf"'
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _formatar_rotulos(nomes: Tuple[str, ...], valores: Tuple, extra: str = "") -> str:
+    pares = [f'{nome}="{_escapar(valor)}"' for nome, valor in zip(nomes, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+def _formatar_numero(valor: float) -> str:
+    if valor == float("inf"):
+        return "+Inf"
+    return repr(float(valor)) if isinstance(valor, float) and not valor.is_integer() else str(int(valor))
+
+
+def tipo_do_erro(e: BaseException) -> str:
+    """Rótulo `tipo` de um erro: "HTTP <status>" quando há resposta, senão o nome da exceção"""
+    status = getattr(getattr(e, "response", None), "status_code", None)
+    return f"HTTP {status}" if status is not None else type(e).__name__
+
+
+class _Metrica:
+    tipo = ""
+
+    def __init__(self, nome: str, ajuda: str, rotulos: Iterable[str] = ()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self._series = {}  # valores dos rótulos -> estado da série
+        self._lock = threading.Lock()
+
+    def _chave(self, rotulos: Dict) -> Tuple:
+        try:
+            if len(rotulos) == len(self.rotulos):
+                return tuple([rotulos[nome] for nome in self.rotulos])
+        except KeyError:
+            pass
+        raise ValueError(f"{self.nome}: rótulos esperados {self.rotulos}, recebidos {tuple(rotulos)}")
+
+    def exportar(self) -> List[str]:
+        linhas = [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} {self.tipo}"]
+        with self._lock:
+            series = sorted(self._series.items(), key=lambda item: tuple(map(str, item[0])))
+            linhas.extend(linha for chave, estado in series for linha in self._linhas(chave, estado))
+        return linhas
+
+    def _linhas(self, chave: Tuple, estado) -> List[str]:
+        raise NotImplementedError
+
+
+class Contador(_Metrica):
+    """Contador só crescente, por combinação de rótulos"""
+
+    tipo = "counter"
+
+    def incrementar(self, valor: float = 1, **rotulos):
+        if not METRICAS_ATIVAS:
+            return
+        chave = self._chave(rotulos)
+        with self._lock:
+            self._series[chave] = self._series.get(chave, 0) + valor
+
+    def _linhas(self, chave: Tuple, estado) -> List[str]:
+        return [f"{self.nome}_total{_formatar_rotulos(self.rotulos, chave)} {_formatar_numero(estado)}"]
+
+
+class Histograma(_Metrica):
+    """Distribuição de valores em faixas acumuladas (mais soma e contagem), por combinação de rótulos"""
+
+    tipo = "histogram"
+
+    def __init__(self, nome: str, ajuda: str, rotulos: Iterable[str] = (), faixas: Iterable[float] = FAIXAS_SEGUNDOS):
+        super().__init__(nome, ajuda, rotulos)
+        self.faixas = tuple(sorted(faixas))
+
+    def observar(self, valor: float, **rotulos):
+        if not METRICAS_ATIVAS:
+            return
+        chave = self._chave(rotulos)
+        with self._lock:
+            estado = self._series.get(chave)
+            if estado is None:
+                estado = self._series[chave] = [[0] * len(self.faixas), 0.0, 0]
+            faixa = bisect_left(self.faixas, valor)
+            if faixa < len(self.faixas):
+                estado[0][faixa] += 1
+            estado[1] += valor
+            estado[2] += 1
+
+    @contextmanager
+    def cronometrar(self, **rotulos):
+        """Observa a duração do bloco em segundos (também quando ele levanta exceção)"""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(time.perf_counter() - inicio, **rotulos)
+
+    def _linhas(self, chave: Tuple, estado) -> List[str]:
+        contagens, soma, total = estado
+        linhas = []
+        acumulado = 0
+        for limite, contagem in zip(self.faixas, contagens):
+            acumulado += contagem
+            rotulos = _formatar_rotulos(self.rotulos, chave, f'le="{_formatar_numero(limite)}"')
+            linhas.append(f"{self.nome}_bucket{rotulos} {acumulado}")
+        linhas.append(f"{self.nome}_bucket{_formatar_rotulos(self.rotulos, chave, _FAIXA_INFINITA)} {total}")
+        linhas.append(f"{self.nome}_sum{_formatar_rotulos(self.rotulos, chave)} {_formatar_numero(soma)}")
+        linhas.append(f"{self.nome}_count{_formatar_rotulos(self.rotulos, chave)} {total}")
+        return linhas
+
+
+class Cronometro:
+    """
+    Mede trechos seguidos de código num histograma:
+
+        cronometro = Cronometro(EXTRATOR_SEGUNDOS)
+        ...  # extrai o título
+        cronometro.marcar(extrator="titulo")  # tempo desde a criação
+        ...  # extrai a cor
+        cronometro.marcar(extrator="cor")     # tempo desde a marca anterior
+    """
+
+    def __init__(self, histograma: Histograma):
+        self.histograma = histograma
+        self._marca = time.perf_counter()
+
+    def marcar(self, **rotulos):
+        agora = time.perf_counter()
+        self.histograma.observar(agora - self._marca, **rotulos)
+        self._marca = agora
+
+
+# ============================================
+# Métricas do scraper
+# ============================================
+
+PRODUTO_SEGUNDOS = Histograma(
+    "scraper_produto_segundos",
+    "Tempo para obter os dados de texto de um produto, por origem (cache, download ou agrupada)",
+    ("origem",)
+)
+ESPERA_TAXA_SEGUNDOS = Histograma(
+    "scraper_espera_taxa_segundos",
+    "Espera pela vez do host no controle de taxa antes do download"
+)
+DOWNLOAD_SEGUNDOS = Histograma(
+    "scraper_download_segundos",
+    "Tempo de rede de uma tentativa de download (sem o parsing feito durante o streaming)",
+    ("modo",)
+)
+DOWNLOAD_BYTES = Histograma(
+    "scraper_download_bytes",
+    "Bytes da página recebidos por download",
+    ("modo",),
+    FAIXAS_BYTES
+)
+PARSE_SEGUNDOS = Histograma(
+    "scraper_parse_segundos",
+    "Tempo de parsing + extração de uma página",
+    ("motor",)
+)
+EXTRATOR_SEGUNDOS = Histograma(
+    "scraper_extrator_segundos",
+    "Tempo de cada extrator (um por campo nos extratores DOM; parse_lexbor, dados_estruturados e html no motor de passagem única; pagina_produto nas extrações sob demanda)",
+    ("extrator",),
+    FAIXAS_EXTRATOR_SEGUNDOS
+)
+SCREENSHOTS_SEGUNDOS = Histograma(
+    "scraper_screenshots_segundos",
+    "Tempo da captura de screenshots de um produto"
+)
+CACHE = Contador(
+    "scraper_cache",
+    "Consultas ao cache de produtos por resultado (hit, miss, ignorado)",
+    ("resultado",)
+)
+SINAIS = Contador(
+    "scraper_sinais",
+    "Respostas por host e sinal do controle de taxa (ok, bloqueio, pagina_curta, erro, neutro)",
+    ("host", "sinal")
+)
+ERROS = Contador(
+    "scraper_erros",
+    "Erros por etapa e tipo (status HTTP ou exceção); a etapa tentativa conta cada tentativa de download que falhou",
+    ("etapa", "tipo")
+)
+CAMPOS = Contador(
+    "scraper_campos",
+    "Campos extraídos de páginas baixadas, por fonte (estado_inicial, json_ld, html, nao_encontrado)",
+    ("campo", "fonte")
+)
+
+_METRICAS = (
+    PRODUTO_SEGUNDOS, ESPERA_TAXA_SEGUNDOS, DOWNLOAD_SEGUNDOS, DOWNLOAD_BYTES, PARSE_SEGUNDOS,
+    EXTRATOR_SEGUNDOS, SCREENSHOTS_SEGUNDOS, CACHE, SINAIS, ERROS, CAMPOS
+)
+
+
+def exportar_metricas() -> str:
+    """Todas as métricas no formato de texto do Prometheus (corpo do GET /metrics)"""
+    return "\n".join(linha for metrica in _METRICAS for linha in metrica.exportar()) + "\n"
@@ -0,0 +1,393 @@
+"""
+Pool de navegadores headless para a captura de screenshots
+Mantém instâncias do Chrome (Selenium) abertas entre capturas, em vez de
+instalar o driver, abrir o navegador e fechá-lo a cada produto:
+
+- tamanho máximo configurável (instâncias criadas sob demanda ou no aquecimento)
+- verificação de saúde antes de emprestar (instância travada é descartada)
+- reciclagem depois de N páginas (o Chrome acumula memória com o tempo)
+- contexto limpo por trabalho: aba nova, e cookies / storage apagados na devolução
+
+`aguardar_pagina_pronta` substitui esperas fixas (time.sleep) por sinais
+reais de prontidão da página.
+
+Com SCRAPER_POOL_TIPO=process cada worker tem o seu pool.
+"""
+
+import atexit
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+
+NAVEGADORES_POOL_TAMANHO = int(os.getenv("NAVEGADORES_POOL_TAMANHO", 2))
+NAVEGADORES_PAGINAS_POR_INSTANCIA = int(os.getenv("NAVEGADORES_PAGINAS_POR_INSTANCIA", 50))
+NAVEGADORES_ESPERA_MAX = float(os.getenv("NAVEGADORES_ESPERA_MAX", 30))
+NAVEGADORES_AQUECER = os.getenv("NAVEGADORES_AQUECER", "false").lower() == "true"
+
+# Rede considerada ociosa quando nenhum recurso novo começa a carregar nesse intervalo
+REDE_OCIOSA_MS = int(os.getenv("REDE_OCIOSA_MS", 500))
+_INTERVALO_VERIFICACAO = 0.1
+
+_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+
+_caminho_driver = None
+_caminho_driver_lock = threading.Lock()
+
+
+class NavegadorIndisponivel(Exception):
+    """Nenhum navegador do pool ficou livre dentro do tempo de espera"""
+
+
+def _instalar_driver() -> str:
+    """Caminho do chromedriver (webdriver-manager consultado uma vez por processo)"""
+    global _caminho_driver
+
+    if _caminho_driver is None:
+        with _caminho_driver_lock:
+            if _caminho_driver is None:
+                from webdriver_manager.chrome import ChromeDriverManager
+                _caminho_driver = ChromeDriverManager().install()
+    return _caminho_driver
+
+
+def criar_navegador():
+    """Abre um Chrome headless com as opções usadas nas capturas"""
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service
+
+    chrome_options = Options()
+    chrome_options.add_argument('--headless')
+    chrome_options.add_argument('--no-sandbox')
+    chrome_options.add_argument('--disable-dev-shm-usage')
+    chrome_options.add_argument('--start-maximized')
+    chrome_options.add_argument('--disable-blink-features=AutomationControlled')
+    chrome_options.add_argument(f'user-agent={_USER_AGENT}')
+    # driver.get volta no DOMContentLoaded; o resto da espera é feito por aguardar_pagina_pronta
+    chrome_options.page_load_strategy = 'eager'
+
+    service = Service(_instalar_driver())
+    return webdriver.Chrome(service=service, options=chrome_options)
+
+
+# Um único round-trip ao navegador por verificação
+_JS_PRONTIDAO = """
+const seletor = arguments[0], todaPagina = arguments[1];
+performance.setResourceTimingBufferSize(10000);
+const altura = window.innerHeight;
+let imagensPendentes = 0;
+for (const img of document.images) {
+    const r = img.getBoundingClientRect();
+    if (r.width === 0 || r.height === 0) continue;
+    if (!todaPagina && (r.bottom < 0 || r.top > altura)) continue;
+    if (!(img.complete && img.naturalWidth > 0)) imagensPendentes++;
+}
+return {
+    dom: document.readyState !== 'loading',
+    secao: !seletor || document.querySelector(seletor) !== null,
+    imagens_pendentes: imagensPendentes,
+    recursos: performance.getEntriesByType('resource').length
+};
+"""
+
+
+def aguardar_pagina_pronta(
+    driver,
+    prazo: float,
+    seletor: Optional[str] = None,
+    toda_pagina: bool = False,
+    rede_ociosa_ms: int = REDE_OCIOSA_MS
+) -> Dict:
+    """
+    Espera a página ficar pronta para a captura, até o instante `prazo` (time.monotonic).
+
+    Pronta = DOM carregado, `seletor` presente, imagens visíveis decodificadas
+    (todas, com `toda_pagina`) e rede ociosa por `rede_ociosa_ms`.
+
+    Returns:
+        Último estado lido, com "pronta" (False quando o prazo acabou antes)
+    """
+    recursos = -1
+    ociosa_desde = time.monotonic()
+    while True:
+        estado = driver.execute_script(_JS_PRONTIDAO, seletor, toda_pagina)
+        agora = time.monotonic()
+        if estado["recursos"] != recursos:
+            recursos = estado["recursos"]
+            ociosa_desde = agora
+        estado["rede_ociosa"] = (agora - ociosa_desde) * 1000 >= rede_ociosa_ms
+        estado["pronta"] = (
+            estado["dom"] and estado["secao"] and estado["imagens_pendentes"] == 0 and estado["rede_ociosa"]
+        )
+        if estado["pronta"] or agora >= prazo:
+            return estado
+        time.sleep(min(_INTERVALO_VERIFICACAO, max(0.0, prazo - agora)))
+
+
+def capturar_pagina_inteira(driver) -> str:
+    """Screenshot da página inteira (além da janela visível) em PNG base64, via DevTools"""
+    metricas = driver.execute_cdp_cmd("Page.getLayoutMetrics", {})
+    conteudo = metricas.get("cssContentSize") or metricas["contentSize"]
+    resultado = driver.execute_cdp_cmd("Page.captureScreenshot", {
+        "format": "png",
+        "captureBeyondViewport": True,
+        "clip": {"x": 0, "y": 0, "width": conteudo["width"], "height": conteudo["height"], "scale": 1}
+    })
+    return resultado["data"]
+
+
+class _Instancia:
+    """Navegador do pool e seus contadores"""
+
+    __slots__ = ("driver", "paginas", "criado_em", "aba_base")
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.paginas = 0
+        self.criado_em = time.time()
+        self.aba_base = driver.current_window_handle
+
+    def saudavel(self) -> bool:
+        """O navegador ainda responde a comandos?"""
+        try:
+            self.driver.switch_to.window(self.aba_base)
+            return self.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def abrir_contexto(self):
+        """Aba nova para o trabalho (não herda histórico nem estado da página anterior)"""
+        self.driver.switch_to.new_window("tab")
+        return self.driver
+
+    def limpar_contexto(self):
+        """Fecha as abas do trabalho e apaga cookies e storage"""
+        driver = self.driver
+        for aba in driver.window_handles:
+            if aba == self.aba_base:
+                continue
+            driver.switch_to.window(aba)
+            try:
+                driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+            except Exception:
+                pass  # about:blank e páginas de erro não têm storage
+            driver.close()
+        driver.switch_to.window(self.aba_base)
+        driver.delete_all_cookies()
+
+    def encerrar(self):
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+
+
+class PoolNavegadores:
+    """
+    Pool de navegadores headless reaproveitados entre capturas.
+
+    Uso:
+        with obter_pool_navegadores().emprestar() as driver:
+            driver.get(url)
+            ...
+    """
+
+    def __init__(
+        self,
+        tamanho: int = NAVEGADORES_POOL_TAMANHO,
+        paginas_por_instancia: int = NAVEGADORES_PAGINAS_POR_INSTANCIA,
+        espera_max: float = NAVEGADORES_ESPERA_MAX,
+        fabrica: Callable = criar_navegador
+    ):
+        self.tamanho = max(1, tamanho)
+        self.paginas_por_instancia = paginas_por_instancia
+        self.espera_max = espera_max
+        self._fabrica = fabrica
+        # Pilha: a instância usada por último (mais "quente") sai primeiro
+        self._livres = []
+        self._lock = threading.Lock()
+        # Avisa quem espera quando uma instância é devolvida ou uma vaga abre
+        self._disponivel = threading.Condition(self._lock)
+        self._instancias = 0  # livres + emprestadas + em criação
+        self._emprestadas = 0
+        self._encerrado = False
+        self._criadas = 0
+        self._recicladas = 0
+        self._descartadas = 0
+        self._emprestimos = 0
+        self._esperas_esgotadas = 0
+        self._espera_total = 0.0
+        self._inicializacao_total = 0.0
+
+    @contextmanager
+    def emprestar(self):
+        """Empresta um navegador (aba nova) e o devolve ao pool no fim do bloco"""
+        instancia = self._obter()
+        falhou = True
+        try:
+            driver = instancia.abrir_contexto()
+            yield driver
+            falhou = False
+        finally:
+            self._devolver(instancia, falhou)
+
+    def aquecer(self, quantidade: Optional[int] = None):
+        """Abre navegadores em segundo plano até `quantidade` (padrão: o tamanho do pool)"""
+        quantidade = min(self.tamanho, quantidade or self.tamanho)
+
+        def abrir():
+            while True:
+                with self._lock:
+                    if self._encerrado or self._instancias >= quantidade:
+                        return
+                    self._instancias += 1
+                try:
+                    self._guardar(self._criar())
+                except Exception as e:
+                    self._liberar_vaga()
+                    print(f"[AVISO] Não foi possível aquecer navegador: {e}")
+                    return
+
+        threading.Thread(target=abrir, name="aquecer-navegadores", daemon=True).start()
+
+    def encerrar(self):
+        """Fecha os navegadores livres; os emprestados são fechados na devolução"""
+        with self._disponivel:
+            self._encerrado = True
+            livres, self._livres = self._livres, []
+            self._disponivel.notify_all()
+        for instancia in livres:
+            self._descartar(instancia)
+
+    def estatisticas(self) -> Dict:
+        """Instâncias abertas, reciclagens e tempos (usado em /status)"""
+        with self._lock:
+            return {
+                "tamanho": self.tamanho,
+                "paginas_por_instancia": self.paginas_por_instancia,
+                "abertos": self._instancias,
+                "em_uso": self._emprestadas,
+                "livres": len(self._livres),
+                "criados": self._criadas,
+                "reciclados": self._recicladas,
+                "descartados": self._descartadas,
+                "emprestimos": self._emprestimos,
+                "esperas_esgotadas": self._esperas_esgotadas,
+                "espera_media_ms": round(self._espera_total / self._emprestimos * 1000, 1) if self._emprestimos else 0.0,
+                "inicializacao_media_ms": round(self._inicializacao_total / self._criadas * 1000, 1) if self._criadas else 0.0
+            }
+
+    def _obter(self) -> _Instancia:
+        inicio = time.monotonic()
+        limite = inicio + self.espera_max
+        while True:
+            instancia = self._retirar(limite)
+            if instancia.saudavel():
+                break
+            print("[AVISO] Navegador do pool não responde: descartado")
+            self._descartar(instancia)
+
+        with self._lock:
+            self._emprestadas += 1
+            self._emprestimos += 1
+            self._espera_total += time.monotonic() - inicio
+        return instancia
+
+    def _retirar(self, limite: float) -> _Instancia:
+        """Instância livre, nova (se houver vaga) ou a primeira que ficar livre até `limite`"""
+        with self._disponivel:
+            while True:
+                if self._encerrado:
+                    raise NavegadorIndisponivel("Pool de navegadores encerrado")
+                if self._livres:
+                    return self._livres.pop()
+                if self._instancias < self.tamanho:
+                    # Reserva a vaga; o navegador é aberto fora do lock
+                    self._instancias += 1
+                    break
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    self._esperas_esgotadas += 1
+                    raise NavegadorIndisponivel(
+                        f"Nenhum navegador livre em {self.espera_max:g}s ({self.tamanho} em uso)"
+                    )
+                self._disponivel.wait(restante)
+
+        try:
+            return self._criar()
+        except Exception:
+            self._liberar_vaga()
+            raise
+
+    def _criar(self) -> _Instancia:
+        inicio = time.monotonic()
+        instancia = _Instancia(self._fabrica())
+        with self._lock:
+            self._criadas += 1
+            self._inicializacao_total += time.monotonic() - inicio
+        print(f"[DEBUG] Navegador iniciado em {time.monotonic() - inicio:.1f}s")
+        return instancia
+
+    def _devolver(self, instancia: _Instancia, falhou: bool):
+        instancia.paginas += 1
+        with self._lock:
+            self._emprestadas -= 1
+            encerrado = self._encerrado
+
+        reciclar = instancia.paginas >= self.paginas_por_instancia
+        if not encerrado and not reciclar:
+            try:
+                instancia.limpar_contexto()
+                # Depois de uma falha, só volta ao pool se ainda responder
+                if not falhou or instancia.saudavel():
+                    self._guardar(instancia)
+                    return
+            except Exception:
+                pass
+
+        self._descartar(instancia, reciclada=reciclar)
+
+    def _guardar(self, instancia: _Instancia):
+        with self._disponivel:
+            if not self._encerrado:
+                self._livres.append(instancia)
+                self._disponivel.notify()
+                return
+        self._descartar(instancia)
+
+    def _liberar_vaga(self):
+        with self._disponivel:
+            self._instancias -= 1
+            self._disponivel.notify()
+
+    def _descartar(self, instancia: _Instancia, reciclada: bool = False):
+        instancia.encerrar()
+        with self._disponivel:
+            if reciclada:
+                self._recicladas += 1
+            else:
+                self._descartadas += 1
+        self._liberar_vaga()
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def obter_pool_navegadores() -> PoolNavegadores:
+    """Retorna o pool de navegadores do processo, criando-o na primeira chamada"""
+    global _pool, _pool_pid
+
+    pid = os.getpid()
+    if _pool is None or _pool_pid != pid:
+        with _pool_lock:
+            if _pool is None or _pool_pid != pid:
+                # Processos filhos (fork) não herdam os navegadores do pai
+                _pool = PoolNavegadores()
+                _pool_pid = pid
+                atexit.register(_pool.encerrar)
+    return _pool
@@ -0,0 +1,228 @@
+"""
+Backends de parsing HTML para o scraper
+Todos expõem a mesma interface mínima (Documento / nó) usada pelos
+extratores de `scraping_mercado_livre_v2`, de modo que a lógica de extração
+é a mesma e só o parser muda:
+
+- "html.parser": BeautifulSoup com o parser puro Python (o mais lento)
+- "lxml": BeautifulSoup com lxml (C)
+- "selectolax": selectolax/lexbor (C), sem BeautifulSoup
+
+O backend padrão vem de PARSER_HTML (ou o mais rápido instalado).
+Comparação: python benchmarks/bench_parsers.py
+"""
+
+import os
+from typing import Callable, Dict, List, Optional, Pattern, Sequence
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml  # noqa: F401
+    LXML_DISPONIVEL = True
+except ImportError:
+    LXML_DISPONIVEL = False
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    SELECTOLAX_DISPONIVEL = True
+except ImportError:
+    SELECTOLAX_DISPONIVEL = False
+
+
+# Tags cujo conteúdo não conta como texto da página (mesmo critério do get_text do BeautifulSoup)
+_TAGS_SEM_TEXTO = {"script", "style", "template"}
+
+
+# ============================================
+# BeautifulSoup (html.parser / lxml)
+# ============================================
+
+class NoSoup:
+    """Nó BeautifulSoup"""
+
+    __slots__ = ("elemento",)
+
+    def __init__(self, elemento):
+        self.elemento = elemento
+
+    def texto(self, strip: bool = False) -> str:
+        return self.elemento.get_text(strip=strip)
+
+    def pai(self) -> Optional["NoSoup"]:
+        return _no_soup(self.elemento.parent)
+
+    def proximo_irmao(self) -> Optional["NoSoup"]:
+        return _no_soup(self.elemento.find_next_sibling())
+
+    def buscar(self, tag: str, classe: Optional[Pattern] = None) -> Optional["NoSoup"]:
+        return _no_soup(self.elemento.find(tag, _filtro_classe(classe)))
+
+    def buscar_todos(self, tag: str, classe: Optional[Pattern] = None) -> List["NoSoup"]:
+        return [NoSoup(e) for e in self.elemento.find_all(tag, _filtro_classe(classe))]
+
+    def proximo(self, tags: Sequence[str]) -> Optional["NoSoup"]:
+        """Próximo elemento com uma das `tags` em ordem de documento (inclui descendentes)"""
+        return _no_soup(self.elemento.find_next(list(tags)))
+
+
+class DocumentoSoup(NoSoup):
+    """Documento BeautifulSoup"""
+
+    __slots__ = ()
+
+    def __init__(self, conteudo: bytes, parser: str):
+        super().__init__(BeautifulSoup(conteudo, parser))
+
+    def titulo_secao(self, tag: str, padrao: Pattern) -> Optional[NoSoup]:
+        """Primeiro `tag` cujo texto casa com `padrao` (ex.: h2 "Características")"""
+        return _no_soup(self.elemento.find(tag, string=padrao))
+
+
+def _no_soup(elemento) -> Optional[NoSoup]:
+    return NoSoup(elemento) if elemento is not None else None
+
+
+def _filtro_classe(classe: Optional[Pattern]) -> Dict:
+    return {"class": classe} if classe is not None else {}
+
+
+# ============================================
+# selectolax (lexbor)
+# ============================================
+
+class NoSelectolax:
+    """Nó selectolax"""
+
+    __slots__ = ("no",)
+
+    def __init__(self, no):
+        self.no = no
+
+    def texto(self, strip: bool = False) -> str:
+        return self.no.text(deep=True, separator="", strip=strip)
+
+    def pai(self) -> Optional["NoSelectolax"]:
+        return _no_selectolax(self.no.parent)
+
+    def proximo_irmao(self) -> Optional["NoSelectolax"]:
+        irmao = self.no.next
+        while irmao is not None and not irmao.is_element_node:
+            irmao = irmao.next
+        return _no_selectolax(irmao)
+
+    def buscar(self, tag: str, classe: Optional[Pattern] = None) -> Optional["NoSelectolax"]:
+        for no in self.no.css(tag):
+            if _classe_casa(no, classe):
+                return NoSelectolax(no)
+        return None
+
+    def buscar_todos(self, tag: str, classe: Optional[Pattern] = None) -> List["NoSelectolax"]:
+        return [NoSelectolax(no) for no in self.no.css(tag) if _classe_casa(no, classe)]
+
+    def proximo(self, tags: Sequence[str]) -> Optional["NoSelectolax"]:
+        """Próximo elemento com uma das `tags` em ordem de documento (inclui descendentes)"""
+        tags = set(tags)
+        # 1. Descendentes (traverse inclui o próprio nó, que é pulado)
+        for no in self.no.traverse():
+            if no.mem_id != self.no.mem_id and no.tag in tags:
+                return NoSelectolax(no)
+        # 2. Irmãos seguintes do nó e de cada ancestral
+        atual = self.no
+        while atual is not None:
+            irmao = atual.next
+            while irmao is not None:
+                if irmao.is_element_node:
+                    for no in irmao.traverse():
+                        if no.tag in tags:
+                            return NoSelectolax(no)
+                irmao = irmao.next
+            atual = atual.parent
+        return None
+
+
+class DocumentoSelectolax(NoSelectolax):
+    """Documento selectolax"""
+
+    __slots__ = ("arvore",)
+
+    def __init__(self, conteudo: bytes):
+        self.arvore = LexborHTMLParser(conteudo)
+        super().__init__(self.arvore.root)
+
+    def texto(self, strip: bool = False) -> str:
+        partes = []
+        for no in self.arvore.root.traverse(include_text=True):
+            if no.is_text_node and (no.parent is None or no.parent.tag not in _TAGS_SEM_TEXTO):
+                texto = no.text_content or ""
+                partes.append(texto.strip() if strip else texto)
+        return "".join(partes)
+
+    def titulo_secao(self, tag: str, padrao: Pattern) -> Optional[NoSelectolax]:
+        """Primeiro `tag` cujo texto casa com `padrao` (ex.: h2 "Características")"""
+        for no in self.arvore.css(tag):
+            if padrao.search(no.text(deep=True)):
+                return NoSelectolax(no)
+        return None
+
+
+def _no_selectolax(no) -> Optional[NoSelectolax]:
+    return NoSelectolax(no) if no is not None else None
+
+
+def _classe_casa(no, classe: Optional[Pattern]) -> bool:
+    if classe is None:
+        return True
+    atributo = no.attributes.get("class") or ""
+    return any(classe.search(c) for c in atributo.split())
+
+
+# ============================================
+# Registro de backends
+# ============================================
+
+BACKENDS: Dict[str, Callable[[bytes], object]] = {
+    "html.parser": lambda conteudo: DocumentoSoup(conteudo, "html.parser"),
+}
+if LXML_DISPONIVEL:
+    BACKENDS["lxml"] = lambda conteudo: DocumentoSoup(conteudo, "lxml")
+if SELECTOLAX_DISPONIVEL:
+    BACKENDS["selectolax"] = DocumentoSelectolax
+
+
+def _backend_padrao() -> str:
+    escolhido = os.getenv("PARSER_HTML")
+    if escolhido:
+        return escolhido
+    if SELECTOLAX_DISPONIVEL:
+        return "selectolax"
+    return "lxml" if LXML_DISPONIVEL else "html.parser"
+
+
+PARSER_HTML = _backend_padrao()
+
+
+def backends_disponiveis() -> List[str]:
+    """Nomes dos backends instalados neste ambiente"""
+    return list(BACKENDS)
+
+
+def carregar_documento(conteudo: bytes, backend: Optional[str] = None):
+    """
+    Faz o parse do HTML com o backend escolhido.
+
+    Args:
+        conteudo: HTML (bytes)
+        backend: Nome do backend (padrão: PARSER_HTML)
+
+    Returns:
+        Documento com a interface comum (texto, titulo_secao, buscar, buscar_todos, ...)
+    """
+    nome = backend or PARSER_HTML
+    try:
+        fabrica = BACKENDS[nome]
+    except KeyError:
+        raise ValueError(
+            f"Backend de parsing '{nome}' indisponível. Disponíveis: {', '.join(BACKENDS)}"
+        ) from None
+    return fabrica(conteudo)
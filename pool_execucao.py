@@ -0,0 +1,200 @@
+"""
+Controle de carga para os servidores de scraping
+Pool de execução limitado (threads ou processos) com fila de tamanho máximo
+e limitador assíncrono de admissão para o FastAPI.
+Quando a fila enche, a requisição é recusada na hora (429 + Retry-After)
+em vez de acumular scrapes em paralelo sem limite.
+"""
+
+import asyncio
+import math
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Dict
+
+
+class PoolSaturado(Exception):
+    """Levantada quando o pool não aceita mais trabalhos na fila"""
+
+    def __init__(self, retry_after: int, mensagem: str = "Servidor ocupado, tente novamente mais tarde"):
+        super().__init__(mensagem)
+        self.retry_after = retry_after
+
+
+def _executar_medindo(fn, args, kwargs):
+    """Executa `fn` no worker e devolve também o instante em que começou (para medir espera na fila)"""
+    inicio = time.time()
+    return inicio, fn(*args, **kwargs)
+
+
+class _Metricas:
+    """Contadores de espera e duração compartilhados pelos controles de carga"""
+
+    def __init__(self, retry_after_padrao: int):
+        self.retry_after_padrao = retry_after_padrao
+        self.concluidos = 0
+        self.rejeitados = 0
+        self.esperas = 0
+        self.espera_total = 0.0
+        self.espera_max = 0.0
+        self.duracao_media = 0.0  # média móvel exponencial (segundos)
+
+    def registrar_espera(self, espera: float):
+        self.esperas += 1
+        self.espera_total += espera
+        self.espera_max = max(self.espera_max, espera)
+
+    def registrar_duracao(self, duracao: float):
+        self.concluidos += 1
+        if self.concluidos == 1:
+            self.duracao_media = duracao
+        else:
+            self.duracao_media = 0.8 * self.duracao_media + 0.2 * duracao
+
+    def estimar_retry_after(self, pendentes: int, vagas: int) -> int:
+        """Estimativa de quando haverá vaga: fila atual × duração média / paralelismo"""
+        if not self.duracao_media:
+            return self.retry_after_padrao
+        return max(1, math.ceil(self.duracao_media * pendentes / max(1, vagas)))
+
+    def como_dict(self) -> Dict:
+        return {
+            "concluidos": self.concluidos,
+            "rejeitados": self.rejeitados,
+            "espera_media_ms": round(self.espera_total / self.esperas * 1000, 1) if self.esperas else 0.0,
+            "espera_max_ms": round(self.espera_max * 1000, 1),
+            "duracao_media_ms": round(self.duracao_media * 1000, 1)
+        }
+
+
+class PoolExecucao(Executor):
+    """
+    Executor com número fixo de workers e fila limitada.
+
+    Pode ser usado diretamente (`submit`) ou como executor do asyncio
+    (`loop.run_in_executor(pool, fn, ...)`). Com `tipo="process"`, as funções
+    e argumentos precisam ser serializáveis (pickle).
+    """
+
+    def __init__(self, max_workers: int = 4, max_fila: int = 16, tipo: str = "thread", retry_after: int = 5):
+        if tipo not in ("thread", "process"):
+            raise ValueError("tipo deve ser 'thread' ou 'process'")
+
+        self.max_workers = max_workers
+        self.max_fila = max_fila
+        self.tipo = tipo
+        self._executor = (
+            ProcessPoolExecutor(max_workers=max_workers)
+            if tipo == "process"
+            else ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scraper")
+        )
+        self._lock = threading.Lock()
+        self._pendentes = 0  # em execução + na fila
+        self._metricas = _Metricas(retry_after)
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        with self._lock:
+            if self._pendentes >= self.max_workers + self.max_fila:
+                self._metricas.rejeitados += 1
+                raise PoolSaturado(self._metricas.estimar_retry_after(self._pendentes, self.max_workers))
+            self._pendentes += 1
+
+        enviado_em = time.time()
+        resultado = Future()
+        try:
+            interno = self._executor.submit(_executar_medindo, fn, args, kwargs)
+        except Exception:
+            with self._lock:
+                self._pendentes -= 1
+            raise
+
+        def concluir(f: Future):
+            fim = time.time()
+            with self._lock:
+                self._pendentes -= 1
+                erro = f.exception()
+                if erro is None:
+                    inicio, valor = f.result()
+                    self._metricas.registrar_espera(max(0.0, inicio - enviado_em))
+                    self._metricas.registrar_duracao(fim - inicio)
+                else:
+                    self._metricas.registrar_duracao(fim - enviado_em)
+            if erro is None:
+                resultado.set_result(valor)
+            else:
+                resultado.set_exception(erro)
+
+        interno.add_done_callback(concluir)
+        return resultado
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False):
+        self._executor.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+    def estatisticas(self) -> Dict:
+        """Profundidade da fila e tempos de espera (usado em /status)"""
+        with self._lock:
+            em_execucao = min(self._pendentes, self.max_workers)
+            dados = {
+                "tipo": self.tipo,
+                "max_workers": self.max_workers,
+                "max_fila": self.max_fila,
+                "em_execucao": em_execucao,
+                "na_fila": self._pendentes - em_execucao
+            }
+            dados.update(self._metricas.como_dict())
+        return dados
+
+
+class LimitadorAsync:
+    """
+    Limita quantos scrapes assíncronos rodam ao mesmo tempo no event loop.
+
+    Até `max_concorrencia` trabalhos executam; outros `max_fila` aguardam
+    vaga; acima disso `vaga()` levanta PoolSaturado imediatamente.
+    """
+
+    def __init__(self, max_concorrencia: int = 8, max_fila: int = 32, retry_after: int = 5):
+        self.max_concorrencia = max_concorrencia
+        self.max_fila = max_fila
+        self._semaforo = asyncio.Semaphore(max_concorrencia)
+        self._ativos = 0
+        self._esperando = 0
+        self._metricas = _Metricas(retry_after)
+
+    @asynccontextmanager
+    async def vaga(self):
+        """Reserva uma vaga de execução (ou levanta PoolSaturado se a fila estiver cheia)"""
+        pendentes = self._ativos + self._esperando
+        if pendentes >= self.max_concorrencia + self.max_fila:
+            self._metricas.rejeitados += 1
+            raise PoolSaturado(self._metricas.estimar_retry_after(pendentes, self.max_concorrencia))
+
+        enviado_em = time.monotonic()
+        self._esperando += 1
+        try:
+            await self._semaforo.acquire()
+        finally:
+            self._esperando -= 1
+
+        inicio = time.monotonic()
+        self._metricas.registrar_espera(inicio - enviado_em)
+        self._ativos += 1
+        try:
+            yield
+        finally:
+            self._ativos -= 1
+            self._metricas.registrar_duracao(time.monotonic() - inicio)
+            self._semaforo.release()
+
+    def estatisticas(self) -> Dict:
+        """Profundidade da fila e tempos de espera (usado em /status)"""
+        dados = {
+            "max_concorrencia": self.max_concorrencia,
+            "max_fila": self.max_fila,
+            "em_execucao": self._ativos,
+            "na_fila": self._esperando
+        }
+        dados.update(self._metricas.como_dict())
+        return dados
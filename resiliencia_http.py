@@ -0,0 +1,337 @@
+"""
+Novas tentativas e requisições de reserva (hedging) nos downloads
+Falhas passageiras (timeout, conexão caída, 429, 5xx) são repetidas com
+backoff exponencial e jitter; erros definitivos (404, 403, URL inválida)
+falham na hora. Com HEDGING_ATIVO, se o download não respondeu até o p95
+das latências recentes do host, uma segunda requisição idêntica é
+disparada e vale a que terminar primeiro (a outra é descartada). A
+reserva ocupa uma vez própria no controle de taxa e não é disparada
+quando o host está pausado, recuando ou sem vaga.
+"""
+
+import asyncio
+import math
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as TimeoutFuturo
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+import requests
+
+from controle_taxa import obter_controle_taxa
+from metricas import ERROS, tipo_do_erro
+
+
+TENTATIVAS_MAX = int(os.getenv("TENTATIVAS_MAX", 3))  # total, incluindo a primeira
+TENTATIVAS_BACKOFF_BASE = float(os.getenv("TENTATIVAS_BACKOFF_BASE", 0.5))
+TENTATIVAS_BACKOFF_MAX = float(os.getenv("TENTATIVAS_BACKOFF_MAX", 8))
+HEDGING_ATIVO = os.getenv("HEDGING_ATIVO", "false").lower() == "true"
+HEDGING_PERCENTIL = float(os.getenv("HEDGING_PERCENTIL", 0.95))
+HEDGING_MIN_AMOSTRAS = int(os.getenv("HEDGING_MIN_AMOSTRAS", 20))
+HEDGING_ATRASO_MIN = float(os.getenv("HEDGING_ATRASO_MIN", 0.2))
+HEDGING_WORKERS = int(os.getenv("HEDGING_WORKERS", 16))
+LATENCIAS_AMOSTRAS = int(os.getenv("LATENCIAS_AMOSTRAS", 200))  # janela por host
+
+# Status HTTP que costumam passar numa nova tentativa
+STATUS_RECUPERAVEIS = (429, 500, 502, 503, 504)
+
+_ERROS_RECUPERAVEIS = (
+    requests.exceptions.Timeout,
+    requests.exceptions.ConnectionError,
+    requests.exceptions.ChunkedEncodingError,
+    httpx.TimeoutException,
+    httpx.NetworkError,
+    httpx.RemoteProtocolError
+)
+
+
+def _status_do_erro(e: BaseException) -> Optional[int]:
+    return getattr(getattr(e, "response", None), "status_code", None)
+
+
+def _retry_after(e: BaseException) -> Optional[float]:
+    resposta = getattr(e, "response", None)
+    try:
+        return max(0.0, float(resposta.headers.get("retry-after")))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def erro_recuperavel(e: BaseException) -> bool:
+    """Timeout, conexão e status 429 / 5xx valem nova tentativa; o resto é definitivo"""
+    status = _status_do_erro(e)
+    if status is not None:
+        return status in STATUS_RECUPERAVEIS
+    return isinstance(e, _ERROS_RECUPERAVEIS)
+
+
+def espera_backoff(tentativa: int, retry_after: Optional[float] = None) -> float:
+    """Backoff exponencial com jitter completo (sorteio entre 0 e o teto), respeitando Retry-After"""
+    teto = min(TENTATIVAS_BACKOFF_MAX, TENTATIVAS_BACKOFF_BASE * 2 ** (tentativa - 1))
+    espera = random.uniform(0, teto)
+    if retry_after is not None:
+        espera = max(espera, retry_after)
+    return espera
+
+
+class _Contadores:
+    def __init__(self):
+        self.novas_tentativas = 0
+        self.desistencias = 0  # erros recuperáveis que esgotaram as tentativas
+        self.hedges = 0
+        self.hedges_vencedores = 0  # a requisição de reserva terminou primeiro
+        self.hedges_sem_vaga = 0  # reserva não disparada: host sem vez no controle de taxa
+
+
+_contadores = _Contadores()
+
+
+def _proxima_espera(e: BaseException, tentativa: int, logs: List[str]) -> Optional[float]:
+    """Quanto esperar antes de tentar de novo (None = desistir e propagar o erro)"""
+    ERROS.incrementar(etapa="tentativa", tipo=tipo_do_erro(e))
+    if not erro_recuperavel(e):
+        return None
+    retry_after = _retry_after(e)
+    if tentativa >= TENTATIVAS_MAX or (retry_after is not None and retry_after > TENTATIVAS_BACKOFF_MAX):
+        _contadores.desistencias += 1
+        return None
+    espera = espera_backoff(tentativa, retry_after)
+    _contadores.novas_tentativas += 1
+    print(f"[AVISO] Tentativa {tentativa}/{TENTATIVAS_MAX} falhou ({e}), nova tentativa em {espera:.2f}s")
+    logs.append(f"Tentativa {tentativa} falhou: {e} (nova tentativa em {espera:.2f}s)")
+    return espera
+
+
+def executar_com_tentativas(fn: Callable, logs: List[str], *args, **kwargs):
+    """Executa `fn`, repetindo em erros recuperáveis até TENTATIVAS_MAX vezes"""
+    tentativa = 1
+    while True:
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            espera = _proxima_espera(e, tentativa, logs)
+            if espera is None:
+                raise
+        time.sleep(espera)
+        tentativa += 1
+
+
+async def executar_com_tentativas_async(fabrica: Callable[[], Awaitable], logs: List[str]):
+    """Versão assíncrona de `executar_com_tentativas` (`fabrica` cria a corrotina de cada tentativa)"""
+    tentativa = 1
+    while True:
+        try:
+            return await fabrica()
+        except Exception as e:
+            espera = _proxima_espera(e, tentativa, logs)
+            if espera is None:
+                raise
+        await asyncio.sleep(espera)
+        tentativa += 1
+
+
+# ============================================
+# Latências e hedging
+# ============================================
+
+class HistoricoLatencias:
+    """Últimas LATENCIAS_AMOSTRAS latências de resposta de cada host"""
+
+    def __init__(self, amostras: int = LATENCIAS_AMOSTRAS):
+        self.amostras = amostras
+        self._por_host = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, host: str, segundos: float):
+        with self._lock:
+            janela = self._por_host.get(host)
+            if janela is None:
+                janela = self._por_host[host] = deque(maxlen=self.amostras)
+            janela.append(segundos)
+
+    def percentil(self, host: str, fracao: float) -> Optional[float]:
+        with self._lock:
+            janela = sorted(self._por_host.get(host, ()))
+        if not janela:
+            return None
+        return janela[max(0, math.ceil(fracao * len(janela)) - 1)]
+
+    def atraso_hedging(self, host: str) -> Optional[float]:
+        """Quanto esperar antes da requisição de reserva (None = sem hedging para o host)"""
+        if not HEDGING_ATIVO:
+            return None
+        with self._lock:
+            amostras = len(self._por_host.get(host, ()))
+        if amostras < HEDGING_MIN_AMOSTRAS:
+            return None
+        return max(HEDGING_ATRASO_MIN, self.percentil(host, HEDGING_PERCENTIL))
+
+    def estatisticas(self) -> Dict:
+        with self._lock:
+            hosts = list(self._por_host)
+        return {
+            host: {
+                "p50_ms": round(self.percentil(host, 0.5) * 1000, 1),
+                "p95_ms": round(self.percentil(host, 0.95) * 1000, 1),
+                "p99_ms": round(self.percentil(host, 0.99) * 1000, 1)
+            }
+            for host in hosts
+        }
+
+
+_historico = HistoricoLatencias()
+_executor_hedging = None
+_executor_lock = threading.Lock()
+
+
+def _obter_executor_hedging() -> ThreadPoolExecutor:
+    global _executor_hedging
+    with _executor_lock:
+        if _executor_hedging is None:
+            _executor_hedging = ThreadPoolExecutor(max_workers=HEDGING_WORKERS, thread_name_prefix="hedging")
+        return _executor_hedging
+
+
+def _reserva(fazer: Callable, permissao):
+    """Requisição de reserva, devolvendo a vez dela no controle de taxa ao receber a resposta"""
+    try:
+        resposta = fazer()
+    except BaseException as e:
+        obter_controle_taxa().devolver_reserva(permissao, erro=e)
+        raise
+    obter_controle_taxa().devolver_reserva(permissao, status=resposta.status_code)
+    return resposta
+
+
+async def _reserva_async(fazer: Callable[[], Awaitable], permissao):
+    try:
+        resposta = await fazer()
+    except BaseException as e:
+        obter_controle_taxa().devolver_reserva(permissao, erro=e)
+        raise
+    obter_controle_taxa().devolver_reserva(permissao, status=resposta.status_code)
+    return resposta
+
+
+def _permissao_reserva(host: str, atraso: float):
+    """Vez da reserva no controle de taxa (None: sem reserva, só espera a original)"""
+    permissao = obter_controle_taxa().permissao_reserva(host)
+    if permissao is None:
+        _contadores.hedges_sem_vaga += 1
+        print(f"[DEBUG] {host} sem resposta em {atraso:.2f}s, mas sem vaga no controle de taxa: sem requisição de reserva")
+        return None
+    _contadores.hedges += 1
+    print(f"[DEBUG] {host} sem resposta em {atraso:.2f}s (p{HEDGING_PERCENTIL * 100:.0f}): disparando requisição de reserva")
+    return permissao
+
+
+def _fechar_resposta_perdedora(futuro):
+    if not futuro.cancelled() and futuro.exception() is None:
+        futuro.result().close()
+
+
+def requisitar(fazer: Callable, host: str):
+    """
+    Executa `fazer()` (que devolve uma resposta do requests) medindo a
+    latência do host e, com hedging ativo, disparando uma requisição de
+    reserva quando a primeira passa do p95.
+    """
+    inicio = time.monotonic()
+    atraso = _historico.atraso_hedging(host)
+    if atraso is None:
+        resposta = fazer()
+        _historico.registrar(host, time.monotonic() - inicio)
+        return resposta
+
+    executor = _obter_executor_hedging()
+    primeira = executor.submit(fazer)
+    try:
+        resposta = primeira.result(timeout=atraso)
+        _historico.registrar(host, time.monotonic() - inicio)
+        return resposta
+    except TimeoutFuturo:
+        pass
+
+    permissao = _permissao_reserva(host, atraso)
+    if permissao is None:
+        resposta = primeira.result()
+        _historico.registrar(host, time.monotonic() - inicio)
+        return resposta
+
+    reserva = executor.submit(_reserva, fazer, permissao)
+    pendentes = {primeira, reserva}
+    erro = None
+    while pendentes:
+        concluidas, pendentes = wait(pendentes, return_when=FIRST_COMPLETED)
+        vencedora = next((f for f in concluidas if f.exception() is None), None)
+        if vencedora is None:
+            erro = next(iter(concluidas)).exception()
+            continue
+        for futuro in (concluidas - {vencedora}) | pendentes:
+            futuro.add_done_callback(_fechar_resposta_perdedora)
+        if vencedora is reserva:
+            _contadores.hedges_vencedores += 1
+        _historico.registrar(host, time.monotonic() - inicio)
+        return vencedora.result()
+    raise erro
+
+
+async def requisitar_async(fazer: Callable[[], Awaitable], host: str):
+    """Versão assíncrona de `requisitar` (`fazer` cria a corrotina que devolve a resposta do httpx)"""
+    inicio = time.monotonic()
+    atraso = _historico.atraso_hedging(host)
+    if atraso is None:
+        resposta = await fazer()
+        _historico.registrar(host, time.monotonic() - inicio)
+        return resposta
+
+    primeira = asyncio.ensure_future(fazer())
+    tarefas = {primeira}
+    vencedora = None
+    try:
+        concluidas, _ = await asyncio.wait(tarefas, timeout=atraso)
+        if not concluidas:
+            permissao = _permissao_reserva(host, atraso)
+            if permissao is not None:
+                tarefas.add(asyncio.ensure_future(_reserva_async(fazer, permissao)))
+
+        pendentes = set(tarefas)
+        erro = None
+        while pendentes:
+            concluidas, pendentes = await asyncio.wait(pendentes, return_when=asyncio.FIRST_COMPLETED)
+            vencedora = next((t for t in concluidas if t.exception() is None), None)
+            if vencedora is not None:
+                break
+            erro = next(iter(concluidas)).exception()
+        if vencedora is None:
+            raise erro
+        if vencedora is not primeira:
+            _contadores.hedges_vencedores += 1
+        _historico.registrar(host, time.monotonic() - inicio)
+        return vencedora.result()
+    finally:
+        # Perdedoras: canceladas se ainda no ar, fechadas se também responderam
+        for tarefa in tarefas - {vencedora}:
+            if not tarefa.done():
+                tarefa.cancel()
+            elif not tarefa.cancelled() and tarefa.exception() is None:
+                await tarefa.result().aclose()
+
+
+def estatisticas_resiliencia() -> Dict:
+    """Novas tentativas, hedges e latências por host (usado em /status)"""
+    return {
+        "tentativas_max": TENTATIVAS_MAX,
+        "novas_tentativas": _contadores.novas_tentativas,
+        "desistencias": _contadores.desistencias,
+        "hedging_ativo": HEDGING_ATIVO,
+        "hedges": _contadores.hedges,
+        "hedges_vencedores": _contadores.hedges_vencedores,
+        "hedges_sem_vaga": _contadores.hedges_sem_vaga,
+        "latencias": _historico.estatisticas()
+    }
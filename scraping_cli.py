@@ -22,18 +22,24 @@ import sys
 import argparse
 
 
-def scrape_mercado_livre(url, verbose=True):
+CAMPOS = ("titulo", "bullet_points", "caracteristicas", "cor", "descricao")
+
+
+def scrape_mercado_livre(url, verbose=True, campos=None):
     """
     Realiza scraping de um produto do Mercado Livre e extrai dados estruturados.
     
     Args:
         url (str): URL do produto no Mercado Livre
         verbose (bool): Mostrar logs detalhados durante o scraping
+        campos (list): Campos a extrair (None = todos); só os pedidos vêm no resultado
         
     Returns:
         dict: Dicionário com os dados extraídos do produto
     """
     
+    campos = CAMPOS if not campos else tuple(campos)
+    
     def log(level, message):
         """Função auxiliar para logging condicional"""
         if verbose:
@@ -70,6 +76,7 @@ def scrape_mercado_livre(url, verbose=True):
         wait = WebDriverWait(driver, 10)
         
         # ===== EXTRAIR TÍTULO =====
+        # Sempre: a espera pelo h1 também é a espera pelo carregamento da página
         try:
             log("INFO", "Extraindo título...")
             titulo_element = wait.until(
@@ -80,226 +87,231 @@ def scrape_mercado_livre(url, verbose=True):
         except (TimeoutException, NoSuchElementException) as e:
             log("AVISO", f"Não foi possível extrair o título")
         
-        time.sleep(3)
+        if any(campo != "titulo" for campo in campos):
+            time.sleep(3)
         
         # ===== EXTRAIR BULLET POINTS =====
-        try:
-            log("INFO", "Extraindo bullet points...")
+        if "bullet_points" in campos:
+            try:
+                log("INFO", "Extraindo bullet points...")
             
-            bullet_selectors = [
-                "span[class*='highlight']",
-                "div[class*='highlight'] span",
-                "li[class*='highlight']",
-                "div.ui-pdp-highlights li",
-                "ul.andes-list li",
-                "ul li span",
-                "li[role='listitem']",
-                "div[class*='feature'] span"
-            ]
+                bullet_selectors = [
+                    "span[class*='highlight']",
+                    "div[class*='highlight'] span",
+                    "li[class*='highlight']",
+                    "div.ui-pdp-highlights li",
+                    "ul.andes-list li",
+                    "ul li span",
+                    "li[role='listitem']",
+                    "div[class*='feature'] span"
+                ]
             
-            found_bullets = set()
+                found_bullets = set()
             
-            for selector in bullet_selectors:
-                try:
-                    elements = driver.find_elements(By.CSS_SELECTOR, selector)
-                    if elements and len(elements) > 0:
-                        for element in elements:
-                            text = element.text.strip()
-                            if text and len(text) > 5 and len(text) < 500:
-                                found_bullets.add(text)
+                for selector in bullet_selectors:
+                    try:
+                        elements = driver.find_elements(By.CSS_SELECTOR, selector)
+                        if elements and len(elements) > 0:
+                            for element in elements:
+                                text = element.text.strip()
+                                if text and len(text) > 5 and len(text) < 500:
+                                    found_bullets.add(text)
                         
-                        if found_bullets:
-                            log("OK", f"Bullet points encontrados com seletor: {selector}")
-                            break
-                except NoSuchElementException:
-                    continue
+                            if found_bullets:
+                                log("OK", f"Bullet points encontrados com seletor: {selector}")
+                                break
+                    except NoSuchElementException:
+                        continue
             
-            dados_produto["bullet_points"] = list(found_bullets)
+                dados_produto["bullet_points"] = list(found_bullets)
             
-            if dados_produto["bullet_points"]:
-                log("OK", f"{len(dados_produto['bullet_points'])} bullet points encontrados")
-            else:
-                log("AVISO", "Nenhum bullet point encontrado")
+                if dados_produto["bullet_points"]:
+                    log("OK", f"{len(dados_produto['bullet_points'])} bullet points encontrados")
+                else:
+                    log("AVISO", "Nenhum bullet point encontrado")
                 
-        except Exception as e:
-            log("AVISO", f"Erro ao extrair bullet points")
+            except Exception as e:
+                log("AVISO", f"Erro ao extrair bullet points")
         
         # ===== EXTRAIR CARACTERÍSTICAS/ESPECIFICAÇÕES =====
-        try:
-            log("INFO", "Extraindo características...")
+        if "caracteristicas" in campos:
+            try:
+                log("INFO", "Extraindo características...")
             
-            spec_selectors = [
-                "div[class*='attribute-row']",
-                "div[class*='attribute']",
-                "div.ui-pdp-specs",
-                "table.andes-table tbody tr",
-                "div[data-spec-name]",
-                "div[class*='spec']",
-                "li[class*='attribute']"
-            ]
+                spec_selectors = [
+                    "div[class*='attribute-row']",
+                    "div[class*='attribute']",
+                    "div.ui-pdp-specs",
+                    "table.andes-table tbody tr",
+                    "div[data-spec-name]",
+                    "div[class*='spec']",
+                    "li[class*='attribute']"
+                ]
             
-            specs_found = False
+                specs_found = False
             
-            for selector in spec_selectors:
-                try:
-                    spec_elements = driver.find_elements(By.CSS_SELECTOR, selector)
+                for selector in spec_selectors:
+                    try:
+                        spec_elements = driver.find_elements(By.CSS_SELECTOR, selector)
                     
-                    if spec_elements and len(spec_elements) > 0:
-                        for element in spec_elements:
-                            try:
-                                cells = element.find_elements(By.TAG_NAME, "td")
-                                if len(cells) >= 2:
-                                    chave = cells[0].text.strip()
-                                    valor = cells[1].text.strip()
-                                    if chave and valor:
-                                        dados_produto["caracteristicas"][chave] = valor
-                                        specs_found = True
-                                        continue
-                                
-                                spans = element.find_elements(By.TAG_NAME, "span")
-                                if len(spans) >= 2:
-                                    chave = spans[0].text.strip()
-                                    valor = spans[1].text.strip() if len(spans) > 1 else ""
-                                    if chave and valor and not chave.endswith(":"):
-                                        dados_produto["caracteristicas"][chave] = valor
-                                        specs_found = True
-                                        continue
-                                
-                                text = element.text.strip()
-                                if ": " in text or ":" in text:
-                                    partes = text.split(":", 1)
-                                    if len(partes) == 2:
-                                        chave = partes[0].strip()
-                                        valor = partes[1].strip()
+                        if spec_elements and len(spec_elements) > 0:
+                            for element in spec_elements:
+                                try:
+                                    cells = element.find_elements(By.TAG_NAME, "td")
+                                    if len(cells) >= 2:
+                                        chave = cells[0].text.strip()
+                                        valor = cells[1].text.strip()
                                         if chave and valor:
                                             dados_produto["caracteristicas"][chave] = valor
                                             specs_found = True
+                                            continue
                                 
-                            except (StaleElementReferenceException, NoSuchElementException):
-                                continue
+                                    spans = element.find_elements(By.TAG_NAME, "span")
+                                    if len(spans) >= 2:
+                                        chave = spans[0].text.strip()
+                                        valor = spans[1].text.strip() if len(spans) > 1 else ""
+                                        if chave and valor and not chave.endswith(":"):
+                                            dados_produto["caracteristicas"][chave] = valor
+                                            specs_found = True
+                                            continue
+                                
+                                    text = element.text.strip()
+                                    if ": " in text or ":" in text:
+                                        partes = text.split(":", 1)
+                                        if len(partes) == 2:
+                                            chave = partes[0].strip()
+                                            valor = partes[1].strip()
+                                            if chave and valor:
+                                                dados_produto["caracteristicas"][chave] = valor
+                                                specs_found = True
+                                
+                                except (StaleElementReferenceException, NoSuchElementException):
+                                    continue
                         
-                        if specs_found:
-                            log("OK", f"Características encontradas com seletor: {selector}")
-                            log("OK", f"{len(dados_produto['caracteristicas'])} características extraídas")
-                            break
+                            if specs_found:
+                                log("OK", f"Características encontradas com seletor: {selector}")
+                                log("OK", f"{len(dados_produto['caracteristicas'])} características extraídas")
+                                break
                             
-                except NoSuchElementException:
-                    continue
+                    except NoSuchElementException:
+                        continue
             
-            if not specs_found:
-                log("AVISO", "Nenhuma característica encontrada")
+                if not specs_found:
+                    log("AVISO", "Nenhuma característica encontrada")
                 
-        except Exception as e:
-            log("AVISO", f"Erro ao extrair características")
+            except Exception as e:
+                log("AVISO", f"Erro ao extrair características")
         
         # ===== EXTRAIR COR =====
-        try:
-            log("INFO", "Extraindo cor...")
+        if "cor" in campos:
+            try:
+                log("INFO", "Extraindo cor...")
             
-            cor_selectors = [
-                "span[class*='Color']",
-                "span[class*='color']",
-                "div[class*='attribute'] span:nth-child(2)",
-                "li[class*='color'] span",
-                "div[data-attribute-name='color'] span",
-                "button[class*='color']"
-            ]
+                cor_selectors = [
+                    "span[class*='Color']",
+                    "span[class*='color']",
+                    "div[class*='attribute'] span:nth-child(2)",
+                    "li[class*='color'] span",
+                    "div[data-attribute-name='color'] span",
+                    "button[class*='color']"
+                ]
             
-            for selector in cor_selectors:
-                try:
-                    elementos = driver.find_elements(By.CSS_SELECTOR, selector)
-                    for element in elementos:
-                        text = element.text.strip()
-                        if text and 1 < len(text) < 50 and not text.endswith("%") and not re.match(r'^\d+%', text):
-                            if "%" not in text:
-                                dados_produto["cor"] = text
-                                log("OK", f"Cor encontrada: {text}")
-                                break
+                for selector in cor_selectors:
+                    try:
+                        elementos = driver.find_elements(By.CSS_SELECTOR, selector)
+                        for element in elementos:
+                            text = element.text.strip()
+                            if text and 1 < len(text) < 50 and not text.endswith("%") and not re.match(r'^\d+%', text):
+                                if "%" not in text:
+                                    dados_produto["cor"] = text
+                                    log("OK", f"Cor encontrada: {text}")
+                                    break
                     
-                    if dados_produto["cor"] != "N/A":
-                        break
-                except NoSuchElementException:
-                    continue
+                        if dados_produto["cor"] != "N/A":
+                            break
+                    except NoSuchElementException:
+                        continue
             
-            if dados_produto["cor"] == "N/A":
-                log("AVISO", "Cor não encontrada como campo explícito")
+                if dados_produto["cor"] == "N/A":
+                    log("AVISO", "Cor não encontrada como campo explícito")
                 
-        except Exception as e:
-            log("AVISO", f"Erro ao extrair cor")
+            except Exception as e:
+                log("AVISO", f"Erro ao extrair cor")
         
         # ===== EXTRAIR DESCRIÇÃO =====
-        try:
-            log("INFO", "Extraindo descrição...")
-            descricao = ""
-            
+        if "descricao" in campos:
             try:
-                log("INFO", "Procurando por descrição em iframe...")
-                iframes = driver.find_elements(By.TAG_NAME, "iframe")
-                log("INFO", f"{len(iframes)} iframe(s) encontrado(s)")
+                log("INFO", "Extraindo descrição...")
+                descricao = ""
+            
+                try:
+                    log("INFO", "Procurando por descrição em iframe...")
+                    iframes = driver.find_elements(By.TAG_NAME, "iframe")
+                    log("INFO", f"{len(iframes)} iframe(s) encontrado(s)")
                 
-                for idx, iframe in enumerate(iframes):
-                    try:
-                        driver.switch_to.frame(iframe)
-                        log("INFO", f"Analisando iframe {idx}...")
-                        
+                    for idx, iframe in enumerate(iframes):
                         try:
-                            descricao_element = driver.find_element(By.CSS_SELECTOR, "body")
-                            descricao = descricao_element.text.strip()
-                            if descricao and len(descricao) > 20:
-                                log("OK", f"Descrição encontrada em iframe: {len(descricao)} caracteres")
-                                break
-                        except NoSuchElementException:
-                            pass
+                            driver.switch_to.frame(iframe)
+                            log("INFO", f"Analisando iframe {idx}...")
+                        
+                            try:
+                                descricao_element = driver.find_element(By.CSS_SELECTOR, "body")
+                                descricao = descricao_element.text.strip()
+                                if descricao and len(descricao) > 20:
+                                    log("OK", f"Descrição encontrada em iframe: {len(descricao)} caracteres")
+                                    break
+                            except NoSuchElementException:
+                                pass
                         
-                        driver.switch_to.default_content()
-                    except Exception as e:
-                        try:
                             driver.switch_to.default_content()
-                        except:
-                            pass
-                        continue
+                        except Exception as e:
+                            try:
+                                driver.switch_to.default_content()
+                            except:
+                                pass
+                            continue
                         
-            except Exception as e:
-                log("AVISO", f"Erro ao processar iframes")
-                try:
-                    driver.switch_to.default_content()
-                except:
-                    pass
+                except Exception as e:
+                    log("AVISO", f"Erro ao processar iframes")
+                    try:
+                        driver.switch_to.default_content()
+                    except:
+                        pass
             
-            if not descricao or len(descricao) < 20:
-                try:
-                    log("INFO", "Procurando por descrição em elementos da página...")
-                    desc_selectors = [
-                        "div[class*='description']",
-                        ".ui-pdp-description",
-                        ".ui-pdp-long-description",
-                        "div[data-description]",
-                        "article[class*='description']",
-                        "section[class*='description']"
-                    ]
+                if not descricao or len(descricao) < 20:
+                    try:
+                        log("INFO", "Procurando por descrição em elementos da página...")
+                        desc_selectors = [
+                            "div[class*='description']",
+                            ".ui-pdp-description",
+                            ".ui-pdp-long-description",
+                            "div[data-description]",
+                            "article[class*='description']",
+                            "section[class*='description']"
+                        ]
                     
-                    for selector in desc_selectors:
-                        try:
-                            desc_elements = driver.find_elements(By.CSS_SELECTOR, selector)
-                            for element in desc_elements:
-                                text = element.text.strip()
-                                if text and len(text) > 20:
-                                    descricao = text
-                                    log("OK", f"Descrição encontrada: {len(descricao)} caracteres")
-                                    break
+                        for selector in desc_selectors:
+                            try:
+                                desc_elements = driver.find_elements(By.CSS_SELECTOR, selector)
+                                for element in desc_elements:
+                                    text = element.text.strip()
+                                    if text and len(text) > 20:
+                                        descricao = text
+                                        log("OK", f"Descrição encontrada: {len(descricao)} caracteres")
+                                        break
                             
-                            if descricao and len(descricao) > 20:
-                                break
+                                if descricao and len(descricao) > 20:
+                                    break
                                 
-                        except NoSuchElementException:
-                            continue
-                except Exception as e:
-                    log("AVISO", f"Erro ao procurar descrição em elementos")
+                            except NoSuchElementException:
+                                continue
+                    except Exception as e:
+                        log("AVISO", f"Erro ao procurar descrição em elementos")
             
-            dados_produto["descricao"] = descricao if descricao else "N/A"
+                dados_produto["descricao"] = descricao if descricao else "N/A"
             
-        except Exception as e:
-            log("AVISO", f"Erro ao extrair descrição")
+            except Exception as e:
+                log("AVISO", f"Erro ao extrair descrição")
         
         log("INFO", "Scraping concluído com sucesso!")
         
@@ -313,7 +325,18 @@ def scrape_mercado_livre(url, verbose=True):
     finally:
         driver.quit()
     
-    return dados_produto
+    return {campo: dados_produto[campo] for campo in CAMPOS if campo in campos}
+
+
+def ler_campos(valor):
+    """Converte "titulo,caracteristicas" na lista de campos (argparse)"""
+    campos = [campo.strip() for campo in valor.split(",") if campo.strip()]
+    desconhecidos = [campo for campo in campos if campo not in CAMPOS]
+    if desconhecidos:
+        raise argparse.ArgumentTypeError(
+            f"campos desconhecidos: {', '.join(desconhecidos)} (disponíveis: {', '.join(CAMPOS)})"
+        )
+    return campos
 
 
 def main():
@@ -327,6 +350,7 @@ Exemplos de uso:
   python scraping_cli.py "https://www.mercadolivre.com.br/produto/p/MLB123456"
   python scraping_cli.py "https://www.mercadolivre.com.br/produto/p/MLB123456" --json
   python scraping_cli.py "https://www.mercadolivre.com.br/produto/p/MLB123456" --quiet
+  python scraping_cli.py "https://www.mercadolivre.com.br/produto/p/MLB123456" --fields titulo,caracteristicas
         """
     )
     
@@ -349,6 +373,13 @@ Exemplos de uso:
         help="Suprimir logs detalhados"
     )
     
+    parser.add_argument(
+        "--fields",
+        type=ler_campos,
+        metavar="CAMPOS",
+        help=f"Extrair só estes campos, separados por vírgula ({', '.join(CAMPOS)})"
+    )
+    
     parser.add_argument(
         "--save",
         type=str,
@@ -360,7 +391,7 @@ Exemplos de uso:
     
     # Executar scraping
     verbose = not args.quiet
-    dados = scrape_mercado_livre(args.url, verbose=verbose)
+    dados = scrape_mercado_livre(args.url, verbose=verbose, campos=args.fields)
     
     # Salvar em arquivo se solicitado
     if args.save:
@@ -385,19 +416,22 @@ Exemplos de uso:
         print("=" * 80)
         print("RESUMO:")
         print("=" * 80)
-        print(f"Título: {dados['titulo'][:60]}..." if len(dados['titulo']) > 60 else f"Título: {dados['titulo']}")
-        print(f"Bullet Points: {len(dados['bullet_points'])} encontrados")
-        if dados['bullet_points']:
+        if 'titulo' in dados:
+            print(f"Título: {dados['titulo'][:60]}..." if len(dados['titulo']) > 60 else f"Título: {dados['titulo']}")
+        if 'bullet_points' in dados:
+            print(f"Bullet Points: {len(dados['bullet_points'])} encontrados")
             for i, bp in enumerate(dados['bullet_points'], 1):
                 print(f"  {i}. {bp[:60]}...")
-        print(f"\nCaracterísticas: {len(dados['caracteristicas'])} encontradas")
-        if dados['caracteristicas']:
+        if 'caracteristicas' in dados:
+            print(f"\nCaracterísticas: {len(dados['caracteristicas'])} encontradas")
             for chave, valor in dados['caracteristicas'].items():
                 print(f"  - {chave}: {valor}")
-        print(f"\nCor: {dados['cor']}")
-        print(f"Descrição: {len(dados['descricao'])} caracteres")
-        if dados['descricao'] != "N/A":
-            print(f"Primeiros 100 caracteres: {dados['descricao'][:100]}...")
+        if 'cor' in dados:
+            print(f"\nCor: {dados['cor']}")
+        if 'descricao' in dados:
+            print(f"Descrição: {len(dados['descricao'])} caracteres")
+            if dados['descricao'] != "N/A":
+                print(f"Primeiros 100 caracteres: {dados['descricao'][:100]}...")
         print("=" * 80)
     else:
         # Modo quiet - apenas retornar JSON
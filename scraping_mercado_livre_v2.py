@@ -5,334 +5,1192 @@ Muito mais rápido e confiável que Playwright para Vercel
 """
 
 import requests
-from bs4 import BeautifulSoup
+import httpx
 import re
 import json
-from typing import Dict, List
+import asyncio
+import copy
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+from concurrent.futures import Executor, ThreadPoolExecutor
 import base64
 import time
 
+from sessao_http import obter_sessao, obter_cliente_async
+from cache_produtos import CACHE_ATIVO, cobre_campos, obter_cache
+from banco_produtos import BANCO_ATIVO, headers_condicionais, obter_banco
+from arquivo_html import ARQUIVO_HTML_ATIVO, obter_arquivo
+from parsers_html import carregar_documento
+from armazem_screenshots import URL_SCREENSHOT, obter_armazem
+from agrupamento import obter_agrupador
+from pool_execucao import PoolSaturado
+from resiliencia_http import executar_com_tentativas, executar_com_tentativas_async, requisitar, requisitar_async
+from controle_taxa import OK, EsperaTaxaEsgotada, obter_controle_taxa, sinal_da_pagina
+from urls_mercado_livre import resolver_url
+from metricas import (
+    CACHE,
+    CAMPOS,
+    DOWNLOAD_BYTES,
+    DOWNLOAD_SEGUNDOS,
+    ERROS,
+    ESPERA_TAXA_SEGUNDOS,
+    EXTRATOR_SEGUNDOS,
+    PARSE_SEGUNDOS,
+    PRODUTO_SEGUNDOS,
+    SCREENSHOTS_SEGUNDOS,
+    Cronometro,
+    tipo_do_erro
+)
+from navegadores import aguardar_pagina_pronta, capturar_pagina_inteira, obter_pool_navegadores
+from extrator_html import (
+    CAMPOS_PRODUTO,
+    EXTRATOR_HTML,
+    MOTOR_PASSAGEM_UNICA,
+    ExtratorPassagemUnica,
+    PaginaProduto,
+    extrair_passagem_unica,
+    resultado_extracao
+)
 
-def scrape_mercado_livre(url: str, capturar_screenshots: bool = False) -> Dict:
+
+# Download em streaming: o motor de passagem única recebe a página em pedaços
+# e a conexão é fechada assim que todos os campos foram extraídos.
+# Com o arquivo de HTML ativo a página precisa vir inteira, então o streaming fica desligado.
+DOWNLOAD_STREAMING = os.getenv("DOWNLOAD_STREAMING", "false").lower() == "true"
+TAMANHO_PEDACO_STREAMING = int(os.getenv("TAMANHO_PEDACO_STREAMING", 16 * 1024))
+
+# Timeout de cada tentativa de download (as novas tentativas vêm de resiliencia_http)
+TIMEOUT_DOWNLOAD = float(os.getenv("TIMEOUT_DOWNLOAD", 20))
+
+# Screenshots: a captura espera sinais de prontidão da página (sem esperas fixas),
+# limitada a um orçamento total por produto
+# SCREENSHOTS_MODO: "secoes" (página + partes do produto) ou "pagina_inteira" (uma captura, sem rolagem)
+SCREENSHOTS_MODO = os.getenv("SCREENSHOTS_MODO", "secoes")
+SCREENSHOTS_ORCAMENTO_SEGUNDOS = float(os.getenv("SCREENSHOTS_ORCAMENTO_SEGUNDOS", 15))
+_SELETOR_SECAO_PRODUTO = "section[data-testid='product-section']"
+# Capturas por rolagem: nome, fração da altura da página, rótulo nos logs
+_ROLAGENS_SCREENSHOTS = (
+    ("caracteristicas", 0.3, "das características"),
+    ("descricao", 0.6, "da descrição"),
+    ("rodape", 1.0, "do rodapé")
+)
+
+
+def normalizar_campos(campos: Optional[Iterable[str]]) -> Optional[Tuple[str, ...]]:
     """
-    Realiza scraping de um produto do Mercado Livre.
+    Campos pedidos pelo cliente (parâmetro `fields`), na ordem de CAMPOS_PRODUTO.
+    
+    Returns:
+        Tupla dos campos pedidos, ou None quando nada foi pedido (lista vazia
+        ou ausente) ou todos foram pedidos: extração completa
+    
+    Raises:
+        ValueError: se algum nome não é um campo do produto
+    """
+    if not campos:
+        return None
+    desconhecidos = sorted(set(campos) - set(CAMPOS_PRODUTO))
+    if desconhecidos:
+        raise ValueError(
+            f"Campos desconhecidos: {', '.join(desconhecidos)} (disponíveis: {', '.join(CAMPOS_PRODUTO)})"
+        )
+    pedidos = tuple(campo for campo in CAMPOS_PRODUTO if campo in campos)
+    return None if len(pedidos) == len(CAMPOS_PRODUTO) else pedidos
+
+
+def _campos_extracao(campos: Optional[Tuple[str, ...]]) -> Optional[Tuple[str, ...]]:
+    """
+    Campos extraídos da página para os campos pedidos: o título entra sempre
+    (é barato e dele dependem o sinal de página curta e a gravação no cache e no banco)
+    """
+    if campos is None or "titulo" in campos:
+        return campos
+    return ("titulo",) + campos
+
+
+def _marcar_campos(dados_produto: Dict, campos: Optional[Tuple[str, ...]]):
+    """Registra nos dados de uma extração parcial quais campos foram extraídos"""
+    if campos is not None:
+        dados_produto["campos_extraidos"] = list(campos)
+
+
+def recortar_resposta(dados_produto: Dict, campos: Optional[Tuple[str, ...]], debug_logs: bool = True) -> Dict:
+    """
+    Resposta só com os campos pedidos (e as fontes deles), mais screenshots e
+    miniaturas se foram capturados e debug_logs se pedidos.
+    Sem `campos`, todos os campos do produto são mantidos.
+    """
+    mantidos = CAMPOS_PRODUTO if campos is None else campos
+    resposta = {campo: dados_produto[campo] for campo in mantidos if campo in dados_produto}
+    fontes = dados_produto.get("fontes") or {}
+    resposta["fontes"] = {campo: fonte for campo, fonte in fontes.items() if campo in mantidos}
+    for chave in ("screenshots", "miniaturas"):
+        if campos is None or dados_produto.get(chave):
+            resposta[chave] = dados_produto.get(chave, {})
+    if debug_logs:
+        resposta["debug_logs"] = dados_produto.get("debug_logs", [])
+    return resposta
+
+
+def extrair_dados_html(
+    conteudo: bytes,
+    logs: List[str],
+    backend: Optional[str] = None,
+    campos: Optional[Iterable[str]] = None
+) -> Dict:
+    """
+    Extrai os dados do produto a partir do HTML já baixado.
+    
+    Etapa puramente de CPU (parsing + extratores), separada do download para
+    poder rodar fora do event loop na versão assíncrona.
     
     Args:
-        url: URL do produto no Mercado Livre
-        capturar_screenshots: Se deve capturar screenshots (não implementado)
+        conteudo: HTML da página do produto (bytes)
+        logs: Lista onde as mensagens de debug são acumuladas
+        backend: "passagem_unica" (ver extrator_html), "dom" ou um backend de
+                 parsers_html para os extratores DOM (padrão: EXTRATOR_HTML)
+        campos: Campos a extrair (None = todos). Só o motor de passagem única
+                pula os outros; os extratores DOM extraem sempre tudo
     
     Returns:
-        Dict com dados extraídos: titulo, bullet_points, caracteristicas, cor, descricao
+        Dict com titulo, bullet_points, caracteristicas, cor e descricao
     """
     
-    logs = []  # Coletar logs para retornar
+    backend = backend or EXTRATOR_HTML
+    with PARSE_SEGUNDOS.cronometrar(motor=backend):
+        if backend == MOTOR_PASSAGEM_UNICA:
+            return extrair_passagem_unica(conteudo, logs, campos)
+        return _extrair_dados_dom(conteudo, logs, None if backend == "dom" else backend)
+
+
+def _extrair_dados_dom(conteudo: bytes, logs: List[str], backend: Optional[str] = None) -> Dict:
+    """Extratores DOM: uma busca na árvore por campo (backend de parsers_html)"""
     
     dados_produto = {
         "titulo": "N/A",
         "bullet_points": [],
         "caracteristicas": {},
         "cor": "N/A",
-        "descricao": "N/A",
-        "screenshots": {},
-        "debug_logs": []
+        "descricao": "N/A"
     }
     
-    try:
-        print(f"[INFO] Acessando URL: {url}")
-        logs.append(f"Acessando URL: {url}")
-        
-        # Headers realistas para evitar bloqueio
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
-            "Accept-Language": "pt-BR,pt;q=0.9,en;q=0.8",
-            "Accept-Encoding": "gzip, deflate, br",
-            "Cache-Control": "max-age=0",
-            "Sec-Ch-Ua": '"Not A(Brand";v="99", "Google Chrome";v="131", "Chromium";v="131"',
-            "Sec-Ch-Ua-Mobile": "?0",
-            "Sec-Ch-Ua-Platform": '"Windows"',
-            "Sec-Fetch-Dest": "document",
-            "Sec-Fetch-Mode": "navigate",
-            "Sec-Fetch-Site": "none",
-            "Upgrade-Insecure-Requests": "1",
-            "Referer": "https://www.mercadolivre.com.br/",
-            "Connection": "keep-alive",
-            "DNT": "1"
-        }
-        
-        # Fazer requisição normal com requests
-        response = requests.get(url, headers=headers, timeout=20, allow_redirects=True)
-        response.raise_for_status()
-        logs.append(f"Request bem-sucedido: {len(response.content)} bytes recebidos")
-        
-        print(f"[OK] Status: {response.status_code}")
-        print(f"[DEBUG] Content length: {len(response.content)} bytes")
-        print(f"[DEBUG] Content-Type: {response.headers.get('content-type')}")
-        
-        logs.append(f"Status: {response.status_code}")
-        logs.append(f"Content-Length: {len(response.content)} bytes")
-        logs.append(f"Content-Type: {response.headers.get('content-type')}")
-        
-        # Parse HTML
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Verificar se tem conteúdo
-        page_text = soup.get_text()
-        print(f"[DEBUG] Page text length: {len(page_text)} caracteres")
-        
-        # Buscar títulos para debug
-        h1s = soup.find_all('h1')
-        print(f"[DEBUG] Total de h1s encontrados: {len(h1s)}")
-        
-        logs.append(f"Page text length: {len(page_text)} caracteres")
-        logs.append(f"H1 elements found: {len(h1s)}")
-        
-        # DEBUG: Retornar snippet do HTML
-        html_snippet = response.content[:500].decode('utf-8', errors='ignore')
-        logs.append(f"HTML snippet: {html_snippet}")
-        
-        # Se página muito pequena, pode ser bloqueio
-        if len(page_text) < 1000:
-            logs.append("⚠️ AVISO: Página retornou com conteúdo muito pequeno - pode estar bloqueada!")
-            logs.append(f"Content: {page_text[:200]}")
-        
-        # ============================================
-        # 1. EXTRAIR TÍTULO (usando regex no texto bruto)
-        # ============================================
-        print("[DEBUG] Extraindo título...")
-        # Procurar por padrões de título
-        titulo_match = re.search(r'([A-Z][a-záàâãéèêíïóôõöúçñ0-9\s\-]{10,200}(?:Gallant|Britania|Mondial|Panificadora)[a-záàâãéèêíïóôõöúçñ0-9\s\-]{5,100}[0-9]w)', page_text)
-        if titulo_match:
-            dados_produto["titulo"] = titulo_match.group(1)[:200]
-            print(f"[OK] Título encontrado: {dados_produto['titulo'][:50]}...")
-            logs.append(f"Título: {dados_produto['titulo'][:50]}...")
+    # Parse HTML (backend selecionável: html.parser, lxml, selectolax)
+    documento = carregar_documento(conteudo, backend)
+    cronometro = Cronometro(EXTRATOR_SEGUNDOS)
+    cronometro.marcar(extrator="parse_dom")
+    
+    # Verificar se tem conteúdo
+    page_text = documento.texto()
+    print(f"[DEBUG] Page text length: {len(page_text)} caracteres")
+    
+    # Buscar títulos para debug
+    h1s = documento.buscar_todos('h1')
+    print(f"[DEBUG] Total de h1s encontrados: {len(h1s)}")
+    
+    logs.append(f"Page text length: {len(page_text)} caracteres")
+    logs.append(f"H1 elements found: {len(h1s)}")
+    
+    # DEBUG: Retornar snippet do HTML
+    html_snippet = conteudo[:500].decode('utf-8', errors='ignore')
+    logs.append(f"HTML snippet: {html_snippet}")
+    
+    # Se página muito pequena, pode ser bloqueio
+    if len(page_text) < 1000:
+        logs.append("⚠️ AVISO: Página retornou com conteúdo muito pequeno - pode estar bloqueada!")
+        logs.append(f"Content: {page_text[:200]}")
+    
+    # ============================================
+    # 1. EXTRAIR TÍTULO (usando regex no texto bruto)
+    # ============================================
+    print("[DEBUG] Extraindo título...")
+    # Procurar por padrões de título
+    titulo_match = re.search(r'([A-Z][a-záàâãéèêíïóôõöúçñ0-9\s\-]{10,200}(?:Gallant|Britania|Mondial|Panificadora)[a-záàâãéèêíïóôõöúçñ0-9\s\-]{5,100}[0-9]w)', page_text)
+    if titulo_match:
+        dados_produto["titulo"] = titulo_match.group(1)[:200]
+        print(f"[OK] Título encontrado: {dados_produto['titulo'][:50]}...")
+        logs.append(f"Título: {dados_produto['titulo'][:50]}...")
+    else:
+        # Fallback: procurar primeira linha que parece ser um título
+        h1 = documento.buscar('h1')
+        if h1:
+            dados_produto["titulo"] = h1.texto(strip=True)[:200]
+            logs.append(f"Título (via h1): {dados_produto['titulo'][:50]}...")
         else:
-            # Fallback: procurar primeira linha que parece ser um título
-            h1 = soup.find('h1')
-            if h1:
-                dados_produto["titulo"] = h1.get_text(strip=True)[:200]
-                logs.append(f"Título (via h1): {dados_produto['titulo'][:50]}...")
-            else:
-                # Tenta extrair do page_text
-                lines = page_text.split('\n')
-                for line in lines:
-                    if len(line) > 15 and len(line) < 200 and 'Panificadora' in line or 'Britania' in line or 'Mondial' in line:
-                        dados_produto["titulo"] = line.strip()
-                        logs.append(f"Título (via regex): {dados_produto['titulo'][:50]}...")
-                        break
-        # ============================================
-        # 2. EXTRAIR BULLET POINTS
-        # ============================================
-        print("[DEBUG] Extraindo bullet points...")
-        bullet_points = []
-        
-        # Procurar por h2 "O que você precisa saber"
-        h2_bullets = soup.find('h2', string=re.compile('você precisa saber', re.I))
-        if h2_bullets:
-            # Próximo elemento sibling contém os bullets
-            container = h2_bullets.parent.find_next_sibling()
-            if container:
-                # Procurar ul com features-list
-                ul = container.find('ul', {'class': re.compile('features-list', re.I)})
-                if ul:
-                    lis = ul.find_all('li')
-                    print(f"[DEBUG] Encontrados {len(lis)} bullet points")
+            # Tenta extrair do page_text
+            lines = page_text.split('\n')
+            for line in lines:
+                if len(line) > 15 and len(line) < 200 and 'Panificadora' in line or 'Britania' in line or 'Mondial' in line:
+                    dados_produto["titulo"] = line.strip()
+                    logs.append(f"Título (via regex): {dados_produto['titulo'][:50]}...")
+                    break
+    # ============================================
+    # 2. EXTRAIR BULLET POINTS
+    # ============================================
+    cronometro.marcar(extrator="titulo")
+    print("[DEBUG] Extraindo bullet points...")
+    bullet_points = []
+    
+    # Procurar por h2 "O que você precisa saber"
+    h2_bullets = documento.titulo_secao('h2', re.compile('você precisa saber', re.I))
+    if h2_bullets:
+        # Próximo elemento sibling contém os bullets
+        container = h2_bullets.pai().proximo_irmao()
+        if container:
+            # Procurar ul com features-list
+            ul = container.buscar('ul', re.compile('features-list', re.I))
+            if ul:
+                lis = ul.buscar_todos('li')
+                print(f"[DEBUG] Encontrados {len(lis)} bullet points")
+                
+                for li in lis:
+                    text = li.texto(strip=True)
+                    if text and len(text) > 10 and len(text) < 500:
+                        if text not in bullet_points:
+                            bullet_points.append(text)
+    
+    dados_produto["bullet_points"] = bullet_points
+    if bullet_points:
+        print(f"[OK] {len(bullet_points)} bullet points encontrados")
+    
+    # ============================================
+    # 3. EXTRAIR CARACTERÍSTICAS
+    # ============================================
+    cronometro.marcar(extrator="bullet_points")
+    print("[DEBUG] Extraindo características...")
+    caracteristicas = {}
+    
+    # Procurar por h2 "Características do produto"
+    h2_char = documento.titulo_secao('h2', re.compile('Características', re.I))
+    if h2_char:
+        # Próximo elemento sibling contém as characteristics
+        container = h2_char.pai().proximo_irmao()
+        if container:
+            # Procurar divs com classe "key-value"
+            key_value_divs = container.buscar_todos('div', re.compile('key-value', re.I))
+            print(f"[DEBUG] Encontrados {len(key_value_divs)} pares chave-valor")
+            
+            for kv_div in key_value_divs:
+                # Dentro tem spans ou p com a chave e valor
+                spans = kv_div.buscar_todos('span')
+                if len(spans) >= 2:
+                    # Primeira span é a chave, segunda é o valor
+                    chave = spans[0].texto(strip=True)
+                    valor = spans[1].texto(strip=True)
                     
-                    for li in lis:
-                        text = li.get_text(strip=True)
-                        if text and len(text) > 10 and len(text) < 500:
-                            if text not in bullet_points:
-                                bullet_points.append(text)
+                    if chave and valor and len(chave) < 100 and len(valor) < 200:
+                        # Remover ':'  da chave se existir
+                        chave = chave.rstrip(':')
+                        caracteristicas[chave] = valor
+    
+    dados_produto["caracteristicas"] = caracteristicas
+    if caracteristicas:
+        print(f"[OK] {len(caracteristicas)} características encontradas")
+    
+    # ============================================
+    # 4. EXTRAIR COR (do texto bruto)
+    # ============================================
+    cronometro.marcar(extrator="caracteristicas")
+    print("[DEBUG] Extraindo cor...")
+    cor_match = re.search(r'Cor\s*:?\s*([A-Za-záàâãéèêíïóôõöúçñ]+(?:\s+[A-Za-záàâãéèêíïóôõöúçñ]+)?)\b', page_text, re.IGNORECASE)
+    if cor_match:
+        cor_text = cor_match.group(1).strip()
+        if len(cor_text) < 50 and not any(w in cor_text.lower() for w in ['escolha', 'selecione', 'voltagem']):
+            dados_produto["cor"] = cor_text
+            print(f"[OK] Cor: {dados_produto['cor']}")
+            logs.append(f"Cor: {dados_produto['cor']}")
+    
+    
+    # ============================================
+    # 5. EXTRAIR DESCRIÇÃO
+    # ============================================
+    cronometro.marcar(extrator="cor")
+    print("[DEBUG] Extraindo descrição...")
+    descricao = "N/A"
+    
+    # Procurar por h2 "Descrição"
+    h2_desc = documento.titulo_secao('h2', re.compile('Descrição', re.I))
+    if h2_desc:
+        container = h2_desc.pai()
         
-        dados_produto["bullet_points"] = bullet_points
-        if bullet_points:
-            print(f"[OK] {len(bullet_points)} bullet points encontrados")
+        # Próximo elemento após h2
+        next_elem = container.proximo(['div', 'p', 'section'])
+        if next_elem:
+            desc_text = next_elem.texto(strip=True)
+            if desc_text and len(desc_text) > 30:
+                descricao = desc_text[:500]
+                print(f"[OK] Descrição: {len(descricao)} caracteres")
         
-        # ============================================
-        # 3. EXTRAIR CARACTERÍSTICAS
-        # ============================================
-        print("[DEBUG] Extraindo características...")
-        caracteristicas = {}
+        # Fallback: pegar todo o conteúdo da seção
+        if descricao == "N/A":
+            desc_text = container.texto(strip=True)
+            if len(desc_text) > 100:
+                # Remover o h2 do início
+                desc_text = desc_text.replace("Descrição", "").strip()
+                descricao = desc_text[:500]
+    
+    dados_produto["descricao"] = descricao
+    cronometro.marcar(extrator="descricao")
+    
+    return dados_produto
+
+
+def capturar_screenshots_pagina(url: str, logs: List[str]) -> Dict:
+    """
+    Captura screenshots da página do produto com Selenium.
+    
+    Args:
+        url: URL do produto no Mercado Livre
+        logs: Lista onde as mensagens de debug são acumuladas
+    
+    Returns:
+        Dict nome -> URL do screenshot (/screenshot/<arquivo>; vazio se a captura falhar)
+    """
+    # Capturas simultâneas do mesmo produto (scrape, lote, trabalhos) dividem um navegador só
+    chave, url = resolver_produto(url)
+    (screenshots, logs_captura), agrupada = obter_agrupador("screenshots").executar(chave, _capturar_screenshots, url)
+    if agrupada:
+        print(f"[DEBUG] Screenshots de {chave} aproveitados de outra captura em andamento")
+        logs.append(f"Screenshots agrupados com outra captura em andamento: {chave}")
+    logs.extend(logs_captura)
+    return dict(screenshots)
+
+
+def _capturar_screenshots(url: str):
+    """Captura os screenshots de `url` e devolve (screenshots, logs)"""
+    logs = []
+    print("[DEBUG] Iniciando captura de screenshots...")
+    logs.append("Iniciando captura de screenshots...")
+    
+    try:
+        # Navegador já aberto do pool (aba nova); devolvido ao sair do bloco
+        inicio = time.perf_counter()
+        with obter_pool_navegadores().emprestar() as driver:
+            screenshots = _capturar_com_navegador(driver, url, logs)
+        SCREENSHOTS_SEGUNDOS.observar(time.perf_counter() - inicio)
         
-        # Procurar por h2 "Características do produto"
-        h2_char = soup.find('h2', string=re.compile('Características', re.I))
-        if h2_char:
-            # Próximo elemento sibling contém as characteristics
-            container = h2_char.parent.find_next_sibling()
-            if container:
-                # Procurar divs com classe "key-value"
-                key_value_divs = container.find_all('div', {'class': re.compile('key-value', re.I)})
-                print(f"[DEBUG] Encontrados {len(key_value_divs)} pares chave-valor")
-                
-                for kv_div in key_value_divs:
-                    # Dentro tem spans ou p com a chave e valor
-                    spans = kv_div.find_all('span')
-                    if len(spans) >= 2:
-                        # Primeira span é a chave, segunda é o valor
-                        chave = spans[0].get_text(strip=True)
-                        valor = spans[1].get_text(strip=True)
-                        
-                        if chave and valor and len(chave) < 100 and len(valor) < 200:
-                            # Remover ':'  da chave se existir
-                            chave = chave.rstrip(':')
-                            caracteristicas[chave] = valor
+        print(f"[OK] {len(screenshots)} screenshots capturados com sucesso!")
+        logs.append(f"Total: {len(screenshots)} screenshots capturados")
+        return screenshots, logs
         
-        dados_produto["caracteristicas"] = caracteristicas
-        if caracteristicas:
-            print(f"[OK] {len(caracteristicas)} características encontradas")
+    except ImportError:
+        print("[AVISO] Selenium/webdriver-manager não instalado. Pulando screenshots.")
+        logs.append("AVISO: Selenium não disponível - screenshots não capturados")
+    except Exception as e:
+        ERROS.incrementar(etapa="screenshots", tipo=tipo_do_erro(e))
+        print(f"[AVISO] Erro ao capturar screenshots: {e}")
+        logs.append(f"AVISO: Erro ao capturar screenshots: {e}")
+    
+    return {}, logs
+
+
+def _capturar_com_navegador(driver, url: str, logs: List[str]) -> Dict:
+    """Abre a página no navegador emprestado e captura as partes do produto"""
+    from selenium.common.exceptions import TimeoutException
+    
+    inicio = time.monotonic()
+    prazo = inicio + SCREENSHOTS_ORCAMENTO_SEGUNDOS
+    driver.set_page_load_timeout(SCREENSHOTS_ORCAMENTO_SEGUNDOS)
+    
+    print("[INFO] Abrindo página com Selenium...")
+    try:
+        driver.get(url)
+    except TimeoutException:
+        # Orçamento esgotado no carregamento: captura o que já foi renderizado
+        logs.append("⚠ Página não terminou de carregar dentro do orçamento de captura")
+    
+    # Capturar screenshots em diferentes partes da página
+    screenshots = {}
+    
+    if SCREENSHOTS_MODO == "pagina_inteira":
+        # Rolar até o fim dispara o carregamento preguiçoso das imagens; a espera cobre a página toda
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        _aguardar_captura(driver, prazo, "página inteira", logs, _SELETOR_SECAO_PRODUTO, toda_pagina=True)
+        print("[INFO] Capturando screenshot da página inteira...")
+        screenshots["pagina_inteira"] = _guardar_screenshot(base64.b64decode(capturar_pagina_inteira(driver)))
+        logs.append("✓ Screenshot da página inteira capturado")
+    else:
+        # 1. Screenshot completo da página
+        _aguardar_captura(driver, prazo, "página", logs, _SELETOR_SECAO_PRODUTO)
+        print("[INFO] Capturando screenshot completo...")
+        screenshot_full = driver.get_screenshot_as_png()
+        screenshots["pagina_completa"] = _guardar_screenshot(screenshot_full)
+        logs.append("✓ Screenshot completo capturado")
         
-        # ============================================
-        # 4. EXTRAIR COR (do texto bruto)
-        # ============================================
-        print("[DEBUG] Extraindo cor...")
-        cor_match = re.search(r'Cor\s*:?\s*([A-Za-záàâãéèêíïóôõöúçñ]+(?:\s+[A-Za-záàâãéèêíïóôõöúçñ]+)?)\b', page_text, re.IGNORECASE)
-        if cor_match:
-            cor_text = cor_match.group(1).strip()
-            if len(cor_text) < 50 and not any(w in cor_text.lower() for w in ['escolha', 'selecione', 'voltagem']):
-                dados_produto["cor"] = cor_text
-                print(f"[OK] Cor: {dados_produto['cor']}")
-                logs.append(f"Cor: {dados_produto['cor']}")
+        # 2. Screenshot do produto (scroll até section principal)
+        try:
+            product_section = driver.find_element("css selector", _SELETOR_SECAO_PRODUTO)
+            driver.execute_script("window.scrollTo(0, arguments[0]);", product_section.location['y'])
+            _aguardar_captura(driver, prazo, "seção de produto", logs)
+            screenshot_prod = driver.get_screenshot_as_png()
+            screenshots["secao_produto"] = _guardar_screenshot(screenshot_prod)
+            logs.append("✓ Screenshot da seção de produto capturado")
+        except:
+            logs.append("⚠ Não foi possível capturar screenshot da seção de produto")
+        
+        # 3-5. Características, descrição e rodapé (posições relativas à altura da página)
+        for nome, fracao, rotulo in _ROLAGENS_SCREENSHOTS:
+            try:
+                driver.execute_script("window.scrollTo(0, document.body.scrollHeight * arguments[0]);", fracao)
+                _aguardar_captura(driver, prazo, rotulo, logs)
+                screenshot = driver.get_screenshot_as_png()
+                screenshots[nome] = _guardar_screenshot(screenshot)
+                logs.append(f"✓ Screenshot {rotulo} capturado")
+            except:
+                logs.append(f"⚠ Não foi possível capturar screenshot {rotulo}")
+    
+    duracao = time.monotonic() - inicio
+    print(f"[DEBUG] Captura concluída em {duracao:.1f}s")
+    logs.append(f"Tempo de captura: {duracao:.1f}s")
+    return screenshots
+
+
+def _guardar_screenshot(png: bytes) -> str:
+    """Grava o PNG comprimido no armazém (nome = hash do conteúdo) e devolve a URL de download"""
+    arquivo = obter_armazem().guardar(png)["arquivo"]
+    return URL_SCREENSHOT.format(arquivo)
+
+
+def _aguardar_captura(driver, prazo: float, etapa: str, logs: List[str], seletor: Optional[str] = None, toda_pagina: bool = False):
+    """Espera a página ficar pronta para a próxima captura; com o orçamento esgotado, captura assim mesmo"""
+    estado = aguardar_pagina_pronta(driver, prazo, seletor=seletor, toda_pagina=toda_pagina)
+    if not estado["pronta"]:
+        pendente = [
+            sinal for sinal, ok in (
+                ("DOM", estado["dom"]),
+                ("seção do produto", estado["secao"]),
+                (f"{estado['imagens_pendentes']} imagens", estado["imagens_pendentes"] == 0),
+                ("rede", estado["rede_ociosa"])
+            ) if not ok
+        ]
+        print(f"[AVISO] Orçamento de captura esgotado ({etapa}): aguardando {', '.join(pendente)}")
+        logs.append(f"⚠ Orçamento de captura esgotado antes de {etapa} ficar pronta ({', '.join(pendente)})")
+
+
+def _extrair_com_logs(conteudo: bytes, campos: Optional[Tuple[str, ...]] = None):
+    """Wrapper de `extrair_dados_html` que devolve os logs (necessário em pools de processos)"""
+    logs = []
+    return extrair_dados_html(conteudo, logs, campos=campos), logs
+
+
+def _capturar_com_logs(url: str):
+    """Wrapper de `capturar_screenshots_pagina` que devolve os logs (necessário em pools de processos)"""
+    logs = []
+    return capturar_screenshots_pagina(url, logs), logs
+
+
+def _registrar_resposta(status_code: int, tamanho: int, content_type: str, logs: List[str]):
+    """Registra nos logs as informações básicas da resposta HTTP"""
+    logs.append(f"Request bem-sucedido: {tamanho} bytes recebidos")
+    
+    print(f"[OK] Status: {status_code}")
+    print(f"[DEBUG] Content length: {tamanho} bytes")
+    print(f"[DEBUG] Content-Type: {content_type}")
+    
+    logs.append(f"Status: {status_code}")
+    logs.append(f"Content-Length: {tamanho} bytes")
+    logs.append(f"Content-Type: {content_type}")
+
+
+def _usar_streaming() -> bool:
+    """Streaming só com o motor de passagem única e sem arquivo de HTML (que precisa da página inteira)"""
+    return DOWNLOAD_STREAMING and EXTRATOR_HTML == MOTOR_PASSAGEM_UNICA and not ARQUIVO_HTML_ATIVO
+
+
+def _concluir_streaming(extrator: ExtratorPassagemUnica, status_code: int, content_type: str, logs: List[str]) -> Dict:
+    """Registra a resposta lida em streaming e finaliza a extração"""
+    _registrar_resposta(status_code, extrator.bytes_recebidos, content_type, logs)
+    if extrator.completo:
+        print(f"[DEBUG] Campos completos após {extrator.bytes_recebidos} bytes: download interrompido")
+        logs.append(f"Download interrompido após {extrator.bytes_recebidos} bytes (todos os campos extraídos)")
+    return resultado_extracao(extrator, logs)
+
+
+def resolver_produto(url: str):
+    """
+    Chave e URL de download de um link de produto.
+    
+    Returns:
+        Tupla (chave do produto ou None, URL canônica sem rastreamento); URLs que
+        não identificam um produto do Mercado Livre voltam sem chave e como vieram
+    """
+    produto = resolver_url(url)
+    if produto is None:
+        return None, url
+    return produto.chave, produto.url
+
+
+def _buscar_no_cache(
+    chave: Optional[str],
+    force_refresh: bool,
+    logs: List[str],
+    campos: Optional[Tuple[str, ...]] = None
+) -> Optional[Dict]:
+    """
+    Consulta o cache de produtos pela chave do produto (None se ausente ou ignorado).
+    Uma extração parcial que não tem todos os `campos` pedidos conta como miss.
+    """
+    if not chave or not CACHE_ATIVO:
+        return None
+    
+    if force_refresh:
+        CACHE.incrementar(resultado="ignorado")
+        logs.append(f"Cache ignorado (force_refresh): {chave}")
+        return None
+    
+    dados = obter_cache().obter(chave, campos)
+    CACHE.incrementar(resultado="miss" if dados is None else "hit")
+    if dados is not None:
+        print(f"[INFO] Produto {chave} servido do cache")
+        logs.append(f"Cache hit: {chave}")
+    return dados
+
+
+def _guardar_no_cache(chave: Optional[str], dados_produto: Dict):
+    """Guarda o produto no cache se a extração encontrou algo útil"""
+    if CACHE_ATIVO and chave and dados_produto.get("titulo") != "N/A":
+        obter_cache().guardar(chave, dados_produto)
+
+
+def _buscar_no_banco(chave: Optional[str], force_refresh: bool, campos: Optional[Tuple[str, ...]] = None) -> Optional[Dict]:
+    """
+    Registro salvo do produto, usado para a requisição condicional
+    (ignorado se é uma extração parcial sem todos os `campos` pedidos)
+    """
+    if not BANCO_ATIVO or not chave or force_refresh:
+        return None
+    try:
+        registro = obter_banco().obter(chave)
+    except Exception as e:
+        print(f"[AVISO] Erro ao consultar banco de produtos: {e}")
+        return None
+    if registro is not None and not cobre_campos(registro["dados"], campos):
+        return None
+    return registro
+
+
+def _reaproveitar_registro(chave: str, registro: Dict, logs: List[str]) -> Dict:
+    """Página não mudou (304): usa os dados salvos sem baixar nem parsear"""
+    print(f"[INFO] Produto {chave} não mudou (304), usando dados salvos")
+    logs.append(f"304 Not Modified: {chave} servido do banco local")
+    try:
+        obter_banco().marcar_validado(chave)
+    except Exception as e:
+        print(f"[AVISO] Erro ao atualizar banco de produtos: {e}")
+    _guardar_no_cache(chave, registro["dados"])
+    return registro["dados"]
+
+
+def _arquivar_html(conteudo: bytes, url: str, chave: Optional[str], status: int, headers: Dict):
+    """Guarda o HTML bruto no arquivo comprimido (se ativado) para replay offline"""
+    if not ARQUIVO_HTML_ATIVO:
+        return
+    try:
+        sha = obter_arquivo().guardar(conteudo, url, chave=chave, status=status, headers=headers)
+        print(f"[DEBUG] HTML arquivado: {sha[:12]}")
+    except Exception as e:
+        print(f"[AVISO] Erro ao arquivar HTML: {e}")
+
+
+def _headers_arquivo(headers_resposta) -> Dict:
+    """Subconjunto dos headers da resposta guardado no arquivo de HTML"""
+    return {
+        nome: headers_resposta.get(nome)
+        for nome in ("content-type", "etag", "last-modified")
+        if headers_resposta.get(nome)
+    }
+
+
+def _guardar_resultado(chave: Optional[str], url: str, dados_produto: Dict, headers_resposta):
+    """Guarda o produto extraído no cache e no banco, com ETag / Last-Modified"""
+    _guardar_no_cache(chave, dados_produto)
+    if BANCO_ATIVO and chave and dados_produto.get("titulo") != "N/A":
+        try:
+            obter_banco().guardar(
+                chave,
+                url,
+                dados_produto,
+                etag=headers_resposta.get("etag"),
+                last_modified=headers_resposta.get("last-modified")
+            )
+        except Exception as e:
+            print(f"[AVISO] Erro ao gravar banco de produtos: {e}")
+
+
+def _dados_vazios() -> Dict:
+    """Estrutura padrão da resposta quando nada foi extraído"""
+    return {
+        "titulo": "N/A",
+        "bullet_points": [],
+        "caracteristicas": {},
+        "cor": "N/A",
+        "descricao": "N/A",
+        "fontes": {},
+        "screenshots": {},
+        "miniaturas": {},
+        "debug_logs": []
+    }
+
+
+def scrape_mercado_livre(
+    url: str,
+    capturar_screenshots: bool = False,
+    levantar_erros: bool = False,
+    force_refresh: bool = False,
+    campos: Optional[Iterable[str]] = None,
+    debug_logs: Optional[bool] = None
+) -> Dict:
+    """
+    Realiza scraping de um produto do Mercado Livre.
+    
+    A URL é reduzida à chave do produto (cache e banco) e baixada sem
+    parâmetros de rastreamento; outras páginas do Mercado Livre são baixadas
+    como vieram, sem cache, banco nem agrupamento. Requisições simultâneas do mesmo
+    produto são agrupadas: só uma baixa e parseia a página, as outras
+    recebem o mesmo resultado.
+    
+    Args:
+        url: URL do produto no Mercado Livre
+        capturar_screenshots: Se deve capturar screenshots com Selenium
+        levantar_erros: Se True, erros HTTP são propagados em vez de apenas registrados nos logs
+        force_refresh: Se True, ignora o cache e baixa a página novamente
+        campos: Campos a extrair e devolver (None = todos); os extratores dos
+                outros campos não rodam e a resposta vem só com os pedidos
+        debug_logs: Se inclui debug_logs na resposta (None = só na extração completa)
+    
+    Returns:
+        Dict com dados extraídos: titulo, bullet_points, caracteristicas, cor, descricao
+    
+    Raises:
+        ValueError: se `campos` tem nomes desconhecidos
+    """
+    
+    campos = normalizar_campos(campos)
+    extracao = _campos_extracao(campos)
+    logs = []  # Coletar logs para retornar
+    dados_produto = _dados_vazios()
+    inicio = time.perf_counter()
+    
+    chave_cache, url = resolver_produto(url)
+    em_cache = _buscar_no_cache(chave_cache, force_refresh, logs, extracao)
+    if em_cache is not None:
+        dados_produto.update(em_cache)
+        PRODUTO_SEGUNDOS.observar(time.perf_counter() - inicio, origem="cache")
+    else:
+        resultado, agrupada = obter_agrupador("produtos").executar(
+            _chave_agrupamento(chave_cache, extracao), _baixar_produto, url, chave_cache, force_refresh, extracao
+        )
+        PRODUTO_SEGUNDOS.observar(time.perf_counter() - inicio, origem="agrupada" if agrupada else "download")
+        _aplicar_download(dados_produto, resultado, agrupada, chave_cache, logs, levantar_erros)
+    
+    # ============================================
+    # CAPTURAR SCREENSHOTS (se solicitado)
+    # ============================================
+    if capturar_screenshots:
+        dados_produto["screenshots"] = capturar_screenshots_pagina(url, logs)
+        dados_produto["miniaturas"] = obter_armazem().miniaturas(dados_produto["screenshots"])
+    
+    # Adicionar logs à resposta
+    dados_produto["debug_logs"] = logs
+    
+    return _resposta(dados_produto, campos, debug_logs)
+
+
+def _chave_agrupamento(chave_cache: Optional[str], campos: Optional[Tuple[str, ...]]):
+    """Só se agrupam requisições do mesmo produto que extraem os mesmos campos"""
+    if chave_cache is None or campos is None:
+        return chave_cache
+    return (chave_cache, campos)
+
+
+def _resposta(dados_produto: Dict, campos: Optional[Tuple[str, ...]], debug_logs: Optional[bool]) -> Dict:
+    """Resposta completa como sempre foi, ou recortada se há campos pedidos ou debug_logs explícito"""
+    if campos is None and debug_logs is not False:
+        dados_produto.pop("campos_extraidos", None)
+        return dados_produto
+    return recortar_resposta(dados_produto, campos, debug_logs=bool(debug_logs))
+
+
+def _baixar_produto(url: str, chave_cache: Optional[str], force_refresh: bool, campos: Optional[Tuple[str, ...]] = None):
+    """
+    Download + extração de um produto (o trabalho compartilhado pelas requisições agrupadas).
+    
+    Erros passageiros (timeout, conexão, 429, 5xx) são repetidos com backoff;
+    erros definitivos voltam na hora.
+    
+    Returns:
+        Tupla (dados extraídos, logs, erro HTTP ou None)
+    """
+    logs = []
+    dados_produto = {}
+    registro = _buscar_no_banco(chave_cache, force_refresh, campos)
+    try:
+        executar_com_tentativas(_baixar_uma_vez, logs, url, chave_cache, registro, dados_produto, logs, campos)
         
+        print("[INFO] Scraping concluído com sucesso!")
+        logs.append("Scraping concluído com sucesso!")
         
-        # ============================================
-        # 5. EXTRAIR DESCRIÇÃO
-        # ============================================
-        print("[DEBUG] Extraindo descrição...")
-        descricao = "N/A"
+    except (PoolSaturado, EsperaTaxaEsgotada) as e:
+        # Sobrecarga (fila do pool cheia ou host sem vaga): vira 429 no endpoint, não um resultado vazio
+        ERROS.incrementar(etapa="download", tipo=tipo_do_erro(e))
+        raise
+    except requests.exceptions.RequestException as e:
+        ERROS.incrementar(etapa="download", tipo=tipo_do_erro(e))
+        print(f"[ERRO] Erro na requisição HTTP: {e}")
+        logs.append(f"Erro HTTP: {e}")
+        return dados_produto, logs, e
+    except Exception as e:
+        ERROS.incrementar(etapa="scraping", tipo=tipo_do_erro(e))
+        print(f"[ERRO] Erro geral durante scraping: {e}")
+        logs.append(f"Erro geral: {e}")
+        import traceback
+        traceback.print_exc()
+    
+    return dados_produto, logs, None
+
+
+def _baixar_uma_vez(
+    url: str,
+    chave_cache: Optional[str],
+    registro: Optional[Dict],
+    dados_produto: Dict,
+    logs: List[str],
+    campos: Optional[Tuple[str, ...]] = None
+):
+    """
+    Uma tentativa de download + extração, preenchendo `dados_produto`.
+    
+    O download espera a vez do host no controle de taxa e informa o sinal
+    da resposta (saudável, bloqueio, página curta ou erro).
+    """
+    with obter_controle_taxa().permissao(url) as permissao:
+        _registrar_espera_taxa(permissao, logs)
+        print(f"[INFO] Acessando URL: {url}")
+        logs.append(f"Acessando URL: {url}")
         
-        # Procurar por h2 "Descrição"
-        h2_desc = soup.find('h2', string=re.compile('Descrição', re.I))
-        if h2_desc:
-            container = h2_desc.parent
-            
-            # Próximo elemento após h2
-            next_elem = container.find_next(['div', 'p', 'section'])
-            if next_elem:
-                desc_text = next_elem.get_text(strip=True)
-                if desc_text and len(desc_text) > 30:
-                    descricao = desc_text[:500]
-                    print(f"[OK] Descrição: {len(descricao)} caracteres")
+        # Sessão compartilhada: reaproveita conexões keep-alive entre produtos
+        # Com registro salvo, a requisição é condicional (ETag / Last-Modified)
+        streaming = _usar_streaming()
+        inicio = time.perf_counter()
+        response = requisitar(
+            lambda: obter_sessao().get(
+                url,
+                headers=headers_condicionais(registro),
+                timeout=TIMEOUT_DOWNLOAD,
+                allow_redirects=True,
+                stream=streaming
+            ),
+            urlsplit(url).hostname
+        )
+        # close() descarta a conexão se o corpo não foi lido até o fim
+        with response:
+            response.raise_for_status()
             
-            # Fallback: pegar todo o conteúdo da seção
-            if descricao == "N/A":
-                desc_text = container.get_text(strip=True)
-                if len(desc_text) > 100:
-                    # Remover o h2 do início
-                    desc_text = desc_text.replace("Descrição", "").strip()
-                    descricao = desc_text[:500]
-        
-        dados_produto["descricao"] = descricao
+            if response.status_code == 304 and registro:
+                _medir_download(inicio, "nao_modificado")
+                dados_produto.update(_reaproveitar_registro(chave_cache, registro, logs))
+                _registrar_sinal(permissao, response.status_code, response.url, None, dados_produto, logs)
+            elif streaming:
+                extrator = ExtratorPassagemUnica(campos)
+                for pedaco in response.iter_content(TAMANHO_PEDACO_STREAMING):
+                    extrator.alimentar(pedaco)
+                    if extrator.completo:
+                        break
+                _medir_download(inicio, "streaming", extrator.bytes_recebidos, extrator.segundos_processando)
+                dados_produto.update(_concluir_streaming(extrator, response.status_code, response.headers.get('content-type'), logs))
+                _registrar_sinal(permissao, response.status_code, response.url, extrator.bytes_recebidos, dados_produto, logs)
+                _marcar_campos(dados_produto, campos)
+                _contar_campos(dados_produto)
+                _guardar_resultado(chave_cache, url, dados_produto, response.headers)
+            else:
+                _registrar_resposta(response.status_code, len(response.content), response.headers.get('content-type'), logs)
+                _medir_download(inicio, "completo", len(response.content))
+                _arquivar_html(response.content, url, chave_cache, response.status_code, _headers_arquivo(response.headers))
+                dados_produto.update(extrair_dados_html(response.content, logs, campos=campos))
+                _registrar_sinal(permissao, response.status_code, response.url, len(response.content), dados_produto, logs)
+                _marcar_campos(dados_produto, campos)
+                _contar_campos(dados_produto)
+                _guardar_resultado(chave_cache, url, dados_produto, response.headers)
+
+
+def _registrar_espera_taxa(permissao, logs: List[str]):
+    """Registra nos logs (e nas métricas) quanto o download esperou pela vez do host"""
+    if permissao is None:
+        return
+    ESPERA_TAXA_SEGUNDOS.observar(permissao.espera)
+    if permissao.espera >= 0.01:
+        print(f"[DEBUG] Aguardou {permissao.espera:.2f}s pelo controle de taxa de {permissao.host}")
+        logs.append(f"Controle de taxa: aguardou {permissao.espera:.2f}s ({permissao.host})")
+
+
+def _registrar_sinal(permissao, status_code: int, url_final, tamanho: Optional[int], dados_produto: Dict, logs: List[str]):
+    """
+    Informa ao controle de taxa como foi a resposta (páginas curtas ou de
+    verificação fazem o host desacelerar). `tamanho` None = 304, sempre saudável.
+    """
+    if permissao is None:
+        return
+    if tamanho is None:
+        permissao.registrar(OK)
+        return
+    sinal = sinal_da_pagina(status_code, str(url_final), tamanho, dados_produto)
+    permissao.registrar(sinal)
+    if sinal != OK:
+        logs.append(f"⚠️ Controle de taxa: resposta sinalizada como {sinal}, desacelerando {permissao.host}")
+
+
+def _medir_download(inicio: float, modo: str, tamanho: Optional[int] = None, segundos_parse: float = 0.0):
+    """
+    Métricas de uma tentativa de download iniciada em `inicio` (perf_counter).
+    No streaming, o parsing feito entre os pedaços é descontado e medido à parte.
+    """
+    DOWNLOAD_SEGUNDOS.observar(time.perf_counter() - inicio - segundos_parse, modo=modo)
+    if tamanho is not None:
+        DOWNLOAD_BYTES.observar(tamanho, modo=modo)
+    if modo == "streaming":
+        PARSE_SEGUNDOS.observar(segundos_parse, motor="streaming")
+
+
+def _contar_campos(dados_produto: Dict):
+    """Conta de onde veio cada campo de uma página recém-extraída (nao_encontrado se vazio)"""
+    fontes = dados_produto.get("fontes") or {}
+    for campo in dados_produto.get("campos_extraidos") or CAMPOS_PRODUTO:
+        encontrado = dados_produto.get(campo) not in (None, "N/A", [], {})
+        CAMPOS.incrementar(campo=campo, fonte=(fontes.get(campo) or "html") if encontrado else "nao_encontrado")
+
+
+def _aplicar_download(dados_produto: Dict, resultado, agrupada: bool, chave_cache: Optional[str], logs: List[str], levantar_erros: bool):
+    """Junta o resultado de `_baixar_produto` (próprio ou de outra requisição) à resposta"""
+    dados, logs_download, erro = resultado
+    if agrupada:
+        # O resultado é compartilhado entre as requisições agrupadas: cada uma leva a sua cópia
+        dados = copy.deepcopy(dados)
+        print(f"[INFO] Produto {chave_cache} aproveitado de outra requisição em andamento")
+        logs.append(f"Requisição agrupada com outra em andamento: {chave_cache}")
+    logs.extend(logs_download)
+    dados_produto.update(dados)
+    if erro is not None and levantar_erros:
+        raise erro
+
+
+async def scrape_mercado_livre_async(
+    url: str,
+    capturar_screenshots: bool = False,
+    levantar_erros: bool = False,
+    executor: Optional[Executor] = None,
+    force_refresh: bool = False,
+    campos: Optional[Iterable[str]] = None,
+    debug_logs: Optional[bool] = None
+) -> Dict:
+    """
+    Versão assíncrona de `scrape_mercado_livre`.
+    
+    O download usa o cliente HTTP assíncrono compartilhado (não bloqueia o
+    event loop) e as etapas de CPU (parsing e Selenium) rodam em `executor`
+    (ou no executor padrão do loop).
+    
+    Args:
+        url: URL do produto no Mercado Livre
+        capturar_screenshots: Se deve capturar screenshots com Selenium
+        levantar_erros: Se True, erros HTTP são propagados em vez de apenas registrados nos logs
+        executor: Executor para as etapas bloqueantes (None = executor padrão do loop)
+        force_refresh: Se True, ignora o cache e baixa a página novamente
+        campos: Campos a extrair e devolver (None = todos)
+        debug_logs: Se inclui debug_logs na resposta (None = só na extração completa)
+    
+    Returns:
+        Dict no mesmo formato de `scrape_mercado_livre`
+    """
+    
+    campos = normalizar_campos(campos)
+    extracao = _campos_extracao(campos)
+    loop = asyncio.get_running_loop()
+    logs = []  # Coletar logs para retornar
+    dados_produto = _dados_vazios()
+    inicio = time.perf_counter()
+    
+    chave_cache, url = resolver_produto(url)
+    em_cache = _buscar_no_cache(chave_cache, force_refresh, logs, extracao)
+    if em_cache is not None:
+        dados_produto.update(em_cache)
+        PRODUTO_SEGUNDOS.observar(time.perf_counter() - inicio, origem="cache")
+    else:
+        resultado, agrupada = await obter_agrupador("produtos", assincrono=True).executar(
+            _chave_agrupamento(chave_cache, extracao),
+            lambda: _baixar_produto_async(url, chave_cache, force_refresh, executor, extracao)
+        )
+        PRODUTO_SEGUNDOS.observar(time.perf_counter() - inicio, origem="agrupada" if agrupada else "download")
+        _aplicar_download(dados_produto, resultado, agrupada, chave_cache, logs, levantar_erros)
+    
+    if capturar_screenshots:
+        screenshots, logs_screenshots = await loop.run_in_executor(executor, _capturar_com_logs, url)
+        logs.extend(logs_screenshots)
+        dados_produto["screenshots"] = screenshots
+        dados_produto["miniaturas"] = obter_armazem().miniaturas(screenshots)
+    
+    # Adicionar logs à resposta
+    dados_produto["debug_logs"] = logs
+    
+    return _resposta(dados_produto, campos, debug_logs)
+
+
+async def _baixar_produto_async(
+    url: str,
+    chave_cache: Optional[str],
+    force_refresh: bool,
+    executor: Optional[Executor],
+    campos: Optional[Tuple[str, ...]] = None
+):
+    """Versão assíncrona de `_baixar_produto` (mesmo retorno)"""
+    logs = []
+    dados_produto = {}
+    # Consulta ao SQLite é rápida (índice por chave), feita direto no loop
+    registro = _buscar_no_banco(chave_cache, force_refresh, campos)
+    try:
+        await executar_com_tentativas_async(
+            lambda: _baixar_uma_vez_async(url, chave_cache, registro, dados_produto, logs, executor, campos),
+            logs
+        )
         
         print("[INFO] Scraping concluído com sucesso!")
         logs.append("Scraping concluído com sucesso!")
         
-    except requests.exceptions.RequestException as e:
+    except (PoolSaturado, EsperaTaxaEsgotada) as e:
+        # Sobrecarga (fila do pool cheia ou host sem vaga): vira 429 no endpoint, não um resultado vazio
+        ERROS.incrementar(etapa="download", tipo=tipo_do_erro(e))
+        raise
+    except httpx.HTTPError as e:
+        ERROS.incrementar(etapa="download", tipo=tipo_do_erro(e))
         print(f"[ERRO] Erro na requisição HTTP: {e}")
         logs.append(f"Erro HTTP: {e}")
+        return dados_produto, logs, e
     except Exception as e:
+        ERROS.incrementar(etapa="scraping", tipo=tipo_do_erro(e))
         print(f"[ERRO] Erro geral durante scraping: {e}")
         logs.append(f"Erro geral: {e}")
         import traceback
         traceback.print_exc()
     
-    # ============================================
-    # CAPTURAR SCREENSHOTS (se solicitado)
-    # ============================================
-    if capturar_screenshots:
-        print("[DEBUG] Iniciando captura de screenshots...")
-        logs.append("Iniciando captura de screenshots...")
+    return dados_produto, logs, None
+
+
+async def _baixar_uma_vez_async(
+    url: str,
+    chave_cache: Optional[str],
+    registro: Optional[Dict],
+    dados_produto: Dict,
+    logs: List[str],
+    executor: Optional[Executor],
+    campos: Optional[Tuple[str, ...]] = None
+):
+    """Versão assíncrona de `_baixar_uma_vez`"""
+    loop = asyncio.get_running_loop()
+    async with obter_controle_taxa().permissao_async(url) as permissao:
+        _registrar_espera_taxa(permissao, logs)
+        print(f"[INFO] Acessando URL: {url}")
+        logs.append(f"Acessando URL: {url}")
         
-        try:
-            from selenium import webdriver
-            from selenium.webdriver.chrome.options import Options
-            from webdriver_manager.chrome import ChromeDriverManager
-            from selenium.webdriver.chrome.service import Service
-            import time
-            
-            # Configurar Chrome
-            chrome_options = Options()
-            chrome_options.add_argument('--headless')
-            chrome_options.add_argument('--no-sandbox')
-            chrome_options.add_argument('--disable-dev-shm-usage')
-            chrome_options.add_argument('--start-maximized')
-            chrome_options.add_argument('--disable-blink-features=AutomationControlled')
-            chrome_options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
-            
-            service = Service(ChromeDriverManager().install())
-            driver = webdriver.Chrome(service=service, options=chrome_options)
-            
-            print("[INFO] Abrindo página com Selenium...")
-            driver.get(url)
-            time.sleep(3)  # Aguardar carregamento
-            
-            # Capturar screenshots em diferentes partes da página
-            screenshots = {}
-            
-            # 1. Screenshot completo da página
-            print("[INFO] Capturando screenshot completo...")
-            screenshot_full = driver.get_screenshot_as_png()
-            screenshots["pagina_completa"] = base64.b64encode(screenshot_full).decode('utf-8')
-            logs.append("✓ Screenshot completo capturado")
-            
-            # 2. Screenshot do produto (scroll até section principal)
-            try:
-                product_section = driver.find_element("xpath", "//section[@data-testid='product-section']")
-                location = product_section.location
-                size = product_section.size
-                driver.execute_script(f"window.scrollTo(0, {location['y']});")
-                time.sleep(1)
-                screenshot_prod = driver.get_screenshot_as_png()
-                screenshots["secao_produto"] = base64.b64encode(screenshot_prod).decode('utf-8')
-                logs.append("✓ Screenshot da seção de produto capturado")
-            except:
-                logs.append("⚠ Não foi possível capturar screenshot da seção de produto")
-            
-            # 3. Screenshot das características
-            try:
-                driver.execute_script("window.scrollTo(0, document.body.scrollHeight * 0.3);")
-                time.sleep(1)
-                screenshot_specs = driver.get_screenshot_as_png()
-                screenshots["caracteristicas"] = base64.b64encode(screenshot_specs).decode('utf-8')
-                logs.append("✓ Screenshot das características capturado")
-            except:
-                logs.append("⚠ Não foi possível capturar screenshot das características")
-            
-            # 4. Screenshot da descrição
-            try:
-                driver.execute_script("window.scrollTo(0, document.body.scrollHeight * 0.6);")
-                time.sleep(1)
-                screenshot_desc = driver.get_screenshot_as_png()
-                screenshots["descricao"] = base64.b64encode(screenshot_desc).decode('utf-8')
-                logs.append("✓ Screenshot da descrição capturado")
-            except:
-                logs.append("⚠ Não foi possível capturar screenshot da descrição")
-            
-            # 5. Screenshot do rodapé
+        cliente = obter_cliente_async()
+        streaming = _usar_streaming()
+        inicio = time.perf_counter()
+        response = await requisitar_async(
+            lambda: cliente.send(
+                cliente.build_request("GET", url, headers=headers_condicionais(registro), timeout=TIMEOUT_DOWNLOAD),
+                follow_redirects=True,
+                stream=streaming
+            ),
+            urlsplit(url).hostname
+        )
+        
+        if response.status_code == 304 and registro:
+            await response.aclose()
+            _medir_download(inicio, "nao_modificado")
+            dados_produto.update(_reaproveitar_registro(chave_cache, registro, logs))
+            _registrar_sinal(permissao, response.status_code, response.url, None, dados_produto, logs)
+        elif streaming:
+            # Sair antes do fim do corpo fecha a conexão (aclose)
             try:
-                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(1)
-                screenshot_footer = driver.get_screenshot_as_png()
-                screenshots["rodape"] = base64.b64encode(screenshot_footer).decode('utf-8')
-                logs.append("✓ Screenshot do rodapé capturado")
-            except:
-                logs.append("⚠ Não foi possível capturar screenshot do rodapé")
+                response.raise_for_status()
+                # Cada pedaço custa pouco (parser incremental): alimentado no próprio event loop
+                extrator = ExtratorPassagemUnica(campos)
+                async for pedaco in response.aiter_bytes(TAMANHO_PEDACO_STREAMING):
+                    extrator.alimentar(pedaco)
+                    if extrator.completo:
+                        break
+            finally:
+                await response.aclose()
+            _medir_download(inicio, "streaming", extrator.bytes_recebidos, extrator.segundos_processando)
+            dados_produto.update(_concluir_streaming(extrator, response.status_code, response.headers.get('content-type'), logs))
+            _registrar_sinal(permissao, response.status_code, response.url, extrator.bytes_recebidos, dados_produto, logs)
+            _marcar_campos(dados_produto, campos)
+            _contar_campos(dados_produto)
+            _guardar_resultado(chave_cache, url, dados_produto, response.headers)
+        else:
+            # httpx trata 304 como erro em raise_for_status, por isso a checagem vem depois
+            response.raise_for_status()
+            _registrar_resposta(response.status_code, len(response.content), response.headers.get('content-type'), logs)
+            _medir_download(inicio, "completo", len(response.content))
             
-            driver.quit()
-            print(f"[OK] {len(screenshots)} screenshots capturados com sucesso!")
-            logs.append(f"Total: {len(screenshots)} screenshots capturados")
-            dados_produto["screenshots"] = screenshots
+            if ARQUIVO_HTML_ATIVO:
+                # Compressão também é CPU: fora do event loop
+                await loop.run_in_executor(
+                    executor, _arquivar_html, response.content, url, chave_cache,
+                    response.status_code, _headers_arquivo(response.headers)
+                )
             
-        except ImportError:
-            print("[AVISO] Selenium/webdriver-manager não instalado. Pulando screenshots.")
-            logs.append("AVISO: Selenium não disponível - screenshots não capturados")
+            # Parsing é CPU puro: executar fora do event loop
+            dados_extraidos, logs_extracao = await loop.run_in_executor(executor, _extrair_com_logs, response.content, campos)
+            logs.extend(logs_extracao)
+            dados_produto.update(dados_extraidos)
+            _registrar_sinal(permissao, response.status_code, response.url, len(response.content), dados_produto, logs)
+            _marcar_campos(dados_produto, campos)
+            _contar_campos(dados_produto)
+            _guardar_resultado(chave_cache, url, dados_produto, response.headers)
+
+
+def obter_pagina_produto(url: str) -> PaginaProduto:
+    """
+    Baixa a página de um produto sem extrair nada: os campos saem sob demanda
+    de `PaginaProduto` (uso como biblioteca, quando só alguns campos interessam).
+    
+    Usa a mesma sessão, controle de taxa e novas tentativas do scraping, mas
+    não passa pelo cache nem pelo banco. Erros HTTP são levantados.
+    
+    Args:
+        url: URL do produto no Mercado Livre
+    
+    Returns:
+        PaginaProduto com o HTML da página (e a URL final, após redirecionamentos)
+    """
+    _, url = resolver_produto(url)
+    logs = []
+    return executar_com_tentativas(_baixar_pagina, logs, url, logs)
+
+
+def _baixar_pagina(url: str, logs: List[str]) -> PaginaProduto:
+    """Uma tentativa de download da página inteira para `obter_pagina_produto`"""
+    with obter_controle_taxa().permissao(url) as permissao:
+        _registrar_espera_taxa(permissao, logs)
+        print(f"[INFO] Acessando URL: {url}")
+        inicio = time.perf_counter()
+        response = requisitar(
+            lambda: obter_sessao().get(url, timeout=TIMEOUT_DOWNLOAD, allow_redirects=True),
+            urlsplit(url).hostname
+        )
+        response.raise_for_status()
+        _medir_download(inicio, "completo", len(response.content))
+        pagina = PaginaProduto(response.content, url=str(response.url))
+        # O título (em geral logo no começo da página) diz ao controle de taxa se veio bloqueada
+        _registrar_sinal(permissao, response.status_code, response.url, len(response.content), {"titulo": pagina.titulo}, logs)
+        return pagina
+
+
+def scrape_em_lote(urls: List[str], capturar_screenshots: bool = False, max_concorrencia: int = 5, force_refresh: bool = False) -> List[Dict]:
+    """
+    Realiza scraping de vários produtos em paralelo.
+    
+    Args:
+        urls: Lista de URLs de produtos do Mercado Livre
+        capturar_screenshots: Se deve capturar screenshots de cada produto
+        max_concorrencia: Número máximo de produtos processados ao mesmo tempo
+        force_refresh: Se True, ignora o cache e baixa todas as páginas novamente
+    
+    Returns:
+        Lista na mesma ordem de `urls`, com um dict por URL: url, sucesso, dados e erro
+    """
+    
+    def processar(url: str) -> Dict:
+        try:
+            dados = scrape_mercado_livre(
+                url,
+                capturar_screenshots=capturar_screenshots,
+                levantar_erros=True,
+                force_refresh=force_refresh
+            )
+            return {"url": url, "sucesso": True, "dados": dados, "erro": None}
         except Exception as e:
-            print(f"[AVISO] Erro ao capturar screenshots: {e}")
-            logs.append(f"AVISO: Erro ao capturar screenshots: {e}")
+            print(f"[ERRO] Falha no scraping em lote de {url}: {e}")
+            return {"url": url, "sucesso": False, "dados": None, "erro": str(e)}
     
-    # Adicionar logs à resposta
-    dados_produto["debug_logs"] = logs
+    if not urls:
+        return []
     
-    return dados_produto
+    # Links repetidos do mesmo produto são baixados uma vez só
+    unicas, posicoes = _deduplicar_urls(urls)
+    max_concorrencia = max(1, min(max_concorrencia, len(unicas)))
+    with ThreadPoolExecutor(max_workers=max_concorrencia) as executor:
+        return _distribuir_resultados(urls, list(executor.map(processar, unicas)), posicoes)
+
+
+async def scrape_em_lote_async(
+    urls: List[str],
+    capturar_screenshots: bool = False,
+    max_concorrencia: int = 5,
+    executor: Optional[Executor] = None,
+    force_refresh: bool = False
+) -> List[Dict]:
+    """
+    Versão assíncrona de `scrape_em_lote`: todas as URLs compartilham o mesmo
+    event loop, limitadas a `max_concorrencia` downloads simultâneos.
+    
+    Returns:
+        Lista na mesma ordem de `urls`, com um dict por URL: url, sucesso, dados e erro
+    """
+    
+    semaforo = asyncio.Semaphore(max(1, max_concorrencia))
+    
+    async def processar(url: str) -> Dict:
+        async with semaforo:
+            try:
+                dados = await scrape_mercado_livre_async(
+                    url,
+                    capturar_screenshots=capturar_screenshots,
+                    levantar_erros=True,
+                    executor=executor,
+                    force_refresh=force_refresh
+                )
+                return {"url": url, "sucesso": True, "dados": dados, "erro": None}
+            except Exception as e:
+                print(f"[ERRO] Falha no scraping em lote de {url}: {e}")
+                return {"url": url, "sucesso": False, "dados": None, "erro": str(e)}
+    
+    unicas, posicoes = _deduplicar_urls(urls)
+    resultados = await asyncio.gather(*(processar(url) for url in unicas))
+    return _distribuir_resultados(urls, resultados, posicoes)
+
+
+def _deduplicar_urls(urls: List[str]):
+    """
+    URLs de um lote sem produtos repetidos.
+    
+    Returns:
+        Tupla (URLs únicas, posição em URLs únicas de cada URL original)
+    """
+    unicas = []
+    posicao_por_chave = {}
+    posicoes = []
+    for url in urls:
+        chave = resolver_produto(url)[0] or url
+        if chave not in posicao_por_chave:
+            posicao_por_chave[chave] = len(unicas)
+            unicas.append(url)
+        posicoes.append(posicao_por_chave[chave])
+    if len(unicas) < len(urls):
+        print(f"[INFO] Lote com {len(urls) - len(unicas)} URLs repetidas do mesmo produto")
+    return unicas, posicoes
+
+
+def _distribuir_resultados(urls: List[str], resultados: List[Dict], posicoes: List[int]) -> List[Dict]:
+    """Um resultado por URL original (cópias para os produtos repetidos), na ordem de `urls`"""
+    usados = set()
+    distribuidos = []
+    for url, posicao in zip(urls, posicoes):
+        resultado = resultados[posicao]
+        if posicao in usados:
+            resultado = copy.deepcopy(resultado)
+        usados.add(posicao)
+        distribuidos.append({**resultado, "url": url})
+    return distribuidos
 
 
 def main():
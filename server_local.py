@@ -9,12 +9,30 @@ Como usar:
 4. Use a URL do ngrok no n8n
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, send_from_directory
 from flask_cors import CORS
 import json
 import os
 from datetime import datetime
-from scraping_mercado_livre_v2 import scrape_mercado_livre
+from scraping_mercado_livre_v2 import normalizar_campos, scrape_mercado_livre
+from pool_execucao import PoolExecucao, PoolSaturado
+from cache_produtos import obter_cache
+from agrupamento import estatisticas_agrupamento
+from controle_taxa import EsperaTaxaEsgotada, obter_controle_taxa
+from resiliencia_http import estatisticas_resiliencia
+from metricas import TIPO_CONTEUDO, exportar_metricas
+from urls_mercado_livre import eh_url_mercado_livre
+from banco_produtos import BANCO_ATIVO, obter_banco
+from armazem_screenshots import SCREENSHOTS_DIR, nome_valido, obter_armazem, tipo_midia
+from navegadores import NAVEGADORES_AQUECER, obter_pool_navegadores
+from trabalhos_screenshots import (
+    SCREENSHOTS_ASSINCRONOS,
+    FilaTrabalhosCheia,
+    WebhookInvalido,
+    obter_fila_trabalhos,
+    resumo_trabalho,
+    validar_webhook_url
+)
 
 app = Flask(__name__)
 CORS(app)  # Permitir requisições do n8n
@@ -22,6 +40,13 @@ CORS(app)  # Permitir requisições do n8n
 # Versão da API
 API_VERSION = "1.0.0"
 
+# Pool limitado de scrapes: acima de workers + fila, a requisição recebe 429
+pool_scraper = PoolExecucao(
+    max_workers=int(os.getenv("SCRAPER_WORKERS", 4)),
+    max_fila=int(os.getenv("MAX_FILA_SCRAPES", 32)),
+    tipo=os.getenv("SCRAPER_POOL_TIPO", "thread")
+)
+
 
 @app.route('/health', methods=['GET'])
 def health():
@@ -29,10 +54,25 @@ def health():
     return jsonify({
         "status": "ok",
         "service": "Scraping API Local",
-        "version": API_VERSION
+        "version": API_VERSION,
+        "pool_execucao": pool_scraper.estatisticas(),
+        "navegadores": obter_pool_navegadores().estatisticas(),
+        "trabalhos_screenshots": obter_fila_trabalhos().estatisticas(),
+        "agrupamento": estatisticas_agrupamento(),
+        "controle_taxa": obter_controle_taxa().estatisticas(),
+        "resiliencia": estatisticas_resiliencia(),
+        "screenshots": obter_armazem().estatisticas(),
+        "cache": obter_cache().estatisticas(),
+        "banco": obter_banco().estatisticas() if BANCO_ATIVO else {"ativo": False}
     }), 200
 
 
+@app.route('/metrics', methods=['GET'])
+def metricas():
+    """Histogramas por etapa do scraping e contadores, no formato de texto do Prometheus"""
+    return Response(exportar_metricas(), content_type=TIPO_CONTEUDO)
+
+
 @app.route('/scrape', methods=['POST'])
 def scrape():
     """
@@ -41,9 +81,20 @@ def scrape():
     Recebe:
     {
         "url": "https://www.mercadolivre.com.br/...",
-        "capturar_screenshots": false
+        "capturar_screenshots": false,
+        "force_refresh": false,
+        "aguardar_screenshots": false,
+        "webhook_url": null,
+        "fields": null,
+        "debug_logs": null
     }
     
+    Com screenshots, a resposta não espera as capturas: traz "trabalho"
+    com o id para GET /jobs/<id> (e o resultado vai para webhook_url, se houver).
+    
+    Com "fields" (ex.: ["titulo", "caracteristicas"]), só esses campos são
+    extraídos e devolvidos; debug_logs só vêm com "debug_logs": true.
+    
     Retorna:
     {
         "sucesso": true,
@@ -72,6 +123,11 @@ def scrape():
         data = request.get_json()
         url = data.get('url')
         capturar_screenshots = data.get('capturar_screenshots', False)
+        force_refresh = data.get('force_refresh', False)
+        aguardar_screenshots = data.get('aguardar_screenshots', not SCREENSHOTS_ASSINCRONOS)
+        webhook_url = data.get('webhook_url')
+        fields = data.get('fields')
+        debug_logs = data.get('debug_logs')
         
         # Validar URL
         if not url:
@@ -81,27 +137,93 @@ def scrape():
                 "dados": None
             }), 400
         
-        if not url.startswith('https://www.mercadolivre.com.br'):
+        if not eh_url_mercado_livre(url):
             return jsonify({
                 "sucesso": False,
                 "mensagem": "URL deve ser do Mercado Livre",
                 "dados": None
             }), 400
         
+        try:
+            if webhook_url:
+                validar_webhook_url(webhook_url)
+        except WebhookInvalido as e:
+            return jsonify({
+                "sucesso": False,
+                "mensagem": str(e),
+                "dados": None
+            }), 400
+        
+        try:
+            if fields is not None and not isinstance(fields, list):
+                raise ValueError("fields deve ser uma lista de campos")
+            campos = normalizar_campos(fields)
+        except ValueError as e:
+            return jsonify({
+                "sucesso": False,
+                "mensagem": str(e),
+                "dados": None
+            }), 400
+        
+        # Screenshots em segundo plano: os campos de texto não esperam o navegador
+        screenshots_em_trabalho = capturar_screenshots and not aguardar_screenshots
+        
         print(f"\n{'='*80}")
         print(f"📍 NOVA REQUISIÇÃO DE SCRAPING")
         print(f"URL: {url}")
         print(f"Screenshots: {capturar_screenshots}")
         print(f"{'='*80}\n")
         
-        # Executar scraping
-        dados = scrape_mercado_livre(url, capturar_screenshots=capturar_screenshots)
+        # Executar scraping no pool limitado
+        try:
+            futuro = pool_scraper.submit(
+                scrape_mercado_livre,
+                url,
+                capturar_screenshots=capturar_screenshots and not screenshots_em_trabalho,
+                force_refresh=force_refresh,
+                campos=campos,
+                debug_logs=debug_logs
+            )
+        except PoolSaturado as e:
+            print(f"⚠️  Fila de scraping cheia, requisição recusada (Retry-After: {e.retry_after}s)")
+            resposta = jsonify({
+                "sucesso": False,
+                "mensagem": "Servidor ocupado: fila de scraping cheia, tente novamente mais tarde",
+                "dados": None,
+                "timestamp": datetime.now().isoformat()
+            })
+            return resposta, 429, {"Retry-After": str(e.retry_after)}
+        try:
+            dados = futuro.result()
+        except EsperaTaxaEsgotada as e:
+            print(f"⚠️  Controle de taxa sem vaga para o host: {e}")
+            return jsonify({
+                "sucesso": False,
+                "mensagem": str(e),
+                "dados": None,
+                "timestamp": datetime.now().isoformat()
+            }), 429, {"Retry-After": str(e.retry_after)}
+        
+        trabalho = None
+        if screenshots_em_trabalho:
+            try:
+                trabalho = obter_fila_trabalhos().enviar(url, webhook_url=webhook_url)
+            except FilaTrabalhosCheia as e:
+                return jsonify({
+                    "sucesso": False,
+                    "mensagem": str(e),
+                    "dados": None,
+                    "timestamp": datetime.now().isoformat()
+                }), 429, {"Retry-After": "30"}
+            trabalho = {"id": trabalho["id"], "status": trabalho["status"], "url": f"/jobs/{trabalho['id']}"}
+            print(f"📸 Screenshots agendados no trabalho {trabalho['id']}")
         
         # Montar resposta
         resposta = {
             "sucesso": True,
             "mensagem": "Scraping realizado com sucesso",
             "dados": dados,
+            "trabalho": trabalho,
             "timestamp": datetime.now().isoformat()
         }
         
@@ -124,6 +246,31 @@ def scrape():
         }), 500
 
 
+@app.route('/jobs/<trabalho_id>', methods=['GET'])
+def consultar_trabalho(trabalho_id):
+    """Status e resultado de um trabalho de screenshots (pendente, executando, concluido ou erro)"""
+    trabalho = obter_fila_trabalhos().consultar(trabalho_id)
+    if trabalho is None:
+        return jsonify({
+            "sucesso": False,
+            "mensagem": "Trabalho não encontrado ou expirado"
+        }), 404
+    return jsonify(resumo_trabalho(trabalho)), 200
+
+
+@app.route('/screenshot/<filename>', methods=['GET'])
+def download_screenshot(filename):
+    """Baixa um screenshot capturado (URLs devolvidas em dados.screenshots)"""
+    if not nome_valido(filename):
+        return jsonify({"sucesso": False, "mensagem": "Nome de arquivo inválido"}), 400
+    if not obter_armazem().registrar_acesso(filename):
+        return jsonify({"sucesso": False, "mensagem": "Screenshot não encontrado"}), 404
+    resposta = send_from_directory(os.path.abspath(SCREENSHOTS_DIR), filename, mimetype=tipo_midia(filename))
+    # Nome = hash do conteúdo: o arquivo nunca muda
+    resposta.headers["Cache-Control"] = "private, max-age=31536000, immutable"
+    return resposta
+
+
 @app.route('/test', methods=['GET'])
 def test():
     """Endpoint de teste para validar o servidor"""
@@ -146,9 +293,12 @@ if __name__ == '__main__':
     print("🚀 SERVIDOR DE SCRAPING LOCAL INICIADO")
     print("="*80)
     print("\n📌 Endpoints disponíveis:")
-    print("   - GET  /health       → Verificar saúde do servidor")
+    print("   - GET  /health       → Verificar saúde do servidor (inclui fila de scraping)")
     print("   - GET  /test         → Testar servidor")
+    print("   - GET  /metrics      → Métricas no formato do Prometheus")
     print("   - POST /scrape       → Fazer scraping (webhook do n8n)")
+    print("   - GET  /jobs/<id>    → Consultar trabalho de screenshots")
+    print("   - GET  /screenshot/<arquivo> → Baixar um screenshot")
     print("\n🔗 Para expor localmente com ngrok:")
     print("   ngrok http 5000")
     print("\n💡 Cole a URL do ngrok no n8n como:")
@@ -160,9 +310,13 @@ if __name__ == '__main__':
     print("   }")
     print("\n" + "="*80 + "\n")
     
+    if NAVEGADORES_AQUECER:
+        obter_pool_navegadores().aquecer()
+    obter_armazem().iniciar_limpeza()
+    
     app.run(
         host='0.0.0.0',
-        port=5000,
+        port=int(os.getenv("PORT", 5000)),
         debug=True,
         use_reloader=False
     )
@@ -0,0 +1,166 @@
+"""
+Sessão HTTP compartilhada para o scraper do Mercado Livre
+Mantém um único pool de conexões por processo, reaproveitado por api.py,
+server_local.py e pelo scraping em lote (evita novo DNS + TCP + TLS a cada produto)
+"""
+
+import os
+import asyncio
+import threading
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+
+# Configuração do pool (pode ser ajustada via variáveis de ambiente)
+POOL_CONEXOES = int(os.getenv("HTTP_POOL_CONEXOES", 10))          # hosts distintos mantidos no pool
+POOL_MAX_POR_HOST = int(os.getenv("HTTP_POOL_MAX_POR_HOST", 20))  # conexões simultâneas por host
+POOL_BLOQUEAR = os.getenv("HTTP_POOL_BLOQUEAR", "true").lower() == "true"
+
+# Headers realistas para evitar bloqueio
+HEADERS_PADRAO = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
+    "Accept-Language": "pt-BR,pt;q=0.9,en;q=0.8",
+    "Accept-Encoding": "gzip, deflate, br",
+    "Cache-Control": "max-age=0",
+    "Sec-Ch-Ua": '"Not A(Brand";v="99", "Google Chrome";v="131", "Chromium";v="131"',
+    "Sec-Ch-Ua-Mobile": "?0",
+    "Sec-Ch-Ua-Platform": '"Windows"',
+    "Sec-Fetch-Dest": "document",
+    "Sec-Fetch-Mode": "navigate",
+    "Sec-Fetch-Site": "none",
+    "Upgrade-Insecure-Requests": "1",
+    "Referer": "https://www.mercadolivre.com.br/",
+    "Connection": "keep-alive",
+    "DNT": "1"
+}
+
+# Só anunciar brotli se houver decodificador instalado; caso contrário requests
+# e httpx devolveriam o corpo ainda comprimido
+try:
+    import brotli  # noqa: F401
+except ImportError:
+    HEADERS_PADRAO["Accept-Encoding"] = "gzip, deflate"
+
+_sessao = None
+_sessao_pid = None
+_lock = threading.Lock()
+
+_cliente_async = None
+_cliente_async_loop = None
+
+
+def criar_sessao(
+    pool_conexoes: int = POOL_CONEXOES,
+    pool_max_por_host: int = POOL_MAX_POR_HOST,
+    bloquear: bool = POOL_BLOQUEAR
+) -> requests.Session:
+    """
+    Cria uma sessão com pool de conexões keep-alive.
+
+    Args:
+        pool_conexoes: Quantidade de hosts distintos mantidos no pool
+        pool_max_por_host: Máximo de conexões abertas por host
+        bloquear: Se True, requisições acima do limite esperam uma conexão livre
+                  em vez de abrir conexões extras descartáveis
+
+    Returns:
+        requests.Session configurada
+    """
+    sessao = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_conexoes,
+        pool_maxsize=pool_max_por_host,
+        pool_block=bloquear
+    )
+    sessao.mount("https://", adapter)
+    sessao.mount("http://", adapter)
+    sessao.headers.update(HEADERS_PADRAO)
+    return sessao
+
+
+def obter_sessao() -> requests.Session:
+    """
+    Retorna a sessão compartilhada do processo, criando-a na primeira chamada.
+
+    O pool do urllib3 é thread-safe; a sessão não deve ser modificada pelos
+    chamadores (headers extras devem ser passados por requisição).
+    Após um fork, o processo filho cria sua própria sessão.
+    """
+    global _sessao, _sessao_pid
+
+    pid = os.getpid()
+    if _sessao is not None and _sessao_pid == pid:
+        return _sessao
+
+    with _lock:
+        if _sessao is None or _sessao_pid != pid:
+            _sessao = criar_sessao()
+            _sessao_pid = pid
+        return _sessao
+
+
+def fechar_sessao():
+    """Fecha a sessão compartilhada e libera as conexões do pool"""
+    global _sessao, _sessao_pid
+
+    with _lock:
+        if _sessao is not None and _sessao_pid == os.getpid():
+            _sessao.close()
+        _sessao = None
+        _sessao_pid = None
+
+
+def criar_cliente_async(
+    pool_conexoes: int = POOL_CONEXOES,
+    pool_max_por_host: int = POOL_MAX_POR_HOST
+) -> httpx.AsyncClient:
+    """
+    Cria um cliente HTTP assíncrono com pool de conexões keep-alive.
+
+    O httpx não tem limite por host: `max_connections` vale para o cliente
+    inteiro, então o teto é o mesmo total da sessão síncrona (hosts no pool
+    x conexões por host), e as conexões ociosas guardadas ficam no limite por host.
+
+    Args:
+        pool_conexoes: Quantidade de hosts distintos mantidos no pool
+        pool_max_por_host: Máximo de conexões por host na sessão síncrona
+
+    Returns:
+        httpx.AsyncClient configurado
+    """
+    limites = httpx.Limits(
+        max_connections=pool_conexoes * pool_max_por_host,
+        max_keepalive_connections=pool_max_por_host
+    )
+    return httpx.AsyncClient(headers=HEADERS_PADRAO, limits=limites)
+
+
+def obter_cliente_async() -> httpx.AsyncClient:
+    """
+    Retorna o cliente assíncrono compartilhado do event loop atual.
+
+    As conexões do httpx ficam presas ao loop em que foram abertas, então um
+    novo cliente é criado se o loop mudar (ex.: testes ou scripts com asyncio.run).
+    Deve ser chamado de dentro de uma corrotina.
+    """
+    global _cliente_async, _cliente_async_loop
+
+    loop = asyncio.get_running_loop()
+    if _cliente_async is None or _cliente_async_loop is not loop or _cliente_async.is_closed:
+        _cliente_async = criar_cliente_async()
+        _cliente_async_loop = loop
+    return _cliente_async
+
+
+async def fechar_cliente_async():
+    """Fecha o cliente assíncrono compartilhado (usar no shutdown da aplicação)"""
+    global _cliente_async, _cliente_async_loop
+
+    cliente = _cliente_async
+    _cliente_async = None
+    _cliente_async_loop = None
+    if cliente is not None and not cliente.is_closed:
+        await cliente.aclose()
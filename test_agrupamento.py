@@ -0,0 +1,99 @@
+"""
+Testes do agrupamento de requisições simultâneas (agrupamento)
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import scraping_mercado_livre_v2 as scraper
+from agrupamento import AgrupadorRequisicoes, AgrupadorRequisicoesAsync
+from conftest import url_de_catalogo
+
+
+def _simultaneas(agrupador: AgrupadorRequisicoes, chave, fn, quantidade: int, liberar: threading.Event):
+    """Chama `executar` em `quantidade` threads e só solta o trabalho depois que todas chegaram"""
+    with ThreadPoolExecutor(quantidade) as executor:
+        futuros = [executor.submit(agrupador.executar, chave, fn) for _ in range(quantidade)]
+        while agrupador.estatisticas()["agrupadas"] < quantidade - 1:
+            threading.Event().wait(0.001)
+        liberar.set()
+        return [futuro.exception() or futuro.result() for futuro in futuros]
+
+
+def test_uma_execucao_para_chamadas_simultaneas():
+    agrupador = AgrupadorRequisicoes()
+    liberar = threading.Event()
+    execucoes = []
+
+    def trabalho():
+        execucoes.append(1)
+        liberar.wait(5)
+        return {"titulo": "Panificadora"}
+
+    resultados = _simultaneas(agrupador, "MLB1", trabalho, 6, liberar)
+
+    assert len(execucoes) == 1
+    assert sorted(agrupada for _, agrupada in resultados) == [False] + [True] * 5
+    assert all(resultado is resultados[0][0] for resultado, _ in resultados)
+    assert agrupador.estatisticas() == {"ativo": True, "em_andamento": 0, "lideres": 1, "agrupadas": 5}
+
+    # Terminado o trabalho, a chave fica livre
+    assert agrupador.executar("MLB1", lambda: "de novo") == ("de novo", False)
+
+
+def test_excecao_chega_a_todas_as_chamadas():
+    agrupador = AgrupadorRequisicoes()
+    liberar = threading.Event()
+
+    def trabalho():
+        liberar.wait(5)
+        raise ValueError("página inválida")
+
+    erros = _simultaneas(agrupador, "MLB1", trabalho, 4, liberar)
+    assert len(erros) == 4 and all(isinstance(erro, ValueError) for erro in erros)
+
+
+def test_chave_none_nao_agrupa():
+    agrupador = AgrupadorRequisicoes()
+    assert agrupador.executar(None, lambda: 1) == (1, False)
+    assert agrupador.estatisticas()["lideres"] == 0
+
+
+def test_async_uma_execucao_e_cancelar_a_lider_nao_interrompe():
+    agrupador = AgrupadorRequisicoesAsync()
+    execucoes = []
+
+    async def trabalho():
+        execucoes.append(1)
+        await asyncio.sleep(0.05)
+        return "resultado"
+
+    async def cenario():
+        lider = asyncio.ensure_future(agrupador.executar("MLB1", trabalho))
+        await asyncio.sleep(0)
+        outras = [asyncio.ensure_future(agrupador.executar("MLB1", trabalho)) for _ in range(3)]
+        await asyncio.sleep(0)
+        lider.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await lider
+        return await asyncio.gather(*outras)
+
+    assert asyncio.run(cenario()) == [("resultado", True)] * 3
+    assert len(execucoes) == 1
+    assert agrupador.estatisticas()["em_andamento"] == 0
+
+
+def test_scrapes_simultaneos_do_mesmo_produto_baixam_uma_vez(site_falso):
+    url = url_de_catalogo("mlb3456789012_liquidificador.html")
+    # Outro link do mesmo produto cai na mesma chave
+    urls = [url, url + "?tracking_id=abc", url + "#reviews"] * 2
+    respostas = sum(site_falso.respostas.values())
+
+    with ThreadPoolExecutor(len(urls)) as executor:
+        resultados = list(executor.map(scraper.scrape_mercado_livre, urls))
+
+    assert sum(site_falso.respostas.values()) == respostas + 1
+    assert {r["titulo"] for r in resultados} == {resultados[0]["titulo"]} and resultados[0]["titulo"] != "N/A"
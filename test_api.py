@@ -142,6 +142,34 @@ def teste_6_lista_screenshots():
     except Exception as e:
         print_teste(6, "Listar screenshots", False, f"Erro: {str(e)}")
 
+def teste_7_scrape_lote():
+    """Teste 7: Scraping em lote com uma URL válida e uma inválida"""
+    try:
+        headers = {
+            "Authorization": f"Bearer {VALID_TOKEN}",
+            "Content-Type": "application/json"
+        }
+        payload = {
+            "urls": [TEST_URL, "https://exemplo.com/produto"],
+            "capturar_screenshots": False,
+            "max_concorrencia": 2
+        }
+        print(f"\n   {YELLOW}⏳ Aguardando resposta do scraping em lote...{RESET}")
+        response = requests.post(f"{API_URL}/scrape/batch", headers=headers, json=payload, timeout=120)
+        
+        corpo = response.json()
+        resultados_lote = corpo.get("resultados", [])
+        passou = (
+            response.status_code == 200
+            and corpo.get("total") == 2
+            and len(resultados_lote) == 2
+            and resultados_lote[1].get("sucesso") is False
+        )
+        detalhes = f"Status: {response.status_code}, Sucessos: {corpo.get('sucessos')}, Falhas: {corpo.get('falhas')}"
+        print_teste(7, "Scraping em lote", passou, detalhes)
+    except Exception as e:
+        print_teste(7, "Scraping em lote", False, f"Erro: {str(e)}")
+
 def main():
     """Executar todos os testes"""
     print(f"\n{BOLD}{BLUE}{'='*60}")
@@ -162,6 +190,8 @@ def main():
     teste_5_scrape_token_valido()
     print()
     teste_6_lista_screenshots()
+    print()
+    teste_7_scrape_lote()
     
     # Resumo
     print(f"\n{BOLD}{BLUE}{'='*60}")
@@ -0,0 +1,167 @@
+"""
+Testes do armazenamento de screenshots em disco (armazem_screenshots):
+deduplicação, índice LRU e faxina
+"""
+
+import io
+import os
+import types
+
+import pytest
+
+import armazem_screenshots
+from armazem_screenshots import ArmazemScreenshots
+
+
+PIL = pytest.importorskip("PIL.Image")
+
+
+def _png(cor: int) -> bytes:
+    saida = io.BytesIO()
+    PIL.new("RGB", (640, 480), (cor, cor, cor)).save(saida, "PNG")
+    return saida.getvalue()
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    """Relógio falso do armazém (time.time), avançado à mão"""
+    relogio = types.SimpleNamespace(agora=1_000_000.0)
+    monkeypatch.setattr(armazem_screenshots, "time", types.SimpleNamespace(time=lambda: relogio.agora))
+    return relogio
+
+
+def _armazem(diretorio, **opcoes) -> ArmazemScreenshots:
+    opcoes = {"formato": "png", "max_dias": 0, "max_bytes": 0, **opcoes}
+    return ArmazemScreenshots(str(diretorio), **opcoes)
+
+
+def _arquivos(diretorio):
+    return sorted(os.listdir(diretorio))
+
+
+def test_capturas_identicas_gravadas_uma_vez(tmp_path):
+    armazem = _armazem(tmp_path)
+    primeiro = armazem.guardar(_png(10))
+    assert armazem.guardar(_png(10)) == primeiro
+    assert primeiro["miniatura"] == primeiro["arquivo"].replace(".png", "_mini.png")
+    assert _arquivos(tmp_path) == sorted(primeiro.values())
+
+    outro = armazem.guardar(_png(20))
+    assert outro["arquivo"] != primeiro["arquivo"]
+    estatisticas = armazem.estatisticas()
+    assert estatisticas["arquivos"] == 4
+    assert estatisticas["bytes"] == sum(os.path.getsize(tmp_path / nome) for nome in _arquivos(tmp_path))
+
+
+def test_listar_pagina_do_acesso_mais_recente(tmp_path, relogio):
+    armazem = _armazem(tmp_path, miniaturas=False)
+    nomes = []
+    for cor in range(5):
+        relogio.agora += 1
+        nomes.append(armazem.guardar(_png(cor))["arquivo"])
+
+    # Ler o mais antigo o traz para o começo da listagem
+    relogio.agora += 1
+    assert armazem.registrar_acesso(nomes[0])
+
+    total, pagina_1 = armazem.listar(pagina=1, por_pagina=2)
+    _, pagina_3 = armazem.listar(pagina=3, por_pagina=2)
+    assert total == 5
+    assert [item["nome"] for item in pagina_1] == [nomes[0], nomes[4]]
+    assert [item["nome"] for item in pagina_3] == [nomes[1]]
+    assert pagina_1[0]["url"] == f"/screenshot/{nomes[0]}"
+    assert armazem.listar(pagina=4, por_pagina=2) == (5, [])
+
+
+def test_limpar_remove_do_acesso_mais_antigo_com_a_miniatura(tmp_path, relogio):
+    armazem = _armazem(tmp_path)
+    unidades = []
+    for cor in range(3):
+        relogio.agora += 1
+        unidades.append(armazem.guardar(_png(cor * 50)))
+
+    # Acessar a miniatura conta para a imagem: a primeira unidade vira a mais recente
+    relogio.agora += 1
+    assert armazem.registrar_acesso(unidades[0]["miniatura"])
+
+    bytes_restantes = sum(os.path.getsize(tmp_path / nome) for u in (unidades[0], unidades[2]) for nome in u.values())
+    armazem.max_bytes = armazem.estatisticas()["bytes"] - 1
+    assert armazem.limpar() == 2
+
+    # Saiu a unidade acessada há mais tempo (a segunda), imagem e miniatura juntas
+    assert _arquivos(tmp_path) == sorted(list(unidades[0].values()) + list(unidades[2].values()))
+    assert armazem.estatisticas()["bytes"] == bytes_restantes
+    assert armazem.estatisticas()["removidos"] == 2
+
+
+def test_limpar_por_idade(tmp_path, relogio):
+    armazem = _armazem(tmp_path, miniaturas=False, max_dias=1)
+    antigo = armazem.guardar(_png(1))["arquivo"]
+    relogio.agora += 2 * 86400
+    recente = armazem.guardar(_png(2))["arquivo"]
+
+    assert armazem.limpar() == 1
+    assert _arquivos(tmp_path) == [recente]
+    assert armazem.registrar_acesso(antigo) is False
+
+    # Sem acesso por mais de um dia, o recente também sai
+    relogio.agora += 2 * 86400
+    assert armazem.limpar() == 1
+    assert armazem.estatisticas()["bytes"] == 0 and _arquivos(tmp_path) == []
+
+
+def test_remover_mantem_o_total_de_bytes(tmp_path):
+    armazem = _armazem(tmp_path)
+    unidade = armazem.guardar(_png(7))
+    armazem.guardar(_png(8))
+    antes = armazem.estatisticas()["bytes"]
+    tamanho = sum(os.path.getsize(tmp_path / nome) for nome in unidade.values())
+
+    # Remover a imagem leva a miniatura junto; remover de novo não muda nada
+    armazem.remover(unidade["arquivo"])
+    armazem.remover(unidade["arquivo"])
+    assert armazem.estatisticas()["bytes"] == antes - tamanho
+    assert armazem.estatisticas()["arquivos"] == 2
+    assert armazem.miniaturas({"principal": f"/screenshot/{unidade['arquivo']}"}) == {}
+
+
+def test_indice_so_com_nomes_do_armazem(tmp_path, relogio):
+    armazem = _armazem(tmp_path, miniaturas=False)
+    nome = armazem.guardar(_png(3))["arquivo"]
+    for outro in ("notas.txt", "imagem.png", "abc_mini.webp", f"{nome}.123.456.tmp"):
+        (tmp_path / outro).write_bytes(b"x" * 100)
+
+    # Recarregado do disco: só o screenshot entra no índice e na faxina
+    recarregado = _armazem(tmp_path, max_bytes=1)
+    assert recarregado.estatisticas()["arquivos"] == 1
+    assert recarregado.registrar_acesso("notas.txt") is False
+    assert recarregado.limpar() == 1
+    assert _arquivos(tmp_path) == sorted(["notas.txt", "imagem.png", "abc_mini.webp", f"{nome}.123.456.tmp"])
+
+
+def test_carregar_indice_em_ordem_de_modificacao(tmp_path):
+    armazem = _armazem(tmp_path, miniaturas=False)
+    nomes = [armazem.guardar(_png(cor))["arquivo"] for cor in (1, 2, 3)]
+    for idade, nome in zip((10, 30, 20), nomes):
+        instante = 1_000_000 - idade * 86400
+        os.utime(tmp_path / nome, (instante, instante))
+
+    recarregado = _armazem(tmp_path)
+    _, itens = recarregado.listar()
+    assert [item["nome"] for item in itens] == [nomes[0], nomes[2], nomes[1]]
+
+
+def test_arquivo_de_outro_processo_entra_no_indice_no_acesso(tmp_path, relogio):
+    armazem = _armazem(tmp_path, miniaturas=False, max_bytes=1)
+    outro_processo = _armazem(tmp_path, miniaturas=False)
+    nome = outro_processo.guardar(_png(4))["arquivo"]
+    assert armazem.estatisticas()["arquivos"] == 0
+
+    relogio.agora += 1
+    assert armazem.registrar_acesso(nome)
+    assert armazem.estatisticas()["bytes"] == os.path.getsize(tmp_path / nome)
+    _, (item,) = armazem.listar()
+    assert item["ultimo_acesso"] == armazem_screenshots._iso(relogio.agora)
+
+    assert armazem.limpar() == 1
+    assert armazem.estatisticas()["bytes"] == 0 and _arquivos(tmp_path) == []
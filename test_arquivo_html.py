@@ -0,0 +1,98 @@
+"""
+Testes do arquivo de HTML bruto e do replay (arquivo_html)
+"""
+
+import json
+import os
+
+import pytest
+
+import arquivo_html
+from arquivo_html import ArquivoHTML, atualizar_banco, reprocessar
+from banco_produtos import BancoProdutos
+from conftest import ler_pagina
+
+
+CATALOGO = "https://www.mercadolivre.com.br/smartphone/p/MLB123"
+ANUNCIO = "https://produto.mercadolivre.com.br/MLB-123-smartphone-_JM"
+
+
+def test_paginas_identicas_guardadas_uma_vez(tmp_path):
+    arquivo = ArquivoHTML(str(tmp_path))
+    conteudo = ler_pagina("mlb44589848_panificadora.html")
+
+    sha = arquivo.guardar(conteudo, CATALOGO, chave="p:MLB123", headers={"etag": '"v1"'})
+    assert arquivo.guardar(conteudo, CATALOGO, chave="p:MLB123") == sha
+    assert arquivo.ler(sha) == conteudo
+
+    estatisticas = arquivo.estatisticas()
+    assert (estatisticas["downloads"], estatisticas["produtos"], estatisticas["objetos"]) == (2, 1, 1)
+    assert estatisticas["bytes_originais"] == 2 * len(conteudo) > estatisticas["bytes_em_disco"]
+    assert arquivo.listar(apenas_mais_recente=False)[0]["etag"] == '"v1"'
+
+
+def test_listar_recalcula_a_chave_pela_url(tmp_path):
+    arquivo = ArquivoHTML(str(tmp_path))
+    # Download antigo, gravado antes da chave "p:" dos catálogos
+    arquivo.guardar(b"<html>v1</html>", CATALOGO, chave="MLB123")
+    arquivo.guardar(b"<html>anuncio</html>", ANUNCIO, chave="MLB123")
+    recente = arquivo.guardar(b"<html>v2</html>", CATALOGO + "?tracking_id=x", chave="p:MLB123")
+
+    por_chave = {arquivo_html.chave_do_registro(r): r["sha256"] for r in arquivo.listar()}
+    assert set(por_chave) == {"p:MLB123", "MLB123"}
+    assert por_chave["p:MLB123"] == recente
+    assert len(arquivo.listar(apenas_mais_recente=False)) == 3
+
+
+def test_arquivo_vazio(tmp_path):
+    arquivo = ArquivoHTML(str(tmp_path))
+    assert arquivo.listar() == []
+    assert list(reprocessar(arquivo, max_workers=1)) == []
+
+
+def test_replay_com_chave_atual_e_sem_gravar_bloqueio(tmp_path):
+    arquivo = ArquivoHTML(str(tmp_path / "arquivo"))
+    banco = BancoProdutos(str(tmp_path / "produtos.db"))
+    arquivo.guardar(ler_pagina("mlb1234567890_smartphone.html"), CATALOGO, chave="MLB123", headers={"etag": '"bom"'})
+
+    resultado, = reprocessar(arquivo, max_workers=1)
+    assert (resultado["chave"], resultado["sucesso"], resultado["etag"]) == ("p:MLB123", True, '"bom"')
+    assert resultado["dados"]["titulo"] != "N/A"
+    assert atualizar_banco(banco, resultado)
+
+    # A mesma URL arquivada depois com a página de bloqueio
+    arquivo.guardar(ler_pagina("bloqueio_captcha.html"), CATALOGO, chave="MLB123", headers={"etag": '"bloqueio"'})
+    bloqueio, = reprocessar(arquivo, max_workers=1)
+    assert not atualizar_banco(banco, bloqueio)
+    # Sem título também não grava, mesmo numa página longa
+    assert not atualizar_banco(banco, {**resultado, "dados": {**resultado["dados"], "titulo": "N/A"}})
+
+    registro = banco.obter("p:MLB123")
+    assert registro["etag"] == '"bom"' and registro["dados"]["titulo"] == resultado["dados"]["titulo"]
+    assert banco.obter("MLB123") is None
+
+
+def test_objeto_ausente_vira_falha(tmp_path):
+    arquivo = ArquivoHTML(str(tmp_path))
+    sha = arquivo.guardar(b"<html></html>", CATALOGO)
+    os.remove(arquivo._caminho_objeto(sha))
+
+    resultado, = reprocessar(arquivo, max_workers=1)
+    assert resultado["sucesso"] is False and resultado["erro"]
+    assert not atualizar_banco(BancoProdutos(str(tmp_path / "produtos.db")), resultado)
+
+
+@pytest.mark.parametrize("comando", ["stats", "replay"])
+def test_cli_aceita_dir_depois_do_subcomando(tmp_path, monkeypatch, capsys, comando):
+    ArquivoHTML(str(tmp_path)).guardar(ler_pagina("mlb44589848_panificadora.html"), CATALOGO)
+    saida = tmp_path / "resultados.jsonl"
+    argumentos = [comando, "--dir", str(tmp_path)] + (["--saida", str(saida), "--workers", "1"] if comando == "replay" else [])
+    monkeypatch.setattr("sys.argv", ["arquivo_html.py"] + argumentos)
+
+    arquivo_html.main()
+
+    if comando == "stats":
+        assert json.loads(capsys.readouterr().out)["downloads"] == 1
+    else:
+        linhas = saida.read_text(encoding="utf-8").splitlines()
+        assert [json.loads(linha)["chave"] for linha in linhas] == ["p:MLB123"]
@@ -0,0 +1,60 @@
+"""
+Testes do banco SQLite de produtos (banco_produtos)
+"""
+
+from banco_produtos import BancoProdutos, headers_condicionais
+
+
+def test_guarda_campos_do_produto_com_validadores(tmp_path):
+    banco = BancoProdutos(str(tmp_path / "produtos.db"))
+    dados = {"titulo": "Panificadora", "cor": "Branca", "fontes": {"titulo": "html"}, "debug_logs": ["log"]}
+    banco.guardar("MLB1", "https://www.mercadolivre.com.br/p/MLB1", dados, etag='"abc"', last_modified="Tue, 01 Jul 2025 10:00:00 GMT")
+
+    registro = banco.obter("MLB1")
+    assert registro["dados"] == {"titulo": "Panificadora", "cor": "Branca", "fontes": {"titulo": "html"}}
+    assert (registro["etag"], registro["url"]) == ('"abc"', "https://www.mercadolivre.com.br/p/MLB1")
+    assert registro["buscado_em"] == registro["validado_em"]
+    assert banco.obter("MLB2") is None
+
+
+def test_marcar_validado_atualiza_so_a_validacao(tmp_path):
+    banco = BancoProdutos(str(tmp_path / "produtos.db"))
+    banco.guardar("MLB1", "u", {"titulo": "t"}, etag='"abc"')
+    buscado_em = banco.obter("MLB1")["buscado_em"]
+
+    banco.marcar_validado("MLB1")
+    registro = banco.obter("MLB1")
+    assert registro["buscado_em"] == buscado_em and registro["validado_em"] >= buscado_em
+    assert banco.estatisticas()["validacoes_304"] == 1
+
+
+def test_headers_condicionais():
+    assert headers_condicionais(None) == {}
+    assert headers_condicionais({"etag": '"abc"', "last_modified": None}) == {"If-None-Match": '"abc"'}
+    assert headers_condicionais({"etag": None, "last_modified": "ontem"}) == {"If-Modified-Since": "ontem"}
+
+
+def test_extracao_parcial_nao_substitui_registro_completo(tmp_path):
+    banco = BancoProdutos(str(tmp_path / "produtos.db"))
+    completo = {"titulo": "Panificadora", "cor": "Branca", "descricao": "Completa", "fontes": {"cor": "html"}}
+    banco.guardar("p:MLB1", "u", completo, etag='"v1"')
+
+    banco.guardar("p:MLB1", "u", {"titulo": "Panificadora", "cor": "Preta", "campos_extraidos": ["titulo", "cor"]}, etag='"v2"')
+    registro = banco.obter("p:MLB1")
+    assert (registro["dados"], registro["etag"]) == (completo, '"v1"')
+    assert banco.estatisticas()["gravacoes"] == 1
+
+
+def test_extracoes_parciais_da_mesma_versao_se_somam(tmp_path):
+    banco = BancoProdutos(str(tmp_path / "produtos.db"))
+    banco.guardar("p:MLB1", "u", {"titulo": "t", "cor": "Branca", "fontes": {"cor": "html"}, "campos_extraidos": ["titulo", "cor"]}, etag='"v1"')
+    banco.guardar("p:MLB1", "u", {"titulo": "t", "descricao": "d", "fontes": {"descricao": "json_ld"}, "campos_extraidos": ["titulo", "descricao"]}, etag='"v1"')
+
+    dados = banco.obter("p:MLB1")["dados"]
+    assert (dados["cor"], dados["descricao"]) == ("Branca", "d")
+    assert dados["campos_extraidos"] == ["titulo", "cor", "descricao"]
+    assert dados["fontes"] == {"cor": "html", "descricao": "json_ld"}
+
+    # Página mudou (outro ETag): a parcial nova substitui a antiga
+    banco.guardar("p:MLB1", "u", {"titulo": "t2", "campos_extraidos": ["titulo"]}, etag='"v2"')
+    assert banco.obter("p:MLB1")["dados"] == {"titulo": "t2", "campos_extraidos": ["titulo"]}
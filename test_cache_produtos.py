@@ -0,0 +1,122 @@
+"""
+Testes do cache em memória de produtos (cache_produtos)
+"""
+
+import cache_produtos
+from cache_produtos import CacheProdutos, cobre_campos
+
+
+def _produto(titulo: str, **extras) -> dict:
+    return {
+        "titulo": titulo,
+        "bullet_points": ["Potência de 600W"],
+        "caracteristicas": {"Marca": "Gallant"},
+        "cor": "Branca",
+        "descricao": "Descrição",
+        "fontes": {"titulo": "html"},
+        **extras
+    }
+
+
+class _Relogio:
+    def __init__(self):
+        self.agora = 1000.0
+
+    def __call__(self):
+        return self.agora
+
+
+def test_guarda_so_campos_do_produto_e_devolve_copia():
+    cache = CacheProdutos(ttl_segundos=60, max_itens=10)
+    cache.guardar("MLB1", _produto("Panificadora", debug_logs=["log"], screenshots={"a": "b"}))
+
+    dados = cache.obter("MLB1")
+    assert "debug_logs" not in dados and "screenshots" not in dados
+    dados["bullet_points"].append("alterado")
+    assert cache.obter("MLB1")["bullet_points"] == ["Potência de 600W"]
+
+
+def test_expira_pelo_ttl(monkeypatch):
+    relogio = _Relogio()
+    monkeypatch.setattr(cache_produtos.time, "monotonic", relogio)
+    cache = CacheProdutos(ttl_segundos=60, max_itens=10)
+    cache.guardar("MLB1", _produto("Panificadora"))
+
+    relogio.agora += 59
+    assert cache.obter("MLB1") is not None
+    relogio.agora += 2
+    assert cache.obter("MLB1") is None
+
+    estatisticas = cache.estatisticas()
+    assert (estatisticas["hits"], estatisticas["misses"], estatisticas["expirados"], estatisticas["itens"]) == (1, 1, 1, 0)
+
+
+def test_despeja_o_menos_usado_por_itens():
+    cache = CacheProdutos(ttl_segundos=60, max_itens=2)
+    cache.guardar("MLB1", _produto("um"))
+    cache.guardar("MLB2", _produto("dois"))
+    cache.obter("MLB1")  # MLB2 passa a ser o menos usado
+    cache.guardar("MLB3", _produto("três"))
+
+    assert cache.obter("MLB2") is None
+    assert cache.obter("MLB1")["titulo"] == "um"
+    assert cache.obter("MLB3")["titulo"] == "três"
+    assert cache.estatisticas()["despejos"] == 1
+
+
+def test_despeja_por_bytes_e_recusa_item_maior_que_o_limite():
+    tamanho = len(cache_produtos.json.dumps(_produto("x" * 10), ensure_ascii=False).encode("utf-8"))
+    cache = CacheProdutos(ttl_segundos=60, max_itens=0, max_bytes=tamanho * 2)
+    cache.guardar("MLB1", _produto("a" * 10))
+    cache.guardar("MLB2", _produto("b" * 10))
+    cache.guardar("MLB3", _produto("c" * 10))
+    assert cache.obter("MLB1") is None
+    assert cache.estatisticas()["bytes"] <= tamanho * 2
+
+    cache.guardar("MLB4", _produto("d" * tamanho * 3))
+    assert cache.obter("MLB4") is None
+
+
+def test_extracao_parcial_so_atende_campos_contidos_e_conta_miss():
+    cache = CacheProdutos(ttl_segundos=60, max_itens=10)
+    cache.guardar("MLB1", _produto("Panificadora", campos_extraidos=["titulo", "cor"]))
+
+    assert cache.obter("MLB1", ("titulo", "cor"))["cor"] == "Branca"
+    assert cache.obter("MLB1", ("titulo", "descricao")) is None
+    assert cache.obter("MLB1") is None
+
+    estatisticas = cache.estatisticas()
+    assert (estatisticas["hits"], estatisticas["misses"]) == (1, 2)
+
+
+def test_cobre_campos():
+    completo = _produto("t")
+    parcial = _produto("t", campos_extraidos=["titulo"])
+    assert cobre_campos(completo, None) and cobre_campos(completo, ("cor",))
+    assert cobre_campos(parcial, ("titulo",))
+    assert not cobre_campos(parcial, None)
+    assert not cobre_campos(parcial, ("titulo", "cor"))
+
+
+def test_extracao_parcial_nao_substitui_completa_e_se_soma_a_parcial():
+    cache = CacheProdutos(ttl_segundos=60, max_itens=10)
+    cache.guardar("p:MLB1", _produto("Completo"))
+    cache.guardar("p:MLB1", _produto("Parcial", cor="Preta", campos_extraidos=["titulo", "cor"]))
+    assert cache.obter("p:MLB1")["titulo"] == "Completo"
+
+    cache.guardar("MLB2", _produto("t", cor="Preta", fontes={"cor": "html"}, campos_extraidos=["titulo", "cor"]))
+    cache.guardar("MLB2", _produto("t", descricao="Nova", fontes={"descricao": "json_ld"}, campos_extraidos=["descricao"]))
+    dados = cache.obter("MLB2", ("cor", "descricao"))
+    assert (dados["cor"], dados["descricao"]) == ("Preta", "Nova")
+    assert dados["campos_extraidos"] == ["titulo", "cor", "descricao"]
+    assert dados["fontes"] == {"cor": "html", "descricao": "json_ld"}
+
+
+def test_extracao_parcial_substitui_completa_expirada(monkeypatch):
+    relogio = _Relogio()
+    monkeypatch.setattr(cache_produtos.time, "monotonic", relogio)
+    cache = CacheProdutos(ttl_segundos=60, max_itens=10)
+    cache.guardar("MLB1", _produto("Completo"))
+    relogio.agora += 61
+    cache.guardar("MLB1", _produto("Parcial", campos_extraidos=["titulo"]))
+    assert cache.obter("MLB1", ("titulo",))["titulo"] == "Parcial"
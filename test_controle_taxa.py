@@ -0,0 +1,129 @@
+"""
+Testes do controle adaptativo de taxa por host (controle_taxa)
+"""
+
+import pytest
+import requests
+
+import controle_taxa
+from controle_taxa import (
+    BLOQUEIO,
+    ERRO,
+    NEUTRO,
+    OK,
+    PAGINA_CURTA,
+    ControladorHost,
+    ControleTaxa,
+    EsperaTaxaEsgotada,
+    Permissao,
+    sinal_da_pagina
+)
+
+
+def _resposta(controlador: ControladorHost, sinal: str, inicio: float, agora: float, retry_after=None):
+    permissao = Permissao(controlador.host, inicio)
+    permissao.registrar(sinal, retry_after)
+    controlador.em_uso += 1
+    controlador.liberar(permissao, agora)
+
+
+def test_aumento_aditivo_com_respostas_saudaveis():
+    controlador = ControladorHost("www.mercadolivre.com.br")
+    controlador.taxa, controlador.limite = 2.0, 4.0
+
+    for i in range(4):
+        _resposta(controlador, OK, inicio=i, agora=i + 0.5)
+
+    assert controlador.taxa == pytest.approx(2.0 + 4 * controle_taxa.TAXA_INCREMENTO_RPS)
+    # ~+1 de concorrência por janela de `limite` respostas
+    assert 4.9 < controlador.limite < 5.0
+
+
+def test_recuo_multiplicativo_uma_vez_por_janela():
+    controlador = ControladorHost("www.mercadolivre.com.br")
+    controlador.taxa, controlador.limite = 8.0, 8.0
+
+    _resposta(controlador, ERRO, inicio=1.0, agora=10.0)
+    assert (controlador.taxa, controlador.limite, controlador.recuos) == (4.0, 4.0, 1)
+
+    # Já estava no ar antes do corte: não corta de novo
+    _resposta(controlador, PAGINA_CURTA, inicio=5.0, agora=11.0)
+    assert (controlador.taxa, controlador.recuos) == (4.0, 1)
+
+    # Começou depois do corte: nova janela
+    _resposta(controlador, PAGINA_CURTA, inicio=10.5, agora=12.0)
+    assert (controlador.taxa, controlador.limite, controlador.recuos) == (2.0, 2.0, 2)
+
+    # Nunca abaixo dos mínimos
+    for i in range(20):
+        _resposta(controlador, ERRO, inicio=20.0 + i, agora=20.5 + i)
+    assert controlador.taxa == controle_taxa.TAXA_MIN_RPS
+    assert controlador.limite == controle_taxa.CONCORRENCIA_MIN
+
+
+def test_bloqueio_pausa_o_host_e_neutro_nao_mexe():
+    controlador = ControladorHost("www.mercadolivre.com.br")
+    _resposta(controlador, BLOQUEIO, inicio=1.0, agora=10.0, retry_after=30)
+    assert controlador.tentar(15.0) == pytest.approx(25.0)
+    assert controlador.pausado_ate == 40.0
+
+    taxa, limite = controlador.taxa, controlador.limite
+    _resposta(controlador, NEUTRO, inicio=50.0, agora=51.0)
+    assert (controlador.taxa, controlador.limite) == (taxa, limite)
+
+
+def test_token_bucket_e_limite_de_simultaneas():
+    controlador = ControladorHost("www.mercadolivre.com.br")
+    controlador.taxa, controlador.limite, controlador.tokens = 2.0, 2.0, 1.0
+    controlador._reposto_em = 100.0
+
+    assert controlador.tentar(100.0) == 0.0
+    # Sem token: espera o próximo (1 / taxa)
+    assert controlador.tentar(100.0) == pytest.approx(0.5)
+    assert controlador.tentar(100.5) == 0.0
+    # Duas em uso = limite: espera uma vaga
+    assert controlador.tentar(200.0) == controle_taxa._ESPERA_VAGA
+
+
+@pytest.mark.parametrize("status, url_final, tamanho, titulo, sinal", [
+    (200, "https://www.mercadolivre.com.br/p/MLB1", 50000, "Panificadora", OK),
+    (200, "https://www.mercadolivre.com.br/gz/account-verification?go=x", 50000, "Panificadora", BLOQUEIO),
+    (200, "https://www.mercadolivre.com.br/p/MLB1", 500, "Panificadora", PAGINA_CURTA),
+    (200, "https://www.mercadolivre.com.br/p/MLB1", 50000, "N/A", PAGINA_CURTA),
+    (429, "", 0, "N/A", BLOQUEIO),
+    (403, "", 0, "N/A", BLOQUEIO),
+    (503, "", 0, "N/A", ERRO),
+    (404, "", 0, "N/A", NEUTRO)
+])
+def test_sinal_da_pagina(status, url_final, tamanho, titulo, sinal):
+    assert sinal_da_pagina(status, url_final, tamanho, {"titulo": titulo}) == sinal
+
+
+def test_excecao_no_bloco_vira_sinal():
+    controle = ControleTaxa(espera_max=5)
+    resposta = requests.Response()
+    resposta.status_code = 429
+    resposta.headers["Retry-After"] = "7"
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        with controle.permissao("https://www.mercadolivre.com.br/p/MLB1"):
+            raise requests.exceptions.HTTPError(response=resposta)
+
+    host = controle.estatisticas()["hosts"]["www.mercadolivre.com.br"]
+    assert host["sinais"][BLOQUEIO] == 1 and host["recuos"] == 1
+    assert 6 < host["pausado_por_s"] <= 7
+
+
+def test_espera_alem_do_prazo_vira_espera_esgotada():
+    controle = ControleTaxa(espera_max=2)
+    with controle.permissao("https://www.mercadolivre.com.br/p/MLB1") as permissao:
+        permissao.registrar(BLOQUEIO, retry_after=30)
+
+    with pytest.raises(EsperaTaxaEsgotada) as erro:
+        with controle.permissao("https://www.mercadolivre.com.br/p/MLB2"):
+            pass
+    assert 29 <= erro.value.retry_after <= 30
+
+
+def test_espera_maxima_padrao_abaixo_do_max_duration():
+    assert controle_taxa.TAXA_ESPERA_MAX <= 15
@@ -0,0 +1,88 @@
+"""
+Testes da leitura dos dados estruturados (dados_estruturados) e da
+prioridade entre as fontes no motor de passagem única
+"""
+
+import json
+
+import pytest
+
+import dados_estruturados
+from conftest import ler_pagina
+from extrator_html import ExtratorPassagemUnica, extrair_passagem_unica
+
+
+def _pagina(*scripts: str, corpo: str = "") -> bytes:
+    return f"<html><head>{''.join(scripts)}</head><body>{corpo}</body></html>".encode("utf-8")
+
+
+def _json_ld(produto: dict) -> str:
+    return f'<script type="application/ld+json">{json.dumps(produto)}</script>'
+
+
+def _estado_inicial(componentes) -> str:
+    estado = {"pageState": {"initialState": {"components": componentes}}}
+    return f"<script>window.__PRELOADED_STATE__ = {json.dumps(estado)};</script>"
+
+
+def test_json_ld_acha_o_produto_no_graph():
+    texto = json.dumps({"@graph": [
+        {"@type": "BreadcrumbList"},
+        {
+            "@type": ["Product"],
+            "name": "Panificadora Gallant",
+            "color": "Branca",
+            "description": "curta",
+            "additionalProperty": [{"name": "Potência:", "value": 600}, {"name": "", "value": "x"}]
+        }
+    ]})
+    assert dados_estruturados.de_json_ld(texto) == {
+        "titulo": "Panificadora Gallant",
+        "cor": "Branca",
+        "caracteristicas": {"Potência": "600"}
+    }
+
+
+@pytest.mark.parametrize("texto", ["", "{quebrado", '{"@type": "Organization"}', "[1, 2]"])
+def test_json_ld_sem_produto(texto):
+    assert dados_estruturados.de_json_ld(texto) == {}
+
+
+def test_estado_inicial_com_componentes_em_lista():
+    texto = "window.__PRELOADED_STATE__ = " + json.dumps({"initialState": {"components": [
+        {"id": "header", "title": "Liquidificador Britania"},
+        {"id": "variations", "pickers": [{"id": "COLOR", "label": {"text": "Cor: Preto"}}]},
+        {"id": "highlighted_specs_attrs", "components": [
+            {"id": "highlighted_specs_features", "features": [{"text": "Possui 12 velocidades."}, {"text": "curto"}]}
+        ]}
+    ]}}) + ";"
+    assert dados_estruturados.do_estado_inicial(texto) == {
+        "titulo": "Liquidificador Britania",
+        "cor": "Preto",
+        "bullet_points": ["Possui 12 velocidades."]
+    }
+
+
+def test_prioridade_estado_inicial_json_ld_html():
+    conteudo = _pagina(
+        _json_ld({"@type": "Product", "name": "Título do JSON-LD", "color": "Branca"}),
+        _estado_inicial({"header": {"title": "Título do estado inicial"}}),
+        corpo="<h1>Título do HTML</h1><h2>Descrição</h2><p>" + "Descrição vinda do HTML da página. " * 2 + "</p>"
+    )
+    dados = ExtratorPassagemUnica().processar(conteudo)
+    assert (dados["titulo"], dados["cor"]) == ("Título do estado inicial", "Branca")
+    assert dados["descricao"].startswith("Descrição vinda do HTML")
+
+
+@pytest.mark.parametrize("pagina, fonte", [
+    ("mlb1234567890_smartphone.html", "estado_inicial"),
+    ("mlb3456789012_liquidificador.html", "estado_inicial"),
+    ("mlb44589848_panificadora.html", "estado_inicial"),
+    ("mlb9876543210_anuncio_sem_json.html", "html")
+])
+def test_fontes_nas_paginas_do_corpus(pagina, fonte):
+    dados = extrair_passagem_unica(ler_pagina(pagina), [])
+    assert set(dados["fontes"].values()) == {fonte}
+    # O JSON traz o mesmo produto que o HTML
+    so_html = ExtratorPassagemUnica(usar_dados_estruturados=False).processar(ler_pagina(pagina))
+    assert dados["titulo"] == so_html["titulo"] and dados["cor"] == so_html["cor"]
@@ -0,0 +1,154 @@
+"""
+Testes de regressão do motor de passagem única (extrator_html) contra os
+extratores DOM de scraping_mercado_livre_v2, com as páginas de benchmarks/corpus
+"""
+
+import os
+
+import pytest
+
+import extrator_html
+from conftest import ler_pagina, paginas_corpus
+from extrator_html import CAMPOS_PRODUTO, ExtratorPassagemUnica, PaginaProduto, extrair_passagem_unica
+from scraping_mercado_livre_v2 import extrair_dados_html
+
+
+PAGINAS = [os.path.basename(caminho) for caminho in paginas_corpus()]
+
+BULLETS_ANUNCIO = [
+    "Possui 12 velocidades e função pulsar.",
+    "Jarra de 2,6 litros em acrílico resistente.",
+    "Lâminas em aço inox com 4 pontas.",
+    "Potência de 900 W."
+]
+CARACTERISTICAS_ANUNCIO = {
+    "Marca": "Britania",
+    "Modelo": "Diamante 900",
+    "Cor": "Preto",
+    "Voltagem": "220V",
+    "Capacidade": "2,6 L"
+}
+
+# Diferenças conhecidas entre os motores (o que a passagem única extrai).
+# Cor: os extratores DOM aplicam a regex ao texto concatenado da página e
+# grudam o texto seguinte ("BrancaO que"); a passagem única lê o rótulo e o
+# valor. Layout de anúncio (ui-pdp-features__list e tabela de
+# especificações): só a passagem única reconhece, o DOM devolve vazio.
+DIFERENCAS = {
+    "mlb1234567890_smartphone.html": {"cor": "Azul Escuro"},
+    "mlb44589848_panificadora.html": {"cor": "Branca"},
+    "mlb3456789012_liquidificador.html": {
+        "bullet_points": BULLETS_ANUNCIO,
+        "caracteristicas": CARACTERISTICAS_ANUNCIO,
+        "cor": "Preto"
+    },
+    "mlb9876543210_anuncio_sem_json.html": {
+        "bullet_points": BULLETS_ANUNCIO,
+        "caracteristicas": CARACTERISTICAS_ANUNCIO,
+        "cor": "Preto"
+    }
+}
+
+
+@pytest.mark.parametrize("pagina", PAGINAS)
+def test_passagem_unica_so_difere_do_dom_onde_documentado(pagina):
+    conteudo = ler_pagina(pagina)
+    dom = extrair_dados_html(conteudo, [], backend="dom")
+    # Sem JSON: só as regras de HTML, comparáveis às do DOM
+    unica = ExtratorPassagemUnica(usar_dados_estruturados=False).processar(conteudo)
+
+    esperado = {campo: dom[campo] for campo in CAMPOS_PRODUTO}
+    esperado.update(DIFERENCAS.get(pagina, {}))
+    assert {campo: unica[campo] for campo in CAMPOS_PRODUTO} == esperado
+
+
+def test_titulo_vem_do_h1_sem_a_regex_de_marcas():
+    # O DOM prefere um trecho do texto com marca conhecida terminando em potência
+    # ("...Britania...900w"); a passagem única usa o primeiro h1
+    conteudo = (
+        "<html><body><p>Oferta liquidificador Britania potente 900w</p>"
+        "<h1>Liquidificador Diamante</h1></body></html>"
+    ).encode("utf-8")
+    assert extrair_dados_html(conteudo, [], backend="dom")["titulo"] == "Oferta liquidificador Britania potente 900w"
+    assert ExtratorPassagemUnica(usar_dados_estruturados=False).processar(conteudo)["titulo"] == "Liquidificador Diamante"
+
+
+def test_sem_h1_titulo_vem_do_title_da_pagina():
+    conteudo = b"<html><head><title>Panificadora Multi Pane | Mercado Livre</title></head><body></body></html>"
+    assert ExtratorPassagemUnica(usar_dados_estruturados=False).processar(conteudo)["titulo"] == "Panificadora Multi Pane"
+
+
+def _em_streaming(conteudo: bytes, campos=None, tamanho_pedaco: int = 16 * 1024) -> ExtratorPassagemUnica:
+    """Como o download em streaming: alimenta em pedaços e para quando `completo`"""
+    extrator = ExtratorPassagemUnica(campos)
+    for inicio in range(0, len(conteudo), tamanho_pedaco):
+        extrator.alimentar(conteudo[inicio:inicio + tamanho_pedaco])
+        if extrator.completo:
+            break
+    extrator.finalizar()
+    return extrator
+
+
+@pytest.mark.parametrize("pagina", PAGINAS)
+def test_streaming_igual_a_pagina_inteira(pagina):
+    conteudo = ler_pagina(pagina)
+    inteira = extrair_passagem_unica(conteudo, [])
+    streaming = _em_streaming(conteudo)
+
+    assert {campo: streaming.dados[campo] for campo in CAMPOS_PRODUTO} == {campo: inteira[campo] for campo in CAMPOS_PRODUTO}
+    assert streaming.fontes == inteira["fontes"]
+
+    # Com projeção de campos, idem para os campos pedidos
+    campos = ("titulo", "cor")
+    parcial = extrair_passagem_unica(conteudo, [], campos)
+    assert {campo: _em_streaming(conteudo, campos).dados[campo] for campo in campos} == {campo: parcial[campo] for campo in campos}
+
+
+def test_streaming_para_depois_do_estado_inicial():
+    # No smartphone o estado inicial termina ~40 KB antes do fim da página
+    conteudo = ler_pagina("mlb1234567890_smartphone.html")
+    streaming = _em_streaming(conteudo)
+    assert streaming.fontes["descricao"] == "estado_inicial"
+    assert streaming.bytes_recebidos < len(conteudo)
+
+
+@pytest.mark.parametrize("pagina", PAGINAS)
+def test_pagina_produto_igual_a_extracao_completa(pagina):
+    conteudo = ler_pagina(pagina)
+    completa = extrair_passagem_unica(conteudo, [])
+
+    # Um campo por vez, na mesma página e cada um numa página nova
+    pagina_produto = PaginaProduto(conteudo)
+    for campo in CAMPOS_PRODUTO:
+        assert getattr(pagina_produto, campo) == completa[campo], campo
+        assert getattr(PaginaProduto(conteudo), campo) == completa[campo], campo
+    assert pagina_produto.fontes == completa["fontes"]
+    assert PaginaProduto(conteudo).para_dict() == {campo: completa[campo] for campo in CAMPOS_PRODUTO + ("fontes",)}
+
+
+def test_pagina_produto_devolve_copias():
+    pagina = PaginaProduto(ler_pagina("mlb44589848_panificadora.html"))
+    pagina.bullet_points.append("alterado")
+    pagina.caracteristicas["Marca"] = "alterada"
+    pagina.para_dict()["bullet_points"].clear()
+
+    completa = extrair_passagem_unica(ler_pagina("mlb44589848_panificadora.html"), [])
+    assert pagina.bullet_points == completa["bullet_points"]
+    assert pagina.caracteristicas == completa["caracteristicas"]
+
+
+@pytest.mark.skipif(not extrator_html.SELECTOLAX_DISPONIVEL, reason="sem selectolax o primeiro acesso extrai tudo")
+def test_pagina_produto_parseia_uma_vez(monkeypatch):
+    parses = []
+    lexbor = extrator_html.LexborHTMLParser
+
+    def parser(conteudo):
+        parses.append(len(conteudo))
+        return lexbor(conteudo)
+
+    monkeypatch.setattr(extrator_html, "LexborHTMLParser", parser)
+    pagina = PaginaProduto(ler_pagina("mlb9876543210_anuncio_sem_json.html"))
+    for campo in CAMPOS_PRODUTO:
+        getattr(pagina, campo)
+    pagina.para_dict()
+    assert len(parses) == 1
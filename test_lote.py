@@ -0,0 +1,112 @@
+"""
+Testes offline do scraping em lote (scrape_em_lote / scrape_em_lote_async e
+POST /scrape/batch da api.py) contra o site falso (ver conftest.py)
+"""
+
+import asyncio
+
+import pytest
+
+import scraping_mercado_livre_v2 as scraper
+from conftest import url_de_catalogo
+
+
+def _lote(assincrono: bool, urls, **opcoes):
+    if assincrono:
+        return asyncio.run(scraper.scrape_em_lote_async(urls, **opcoes))
+    return scraper.scrape_em_lote(urls, **opcoes)
+
+
+def _downloads(site_falso) -> int:
+    return sum(site_falso.respostas.values())
+
+
+def test_deduplicar_e_distribuir():
+    urls = [
+        "https://www.mercadolivre.com.br/a/p/MLB1?tracking_id=x",
+        "https://produto.mercadolivre.com.br/MLB-1-a-_JM",  # anúncio: outro produto
+        "https://www.mercadolivre.com.br/b/p/MLB1#reviews",
+        "https://www.mercadolivre.com.br/produto/sem-chave",
+        "https://www.mercadolivre.com.br/produto/sem-chave"
+    ]
+    unicas, posicoes = scraper._deduplicar_urls(urls)
+    assert unicas == [urls[0], urls[1], urls[3]]
+    assert posicoes == [0, 1, 0, 2, 2]
+
+    resultados = [{"url": url, "sucesso": True, "dados": {"titulo": url}, "erro": None} for url in unicas]
+    distribuidos = scraper._distribuir_resultados(urls, resultados, posicoes)
+    assert [r["url"] for r in distribuidos] == urls
+    assert distribuidos[2]["dados"] == distribuidos[0]["dados"]
+    # Cópias: alterar um resultado repetido não muda o outro
+    assert distribuidos[2]["dados"] is not distribuidos[0]["dados"]
+
+
+@pytest.mark.parametrize("assincrono", [False, True])
+def test_repetidas_baixadas_uma_vez_na_ordem_do_pedido(site_falso, assincrono):
+    smartphone = url_de_catalogo("mlb1234567890_smartphone.html")
+    liquidificador = url_de_catalogo("mlb3456789012_liquidificador.html")
+    panificadora = url_de_catalogo("mlb44589848_panificadora.html")
+    urls = [smartphone, liquidificador, smartphone + "?tracking_id=abc", panificadora, liquidificador + "#reviews"]
+    downloads = _downloads(site_falso)
+
+    resultados = _lote(assincrono, urls, max_concorrencia=3)
+
+    assert _downloads(site_falso) == downloads + 3
+    assert [r["url"] for r in resultados] == urls
+    assert all(r["sucesso"] and r["erro"] is None for r in resultados)
+    assert resultados[2]["dados"]["titulo"] == resultados[0]["dados"]["titulo"] != resultados[1]["dados"]["titulo"]
+    assert len({r["dados"]["titulo"] for r in resultados}) == 3
+
+
+@pytest.mark.parametrize("assincrono", [False, True])
+def test_falha_de_um_item_nao_derruba_o_lote(site_falso, monkeypatch, assincrono):
+    boa = url_de_catalogo("mlb44589848_panificadora.html")
+    ausente = url_de_catalogo("mlb3456789012_liquidificador.html")
+    produto_ausente = ausente.rsplit("/", 1)[-1]
+    responder = site_falso.responder
+
+    def responder_sem_o_produto(caminho, if_none_match):
+        if caminho.endswith(f"/p/{produto_ausente}"):
+            return 404, {}, b"not found"
+        return responder(caminho, if_none_match)
+
+    monkeypatch.setattr(site_falso, "responder", responder_sem_o_produto)
+
+    ok, falha = _lote(assincrono, [boa, ausente])
+
+    assert ok["sucesso"] and ok["dados"]["titulo"] != "N/A"
+    assert (falha["url"], falha["sucesso"], falha["dados"]) == (ausente, False, None)
+    assert "404" in falha["erro"]
+
+
+def test_lote_vazio():
+    assert scraper.scrape_em_lote([]) == []
+    assert asyncio.run(scraper.scrape_em_lote_async([])) == []
+
+
+def test_endpoint_recusa_urls_invalidas_sem_baixar(site_falso):
+    from fastapi.testclient import TestClient
+
+    import api
+
+    cliente = TestClient(api.app)
+    cabecalhos = {"Authorization": f"Bearer {api.API_TOKEN}"}
+    valida = url_de_catalogo("mlb9876543210_anuncio_sem_json.html")
+    downloads = _downloads(site_falso)
+
+    resposta = cliente.post("/scrape/batch", headers=cabecalhos, json={
+        "urls": ["https://www.exemplo.com/p/MLB1", valida, ""]
+    })
+
+    corpo = resposta.json()
+    assert resposta.status_code == 200
+    assert (corpo["total"], corpo["sucessos"], corpo["falhas"]) == (3, 1, 2)
+    invalida, ok, vazia = corpo["resultados"]
+    assert ok["sucesso"] and ok["url"] == valida
+    assert invalida["sucesso"] is False and "Mercado Livre" in invalida["erro"]
+    assert vazia["sucesso"] is False
+    assert _downloads(site_falso) == downloads + 1
+
+    assert cliente.post("/scrape/batch", headers=cabecalhos, json={"urls": []}).status_code == 400
+    limite = ["https://www.exemplo.com/p/MLB1"] * (api.MAX_URLS_LOTE + 1)
+    assert cliente.post("/scrape/batch", headers=cabecalhos, json={"urls": limite}).status_code == 400
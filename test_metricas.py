@@ -0,0 +1,103 @@
+"""
+Testes da exposição das métricas no formato de texto do Prometheus (metricas)
+"""
+
+import pytest
+
+import metricas
+from metricas import Contador, Cronometro, Histograma, exportar_metricas, tipo_do_erro
+
+
+@pytest.fixture(autouse=True)
+def metricas_ativas(monkeypatch):
+    monkeypatch.setattr(metricas, "METRICAS_ATIVAS", True)
+
+
+def test_contador_por_rotulos():
+    contador = Contador("teste_eventos", "Eventos de teste", ("tipo",))
+    contador.incrementar(tipo="b")
+    contador.incrementar(2, tipo="a")
+    contador.incrementar(0.5, tipo="a")
+
+    assert contador.exportar() == [
+        "# HELP teste_eventos Eventos de teste",
+        "# TYPE teste_eventos counter",
+        'teste_eventos_total{tipo="a"} 2.5',
+        'teste_eventos_total{tipo="b"} 1'
+    ]
+
+
+def test_contador_sem_rotulos_e_sem_series():
+    contador = Contador("teste_vazio", "Sem observações")
+    assert contador.exportar() == ["# HELP teste_vazio Sem observações", "# TYPE teste_vazio counter"]
+    contador.incrementar()
+    assert contador.exportar()[-1] == "teste_vazio_total 1"
+
+
+def test_histograma_faixas_acumuladas_soma_e_contagem():
+    histograma = Histograma("teste_segundos", "Duração de teste", ("etapa",), faixas=(1, 0.1, 0.5))
+    for valor in (0.05, 0.1, 0.3, 0.7, 2.0):
+        histograma.observar(valor, etapa="x")
+
+    assert histograma.exportar()[2:] == [
+        # Valor igual ao limite conta na faixa (le = menor ou igual)
+        'teste_segundos_bucket{etapa="x",le="0.1"} 2',
+        'teste_segundos_bucket{etapa="x",le="0.5"} 3',
+        'teste_segundos_bucket{etapa="x",le="1"} 4',
+        'teste_segundos_bucket{etapa="x",le="+Inf"} 5',
+        'teste_segundos_sum{etapa="x"} 3.15',
+        'teste_segundos_count{etapa="x"} 5'
+    ]
+    assert histograma.exportar()[1] == "# TYPE teste_segundos histogram"
+
+
+def test_escapa_valores_dos_rotulos():
+    contador = Contador("teste_escape", "Escape", ("tipo",))
+    contador.incrementar(tipo='aspas " barra \\ e\nquebra')
+    assert contador.exportar()[-1] == 'teste_escape_total{tipo="aspas \\" barra \\\\ e\\nquebra"} 1'
+
+
+@pytest.mark.parametrize("rotulos", [{}, {"etapa": "x", "outra": "y"}, {"outra": "y"}])
+def test_rotulos_diferentes_dos_declarados(rotulos):
+    histograma = Histograma("teste_rotulos", "Rótulos", ("etapa",))
+    with pytest.raises(ValueError, match="teste_rotulos"):
+        histograma.observar(1.0, **rotulos)
+    with pytest.raises(ValueError):
+        Contador("teste_rotulos_total", "Rótulos", ("etapa",)).incrementar(**rotulos)
+
+
+def test_desativadas_nao_registram(monkeypatch):
+    monkeypatch.setattr(metricas, "METRICAS_ATIVAS", False)
+    histograma = Histograma("teste_desativado", "Desativado")
+    histograma.observar(1.0)
+    assert len(histograma.exportar()) == 2
+
+
+def test_cronometro_e_cronometrar():
+    histograma = Histograma("teste_cronometro", "Cronômetro", ("etapa",))
+    cronometro = Cronometro(histograma)
+    cronometro.marcar(etapa="a")
+    cronometro.marcar(etapa="b")
+    with pytest.raises(RuntimeError):
+        with histograma.cronometrar(etapa="c"):
+            raise RuntimeError("conta mesmo com exceção")
+
+    contagens = [linha for linha in histograma.exportar() if linha.startswith("teste_cronometro_count")]
+    assert contagens == [f'teste_cronometro_count{{etapa="{etapa}"}} 1' for etapa in "abc"]
+
+
+def test_tipo_do_erro():
+    class _Resposta:
+        status_code = 503
+
+    erro = RuntimeError()
+    erro.response = _Resposta()
+    assert tipo_do_erro(erro) == "HTTP 503"
+    assert tipo_do_erro(TimeoutError()) == "TimeoutError"
+
+
+def test_exportar_metricas_do_scraper():
+    texto = exportar_metricas()
+    assert texto.endswith("\n")
+    for nome in ("scraper_produto_segundos", "scraper_cache"):
+        assert f"# TYPE {nome} " in texto
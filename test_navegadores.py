@@ -0,0 +1,242 @@
+"""
+Testes do pool de navegadores e da espera de prontidão da página (navegadores),
+com drivers falsos no lugar do Chrome
+"""
+
+import threading
+import time
+
+import pytest
+
+from navegadores import NavegadorIndisponivel, PoolNavegadores, aguardar_pagina_pronta
+
+
+class _Abas:
+    def __init__(self, driver):
+        self._driver = driver
+
+    def window(self, aba):
+        if aba not in self._driver.window_handles:
+            raise RuntimeError(f"aba {aba} não existe")
+        self._driver.aba_atual = aba
+
+    def new_window(self, tipo):
+        self._driver.abas_abertas += 1
+        aba = f"aba-{self._driver.abas_abertas}"
+        self._driver.window_handles.append(aba)
+        self._driver.aba_atual = aba
+
+
+class DriverFalso:
+    """Só o que o pool usa do webdriver do Selenium"""
+
+    def __init__(self):
+        self.window_handles = ["base"]
+        self.aba_atual = "base"
+        self.abas_abertas = 0
+        self.travado = False
+        self.encerrado = False
+        self.cookies_apagados = 0
+        self.switch_to = _Abas(self)
+
+    @property
+    def current_window_handle(self):
+        return self.aba_atual
+
+    def execute_script(self, script, *args):
+        if self.travado:
+            raise RuntimeError("navegador não responde")
+        return 1 if script == "return 1" else None
+
+    def close(self):
+        self.window_handles.remove(self.aba_atual)
+
+    def delete_all_cookies(self):
+        self.cookies_apagados += 1
+
+    def quit(self):
+        self.encerrado = True
+
+
+class Fabrica:
+    """Cria drivers falsos e guarda todos os já criados"""
+
+    def __init__(self):
+        self.criados = []
+
+    def __call__(self):
+        driver = DriverFalso()
+        self.criados.append(driver)
+        return driver
+
+
+def _pool(**opcoes):
+    fabrica = Fabrica()
+    return PoolNavegadores(fabrica=fabrica, **{"tamanho": 1, "espera_max": 5, **opcoes}), fabrica
+
+
+def _aguardar(condicao, prazo: float = 5):
+    limite = time.monotonic() + prazo
+    while not condicao():
+        assert time.monotonic() < limite, "condição não atingida no prazo"
+        time.sleep(0.005)
+
+
+def test_reaproveita_o_navegador_com_contexto_limpo():
+    pool, fabrica = _pool()
+    for _ in range(3):
+        with pool.emprestar() as driver:
+            assert driver.current_window_handle != "base"
+
+    driver, = fabrica.criados
+    assert driver.window_handles == ["base"] and driver.cookies_apagados == 3
+    assert pool.estatisticas()["emprestimos"] == 3
+
+
+def test_emprestar_espera_e_desiste_no_prazo():
+    pool, fabrica = _pool(espera_max=0.05)
+    with pool.emprestar():
+        inicio = time.monotonic()
+        with pytest.raises(NavegadorIndisponivel):
+            with pool.emprestar():
+                pass
+        assert time.monotonic() - inicio >= 0.05
+    assert pool.estatisticas()["esperas_esgotadas"] == 1
+
+    # Quem espera recebe o navegador assim que ele é devolvido
+    pool.espera_max = 5
+    liberar = threading.Event()
+    emprestado = threading.Event()
+
+    def segurar():
+        with pool.emprestar():
+            emprestado.set()
+            liberar.wait(5)
+
+    thread = threading.Thread(target=segurar)
+    thread.start()
+    emprestado.wait(5)
+    threading.Timer(0.05, liberar.set).start()
+    with pool.emprestar():
+        pass
+    thread.join()
+    assert len(fabrica.criados) == 1
+
+
+def test_recicla_depois_de_n_paginas():
+    pool, fabrica = _pool(paginas_por_instancia=2)
+    for _ in range(5):
+        with pool.emprestar():
+            pass
+
+    assert len(fabrica.criados) == 3
+    assert [driver.encerrado for driver in fabrica.criados] == [True, True, False]
+    estatisticas = pool.estatisticas()
+    assert (estatisticas["reciclados"], estatisticas["abertos"]) == (2, 1)
+
+
+def test_descarta_navegador_que_nao_responde():
+    pool, fabrica = _pool()
+    with pool.emprestar():
+        pass
+    travado, = fabrica.criados
+    travado.travado = True
+
+    with pool.emprestar() as driver:
+        assert driver is not travado
+    assert travado.encerrado and pool.estatisticas()["descartados"] == 1
+
+    # Falha durante o trabalho: volta ao pool só se ainda responder
+    with pytest.raises(ValueError):
+        with pool.emprestar() as driver:
+            driver.travado = True
+            raise ValueError("erro na captura")
+    assert fabrica.criados[-1].encerrado
+    assert pool.estatisticas()["abertos"] == 0
+
+
+def test_aquecer_abre_ate_o_tamanho():
+    pool, fabrica = _pool(tamanho=3)
+    pool.aquecer(2)
+    _aguardar(lambda: pool.estatisticas()["livres"] == 2)
+    pool.aquecer()
+    _aguardar(lambda: pool.estatisticas()["livres"] == 3)
+
+    with pool.emprestar():
+        pass
+    assert len(fabrica.criados) == 3
+
+
+def test_encerrar_fecha_todos_os_navegadores():
+    pool, fabrica = _pool(tamanho=3)
+    with pool.emprestar():
+        pass
+    pool.aquecer()
+    _aguardar(lambda: pool.estatisticas()["livres"] == 3)
+
+    with pool.emprestar() as emprestado:
+        pool.encerrar()
+        assert not emprestado.encerrado
+        assert sum(driver.encerrado for driver in fabrica.criados) == 2
+    # O emprestado é fechado na devolução
+    assert all(driver.encerrado for driver in fabrica.criados)
+    assert pool.estatisticas()["abertos"] == 0
+
+    with pytest.raises(NavegadorIndisponivel):
+        with pool.emprestar():
+            pass
+
+
+class DriverDaPagina:
+    """Responde ao script de prontidão com os estados da lista (o último se repete)"""
+
+    def __init__(self, *estados):
+        self.estados = list(estados)
+        self.chamadas = []
+
+    def execute_script(self, script, *args):
+        self.chamadas.append(args)
+        estado = self.estados.pop(0) if len(self.estados) > 1 else self.estados[0]
+        return dict(estado)
+
+
+def _estado(dom=True, secao=True, imagens_pendentes=0, recursos=10):
+    return {"dom": dom, "secao": secao, "imagens_pendentes": imagens_pendentes, "recursos": recursos}
+
+
+def test_aguarda_dom_secao_e_imagens():
+    driver = DriverDaPagina(
+        _estado(dom=False),
+        _estado(secao=False),
+        _estado(imagens_pendentes=2),
+        _estado()
+    )
+    estado = aguardar_pagina_pronta(driver, time.monotonic() + 5, seletor="#descricao", toda_pagina=True, rede_ociosa_ms=0)
+
+    assert estado["pronta"] and estado["rede_ociosa"]
+    assert len(driver.chamadas) == 4
+    assert driver.chamadas[0] == ("#descricao", True)
+
+
+def test_aguarda_a_rede_ficar_ociosa():
+    # Recursos novos a cada verificação, depois a contagem para de mudar
+    driver = DriverDaPagina(*(_estado(recursos=n) for n in range(3)), _estado(recursos=3))
+    inicio = time.monotonic()
+    estado = aguardar_pagina_pronta(driver, inicio + 5, rede_ociosa_ms=150)
+
+    assert estado["pronta"]
+    assert time.monotonic() - inicio >= 0.15
+    assert len(driver.chamadas) >= 5
+
+
+def test_prazo_esgotado_devolve_o_ultimo_estado():
+    driver = DriverDaPagina(_estado(imagens_pendentes=1))
+    inicio = time.monotonic()
+    estado = aguardar_pagina_pronta(driver, inicio + 0.2, rede_ociosa_ms=0)
+
+    assert estado["pronta"] is False and estado["imagens_pendentes"] == 1
+    assert 0.2 <= time.monotonic() - inicio < 1
+    # Prazo já vencido: uma verificação só
+    driver.chamadas.clear()
+    assert aguardar_pagina_pronta(driver, time.monotonic() - 1)["pronta"] is False
+    assert len(driver.chamadas) == 1
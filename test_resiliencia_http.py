@@ -0,0 +1,172 @@
+"""
+Testes das novas tentativas e do hedging (resiliencia_http)
+"""
+
+import asyncio
+import threading
+
+import httpx
+import pytest
+import requests
+
+import resiliencia_http
+from controle_taxa import BLOQUEIO, obter_controle_taxa
+from resiliencia_http import (
+    HistoricoLatencias,
+    erro_recuperavel,
+    espera_backoff,
+    executar_com_tentativas,
+    requisitar,
+    requisitar_async
+)
+
+
+def _erro_http(status: int, retry_after=None) -> requests.exceptions.HTTPError:
+    resposta = requests.Response()
+    resposta.status_code = status
+    if retry_after is not None:
+        resposta.headers["Retry-After"] = str(retry_after)
+    return requests.exceptions.HTTPError(response=resposta)
+
+
+@pytest.mark.parametrize("erro, recuperavel", [
+    (requests.exceptions.ConnectTimeout(), True),
+    (requests.exceptions.ConnectionError(), True),
+    (requests.exceptions.ChunkedEncodingError(), True),
+    (httpx.ReadTimeout("lento"), True),
+    (httpx.ConnectError("recusada"), True),
+    (_erro_http(429), True),
+    (_erro_http(503), True),
+    (_erro_http(404), False),
+    (_erro_http(403), False),
+    (requests.exceptions.InvalidURL(), False),
+    (ValueError("parser"), False)
+])
+def test_erro_recuperavel(erro, recuperavel):
+    assert erro_recuperavel(erro) is recuperavel
+
+
+def test_espera_backoff_com_jitter_e_retry_after():
+    base, maximo = resiliencia_http.TENTATIVAS_BACKOFF_BASE, resiliencia_http.TENTATIVAS_BACKOFF_MAX
+    for tentativa in range(1, 8):
+        teto = min(maximo, base * 2 ** (tentativa - 1))
+        assert all(0 <= espera_backoff(tentativa) <= teto for _ in range(50))
+    assert espera_backoff(1, retry_after=3) >= 3
+
+
+def test_repete_so_erros_recuperaveis(monkeypatch):
+    monkeypatch.setattr(resiliencia_http.time, "sleep", lambda segundos: None)
+    chamadas = []
+
+    def instavel():
+        chamadas.append(1)
+        if len(chamadas) < resiliencia_http.TENTATIVAS_MAX:
+            raise _erro_http(503)
+        return "ok"
+
+    logs = []
+    assert executar_com_tentativas(instavel, logs) == "ok"
+    assert len(chamadas) == resiliencia_http.TENTATIVAS_MAX and len(logs) == len(chamadas) - 1
+
+
+@pytest.mark.parametrize("erro", [_erro_http(404), _erro_http(429, retry_after=3600)])
+def test_desiste_na_hora_de_erro_definitivo_ou_retry_after_longo(erro):
+    chamadas = []
+
+    def falha():
+        chamadas.append(1)
+        raise erro
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        executar_com_tentativas(falha, [])
+    assert len(chamadas) == 1
+
+
+class _Resposta:
+    def __init__(self, nome: str, status_code: int = 200):
+        self.nome = nome
+        self.status_code = status_code
+        self.fechada = False
+
+    def close(self):
+        self.fechada = True
+
+    async def aclose(self):
+        self.fechada = True
+
+
+@pytest.fixture
+def hedging(monkeypatch):
+    """Hedging ligado, com histórico de latências rápidas para o host do teste"""
+    monkeypatch.setattr(resiliencia_http, "HEDGING_ATIVO", True)
+    monkeypatch.setattr(resiliencia_http, "HEDGING_MIN_AMOSTRAS", 5)
+    monkeypatch.setattr(resiliencia_http, "HEDGING_ATRASO_MIN", 0.02)
+    historico = HistoricoLatencias()
+    monkeypatch.setattr(resiliencia_http, "_historico", historico)
+    for _ in range(5):
+        historico.registrar("hedging.teste", 0.01)
+    return historico
+
+
+def _pausar(host: str):
+    with obter_controle_taxa().permissao(f"https://{host}/p/MLB1") as permissao:
+        permissao.registrar(BLOQUEIO, retry_after=60)
+
+
+def test_reserva_vence_quando_a_original_demora(hedging):
+    liberar = threading.Event()
+    respostas = []
+
+    def fazer():
+        resposta = _Resposta("original" if not respostas else "reserva")
+        respostas.append(resposta)
+        if resposta.nome == "original":
+            liberar.wait(5)
+        return resposta
+
+    antes = resiliencia_http.estatisticas_resiliencia()["hedges_vencedores"]
+    try:
+        assert requisitar(fazer, "hedging.teste").nome == "reserva"
+    finally:
+        liberar.set()
+    assert resiliencia_http.estatisticas_resiliencia()["hedges_vencedores"] == antes + 1
+
+    # A vez da reserva foi devolvida ao controle de taxa
+    host = obter_controle_taxa().estatisticas()["hosts"]["hedging.teste"]
+    assert host["em_uso"] == 0
+
+
+def test_sem_reserva_com_o_host_pausado(hedging):
+    _pausar("hedging-pausado.teste")
+    for _ in range(5):
+        hedging.registrar("hedging-pausado.teste", 0.01)
+    chamadas = []
+
+    def fazer():
+        chamadas.append(1)
+        threading.Event().wait(0.1)
+        return _Resposta("original")
+
+    antes = resiliencia_http.estatisticas_resiliencia()["hedges_sem_vaga"]
+    assert requisitar(fazer, "hedging-pausado.teste").nome == "original"
+    assert len(chamadas) == 1
+    assert resiliencia_http.estatisticas_resiliencia()["hedges_sem_vaga"] == antes + 1
+
+
+def test_async_sem_reserva_com_o_host_pausado_e_com_reserva_livre(hedging):
+    _pausar("hedging-async-pausado.teste")
+    for _ in range(5):
+        hedging.registrar("hedging-async-pausado.teste", 0.01)
+
+    def fabrica(chamadas):
+        async def fazer():
+            chamadas.append(1)
+            await asyncio.sleep(0.1 if len(chamadas) == 1 else 0)
+            return _Resposta(f"chamada {len(chamadas)}")
+        return fazer
+
+    pausado, livre = [], []
+    assert asyncio.run(requisitar_async(fabrica(pausado), "hedging-async-pausado.teste")).nome == "chamada 1"
+    assert len(pausado) == 1
+    assert asyncio.run(requisitar_async(fabrica(livre), "hedging.teste")).nome == "chamada 2"
+    assert len(livre) == 2
@@ -0,0 +1,121 @@
+"""
+Testes offline do scraper (scraping_mercado_livre_v2) contra o site falso
+(ver conftest.py), com as páginas de benchmarks/corpus
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import metricas
+import scraping_mercado_livre_v2 as scraper
+from banco_produtos import obter_banco
+from cache_produtos import obter_cache
+from conftest import url_de_catalogo
+from pool_execucao import PoolSaturado
+
+
+class _ExecutorSaturado(ThreadPoolExecutor):
+    """Executor cuja fila está sempre cheia (como o PoolExecucao saturado)"""
+
+    def submit(self, fn, *args, **kwargs):
+        raise PoolSaturado(7)
+
+
+def test_pool_saturado_chega_ao_endpoint(site_falso, monkeypatch):
+    # Sem streaming, o parsing vai para o executor
+    monkeypatch.setattr(scraper, "DOWNLOAD_STREAMING", False)
+    url = url_de_catalogo("mlb44589848_panificadora.html")
+    with _ExecutorSaturado() as executor, pytest.raises(PoolSaturado) as erro:
+        asyncio.run(scraper.scrape_mercado_livre_async(url, executor=executor))
+    assert erro.value.retry_after == 7
+
+
+def _contagem_cache(resultado: str) -> float:
+    return metricas.CACHE._series.get((resultado,), 0)
+
+
+def test_metrica_e_estatisticas_do_cache_concordam(site_falso):
+    url = url_de_catalogo("mlb3456789012_liquidificador.html")
+    cache = obter_cache()
+    antes = (cache.hits, cache.misses, _contagem_cache("hit"), _contagem_cache("miss"))
+
+    scraper.scrape_mercado_livre(url, campos=["cor"])        # miss: baixa só título e cor
+    scraper.scrape_mercado_livre(url)                        # entrada parcial não cobre: miss
+    scraper.scrape_mercado_livre(url, campos=["descricao"])  # a extração completa atende: hit
+
+    depois = (cache.hits, cache.misses, _contagem_cache("hit"), _contagem_cache("miss"))
+    hits, misses, hits_metrica, misses_metrica = (d - a for d, a in zip(depois, antes))
+    assert (hits, misses) == (hits_metrica, misses_metrica) == (1, 2)
+
+
+def test_pagina_nao_modificada_reaproveita_o_banco(site_falso):
+    url = url_de_catalogo("mlb44589848_panificadora.html")
+    chave = scraper.resolver_produto(url)[0]
+    primeiro = scraper.scrape_mercado_livre(url)
+    validacoes = obter_banco().validacoes_304
+    respostas_304 = site_falso.respostas["304"]
+
+    obter_cache().invalidar(chave)
+    segundo = scraper.scrape_mercado_livre(url)
+
+    assert site_falso.respostas["304"] == respostas_304 + 1
+    assert obter_banco().validacoes_304 == validacoes + 1
+    assert any("304 Not Modified" in linha for linha in segundo["debug_logs"])
+    campos = ("titulo", "bullet_points", "caracteristicas", "cor", "descricao", "fontes")
+    assert {c: segundo[c] for c in campos} == {c: primeiro[c] for c in campos}
+
+
+def test_extracao_parcial_nao_sobrescreve_a_completa(site_falso):
+    url = url_de_catalogo("mlb1234567890_smartphone.html")
+    chave = scraper.resolver_produto(url)[0]
+    completo = scraper.scrape_mercado_livre(url)
+    scraper.scrape_mercado_livre(url, campos=["cor"], force_refresh=True)  # baixa e tenta guardar a parcial
+
+    cache = obter_cache()
+    hits = cache.hits
+    assert scraper.scrape_mercado_livre(url)["descricao"] == completo["descricao"]
+    assert cache.hits == hits + 1
+
+    # O banco também manteve o registro completo (e o ETag dele): volta com 304
+    registro = obter_banco().obter(chave)
+    assert "campos_extraidos" not in registro["dados"]
+    respostas_304 = site_falso.respostas["304"]
+    cache.invalidar(chave)
+    scraper.scrape_mercado_livre(url)
+    assert site_falso.respostas["304"] == respostas_304 + 1
+
+
+def test_normalizar_campos():
+    assert scraper.normalizar_campos(None) is None
+    assert scraper.normalizar_campos([]) is None
+    assert scraper.normalizar_campos(["descricao", "titulo"]) == ("titulo", "descricao")
+    assert scraper.normalizar_campos(list(scraper.CAMPOS_PRODUTO)) is None
+    with pytest.raises(ValueError, match="preco"):
+        scraper.normalizar_campos(["titulo", "preco"])
+
+
+def test_resposta_recortada_so_com_os_campos_pedidos(site_falso):
+    url = url_de_catalogo("mlb44589848_panificadora.html")
+    resposta = scraper.scrape_mercado_livre(url, campos=["cor", "caracteristicas"])
+
+    assert set(resposta) == {"caracteristicas", "cor", "fontes"}
+    assert set(resposta["fontes"]) == {"caracteristicas", "cor"}
+    assert resposta["cor"] == "Branca" and resposta["caracteristicas"]
+
+    com_logs = scraper.scrape_mercado_livre(url, campos=["cor"], debug_logs=True)
+    assert set(com_logs) == {"cor", "fontes", "debug_logs"}
+
+
+def test_streaming_desligado_por_padrao_e_igual_a_pagina_inteira(site_falso, monkeypatch):
+    assert scraper._usar_streaming() is False
+    campos = ("titulo", "bullet_points", "caracteristicas", "cor", "descricao", "fontes")
+    inteira = scraper.scrape_mercado_livre(url_de_catalogo("mlb1234567890_smartphone.html"))
+
+    monkeypatch.setattr(scraper, "DOWNLOAD_STREAMING", True)
+    streaming = scraper.scrape_mercado_livre(url_de_catalogo("mlb1234567890_smartphone.html"), debug_logs=True)
+    streaming_async = asyncio.run(scraper.scrape_mercado_livre_async(url_de_catalogo("mlb1234567890_smartphone.html")))
+
+    assert any("Download interrompido" in linha for linha in streaming["debug_logs"])
+    assert {c: streaming[c] for c in campos} == {c: streaming_async[c] for c in campos} == {c: inteira[c] for c in campos}
@@ -0,0 +1,54 @@
+"""
+Testes da validação do webhook_url dos trabalhos de screenshot (trabalhos_screenshots)
+"""
+
+import socket
+
+import pytest
+
+import trabalhos_screenshots
+from trabalhos_screenshots import FilaTrabalhos, WebhookInvalido, validar_webhook_url
+
+
+@pytest.mark.parametrize("url", [
+    "ftp://exemplo.com/webhook",
+    "http:///sem-host",
+    "http://127.0.0.1:5678/webhook",
+    "http://localhost/webhook",
+    "http://10.0.0.5/webhook",
+    "http://192.168.1.10/webhook",
+    "http://169.254.169.254/latest/meta-data",
+    "http://[::1]/webhook",
+    "http://0.0.0.0/webhook"
+])
+def test_recusa_esquema_errado_e_enderecos_internos(url):
+    with pytest.raises(WebhookInvalido):
+        validar_webhook_url(url)
+
+
+def test_aceita_endereco_publico():
+    validar_webhook_url("https://93.184.216.34/webhook")
+
+
+def test_host_que_resolve_para_rede_privada(monkeypatch):
+    def resolver(host, porta, *args, **kwargs):
+        assert (host, porta) == ("n8n.exemplo.com", 443)
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("172.16.0.9", porta))]
+
+    monkeypatch.setattr(trabalhos_screenshots.socket, "getaddrinfo", resolver)
+    with pytest.raises(WebhookInvalido, match="172.16.0.9"):
+        validar_webhook_url("https://n8n.exemplo.com/webhook")
+
+    # Liberado explicitamente: nem resolve
+    monkeypatch.setattr(trabalhos_screenshots, "WEBHOOK_HOSTS_PERMITIDOS", {"n8n.exemplo.com"})
+    validar_webhook_url("https://N8N.exemplo.com/webhook")
+
+
+def test_entrega_recusada_sem_post(monkeypatch):
+    def sem_sessao():
+        raise AssertionError("não deveria fazer o POST")
+
+    monkeypatch.setattr(trabalhos_screenshots, "obter_sessao", sem_sessao)
+    fila = FilaTrabalhos(max_workers=1)
+    resultado = fila._notificar({"id": "abcdef123456", "webhook_url": "http://127.0.0.1/webhook", "webhook": None})
+    assert resultado["entregue"] is False and resultado["tentativas"] == 0
@@ -0,0 +1,69 @@
+"""
+Testes da resolução de URLs do Mercado Livre (urls_mercado_livre) e da
+aceitação de URLs nos servidores
+"""
+
+import pytest
+
+import scraping_mercado_livre_v2 as scraper
+from urls_mercado_livre import ML_BASE_URL, eh_url_mercado_livre, resolver_url
+
+
+@pytest.mark.parametrize("url, chave, tipo", [
+    ("https://www.mercadolivre.com.br/panificadora-gallant/p/MLB44589848?tracking_id=abc#reco", "p:MLB44589848", "catalogo"),
+    ("https://www.mercadolivre.com.br/p/mlb44589848/", "p:MLB44589848", "catalogo"),
+    ("https://produto.mercadolivre.com.br/MLB-1234567890-panela-_JM#position=2", "MLB1234567890", "anuncio"),
+    ("https://produto.mercadolivre.com.br/MLB1234567890", "MLB1234567890", "anuncio"),
+    ("https://www.mercadolivre.com.br/up/MLBU123456?x=1", "MLBU123456", "produto_usuario"),
+    # O /p/ vence um MLB- que aparecer no slug
+    ("https://www.mercadolivre.com.br/kit-MLB-999-x/p/MLB44589848", "p:MLB44589848", "catalogo")
+])
+def test_links_equivalentes_dao_a_mesma_chave(url, chave, tipo):
+    produto = resolver_url(url)
+    assert (produto.chave, produto.tipo) == (chave, tipo)
+    assert "?" not in produto.url and "#" not in produto.url
+
+
+def test_catalogo_e_anuncio_com_o_mesmo_numero_nao_colidem():
+    catalogo = resolver_url("https://www.mercadolivre.com.br/slug/p/MLB123")
+    anuncio = resolver_url("https://produto.mercadolivre.com.br/MLB-123-slug-_JM")
+    assert catalogo.id == anuncio.id == "MLB123"
+    assert catalogo.chave != anuncio.chave
+    assert scraper.resolver_produto("https://www.mercadolivre.com.br/slug/p/MLB123")[0] == "p:MLB123"
+
+
+def test_url_de_download_canonica():
+    base = ML_BASE_URL  # nos testes, o site falso
+    assert resolver_url("https://www.mercadolivre.com.br/x/p/MLB1?a=b").url == f"{base}/p/MLB1"
+    assert resolver_url("https://produto.mercadolivre.com.br/MLB-2-x-_JM").url == f"{base}/MLB-2-_JM"
+
+
+@pytest.mark.parametrize("url, do_mercado_livre", [
+    ("https://www.mercadolivre.com.br/produto/panificadora-gallant", True),
+    ("https://lista.mercadolivre.com.br/panificadora", True),
+    ("https://mercadolivre.com.br.exemplo.com/p/MLB1", False),
+    ("ftp://www.mercadolivre.com.br/p/MLB1", False),
+    ("https://www.exemplo.com/p/MLB1", False),
+    ("", False)
+])
+def test_urls_sem_produto(url, do_mercado_livre):
+    assert resolver_url(url) is None
+    assert eh_url_mercado_livre(url) is do_mercado_livre
+
+
+def test_servidor_aceita_pagina_do_mercado_livre_sem_chave(monkeypatch):
+    import server_local
+
+    chamadas = []
+
+    def scrape_falso(url, **kwargs):
+        chamadas.append((url, scraper.resolver_produto(url)[0]))
+        return {"titulo": "Panificadora"}
+
+    monkeypatch.setattr(server_local, "scrape_mercado_livre", scrape_falso)
+    cliente = server_local.app.test_client()
+
+    url = "https://www.mercadolivre.com.br/produto/panificadora-gallant"
+    assert cliente.post("/scrape", json={"url": url}).status_code == 200
+    assert chamadas == [(url, None)]
+    assert cliente.post("/scrape", json={"url": "https://www.exemplo.com/p/MLB1"}).status_code == 400
@@ -0,0 +1,249 @@
+"""
+Trabalhos assíncronos de captura de screenshots
+O /scrape devolve os campos de texto na hora e, quando há screenshots
+pedidos, só o id de um trabalho. A captura roda num pool de threads
+próprio (não ocupa os workers de parsing) e o cliente acompanha por
+GET /jobs/{id} ou recebe o resultado num webhook.
+
+Os trabalhos ficam em memória por TRABALHOS_TTL_SEGUNDOS depois de
+concluídos (cada processo tem os seus).
+"""
+
+import ipaddress
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+from armazem_screenshots import obter_armazem
+from navegadores import NAVEGADORES_POOL_TAMANHO
+from scraping_mercado_livre_v2 import capturar_screenshots_pagina
+from sessao_http import obter_sessao
+
+
+SCREENSHOTS_ASSINCRONOS = os.getenv("SCREENSHOTS_ASSINCRONOS", "true").lower() == "true"
+TRABALHOS_WORKERS = int(os.getenv("TRABALHOS_WORKERS", NAVEGADORES_POOL_TAMANHO))
+TRABALHOS_TTL_SEGUNDOS = int(os.getenv("TRABALHOS_TTL_SEGUNDOS", 3600))
+TRABALHOS_MAX = int(os.getenv("TRABALHOS_MAX", 1000))
+WEBHOOK_TIMEOUT = float(os.getenv("WEBHOOK_TIMEOUT", 10))
+WEBHOOK_TENTATIVAS = int(os.getenv("WEBHOOK_TENTATIVAS", 3))
+# Hosts aceitos mesmo resolvendo para endereços internos (ex.: n8n na rede privada)
+WEBHOOK_HOSTS_PERMITIDOS = {
+    host.strip().lower() for host in os.getenv("WEBHOOK_HOSTS_PERMITIDOS", "").split(",") if host.strip()
+}
+
+# Estados de um trabalho
+PENDENTE = "pendente"
+EXECUTANDO = "executando"
+CONCLUIDO = "concluido"
+ERRO = "erro"
+
+
+class FilaTrabalhosCheia(Exception):
+    """Levantada quando há TRABALHOS_MAX trabalhos ainda não concluídos"""
+
+
+class WebhookInvalido(ValueError):
+    """webhook_url que não é http(s) ou aponta para um endereço interno"""
+
+
+def validar_webhook_url(url: str):
+    """
+    Recusa webhook_url fora de http(s) ou cujo host resolve para loopback,
+    rede privada, link-local ou outro endereço não roteável, para o POST do
+    resultado não alcançar serviços internos. Hosts em WEBHOOK_HOSTS_PERMITIDOS
+    passam sem a checagem de endereço.
+
+    Raises:
+        WebhookInvalido: com a mensagem para o cliente
+    """
+    partes = urlsplit(url)
+    if partes.scheme not in ("http", "https") or not partes.hostname:
+        raise WebhookInvalido("webhook_url deve ser uma URL http(s)")
+
+    host = partes.hostname.lower()
+    if host in WEBHOOK_HOSTS_PERMITIDOS:
+        return
+    try:
+        porta = partes.port or (443 if partes.scheme == "https" else 80)
+        enderecos = socket.getaddrinfo(host, porta, proto=socket.IPPROTO_TCP)
+    except (socket.gaierror, UnicodeError, ValueError):
+        raise WebhookInvalido(f"webhook_url: host {host} não resolvido")
+
+    for endereco in enderecos:
+        ip = ipaddress.ip_address(endereco[4][0].split("%", 1)[0])
+        if (ip.is_loopback or ip.is_private or ip.is_link_local or ip.is_reserved
+                or ip.is_multicast or ip.is_unspecified):
+            raise WebhookInvalido(f"webhook_url: host {host} resolve para endereço interno ({ip})")
+
+
+def _concluido(trabalho: Dict) -> bool:
+    return trabalho["concluido_em"] is not None
+
+
+class FilaTrabalhos:
+    """
+    Trabalhos de screenshot em segundo plano, consultáveis por id.
+
+    Cada trabalho é um dict: id, status, url, screenshots, miniaturas, erro, logs,
+    webhook_url, webhook (resultado da entrega) e instantes de criação,
+    início e conclusão.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = TRABALHOS_WORKERS,
+        ttl: int = TRABALHOS_TTL_SEGUNDOS,
+        max_trabalhos: int = TRABALHOS_MAX
+    ):
+        self.ttl = ttl
+        self.max_trabalhos = max_trabalhos
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="screenshots")
+        self._trabalhos = OrderedDict()  # id -> trabalho, em ordem de criação
+        self._lock = threading.Lock()
+
+    def enviar(self, url: str, webhook_url: Optional[str] = None) -> Dict:
+        """
+        Agenda a captura dos screenshots de `url`.
+
+        Returns:
+            Cópia do trabalho criado (status "pendente")
+
+        Raises:
+            FilaTrabalhosCheia: se a fila já tem `max_trabalhos` trabalhos em aberto
+        """
+        agora = time.time()
+        trabalho = {
+            "id": uuid.uuid4().hex,
+            "status": PENDENTE,
+            "url": url,
+            "screenshots": {},
+            "miniaturas": {},
+            "erro": None,
+            "logs": [],
+            "webhook_url": webhook_url,
+            "webhook": None,
+            "criado_em": agora,
+            "iniciado_em": None,
+            "concluido_em": None
+        }
+        with self._lock:
+            self._remover_expirados(agora)
+            if len(self._trabalhos) >= self.max_trabalhos:
+                # Abre espaço descartando o concluído mais antigo; só recusa se todos estão em aberto
+                antigo = next((t for t, trabalho in self._trabalhos.items() if _concluido(trabalho)), None)
+                if antigo is None:
+                    raise FilaTrabalhosCheia(f"Limite de {self.max_trabalhos} trabalhos de screenshot em aberto")
+                del self._trabalhos[antigo]
+            self._trabalhos[trabalho["id"]] = trabalho
+            copia = dict(trabalho)
+        self._executor.submit(self._executar, trabalho["id"])
+        return copia
+
+    def consultar(self, trabalho_id: str) -> Optional[Dict]:
+        """Cópia do trabalho (None se não existe ou já expirou)"""
+        with self._lock:
+            self._remover_expirados(time.time())
+            trabalho = self._trabalhos.get(trabalho_id)
+            return dict(trabalho) if trabalho is not None else None
+
+    def estatisticas(self) -> Dict:
+        """Trabalhos por status (usado em /status)"""
+        with self._lock:
+            por_status = {PENDENTE: 0, EXECUTANDO: 0, CONCLUIDO: 0, ERRO: 0}
+            for trabalho in self._trabalhos.values():
+                por_status[trabalho["status"]] += 1
+        return {"total": sum(por_status.values()), **por_status}
+
+    def encerrar(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _executar(self, trabalho_id: str):
+        self._atualizar(trabalho_id, status=EXECUTANDO, iniciado_em=time.time())
+        trabalho = self.consultar(trabalho_id)
+        logs = []
+        try:
+            screenshots = capturar_screenshots_pagina(trabalho["url"], logs)
+            miniaturas = obter_armazem().miniaturas(screenshots)
+            status, erro = (CONCLUIDO, None) if screenshots else (ERRO, "Nenhum screenshot capturado")
+        except Exception as e:
+            screenshots, miniaturas, status, erro = {}, {}, ERRO, str(e)
+        self._atualizar(
+            trabalho_id,
+            status=status,
+            screenshots=screenshots,
+            miniaturas=miniaturas,
+            erro=erro,
+            logs=logs,
+            concluido_em=time.time()
+        )
+
+        if trabalho["webhook_url"]:
+            self._atualizar(trabalho_id, webhook=self._notificar(self.consultar(trabalho_id)))
+
+    def _notificar(self, trabalho: Dict) -> Dict:
+        """POST do trabalho concluído no webhook, com novas tentativas em erro de rede ou 5xx"""
+        corpo = {chave: valor for chave, valor in trabalho.items() if chave not in ("webhook_url", "webhook")}
+        try:
+            # De novo na entrega: o DNS pode ter mudado desde a requisição
+            validar_webhook_url(trabalho["webhook_url"])
+        except WebhookInvalido as e:
+            print(f"[AVISO] Webhook do trabalho {trabalho['id'][:8]} recusado: {e}")
+            return {"entregue": False, "erro": str(e), "tentativas": 0}
+        ultimo_erro = None
+        for tentativa in range(1, WEBHOOK_TENTATIVAS + 1):
+            try:
+                resposta = obter_sessao().post(trabalho["webhook_url"], json=corpo, timeout=WEBHOOK_TIMEOUT)
+                if resposta.status_code < 500:
+                    print(f"[DEBUG] Webhook do trabalho {trabalho['id'][:8]}: HTTP {resposta.status_code}")
+                    return {"entregue": resposta.ok, "status": resposta.status_code, "tentativas": tentativa}
+                ultimo_erro = f"HTTP {resposta.status_code}"
+            except Exception as e:
+                ultimo_erro = str(e)
+            if tentativa < WEBHOOK_TENTATIVAS:
+                time.sleep(2 ** (tentativa - 1))
+        print(f"[AVISO] Webhook do trabalho {trabalho['id'][:8]} não entregue: {ultimo_erro}")
+        return {"entregue": False, "erro": ultimo_erro, "tentativas": WEBHOOK_TENTATIVAS}
+
+    def _atualizar(self, trabalho_id: str, **campos):
+        with self._lock:
+            trabalho = self._trabalhos.get(trabalho_id)
+            if trabalho is not None:
+                trabalho.update(campos)
+
+    def _remover_expirados(self, agora: float):
+        """Descarta trabalhos concluídos há mais de `ttl` segundos (chamado com o lock)"""
+        expirados = [
+            trabalho_id for trabalho_id, trabalho in self._trabalhos.items()
+            if _concluido(trabalho) and agora - trabalho["concluido_em"] > self.ttl
+        ]
+        for trabalho_id in expirados:
+            del self._trabalhos[trabalho_id]
+
+
+def resumo_trabalho(trabalho: Dict) -> Dict:
+    """Parte pública de um trabalho (sem o webhook_url)"""
+    return {chave: valor for chave, valor in trabalho.items() if chave != "webhook_url"}
+
+
+_fila = None
+_fila_pid = None
+_fila_lock = threading.Lock()
+
+
+def obter_fila_trabalhos() -> FilaTrabalhos:
+    """Retorna a fila de trabalhos do processo, criando-a na primeira chamada"""
+    global _fila, _fila_pid
+
+    pid = os.getpid()
+    if _fila is None or _fila_pid != pid:
+        with _fila_lock:
+            if _fila is None or _fila_pid != pid:
+                _fila = FilaTrabalhos()
+                _fila_pid = pid
+    return _fila
@@ -0,0 +1,107 @@
+"""
+Resolução de URLs do Mercado Livre
+Os links chegam em várias formas para o mesmo produto: página de catálogo
+(/slug/p/MLB123), anúncio (produto.mercadolivre.com.br/MLB-123-slug-_JM),
+produto de vendedor (/up/MLBU123), com parâmetros de rastreamento e
+fragmentos. `resolver_url` reduz todas ao id canônico, a uma chave (cache,
+banco, agrupamento e deduplicação) e a uma URL de download sem rastreamento.
+
+O mesmo número pode ser de um catálogo (/p/MLB123) e de um anúncio
+(MLB-123), que são páginas diferentes: a chave do catálogo leva o prefixo
+"p:" (p:MLB123) para não colidir com a do anúncio (MLB123).
+
+Com ML_BASE_URL (ex.: o servidor falso do teste de carga), as URLs de
+download apontam para esse endereço no lugar do Mercado Livre; as URLs
+aceitas continuam sendo as do site.
+"""
+
+import os
+import re
+from functools import lru_cache
+from typing import NamedTuple, Optional
+from urllib.parse import urlsplit
+
+
+DOMINIO_MERCADO_LIVRE = "mercadolivre.com.br"
+ML_BASE_URL = os.getenv("ML_BASE_URL", "").rstrip("/")
+
+# Tipos de página
+TIPO_CATALOGO = "catalogo"
+TIPO_ANUNCIO = "anuncio"
+TIPO_PRODUTO_USUARIO = "produto_usuario"
+
+# URLs de download canônicas por tipo
+_BASE_SITE = ML_BASE_URL or "https://www.mercadolivre.com.br"
+_BASE_ANUNCIOS = ML_BASE_URL or "https://produto.mercadolivre.com.br"
+# Prefixo da chave por tipo (o id de produto de vendedor, MLBU..., já é distinto)
+_PREFIXO_CHAVE = {TIPO_CATALOGO: "p:", TIPO_ANUNCIO: "", TIPO_PRODUTO_USUARIO: ""}
+_URL_CANONICA = {
+    TIPO_CATALOGO: _BASE_SITE + "/p/{}",
+    TIPO_ANUNCIO: _BASE_ANUNCIOS + "/MLB-{}-_JM",
+    TIPO_PRODUTO_USUARIO: _BASE_SITE + "/up/{}"
+}
+
+# Padrões do caminho, na ordem de prioridade (o /p/ vence um MLB- que aparecer no slug)
+_PADROES_CAMINHO = (
+    (TIPO_CATALOGO, re.compile(r'/p/(MLB\d+)(?:[/?#]|$)', re.IGNORECASE)),
+    (TIPO_PRODUTO_USUARIO, re.compile(r'/up/(MLBU\d+)(?:[/?#]|$)', re.IGNORECASE)),
+    (TIPO_ANUNCIO, re.compile(r'(?:^|/)MLB-?(\d+)', re.IGNORECASE))
+)
+
+
+class ProdutoML(NamedTuple):
+    """Produto identificado numa URL do Mercado Livre"""
+    id: str    # ex.: MLB44589848 (catálogo / anúncio) ou MLBU123 (produto de vendedor)
+    tipo: str  # catalogo | anuncio | produto_usuario
+    url: str   # URL de download canônica, sem rastreamento
+
+    @property
+    def chave(self) -> str:
+        """Chave de cache, banco e agrupamento: o id com o prefixo do tipo (ex.: p:MLB44589848)"""
+        return _PREFIXO_CHAVE[self.tipo] + self.id
+
+
+def eh_url_mercado_livre(url: str) -> bool:
+    """http(s) num host *.mercadolivre.com.br"""
+    try:
+        partes = urlsplit((url or "").strip())
+    except ValueError:
+        return False
+    host = (partes.hostname or "").lower()
+    return partes.scheme.lower() in ("http", "https") and (
+        host == DOMINIO_MERCADO_LIVRE or host.endswith("." + DOMINIO_MERCADO_LIVRE)
+    )
+
+
+@lru_cache(maxsize=4096)
+def resolver_url(url: str) -> Optional[ProdutoML]:
+    """
+    Id canônico e URL de download de um link do Mercado Livre.
+
+    Query string e fragmento são ignorados (só trazem rastreamento).
+
+    Exemplos:
+        ".../panificadora-gallant/p/MLB44589848?tracking_id=..." -> MLB44589848 (catalogo, chave p:MLB44589848)
+        "https://produto.mercadolivre.com.br/MLB-1234567890-panela-_JM#reco" -> MLB1234567890 (anuncio, chave MLB1234567890)
+
+    Returns:
+        ProdutoML, ou None se a URL não é de um produto do Mercado Livre
+    """
+    if not eh_url_mercado_livre(url):
+        return None
+
+    caminho = urlsplit(url.strip()).path
+    for tipo, padrao in _PADROES_CAMINHO:
+        match = padrao.search(caminho)
+        if match:
+            numero = match.group(1).upper()
+            if tipo == TIPO_ANUNCIO:
+                return ProdutoML(f"MLB{numero}", tipo, _URL_CANONICA[tipo].format(numero))
+            return ProdutoML(numero, tipo, _URL_CANONICA[tipo].format(numero))
+    return None
+
+
+def id_produto(url: str) -> Optional[str]:
+    """Só o id canônico (None se a URL não identifica um produto)"""
+    produto = resolver_url(url)
+    return produto.id if produto else None